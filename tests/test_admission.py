@@ -0,0 +1,118 @@
+'''test_admission.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import os
+import sys
+import threading
+import unittest
+from mock import patch
+from falcon import testing
+import pytest
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api, admission_control
+from traveller_api.middleware import AdmissionControl
+
+
+@pytest.fixture
+def client():
+    '''API test client'''
+    return testing.TestClient(api)
+
+
+class TestAdmissionControl(unittest.TestCase):
+    '''AdmissionControl tests'''
+
+    def setUp(self):
+        self.control = AdmissionControl(capacity=8, reserved=2, max_wait=0)
+
+    def test_cost_class(self):
+        '''Test route cost classes'''
+        self.assertTrue(self.control.cost_class('/ping') == 'cheap')
+        self.assertTrue(self.control.cost_class('/ct/lbb6/star') == 'cheap')
+        self.assertTrue(
+            self.control.cost_class('/ct/lbb6/star/orbits') == 'cheap')
+        self.assertTrue(
+            self.control.cost_class('/ct/lbb3/encounter') == 'expensive')
+        self.assertTrue(
+            self.control.cost_class('/ct/lbb6/planet') == 'standard')
+
+    def test_reserved(self):
+        '''Test expensive requests cannot use reserved capacity'''
+        self.assertTrue(self.control.acquire('expensive'))
+        self.assertFalse(self.control.acquire('expensive'))
+        self.assertTrue(self.control.acquire('standard'))
+        self.assertFalse(self.control.acquire('standard'))
+        self.assertTrue(self.control.acquire('cheap'))
+        self.assertTrue(self.control.acquire('cheap'))
+        self.assertFalse(self.control.acquire('cheap'))
+        self.control.release('expensive')
+        self.assertTrue(self.control.acquire('standard'))
+        self.assertTrue(self.control.in_use == 6)
+
+    def test_wait(self):
+        '''Test waiting request is admitted when capacity is released'''
+        self.control.max_wait = 5
+        self.assertTrue(self.control.acquire('expensive'))
+        timer = threading.Timer(
+            0.05, self.control.release, args=('expensive',))
+        timer.start()
+        self.assertTrue(self.control.acquire('expensive'))
+        timer.join()
+
+    def test_invalid(self):
+        '''Test reserved capacity must leave room for expensive requests'''
+        with self.assertRaises(ValueError):
+            AdmissionControl(capacity=8, reserved=5)
+        with self.assertRaises(ValueError):
+            AdmissionControl(capacity=8, reserved=-1)
+
+
+def test_shed(client):
+    '''Test expensive request shed with 503, cheap routes still served'''
+    with patch.object(admission_control, 'max_wait', 0), \
+            patch.object(admission_control, 'in_use', 12):
+        resp = client.simulate_get(
+            '/ct/lbb3/encounter', query_string='terrain=Clear&size=1')
+        assert resp.status == '503 Service Unavailable'
+        assert resp.headers['Retry-After'] == '1'
+        resp = client.simulate_get('/ping')
+        assert resp.status == '200 OK'
+        assert admission_control.in_use == 12
+
+
+def test_release(client):
+    '''Test capacity released after success and error responses'''
+    client.simulate_get('/ct/lbb6/planet', query_string='uwp=A867949-C')
+    client.simulate_get('/t5/orbit', query_string='orbit_number=99')
+    client.simulate_get('/error_handler/foo')
+    assert admission_control.in_use == 0
+
+
+def _start(app, path, query_string='', method='GET'):
+    '''Call WSGI app, return response iterable (unconsumed)'''
+    env = testing.create_environ(
+        path=path, query_string=query_string, method=method)
+    return app(env, lambda status, headers: None)
+
+
+def test_stream():
+    '''Test streamed response holds capacity until consumed or closed'''
+    body = _start(api, '/ct/lbb6/system', 'uwp=A867949-C')
+    held = []
+    for chunk in body:
+        assert chunk
+        held.append(admission_control.in_use)
+    assert held and set(held) == {4}
+    assert admission_control.in_use == 0
+    body = _start(
+        api, '/t5/cargogen/matrix', 'uwp=A867949-C&uwp=B560A87-D')
+    next(body)
+    assert admission_control.in_use == 4
+    body.close()
+    body.close()
+    assert admission_control.in_use == 0
+    _start(api, '/ct/lbb6/system', 'uwp=A867949-C', method='HEAD')
+    assert admission_control.in_use == 0
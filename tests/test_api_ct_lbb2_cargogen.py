@@ -0,0 +1,104 @@
+'''test_api_ct_lbb2_cargogen.py'''
+
+# pragma pylint: disable=relative-beyond-top-level
+# pragma pylint: disable=C0413, E0401, W0621
+
+import logging
+import sys
+import os
+import pytest
+import falcon
+from falcon import testing
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+
+@pytest.fixture
+def client():
+    '''API test client'''
+    return testing.TestClient(api)
+
+
+def test_market_uwp(client):
+    '''Test market board from UWP'''
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/market',
+        query_string='market_uwp=A777999-C&broker=2&sample=true')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['trade_codes'] == ['In']
+    assert len(resp.json['goods']) == 36
+    for good in resp.json['goods']:
+        assert 'actual_net_unit_price' in good
+
+
+def test_market_tc(client):
+    '''Test market board from trade codes'''
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/market',
+        query_string='market_tc=Ag&market_tc=Ni')
+    assert resp.status == falcon.HTTP_200
+    goods = {good['id']: good for good in resp.json['goods']}
+    assert goods['56']['resale_dm'] == 5
+    assert goods['11']['resale_dm'] == -6
+
+
+def test_market_bogus(client):
+    '''Test invalid market parameters'''
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/market',
+        query_string='market_uwp=bogus')
+    assert resp.status == '400 Invalid UWP'
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/market',
+        query_string='market_tc=In&broker=9')
+    assert resp.status == '400 Bad Request'
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/sale',
+        query_string='cargo=Copper&quantity=10&market_uwp=bogus')
+    assert resp.status == '400 Invalid UWP'
+
+
+def test_sale_analytic(client):
+    '''Test sale with analytic price distribution'''
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/sale',
+        query_string='cargo=Copper&quantity=10&analytic=true')
+    assert resp.status == falcon.HTTP_200
+    dist = resp.json['price_distribution']
+    assert dist['percentiles']['50'] == 2000
+    assert dist['table'][0] == [800, round(1 / 36.0, 6)]
+
+
+def test_simulate(client):
+    '''Test trade run simulation'''
+    query_string = \
+        'route=A777999-C&route=C43059A-8&route=A777999-C&runs=200&seed=7'
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate', query_string=query_string)
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['runs'] == 200
+    assert resp.json['seed'] == 7
+    assert len(resp.json['legs']) == 2
+    again = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate', query_string=query_string)
+    assert again.json == resp.json
+
+
+def test_simulate_bogus(client):
+    '''Test invalid simulation parameters'''
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate',
+        query_string='route=A777999-C&route=bogus')
+    assert resp.status == '400 Invalid UWP'
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate', query_string='route=A777999-C')
+    assert resp.status == '400 Bad Request'
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate',
+        query_string='route=A777999-C&route=A777999-C&policy=bogus')
+    assert resp.status == '400 Bad Request'
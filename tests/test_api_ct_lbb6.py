@@ -7,8 +7,10 @@ import logging
 import sys
 import os
 import pytest
+import json
 import falcon
 from falcon import testing
+from mock import patch
 sys.path.insert(
     0,
     os.path.dirname(os.path.abspath(__file__)) + '/../')
@@ -157,6 +159,186 @@ def test_orbit_api_doc(client):
         '<apiserver>', 'http://falconframework.org')
 
 
+def test_star_orbits(client):
+    '''Test star orbit profile'''
+    for code in ['F7 V', 'F7V', 'F7%20V']:
+        resp = client.simulate_get(
+            '/ct/lbb6/star/orbits',
+            query_string='code={}'.format(code))
+        assert resp.status == falcon.HTTP_200
+        assert resp.json['star'] == 'F7 V'
+        assert [orbit['orbit_no'] for orbit in resp.json['orbits']] == \
+            list(range(20))
+        assert resp.json['orbits'][4] == {
+            "angular_diameter": 0.416,
+            "au": 1.6,
+            "habitable": True,
+            "interior": False,
+            "mkm": 239.3,
+            "orbit_no": 4,
+            "period": 1.848,
+            "unavailable": False
+        }
+    resp = client.simulate_get(
+        '/ct/lbb6/star/orbits', query_string='code=GD')
+    assert resp.json['star'] == 'G D'
+
+
+def test_star_orbits_invalid(client):
+    '''Test star orbit profile with invalid star'''
+    for query_string in ['code=foo', 'code=G2%20VII', '']:
+        resp = client.simulate_get(
+            '/ct/lbb6/star/orbits', query_string=query_string)
+        assert resp.status == '400 Invalid parameter'
+
+
+def test_catalogue(client):
+    '''Test catalogue dump, formats and conditional GET'''
+    resp = client.simulate_get('/ct/lbb6/catalogue')
+    assert resp.status == falcon.HTTP_200
+    assert len(resp.json['star']) == 386
+    assert len(resp.json['orbit']) == 20
+    assert resp.json['orbit'][3] == {'indx': 3, 'au': 1, 'mkm': 149.6}
+    version = resp.json['version']
+    etag = resp.headers['etag']
+    assert version in etag
+
+    resp = client.simulate_get(
+        '/ct/lbb6/catalogue', query_string='format=columnar')
+    assert resp.json['version'] == version
+    assert len(resp.json['star']['luminosity']) == 386
+    assert resp.json['orbit']['mkm'][3] == 149.6
+    assert resp.headers['etag'] != etag
+
+    resp = client.simulate_get(
+        '/ct/lbb6/catalogue', headers={'If-None-Match': etag})
+    assert resp.status == falcon.HTTP_304
+    assert resp.text == ''
+    resp = client.simulate_get(
+        '/ct/lbb6/catalogue', headers={'If-None-Match': '"stale-json"'})
+    assert resp.status == falcon.HTTP_200
+    resp = client.simulate_get(
+        '/ct/lbb6/catalogue', query_string='format=xml')
+    assert resp.status == '400 Invalid parameter'
+
+
+def test_planet_temperature(client):
+    '''Test planet temperature profile'''
+    resp = client.simulate_get(
+        '/ct/lbb6/planet/temperature',
+        query_string='uwp=A867977-8&star=G2%20V')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['star'] == 'G2 V'
+    assert resp.json['uwp'] == 'A867977-8'
+    assert resp.json['columns'][0] == 'orbit_no'
+    assert len(resp.json['orbits']) == 20
+    assert resp.json['orbits'][3][:5] == [3, 1, 'HZ', 0.265, 0.465]
+
+    for query_string in [
+            'uwp=A867977-8&star=foo', 'uwp=A867977-8',
+            'uwp=bogus&star=G2V', 'star=G2V']:
+        resp = client.simulate_get(
+            '/ct/lbb6/planet/temperature', query_string=query_string)
+        assert resp.status == '400 Invalid parameter'
+
+
+def test_planet_placement(client):
+    '''Test planet placement search'''
+    resp = client.simulate_get(
+        '/ct/lbb6/planet/placement',
+        query_string='uwp=A867977-8&min_temp=250&max_temp=350&limit=5')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['uwp'] == 'A867977-8'
+    assert resp.json['count'] > 5
+    assert len(resp.json['placements']) == 5
+    for placement in resp.json['placements']:
+        assert placement['temperature']['min'] >= 250
+        assert placement['temperature']['max'] <= 350
+    resp_overlap = client.simulate_get(
+        '/ct/lbb6/planet/placement',
+        query_string='uwp=A867977-8&min_temp=250&max_temp=350&overlap=true')
+    assert resp_overlap.json['count'] >= resp.json['count']
+
+    for query_string in [
+            'uwp=A867977-8&min_temp=350&max_temp=250',
+            'uwp=A867977-8&min_temp=250',
+            'uwp=A867977-8&min_temp=250&max_temp=350&limit=0',
+            'uwp=bogus&min_temp=250&max_temp=350',
+            'min_temp=250&max_temp=350']:
+        resp = client.simulate_get(
+            '/ct/lbb6/planet/placement', query_string=query_string)
+        assert resp.status == '400 Invalid parameter'
+
+
+def test_planet_generate(client):
+    '''Test random world generation'''
+    resp = client.simulate_get(
+        '/ct/lbb6/planet/generate',
+        query_string='count=100&star=G2%20V&orbit_no=3&seed=42')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['count'] == 100
+    assert resp.json['seed'] == 42
+    assert resp.json['star'] == 'G2 V'
+    assert resp.json['orbit_no'] == 3
+    assert len(resp.json['worlds']) == 100
+    assert resp.json['worlds'][0]['temperature']['min'] is not None
+    resp_again = client.simulate_get(
+        '/ct/lbb6/planet/generate',
+        query_string='count=100&star=G2%20V&orbit_no=3&seed=42')
+    assert resp_again.json == resp.json
+
+    resp = client.simulate_get(
+        '/ct/lbb6/planet/generate',
+        query_string='count=200&is_mainworld=false')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['is_mainworld'] is False
+    for world in resp.json['worlds']:
+        assert world['uwp'][0] in 'FGHY'
+        assert world['temperature'] == {'min': None, 'max': None}
+
+    for query_string in [
+            'count=0', 'count=10001', 'count=foo', 'seed=foo',
+            'star=foo', 'orbit_no=20', 'orbit_no=foo', 'is_mainworld=foo',
+            'is_mainworld=']:
+        resp = client.simulate_get(
+            '/ct/lbb6/planet/generate', query_string=query_string)
+        assert resp.status == '400 Invalid parameter'
+        assert resp.json['description'] == 'Invalid {} {}'.format(
+            *query_string.split('='))
+
+    resp = client.simulate_get(
+        '/ct/lbb6/planet/generate', query_string='is_mainworld=TRUE')
+    assert resp.json['is_mainworld'] is True
+
+
+def test_system(client):
+    '''Test streamed system generation'''
+    resp = client.simulate_get(
+        '/ct/lbb6/system', query_string='uwp=A788767-8')
+    assert resp.status == falcon.HTTP_200
+    assert resp.headers['content-type'] == 'application/x-ndjson'
+    bodies = [json.loads(line) for line in resp.text.splitlines()]
+    assert bodies[0]['body'] == 'star'
+    assert bodies[0]['role'] == 'primary'
+    assert [
+        body['uwp'] for body in bodies
+        if body.get('contents') == 'mainworld'] == ['A788767-8']
+
+    resp = client.simulate_get('/ct/lbb6/system')
+    assert resp.status == falcon.HTTP_200
+
+    resp = client.simulate_get('/ct/lbb6/system', query_string='uwp=bogus')
+    assert resp.status == '400 Invalid parameter'
+
+    # Invalid star => error response, not a truncated stream
+    with patch(
+            'traveller_api.ct.lbb6_expanded_sysgen.system.'
+            'LBB6ExpandedStar.generate',
+            return_value='X1 V'):
+        resp = client.simulate_get('/ct/lbb6/system')
+    assert resp.status == falcon.HTTP_500
+
+
 def test_planet_valid_params(client):
     '''Test planet API call with valid params'''
     # name, mainworld, orbit, star
@@ -0,0 +1,125 @@
+'''test_api_mt_wbh.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import json
+import sys
+import os
+import falcon
+from falcon import testing
+import pytest
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api
+from traveller_api.mt.wbh.catalogue import load_catalogue, read_star_csv
+from traveller_api.mt.wbh.catalogue import STAR_CSV
+from traveller_api.starcode import StarCode
+
+
+@pytest.fixture
+def client():
+    '''API test client'''
+    return testing.TestClient(api)
+
+
+def test_catalogue():
+    '''Test catalogue matches CSV, computes angular diameter locally'''
+    catalogue = load_catalogue()
+    assert len(catalogue.stars) == len(read_star_csv(STAR_CSV))
+    assert len(catalogue.orbits) == 20
+    star = catalogue.star(StarCode.parse('G2 V'))
+    assert star.hz_orbit == 3
+    orbit = catalogue.orbit_details(star, 3)
+    assert orbit['angular_dia_deg'] == 0.522
+    assert orbit['angular_dia_sun'] == 1.0
+    assert catalogue.star(StarCode.parse('M D')).size == 'D'
+    with pytest.raises(ValueError):
+        catalogue.orbit_details(star, 20)
+
+
+def test_star(client):
+    '''Test star lookup (path and query string)'''
+    expected = {
+        'type': 'G',
+        'decimal': 2,
+        'size': 'V',
+        'min_orbit': 0,
+        'hz_orbit': 3,
+        'luminosity': 0.99,
+        'mass': 1.0,
+        'hz_period': 1.0,
+        'int_orbit': None
+    }
+    for path, query_string in [
+            ('/mt/wbh/star/G2 V', ''),
+            ('/mt/wbh/star/G2V', ''),
+            ('/mt/wbh/star', 'code=G2%20V')]:
+        resp = client.simulate_get(path, query_string=query_string)
+        assert resp.status == falcon.HTTP_200
+        assert resp.json == expected
+
+    # Habitable zone orbit 0
+    resp = client.simulate_get('/mt/wbh/star/M0 V')
+    assert resp.json['hz_orbit'] == 0
+    assert resp.json['hz_period'] == 0.128
+
+    resp = client.simulate_get('/mt/wbh/star/M D')
+    assert resp.json['decimal'] == ''
+
+    for path in ['/mt/wbh/star/foo', '/mt/wbh/star']:
+        resp = client.simulate_get(path)
+        assert resp.status == '400 Invalid parameter'
+
+
+def test_orbit(client):
+    '''Test orbit lookup'''
+    resp = client.simulate_get('/mt/wbh/star/G2 V/orbit/3')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json == {
+        'angular_dia_deg': 0.522,
+        'angular_dia_sun': 1.0,
+        'au': 1.0,
+        'interior': False,
+        'mkm': 149.6,
+        'orbit_no': 3,
+        'period': 1.0,
+        'unavailable': False
+    }
+    resp = client.simulate_get('/mt/wbh/star/B0 Ia/orbit/1')
+    assert resp.json['interior'] is True
+    assert resp.json['unavailable'] is True
+
+    for path in ['/mt/wbh/star/foo/orbit/3', '/mt/wbh/star/G2V/orbit/20']:
+        resp = client.simulate_get(path)
+        assert resp.status == '400 Invalid parameter'
+
+
+def test_star_batch(client):
+    '''Test batch lookup'''
+    resp = client.simulate_get(
+        '/mt/wbh/star/batch', query_string='code=G2V&code=foo&code=G2%20V')
+    assert resp.status == falcon.HTTP_200
+    stars = resp.json['stars']
+    assert [star['query'] for star in stars] == ['G2V', 'foo', 'G2 V']
+    assert [star['code'] for star in stars] == ['G2 V', None, 'G2 V']
+    assert stars[0]['star'] == stars[2]['star']
+    assert stars[1]['star'] is None
+    assert 'orbits' not in stars[0]
+
+    resp = client.simulate_post(
+        '/mt/wbh/star/batch',
+        body=json.dumps({'codes': ['K5 V', 'M D'], 'orbits': True}))
+    assert resp.status == falcon.HTTP_200
+    stars = resp.json['stars']
+    assert len(stars[0]['orbits']) == 20
+    single = client.simulate_get('/mt/wbh/star/K5V/orbit/4')
+    assert stars[0]['orbits'][4] == single.json
+
+    resp = client.simulate_post('/mt/wbh/star/batch', body='{"foo": 1}')
+    assert resp.status == '400 Invalid parameter'
+    for orbits in ('"false"', '1', 'null'):
+        resp = client.simulate_post(
+            '/mt/wbh/star/batch',
+            body='{"codes": ["K5 V"], "orbits": ' + orbits + '}')
+        assert resp.status == '400 Invalid parameter'
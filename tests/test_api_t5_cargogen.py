@@ -3,17 +3,20 @@
 # pragma pylint: disable=relative-beyond-top-level
 # pragma pylint: disable=C0413, E0401
 
+import json
 import logging
 import sys
 import os
 import pytest
 import falcon
 from falcon import testing
+from mock import patch
 sys.path.insert(
     0,
     os.path.dirname(os.path.abspath(__file__)) + '/../')
 from traveller_api.app import api
 from traveller_api.t5.cargogen import CargoGen
+from traveller_api.executor import TASK_POOL, TaskTimeout
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -97,3 +100,94 @@ def test_invalid_broker(client):
         '/t5/cargogen',
         query_string=query_string)
     assert resp.status == '400 Invalid parameter'
+
+
+def test_count(client):
+    '''Test batch (count) mode'''
+    query_string = 'source_uwp=B56789C-A&market_uwp=B439598-D&count=10'
+    resp = client.simulate_get(
+        '/t5/cargogen',
+        query_string=query_string)
+    assert resp.status == falcon.HTTP_200
+    assert len(resp.json) == 10
+    for lot in resp.json:
+        assert lot['cost'] == 5000
+        assert lot['price'] == 3500
+
+    for count in ['0', 'Ten', '100000']:
+        resp = client.simulate_get(
+            '/t5/cargogen',
+            query_string='source_uwp=B56789C-A&count={}'.format(count))
+        assert resp.status == '400 Invalid parameter'
+
+
+def test_analytic(client):
+    '''Test analytic price distribution'''
+    query_string = 'source_uwp=B56789C-A&market_uwp=B439598-D&analytic=true'
+    resp = client.simulate_get(
+        '/t5/cargogen',
+        query_string=query_string)
+    assert resp.status == falcon.HTTP_200
+    dist = resp.json['market']['price_distribution']
+    assert dist['percentiles']['50'] == 3500
+    assert sorted(dist['percentiles'].keys()) == ['25', '5', '50', '75', '95']
+
+
+def test_matrix(client):
+    '''Test streamed trade matrix'''
+    resp = client.simulate_get(
+        '/t5/cargogen/matrix',
+        query_string='uwp=B56789C-A&uwp=B439598-D&broker=2')
+    assert resp.status == falcon.HTTP_200
+    assert resp.headers['content-type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row['row'] for row in rows] == [0, 1]
+    assert rows[0]['source'] == 'B56789C-A'
+    assert rows[0]['cost'] == 5000
+    assert rows[0]['price'][1] == 3500
+
+    post = client.simulate_post(
+        '/t5/cargogen/matrix',
+        body=json.dumps({'uwps': ['B56789C-A', 'B439598-D'], 'broker': 2}))
+    assert post.text == resp.text
+
+    # Repeated worlds keep their place in GET and POST
+    uwps = ['B56789C-A', 'B439598-D', 'B56789C-A']
+    resp = client.simulate_get(
+        '/t5/cargogen/matrix',
+        query_string='&'.join('uwp=' + uwp for uwp in uwps))
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row['source'] for row in rows] == uwps
+    assert len(rows[0]['price']) == 3
+    post = client.simulate_post(
+        '/t5/cargogen/matrix', body=json.dumps({'uwps': uwps}))
+    assert post.text == resp.text
+
+
+def test_matrix_invalid(client):
+    '''Test invalid trade matrix parameters'''
+    resp = client.simulate_get(
+        '/t5/cargogen/matrix', query_string='uwp=B56789C-A&uwp=bogus')
+    assert resp.status == '400 Invalid parameter'
+    resp = client.simulate_get('/t5/cargogen/matrix')
+    assert resp.status == '400 Invalid parameter'
+    resp = client.simulate_post('/t5/cargogen/matrix', body='{}')
+    assert resp.status == '400 Invalid parameter'
+
+
+def test_matrix_pool_error(client):
+    '''Test pool error mid-stream ends matrix with error line'''
+    def imap(func, tasks, *args, **kwargs):
+        '''First chunk, then timeout'''
+        yield func(*tasks[0])
+        raise TaskTimeout('_matrix_rows tasks not finished within 30 s')
+
+    uwps = ['B56789C-A', 'B439598-D'] * 50
+    with patch.object(TASK_POOL, 'imap', side_effect=imap):
+        resp = client.simulate_post(
+            '/t5/cargogen/matrix', body=json.dumps({'uwps': uwps}))
+    assert resp.status == falcon.HTTP_200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line['row'] for line in lines[:-1]] == list(range(10))
+    assert lines[-1] == {
+        'error': '_matrix_rows tasks not finished within 30 s'}
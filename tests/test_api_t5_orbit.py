@@ -3,6 +3,7 @@
 # pragma pylint: disable=relative-beyond-top-level
 # pragma pylint: disable=C0413, E0401
 
+import json
 import sys
 import os
 import pytest
@@ -63,3 +64,51 @@ def test_api_doc(client):
     assert resp.status == falcon.HTTP_200
     assert resp.json['doc'] == Orbit.__doc__.replace(
         '<apiserver>', 'http://falconframework.org')
+
+
+def test_api_batch(client):
+    '''Test batch orbit number lookups'''
+    resp = client.simulate_get(
+        '/t5/orbit/batch',
+        query_string='orbit_number=3&orbit_number=1.5&orbit_number=3')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['orbits'] == [
+        {'orbit_number': 3.0, 'au': 1.0, 'mkm': 150},
+        {'orbit_number': 1.5, 'au': 0.6, 'mkm': 90},
+        {'orbit_number': 3.0, 'au': 1.0, 'mkm': 150}
+    ]
+    resp = client.simulate_post(
+        '/t5/orbit/batch', body=json.dumps({'orbit_numbers': [0, 19]}))
+    assert resp.status == falcon.HTTP_200
+    assert [orbit['au'] for orbit in resp.json['orbits']] == [0.2, 39500.0]
+
+    for query_string in ['orbit_number=3&orbit_number=Foo',
+                         'orbit_number=19.5']:
+        resp = client.simulate_get(
+            '/t5/orbit/batch', query_string=query_string)
+        assert resp.status == '400 Invalid parameter'
+    resp = client.simulate_post('/t5/orbit/batch', body='[1, 2]')
+    assert resp.status == '400 Invalid parameter'
+
+
+def test_api_inverse(client):
+    '''Test inverse (distance => orbit number) lookups'''
+    resp = client.simulate_get(
+        '/t5/orbit/inverse', query_string='au=1.0&au=1.3')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json['orbits'] == [
+        {'au': 1.0, 'orbit_number': 3.0},
+        {'au': 1.3, 'orbit_number': 3.5}
+    ]
+    resp = client.simulate_get('/t5/orbit/inverse', query_string='mkm=150')
+    assert resp.json['orbits'] == [{'mkm': 150.0, 'orbit_number': 3.0}]
+    resp = client.simulate_post(
+        '/t5/orbit/inverse', body=json.dumps({'mkm': [30, 5925000]}))
+    assert resp.status == falcon.HTTP_200
+    assert [orbit['orbit_number'] for orbit in resp.json['orbits']] == \
+        [0.0, 19.0]
+
+    for query_string in ['au=1&mkm=150', 'au=0.1', 'au=Foo']:
+        resp = client.simulate_get(
+            '/t5/orbit/inverse', query_string=query_string)
+        assert resp.status == '400 Invalid parameter'
@@ -0,0 +1,184 @@
+'''test_cache.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+from falcon import testing
+import pytest
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api
+from traveller_api import cache
+from traveller_api.cache import MemoryCache, SQLiteCache, RedisCache
+from traveller_api.cache import create_cache, get_cache
+
+
+@pytest.fixture
+def client():
+    '''API test client'''
+    return testing.TestClient(api)
+
+
+class BackendTests(object):
+    '''Tests for every backend (self.cache set by setUp())'''
+
+    def test_get_set(self):
+        '''Test values round trip, hits/misses counted'''
+        self.assertTrue(self.cache.get('a') is None)
+        self.cache.set('a', {'b': [1, 2.5, None, 'c']})
+        self.assertTrue(self.cache.get('a') == {'b': [1, 2.5, None, 'c']})
+        self.assertTrue(len(self.cache) == 1)
+        self.cache.delete('a')
+        self.assertTrue(self.cache.get('a') is None)
+        stats = self.cache.stats()
+        self.assertTrue(stats['hits'] == 1 and stats['misses'] == 2)
+        self.assertTrue(stats['hit_ratio'] == round(1 / 3.0, 6))
+
+    def test_ttl(self):
+        '''Test entries expire'''
+        self.cache.set('a', 1, ttl=0.05)
+        self.cache.set('b', 2)
+        self.assertTrue(self.cache.get('a') == 1)
+        time.sleep(0.1)
+        self.assertTrue(self.cache.get('a') is None)
+        self.assertTrue(self.cache.get('b') == 2)
+
+    def test_get_or_set(self):
+        '''Test get_or_set() calls func on miss only'''
+        calls = []
+        for _ in range(3):
+            value = self.cache.get_or_set(
+                'a', lambda: calls.append(1) or 'value')
+            self.assertTrue(value == 'value')
+        self.assertTrue(len(calls) == 1)
+
+    def test_max_entries(self):
+        '''Test oldest entries evicted'''
+        for indx in range(12):
+            self.cache.set(str(indx), indx)
+        self.assertTrue(len(self.cache) == 10)
+        self.assertTrue(self.cache.get('0') is None)
+        self.assertTrue(self.cache.get('11') == 11)
+
+    def test_max_bytes(self):
+        '''Test entries evicted to keep total size under limit'''
+        for indx in range(5):
+            self.cache.set(str(indx), 'x' * 298)
+        self.assertTrue(len(self.cache) == 3)
+        self.assertTrue(self.cache.get('4') is not None)
+        self.cache.clear()
+        self.assertTrue(len(self.cache) == 0)
+
+
+class TestMemoryCache(BackendTests, unittest.TestCase):
+    '''MemoryCache tests'''
+
+    def setUp(self):
+        self.cache = MemoryCache(max_entries=10, max_bytes=1000)
+
+    def test_lru(self):
+        '''Test recently used entries kept'''
+        for indx in range(10):
+            self.cache.set(str(indx), indx)
+        self.cache.get('0')
+        self.cache.set('10', 10)
+        self.assertTrue(self.cache.get('0') == 0)
+        self.assertTrue(self.cache.get('1') is None)
+
+
+class TestSQLiteCache(BackendTests, unittest.TestCase):
+    '''SQLiteCache tests'''
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite')
+        self.cache = SQLiteCache(self.path, max_entries=10, max_bytes=1000)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_shared(self):
+        '''Test entries shared between instances and processes'''
+        other = SQLiteCache(self.path)
+        self.cache.set('a', 1)
+        self.assertTrue(other.get('a') == 1)
+        pid = os.fork()
+        if pid == 0:
+            self.cache.set('b', 2)
+            os._exit(0)     # pylint: disable=W0212
+        os.waitpid(pid, 0)
+        self.assertTrue(other.get('b') == 2)
+        with self.cache._connection() as conn:   # noqa
+            mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertTrue(mode == 'wal')
+
+    def test_evict_low_water(self):
+        '''Test eviction batches down to low water, sizes tracked'''
+        for indx in range(11):
+            self.cache.set(str(indx), indx)
+        self.assertTrue(len(self.cache) == 9)
+        self.cache.set('10', 'x' * 10)
+        self.cache.delete('9')
+        conn = self.cache._connection()     # noqa
+        self.assertTrue(
+            self.cache._size(conn) ==     # noqa
+            conn.execute(
+                'SELECT COUNT(*), SUM(size) FROM cache').fetchone())
+        self.cache.clear()
+        self.assertTrue(self.cache._size(conn) == (0, 0))     # noqa
+
+
+class TestCache(unittest.TestCase):
+    '''Backend selection tests'''
+
+    def test_create_cache(self):
+        '''Test backends by name'''
+        self.assertTrue(isinstance(create_cache('memory'), MemoryCache))
+        with self.assertRaises(ValueError):
+            create_cache('foo')
+        self.assertTrue(get_cache() is get_cache())
+
+    @unittest.skipIf(cache.redis is not None, 'redis installed')
+    def test_redis_missing(self):
+        '''Test redis backend needs redis package'''
+        with self.assertRaises(ImportError):
+            RedisCache()
+
+
+def test_response_cache(client):
+    '''Test deterministic and seeded responses served from cache'''
+    get_cache().clear()
+    hits = get_cache().stats()['hits']
+    for _ in range(2):
+        resp = client.simulate_get(
+            '/ct/lbb6/star', query_string='code=K0%20V')
+        assert resp.status == '200 OK'
+        assert resp.json['classification'] == 'K0 V'
+    assert get_cache().stats()['hits'] == hits + 1
+    query_string = 'route=A867949-C&route=B560A87-D&runs=20'
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate', query_string=query_string)
+    assert len(get_cache()) == 1
+    resp = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate', query_string=query_string + '&seed=1')
+    cached = client.simulate_get(
+        '/ct/lbb2/cargogen/simulate', query_string=query_string + '&seed=1')
+    assert len(get_cache()) == 2
+    assert resp.text == cached.text
+    assert get_cache().stats()['hits'] == hits + 2
+
+
+def test_response_notes(client):
+    '''Test responses with notes not cached'''
+    get_cache().clear()
+    for _ in range(2):
+        resp = client.simulate_get(
+            '/ct/lbb6/orbit', query_string='orbit_no=0&star=B0%20V')
+        assert resp.status == '200 OK'
+        assert resp.json['notes']
+    assert len(get_cache()) == 0
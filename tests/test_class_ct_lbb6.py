@@ -6,6 +6,7 @@ import json
 import logging
 import os
 import sys
+import timeit
 import unittest
 import requests
 from mock import patch
@@ -16,6 +17,12 @@ sys.path.insert(
 from traveller_api.ct.lbb6.star import Star
 from traveller_api.ct.lbb6.orbit import Orbit
 from traveller_api.ct.lbb6.planet import EhexSize, LBB6Planet
+from traveller_api.ct.lbb6.planet import ATMOSPHERE_CODES, HYDROGRAPHICS_CODES
+from traveller_api.ct.lbb6.planet import FACTOR_TABLE
+from traveller_api.ct.lbb6.catalogue import load_catalogue
+from traveller_api.ct.lbb6.worldgen import WorldBatch, CHUNK_SIZE
+from traveller_api.ct.planet import techlevel_die_mod
+from traveller_api.starcode import StarCode
 from traveller_api.util import MinMax
 
 LOGGER = logging.getLogger(__name__)
@@ -137,13 +144,15 @@ class TestOrbit(unittest.TestCase):
         orbit = Orbit(2)
         self.assertTrue(orbit.period is None)
 
-    @patch('requests.get', side_effect=mock_requests_get_error)
+    @patch(
+        'traveller_api.util.RestQuery.get',
+        side_effect=mock_requests_get_error)
     def test_angdia(self, mock_fn):
-        '''Test angdia response if API server is down'''
+        '''Test angdia computed locally (no API server call)'''
         orbit = Orbit(3, Star('G2 V'))
-        self.assertTrue(
-            'Unable to connect to API endpoint http://api.trav.phraction.org' in orbit.notes
-        )
+        self.assertTrue(orbit.angular_diameter == 0.522)
+        self.assertTrue(orbit.notes == [])
+        mock_fn.assert_not_called()
 
     def test_unavailable_orbits(self):
         '''Test for interior orbit, mnimum orbit'''
@@ -203,6 +212,43 @@ class TestOrbit(unittest.TestCase):
         self.assertTrue(orbit.json() == expected)
 
 
+class TestCatalogue(unittest.TestCase):
+    '''In-memory star/orbit catalogue tests'''
+
+    def test_load(self):
+        '''Test tables are loaded, stars indexed by StarCode'''
+        catalogue = load_catalogue()
+        self.assertTrue(len(catalogue.stars) == 386)
+        self.assertTrue([orbit.indx for orbit in catalogue.orbits] ==
+                        list(range(20)))
+        star = catalogue.star(StarCode.parse('G2 V'))
+        self.assertTrue(star.luminosity == Star('G2 V').luminosity)
+        self.assertTrue(catalogue.star(StarCode.parse('DM')).size == 'D')
+        self.assertTrue(catalogue.star(StarCode.parse('K5 IV')).size == 'V')
+        self.assertTrue(load_catalogue() is catalogue)
+
+    def test_orbit_profile(self):
+        '''Test orbit profile matches Orbit()'''
+        catalogue = load_catalogue()
+        profile = catalogue.orbit_profile(
+            catalogue.star(StarCode.parse('F7 V')))
+        self.assertTrue(len(profile) == 20)
+        self.assertTrue(profile[4]['period'] == 1.848)
+        self.assertTrue(profile[4]['angular_diameter'] == 0.416)
+        for orbit_no in [0, 7, 19]:
+            orbit = Orbit(orbit_no, Star('F7 V'))
+            self.assertTrue(profile[orbit_no]['period'] == orbit.period)
+            self.assertTrue(profile[orbit_no]['mkm'] == orbit.mkm)
+        profile = catalogue.orbit_profile(
+            catalogue.star(StarCode.parse('M9 Ia')))
+        self.assertTrue(profile[2]['interior'])
+        profile = catalogue.orbit_profile(
+            catalogue.star(StarCode.parse('B5 V')))
+        self.assertTrue(profile[2]['unavailable'])
+        self.assertFalse(profile[2]['interior'])
+        self.assertFalse(profile[3]['unavailable'])
+
+
 class TestEhexSize(unittest.TestCase):
     '''ehex extended for size S unit tests'''
 
@@ -656,3 +702,202 @@ class TestLBB6PlanetTemp(unittest.TestCase):
         )
         LOGGER.debug('temp = %s', temp)
         self.assertTrue(temp == 288)
+
+    def test_temperature_profile(self):
+        '''Test temperature profile matches per-orbit generate()'''
+        catalogue = load_catalogue()
+        for code in ['G2 V', 'MD', 'B5 V']:
+            star = Star(code)
+            for uwp in ['A867977-8', 'X644000-0', 'B4A0654-A', 'C7C5000-0']:
+                profile = LBB6Planet(uwp=uwp).temperature_profile(
+                    star, catalogue.orbits)
+                self.assertTrue(len(profile) == 20)
+                for orbit_no in [0, 3, 5, 12]:
+                    planet = LBB6Planet(uwp=uwp)
+                    planet.generate(star=star, orbit=Orbit(orbit_no))
+                    self.assertTrue(
+                        profile[orbit_no][3:] == (
+                            planet.albedo.min(),
+                            planet.albedo.max(),
+                            planet.temperature.min(),
+                            planet.temperature.max()))
+        profile = LBB6Planet(uwp='A867977-8').temperature_profile(
+            catalogue.star(StarCode.parse('G2 V')), catalogue.orbits)
+        self.assertTrue(
+            [row[2] for row in profile[2:5]] == ['Inner', 'HZ', 'Outer'])
+
+    def test_find_placements(self):
+        '''Test placement search matches temperature profile'''
+        catalogue = load_catalogue()
+        planet = LBB6Planet(uwp='A867977-8')
+        matches = planet.find_placements(catalogue, 250, 350)
+        self.assertTrue(len(matches) > 0)
+        self.assertTrue(
+            [match[0] for match in matches] ==
+            sorted(match[0] for match in matches))
+        for distance, star, orbit, zone, low, high in matches[:20]:
+            self.assertTrue(low >= 250 and high <= 350)
+            self.assertTrue(orbit.indx >= catalogue.first_orbit(star))
+            row = LBB6Planet(uwp='A867977-8').temperature_profile(
+                star, catalogue.orbits)[orbit.indx]
+            self.assertTrue(row[2] == zone)
+            self.assertTrue(row[5:] == (low, high))
+            self.assertTrue(distance == abs((low + high) / 2.0 - 300))
+        overlaps = planet.find_placements(catalogue, 250, 350, overlap=True)
+        self.assertTrue(len(overlaps) >= len(matches))
+        self.assertTrue(planet.find_placements(catalogue, 5000, 6000) == [])
+
+
+class TestLBB6PlanetFactorTable(unittest.TestCase):
+    '''LBB6 planet precomputed factor table tests'''
+
+    @staticmethod
+    def reference(planet):
+        '''Determine factors using reference methods'''
+        planet.determine_greenhouse()
+        planet.determine_cloudiness()
+        planet.determine_albedo()
+        return (
+            planet.cloudiness,
+            planet.greenhouse.min(), planet.greenhouse.max(),
+            planet.albedo.min(), planet.albedo.max())
+
+    def test_table_matches_reference(self):
+        '''Test table values match reference methods for all cases'''
+        self.assertTrue(len(FACTOR_TABLE) == 16 * 11 * 5)
+        stars = [Star('G2 V'), Star('MD'), Star('B5 V')]
+        orbits = [Orbit(orbit_no) for orbit_no in [0, 3, 4, 12]]
+        cases = [(None, None)] + [
+            (star, orbit) for star in stars for orbit in orbits]
+        for atmosphere in ATMOSPHERE_CODES:
+            for hydrographics in HYDROGRAPHICS_CODES:
+                planet = LBB6Planet(
+                    uwp='A7{}{}777-7'.format(atmosphere, hydrographics))
+                for star, orbit in cases:
+                    planet.star = star
+                    planet.orbit = orbit
+                    planet.determine_factors()
+                    factors = (
+                        planet.cloudiness,
+                        planet.greenhouse.min(), planet.greenhouse.max(),
+                        planet.albedo.min(), planet.albedo.max())
+                    self.assertTrue(self.reference(planet) == factors)
+
+    def test_untabulated_fallback(self):
+        '''Test values not in table use reference methods'''
+        planet = LBB6Planet(uwp='A7A7777-7')
+        planet.atmosphere = 10
+        planet.determine_factors()
+        factors = (
+            planet.cloudiness,
+            planet.greenhouse.min(), planet.greenhouse.max(),
+            planet.albedo.min(), planet.albedo.max())
+        self.assertTrue(factors == self.reference(planet))
+
+    def test_benchmark(self):
+        '''Microbenchmark: table lookup v reference methods'''
+        planets = []
+        for atmosphere in ATMOSPHERE_CODES:
+            planet = LBB6Planet(uwp='A7{}7777-7'.format(atmosphere))
+            planet.star = Star('G2 V')
+            planet.orbit = Orbit(3)
+            planets.append(planet)
+        table = min(timeit.repeat(
+            lambda: [planet.determine_factors() for planet in planets],
+            number=20, repeat=3))
+        reference = min(timeit.repeat(
+            lambda: [self.reference(planet) for planet in planets],
+            number=20, repeat=3))
+        LOGGER.info(
+            'table %.6fs reference %.6fs (%.1fx)',
+            table, reference, reference / table)
+        self.assertTrue(table < reference)
+
+
+class TestWorldBatch(unittest.TestCase):
+    '''LBB6 batch world generation tests'''
+
+    def setUp(self):
+        self.catalogue = load_catalogue()
+        self.star = self.catalogue.star(StarCode.parse('G2 V'))
+
+    def test_seed(self):
+        '''Test same seed => same worlds'''
+        batches = []
+        for _ in range(2):
+            batch = WorldBatch(
+                200, self.star, self.catalogue.orbits[3], seed=7)
+            batch.generate()
+            batches.append(batch.worlds)
+        self.assertTrue(batches[0] == batches[1])
+        self.assertTrue(len(batches[0]) == 200)
+
+    def test_worlds(self):
+        '''Test generated worlds follow LBB6Planet rules'''
+        batch = WorldBatch(
+            200, self.star, self.catalogue.orbits[3], seed=1)
+        batch.generate()
+        star = Star('G2 V')
+        orbit = Orbit(3)
+        for world in batch.worlds:
+            planet = LBB6Planet(uwp=world['uwp'])
+            self.assertTrue(planet.starport in 'ABCDEX')
+            planet._determine_env_trade_codes()
+            self.assertTrue(world['trade_codes'] == planet.trade_codes)
+            die_mod = techlevel_die_mod(
+                planet.starport, int(planet.size), int(planet.atmosphere),
+                int(planet.hydrographics), int(planet.population),
+                int(planet.government))
+            self.assertTrue(
+                int(planet.techlevel) >= max(0, die_mod + 1) and
+                int(planet.techlevel) <= max(0, die_mod + 6))
+            planet.generate(star=star, orbit=orbit)
+            self.assertTrue(
+                world['temperature'] == planet.temperature.dict())
+
+    def test_satellites(self):
+        '''Test satellite (not mainworld) mode'''
+        batch = WorldBatch(
+            1000, self.star, self.catalogue.orbits[1], is_mainworld=False,
+            seed=1)
+        batch.generate()
+        sizes = set()
+        for world in batch.worlds:
+            self.assertTrue(world['uwp'][0] in 'FGHY')
+            self.assertTrue(world['uwp'][3] == '0')
+            self.assertFalse('As' in world['trade_codes'])
+            sizes.add(world['uwp'][1])
+        self.assertTrue('S' in sizes)
+        self.assertFalse('0' in sizes)
+
+    def test_outer_orbits(self):
+        '''Test orbits 2+ beyond habitable zone'''
+        batch = WorldBatch(500, self.star, self.catalogue.orbits[11], seed=1)
+        batch.generate()
+        for world in batch.worlds:
+            self.assertTrue(world['uwp'][2] in '0A')
+
+    def test_no_star(self):
+        '''Test generation without star, orbit'''
+        batch = WorldBatch(100, seed=1)
+        batch.generate()
+        for world in batch.worlds:
+            self.assertTrue(world['temperature'] == {'min': None, 'max': None})
+
+    def test_invalid(self):
+        '''Test invalid count, seed'''
+        for count in [0, 10001, 'foo']:
+            with self.assertRaises(ValueError):
+                WorldBatch(count)
+        with self.assertRaises(ValueError):
+            WorldBatch(1, seed='foo')
+
+    def test_chunks(self):
+        '''Test chunked batches are repeatable and independent of processes'''
+        count = CHUNK_SIZE + 10
+        inline = WorldBatch(count, seed=3)
+        inline.generate(processes=1)
+        pooled = WorldBatch(count, seed=3)
+        pooled.generate(processes=2)
+        self.assertTrue(inline.worlds == pooled.worlds)
+        self.assertTrue(len(inline.worlds) == count)
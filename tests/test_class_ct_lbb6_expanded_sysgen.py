@@ -13,7 +13,10 @@ sys.path.insert(
     os.path.dirname(os.path.abspath(__file__)) + '/../')
 from traveller_api.ct.lbb6_expanded_sysgen.system import LBB6ExpandedStar
 from traveller_api.ct.lbb6_expanded_sysgen.system import LBB6CompanionStar
+from traveller_api.ct.lbb6_expanded_sysgen.system import LBB6ExpandedSystem
 from traveller_api.ct.lbb6.planet import LBB6Planet
+from traveller_api.ct.lbb6.star import Star
+from traveller_api.ct.lbb6.catalogue import load_catalogue
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -27,6 +30,14 @@ def mock_d6_roll_1(dice=1, modifier=0, floor=0, ceiling=9999):
     return result
 
 
+def mock_d6_roll_12(dice=1, modifier=0, floor=0, ceiling=9999):
+    '''Mock D6.roll() - return 6 * dice + modifier'''
+    result = 6 * dice + modifier
+    result = max(floor, result)
+    result = min(ceiling, result)
+    return result
+
+
 class TestExpandedStar(unittest.TestCase):
     '''LBB6ExpandedStar tests'''
 
@@ -52,6 +63,23 @@ class TestExpandedStar(unittest.TestCase):
         self.assertTrue(star.size_roll == 6)
         self.assertTrue(star.type_roll == 6)
 
+    @patch('traveller_api.ct.util.Die.roll', side_effect=mock_d6_roll_12)
+    def test_create_dwarf(self, mock_fn):
+        '''Test codeless create (dwarf)'''
+        mainworld = LBB6Planet(uwp='A788767-8')
+        star = LBB6ExpandedStar(mainworld)
+        self.assertTrue(star.type == 'F')
+        self.assertTrue(star.size == 'D')
+        self.assertTrue(str(star) == 'F D')
+
+    def test_catalogue(self):
+        '''Test star details from catalogue match DB'''
+        catalogue = load_catalogue()
+        for code in ['G2 V', 'M D', 'B5 Ia', 'K5 IV']:
+            star = LBB6ExpandedStar(
+                mainworld=None, code=code, catalogue=catalogue)
+            self.assertTrue(star.json() == Star(code).json())
+
 
     def test_json(self):
         '''Test JSON representation'''
@@ -88,3 +116,66 @@ class TestCompanionStar(unittest.TestCase):
         LOGGER.debug('companion = %s', str(companion))
         self.assertTrue(companion.type == 'K')
         self.assertTrue(companion.size == 'V')
+
+
+class TestExpandedSystem(unittest.TestCase):
+    '''LBB6ExpandedSystem tests'''
+
+    def test_bodies(self):
+        '''Test system bodies'''
+        for _ in range(50):
+            system = LBB6ExpandedSystem(
+                mainworld=LBB6Planet(uwp='A788767-8'))
+            bodies = list(system.bodies())
+            self.assertTrue(bodies[0]['body'] == 'star')
+            self.assertTrue(bodies[0]['role'] == 'primary')
+            stars = [body for body in bodies if body['body'] == 'star']
+            self.assertTrue(len(stars) in [1, 2, 3])
+            self.assertTrue(len(stars) == len(system.companions) + 1)
+            orbits = [body for body in bodies if body['body'] == 'orbit']
+            self.assertTrue(
+                [body['orbit_no'] for body in orbits] ==
+                list(range(len(orbits))))
+            mainworlds = [
+                body for body in orbits if body['contents'] == 'mainworld']
+            self.assertTrue(len(mainworlds) == 1)
+            self.assertTrue(mainworlds[0]['uwp'] == 'A788767-8')
+            self.assertTrue(len(system.worlds) == len([
+                body for body in orbits
+                if body['contents'] in ('world', 'mainworld')]))
+            for body in orbits:
+                if body['contents'] == 'world':
+                    self.assertTrue(body['uwp'][0] in 'FGHY')
+                if body['contents'] == 'gas giant':
+                    self.assertTrue(body['zone'] != 'Inner')
+
+    def test_a_vi_primary(self):
+        '''Test type A size VI primary (type 2, size 11) becomes size V'''
+        rolls = iter([2, 11])
+
+        def roll(dice=1, modifier=0, floor=0, ceiling=9999):
+            '''Type, size rolls 2, 11 then mock_d6_roll_1()'''
+            return next(
+                rolls, mock_d6_roll_1(dice, modifier, floor, ceiling))
+
+        with patch('traveller_api.ct.util.Die.roll', side_effect=roll):
+            system = LBB6ExpandedSystem(
+                mainworld=LBB6Planet(uwp='A200000-0'))
+            bodies = list(system.bodies())
+        self.assertTrue(system.star.type == 'A')
+        self.assertTrue(system.star.size == 'V')
+        self.assertTrue(bodies[0]['classification'] == str(system.star))
+
+    def test_random_mainworld(self):
+        '''Test system with random mainworld'''
+        system = LBB6ExpandedSystem()
+        system.generate()
+        self.assertTrue(str(system.mainworld) in system.worlds)
+
+    @patch('traveller_api.ct.lbb6.star.DB')
+    def test_no_db(self, mock_db):
+        '''Test system generation makes no DB queries'''
+        load_catalogue()
+        for _ in range(20):
+            LBB6ExpandedSystem().generate()
+        self.assertFalse(mock_db.called)
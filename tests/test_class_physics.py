@@ -0,0 +1,53 @@
+'''test_class_physics.py'''
+
+# pragma pylint: disable=C0413, E0401
+
+import os
+import sys
+import unittest
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.physics import angular_diameter, angular_diameters
+from traveller_api.physics import period, periods, broadcast
+from traveller_api.physics import temperature, temperatures
+from traveller_api.ct.lbb6.catalogue import load_catalogue
+
+
+class TestPhysics(unittest.TestCase):
+    '''Test physics kernel functions'''
+
+    def test_broadcast(self):
+        '''Test broadcast()'''
+        self.assertEqual(broadcast(1, 2), [[1], [2]])
+        self.assertEqual(broadcast([1, 2], 3), [[1, 2], [3, 3]])
+        self.assertEqual(broadcast((1, 2), [3, 4]), [[1, 2], [3, 4]])
+        with self.assertRaises(ValueError):
+            broadcast([1, 2], [1, 2, 3])
+
+    def test_scalar(self):
+        '''Test scalar functions'''
+        self.assertEqual(angular_diameter(4, 3), 36.87)
+        self.assertEqual(angular_diameter(4, 3, degrees=False), 0.644)
+        self.assertEqual(period(1.0, 1.0), 1.0)
+        self.assertEqual(period(4.0, 1.0), 8.0)
+        self.assertEqual(temperature(1.0, 0.3, 1.0, 1.1), 288.0)
+
+    def test_array(self):
+        '''Test array functions match scalar functions'''
+        catalogue = load_catalogue()
+        stars = catalogue.stars
+        orbits = catalogue.orbits[:len(stars)]
+        aus = [orbits[indx % len(orbits)].au for indx in range(len(stars))]
+        self.assertEqual(
+            periods(aus, [star.mass for star in stars]),
+            [period(au, star.mass) for au, star in zip(aus, stars)])
+        self.assertEqual(
+            temperatures([star.luminosity for star in stars], 0.3, aus, 1.1),
+            [temperature(star.luminosity, 0.3, au, 1.1)
+             for au, star in zip(aus, stars)])
+        diameters = [star.radius * 1.3914 for star in stars]
+        self.assertEqual(
+            angular_diameters(149.6, diameters),
+            [angular_diameter(149.6, diameter) for diameter in diameters])
+        self.assertEqual(periods(1.0, 1.0), [1.0])
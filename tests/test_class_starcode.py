@@ -0,0 +1,59 @@
+'''test_class_starcode.py'''
+
+# pylint: disable=E402
+
+import unittest
+import sys
+import os
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.starcode import StarCode, parse_star_code
+
+
+class TestStarCode(unittest.TestCase):
+    '''StarCode unit tests'''
+
+    def test_parse(self):
+        '''Test valid codes'''
+        tests = {
+            'G2 V': ('G', 2, 'V', 'G2 V'),
+            'K5VI': ('K', 5, 'VI', 'K5 VI'),
+            ' A0  Ia ': ('A', 0, 'Ia', 'A0 Ia'),
+            'M D': ('M', '', 'D', 'M D'),
+            'MD': ('M', '', 'D', 'M D'),
+            'DG': ('G', '', 'D', 'G D'),
+            'D G': ('G', '', 'D', 'G D')
+        }
+        for code, expected in tests.items():
+            star_code = StarCode.parse(code)
+            self.assertTrue(tuple(star_code) == expected[:3])
+            self.assertTrue(str(star_code) == expected[3])
+
+    def test_size_rewrite(self):
+        '''Test size corrections (K5-M9 IV, B0-F4 VI => V)'''
+        for code in ['K5 IV', 'K9 IV', 'M0 IV', 'B0 VI', 'A5 VI', 'F4 VI']:
+            self.assertTrue(StarCode.parse(code).size == 'V')
+        for code in ['K4 IV', 'F5 VI', 'G2 VI']:
+            self.assertTrue(StarCode.parse(code).size != 'V')
+
+    def test_bogus(self):
+        '''Test invalid codes'''
+        for code in ['foo', 'G2 D', 'G2 VII', 'X2 V', 'DD', '', None]:
+            with self.assertRaises(ValueError):
+                StarCode.parse(code)
+
+    def test_interned(self):
+        '''Test equivalent codes share one instance'''
+        self.assertTrue(StarCode.parse('GD') is StarCode.parse('D G'))
+        self.assertTrue(StarCode.parse('K7 IV') is StarCode.parse('K7V'))
+        parse_star_code.cache_clear()
+        StarCode.parse('G2 V')
+        StarCode.parse('G2 V')
+        self.assertTrue(parse_star_code.cache_info().hits == 1)
+
+    def test_keys(self):
+        '''Test lookup keys'''
+        self.assertTrue(StarCode.parse('G2 V').keys() == ('G2 V',))
+        self.assertTrue(
+            StarCode.parse('D M').keys() == ('MD', 'DM', 'M D'))
@@ -10,6 +10,11 @@ sys.path.insert(
     0,
     os.path.dirname(os.path.abspath(__file__)) + '/../')
 from traveller_api.t5.cargogen.trade_cargo import TradeCargo, FluxRoll
+from traveller_api.t5.cargogen.trade_cargo import DESCRIPTIONS
+from traveller_api.t5.cargogen.trade_cargo import actual_value_distribution
+from traveller_api.t5.cargogen.matrix import classify_world, matrix_row
+from traveller_api.t5.cargogen.matrix import trade_matrix
+from traveller_api.t5.cargogen.trade_cargo import price_distribution
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -125,3 +130,126 @@ class TestTradeCargo(unittest.TestCase):
         cargo = TradeCargo()
         with self.assertRaises(ValueError):
             cargo.generate_cargo(source_uwp, market_uwp, broker)
+
+    def test_generate_cargoes(self):
+        '''Test batch cargo generation'''
+        source_uwp = 'B56789C-A'
+        market_uwp = 'B439598-D'
+        cargo = TradeCargo()
+        lots = cargo.generate_cargoes(source_uwp, market_uwp, count=5)
+        self.assertTrue(len(lots) == 5)
+        for lot in lots:
+            self.assertTrue(lot['cost'] == 5000)
+            self.assertTrue(lot['price'] == 3500)
+            self.assertTrue(lot['market']['uwp'] == market_uwp)
+            self.assertFalse(lot['description'].startswith('_'))
+
+
+class TestDescriptions(unittest.TestCase):
+    '''Precompiled description table tests'''
+
+    def test_tables(self):
+        '''Test flattened tables, resolved imbalance entries'''
+        for trade_code in DESCRIPTIONS:
+            table = DESCRIPTIONS[trade_code]
+            self.assertTrue(len(table) == 36)
+            for cargo in table:
+                if isinstance(cargo, str):
+                    self.assertFalse(cargo.startswith('_'))
+                else:
+                    for code in cargo:
+                        self.assertTrue(code in DESCRIPTIONS)
+        # Ga [5][0] => _As; As [5][0] => _Ag => Ga or Fa
+        self.assertTrue(DESCRIPTIONS['Ga'][30] == ('As',))
+        self.assertTrue(DESCRIPTIONS['As'][30] == ('Ga', 'Fa'))
+        self.assertTrue(DESCRIPTIONS['Ri'][7] == 'Self-Defenders')
+
+    @patch(
+        'traveller_api.t5.cargogen.trade_cargo.randint',
+        side_effect=mock_randint)
+    def test_select_cargo_name(self, randint_fn):
+        '''Test cargo selection follows imbalance redirects'''
+        # Efate A646930-D Hi In; mock picks In, [5][5] => Improvements
+        cargo = TradeCargo()
+        cargo.generate_cargo('A646930-D')
+        self.assertTrue(cargo.description == 'Improvements')
+
+
+class TestPriceDistribution(unittest.TestCase):
+    '''Analytic pricing tests'''
+
+    def test_actual_value_distribution(self):
+        '''Test flux distribution'''
+        self.assertTrue(
+            dict(actual_value_distribution(0)) == {
+                0.4: 1, 0.5: 2, 0.7: 3, 0.8: 4, 0.9: 5, 1.0: 6,
+                1.1: 5, 1.2: 4, 1.3: 3, 1.5: 2, 1.7: 1})
+        self.assertTrue(dict(actual_value_distribution(13)) == {4.0: 36})
+        for modifier in range(-4, 5):
+            self.assertTrue(
+                sum([w for _, w in actual_value_distribution(modifier)]) ==
+                36)
+
+    def test_price_distribution(self):
+        '''Test price distribution for source/market'''
+        # Source world - Alell B56789C-A; market Uakye B439598-D; price 3500
+        cargo = TradeCargo()
+        cargo.generate_cargo('B56789C-A', 'B439598-D')
+        cargo.determine_price_distribution()
+        dist = cargo.price_distribution
+        self.assertTrue(dist['percentiles']['50'] == 3500)
+        self.assertTrue(
+            abs(sum([prob for _, prob in dist['table']]) - 1.0) < 0.0001)
+        self.assertTrue(
+            json.loads(cargo.json())['market']['price_distribution'] == dist)
+        dist['table'][0][0] = -1
+        self.assertTrue(price_distribution(3500, 0, 0) != dist)
+
+    def test_no_market(self):
+        '''Test no distribution without market'''
+        cargo = TradeCargo()
+        cargo.generate_cargo('B56789C-A')
+        cargo.determine_price_distribution()
+        self.assertTrue(cargo.price_distribution is None)
+
+
+class TestTradeMatrix(unittest.TestCase):
+    '''Trade matrix unit tests'''
+
+    def test_classify_world(self):
+        '''Test world classification'''
+        self.assertTrue(
+            classify_world('B56789C-A') ==
+            ('B56789C-A', 10, ('Ph', 'Pa', 'Ri')))
+        with self.assertRaises(ValueError):
+            classify_world('bogus')
+
+    def test_matrix_row(self):
+        '''Test single matrix row'''
+        source = classify_world('B56789C-A')
+        market = classify_world('B439598-D')
+        row = matrix_row(source, [market], 0)
+        self.assertTrue(row['source'] == 'B56789C-A')
+        self.assertTrue(row['cost'] == 5000)
+        self.assertTrue(row['price'] == [3500])
+        self.assertTrue(
+            row['expected_actual_value'] ==
+            [price_distribution(3500, 0)['mean']])
+
+    def test_trade_matrix(self):
+        '''Test inline and process pool matrices match'''
+        uwps = ['B56789C-A', 'B439598-D', 'A777999-C']
+        inline = list(trade_matrix(uwps, 1, processes=1))
+        pooled = list(trade_matrix(uwps, 1, processes=2))
+        self.assertTrue(inline == pooled)
+        self.assertTrue([row['row'] for row in inline] == [0, 1, 2])
+        for row in inline:
+            self.assertTrue(len(row['price']) == 3)
+        self.assertTrue(inline[0]['price'][1] == 3500)
+
+    def test_trade_matrix_invalid(self):
+        '''Test invalid parameters raise before streaming'''
+        with self.assertRaises(ValueError):
+            trade_matrix(['B56789C-A', 'bogus'])
+        with self.assertRaises(ValueError):
+            trade_matrix(['B56789C-A'], broker_skill=-1)
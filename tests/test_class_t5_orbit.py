@@ -11,7 +11,8 @@ import unittest
 sys.path.insert(
     0,
     os.path.dirname(os.path.abspath(__file__)) + '/../')
-from traveller_api.t5.orbit.orbit import Orbit
+from traveller_api.t5.orbit.orbit import Orbit, ORBIT_AU
+from traveller_api.t5.orbit.orbit import orbit_radii, orbit_numbers
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -53,3 +54,40 @@ class TestOrbit(unittest.TestCase):
             'actual = %s', orbit.json()
         )
         self.assertTrue(orbit.json() == json.dumps(expected, sort_keys=True))
+
+
+class TestOrbitTable(unittest.TestCase):
+    '''Test batch, inverse orbit lookups'''
+
+    def test_orbit_radii(self):
+        '''Test orbit_radii() matches Orbit()'''
+        numbers = [indx / 10 for indx in range(191)]
+        for number, au, mkm in orbit_radii(numbers):
+            orbit = Orbit(number)
+            self.assertTrue(number == orbit.orbit_number)
+            self.assertTrue(au == orbit.orbit_radius_au)
+            self.assertTrue(mkm == orbit.orbit_radius_mkm)
+        with self.assertRaises(TypeError):
+            orbit_radii([1, 'foo'])
+        with self.assertRaises(ValueError):
+            orbit_radii([1, 19.1])
+
+    def test_orbit_numbers(self):
+        '''Test orbit_numbers() inverts orbit_radii()'''
+        for number, au in enumerate(ORBIT_AU[:20]):
+            self.assertTrue(orbit_numbers([au]) == [(au, float(number))])
+            self.assertTrue(
+                orbit_numbers([au * 150], 'mkm') == [(au * 150, number)])
+        self.assertTrue(orbit_numbers([1.3]) == [(1.3, 3.5)])
+        self.assertTrue(orbit_numbers(['30'], 'mkm') == [(30.0, 0.0)])
+        numbers = [indx / 8 for indx in range(153)]
+        radii = [au for _, au, _ in orbit_radii(numbers)]
+        inverses = [number for _, number in orbit_numbers(radii)]
+        self.assertTrue(
+            [au for _, au, _ in orbit_radii(inverses)] == radii)
+        with self.assertRaises(TypeError):
+            orbit_numbers([None])
+        for distances, unit in [([0.1], 'au'), ([39501], 'au'),
+                                ([29], 'mkm'), ([1], 'ly')]:
+            with self.assertRaises(ValueError):
+                orbit_numbers(distances, unit)
@@ -11,7 +11,7 @@ from ehex import ehex
 sys.path.insert(
     0,
     os.path.dirname(os.path.abspath(__file__)) + '/../')
-from traveller_api.util import MinMax
+from traveller_api.util import MinMax, sample_summary
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -116,3 +116,18 @@ class TestMinMax(unittest.TestCase):
         # Test one param only
         with self.assertRaises(TypeError):
             _ = MinMax(1)
+
+
+class TestSampleSummary(unittest.TestCase):
+    '''sample_summary() unit tests'''
+
+    def test_summary(self):
+        '''Test summary of sampled values'''
+        summary = sample_summary(list(range(100, 0, -1)))
+        self.assertTrue(summary['mean'] == 50.5)
+        self.assertTrue(summary['min'] == 1)
+        self.assertTrue(summary['max'] == 100)
+        self.assertTrue(summary['percentiles']['5'] == 5)
+        self.assertTrue(summary['percentiles']['50'] == 50)
+        self.assertTrue(summary['percentiles']['95'] == 95)
+        self.assertTrue(sample_summary([3])['stdev'] == 0)
@@ -0,0 +1,148 @@
+'''test_coalescing.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import falcon
+from falcon import testing
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.middleware import RequestCoalescing
+from traveller_api.singleflight import SingleFlight, NodeFlight
+
+THREADS = 8
+
+
+class Slow(object):
+    '''Resource that takes a while, counts calls'''
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def on_get(self, req, resp):
+        '''GET /slow?x=<x>'''
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.2)
+        if req.get_param('x') == 'bad':
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description='Invalid x')
+        resp.body = '{}:{}'.format(req.get_param('x'), req.get_param('y'))
+        resp.set_header('X-Test', 'yes')
+        resp.status = falcon.HTTP_200
+
+
+def _client(resource, directory=None):
+    '''Test client for API with coalescing on /slow'''
+    api = falcon.API(middleware=[
+        RequestCoalescing(paths=['/slow'], directory=directory)])
+    api.add_route('/slow', resource)
+    api.add_route('/other', resource)
+    return testing.TestClient(api)
+
+
+def _concurrent(requests):
+    '''Run (client, query string) requests at once, return responses'''
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        return list(executor.map(
+            lambda request: request[0].simulate_get(
+                '/slow', query_string=request[1]),
+            requests))
+
+
+class TestSingleFlight(unittest.TestCase):
+    '''SingleFlight, NodeFlight tests'''
+
+    def test_single_flight(self):
+        '''Test first caller leads, later callers wait for result'''
+        flights = SingleFlight()
+        flight, leader = flights.join('a')
+        self.assertTrue(leader)
+        waiter, leader = flights.join('a')
+        self.assertFalse(leader)
+        self.assertTrue(waiter is flight and flight.waiters == 1)
+        self.assertTrue(flights.wait(waiter, 0) is None)
+        flights.finish('a', flight, 'result')
+        self.assertTrue(flights.wait(waiter, 0) == 'result')
+        self.assertTrue(flights.in_flight() == 0)
+        self.assertTrue(flights.join('a')[1])
+
+    def test_node_flight(self):
+        '''Test result passed to process waiting on lock'''
+        with tempfile.TemporaryDirectory() as directory:
+            node = NodeFlight(directory)
+            lock_file, result = node.acquire('a', 1)
+            self.assertTrue(result is None)
+            self.assertTrue(node.acquire('a', 0.01) == (None, None))
+            threading.Timer(
+                0.05, node.release, args=('a', lock_file, 'result')).start()
+            lock_file, result = node.acquire('a', 5)
+            self.assertTrue(result == 'result')
+            node.release('a', lock_file)
+            # Stale result (written before caller started waiting)
+            lock_file, result = node.acquire('a', 5)
+            self.assertTrue(result is None)
+            node.release('a', lock_file)
+            self.assertTrue(len(os.listdir(directory)) == 2)
+
+
+class TestRequestCoalescing(unittest.TestCase):
+    '''RequestCoalescing middleware tests'''
+
+    def test_worker(self):
+        '''Test identical requests in one worker computed once'''
+        resource = Slow()
+        client = _client(resource)
+        responses = _concurrent(
+            [(client, 'x=1&y=2')] * (THREADS - 1) + [(client, 'y=2&x=1')])
+        self.assertTrue(resource.calls == 1)
+        for resp in responses:
+            self.assertTrue(resp.status == '200 OK')
+            self.assertTrue(resp.text == '1:2')
+            self.assertTrue(resp.headers['X-Test'] == 'yes')
+
+    def test_distinct(self):
+        '''Test different requests, other paths are not coalesced'''
+        resource = Slow()
+        client = _client(resource)
+        responses = _concurrent(
+            [(client, 'x={}'.format(indx)) for indx in range(THREADS)])
+        self.assertTrue(resource.calls == THREADS)
+        self.assertTrue(
+            sorted(resp.text for resp in responses) ==
+            sorted('{}:None'.format(indx) for indx in range(THREADS)))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(
+                lambda _: client.simulate_get('/other', query_string='x=1'),
+                range(2)))
+        self.assertTrue(resource.calls == THREADS + 2)
+
+    def test_error(self):
+        '''Test client errors are shared'''
+        resource = Slow()
+        client = _client(resource)
+        responses = _concurrent([(client, 'x=bad')] * THREADS)
+        self.assertTrue(resource.calls == 1)
+        for resp in responses:
+            self.assertTrue(resp.status == '400 Invalid parameter')
+
+    def test_node(self):
+        '''Test identical requests in two workers computed once'''
+        resource = Slow()
+        with tempfile.TemporaryDirectory() as directory:
+            clients = [_client(resource, directory) for _ in range(2)]
+            responses = _concurrent([
+                (clients[indx % 2], 'x=1') for indx in range(THREADS)])
+        self.assertTrue(resource.calls == 1)
+        for resp in responses:
+            self.assertTrue(resp.text == '1:None')
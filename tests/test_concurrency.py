@@ -0,0 +1,130 @@
+'''test_concurrency.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import random
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from mock import patch
+from falcon import testing
+import pytest
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api, admission_control
+
+THREADS = 16
+REPEATS = 20
+
+# (path, query string, deterministic); deterministic responses must match
+# the single-threaded response exactly, others must match its status and
+# top-level keys. Several endpoints appear with different parameters so
+# that one request's parameters leaking into another is detected.
+# /metrics is omitted (it needs a multiprocess metrics directory)
+CASES = [
+    ('/misc/angdia', 'distance=4&diameter=3', True),
+    ('/misc/angdia', 'distance=10&diameter=1&diameter=2', True),
+    ('/ct/lbb6/star', 'code=G2%20V', True),
+    ('/ct/lbb6/star', 'code=M0%20V', True),
+    ('/ct/lbb6/star/orbits', 'code=K5%20V', True),
+    ('/ct/lbb6/star/orbits', 'code=B0%20Ia', True),
+    ('/ct/lbb6/orbit', 'orbit_no=3', True),
+    ('/ct/lbb6/orbit', 'orbit_no=7', True),
+    ('/ct/lbb6/planet', 'uwp=A867949-C', True),
+    ('/ct/lbb6/planet', 'uwp=B560A87-D&is_mainworld=false', True),
+    ('/ct/lbb6/planet/temperature', 'uwp=A867949-C&star=G2%20V', True),
+    ('/ct/lbb6/planet/temperature', 'uwp=B560A87-D&star=M0%20V', True),
+    ('/ct/lbb6/planet/placement',
+     'uwp=A867949-C&min_temp=270&max_temp=300&limit=5', True),
+    ('/ct/lbb6/planet/generate',
+     'count=5&seed=1&star=G2%20V&orbit_no=3', True),
+    ('/ct/lbb6/planet/generate', 'count=5&seed=2&is_mainworld=false', True),
+    ('/ct/lbb6/catalogue', 'format=columnar', True),
+    ('/ct/lbb6/system', 'uwp=A867949-C', False),
+    ('/mt/wbh/star', 'code=G2%20V', True),
+    ('/mt/wbh/star/K5 V', '', True),
+    ('/mt/wbh/star/batch', 'code=G2V&code=M0V&orbits=true', True),
+    ('/mt/wbh/star/G2 V/orbit/3', '', True),
+    ('/t5/cargogen', 'source_uwp=A867949-C&market_uwp=B560A87-D', False),
+    ('/t5/cargogen/matrix', 'uwp=A867949-C&uwp=B560A87-D', True),
+    ('/ct/lbb2/cargogen/purchase', 'source_uwp=A867949-C', False),
+    ('/ct/lbb2/cargogen/purchase', 'source_tc=Ag&source_tc=Ri', False),
+    ('/ct/lbb2/cargogen/sale',
+     'cargo=11&quantity=10&market_uwp=B560A87-D', False),
+    ('/ct/lbb2/cargogen/market', 'market_uwp=B560A87-D', True),
+    ('/ct/lbb2/cargogen/market', 'market_tc=In&broker=2', True),
+    ('/ct/lbb2/cargogen/simulate',
+     'route=A867949-C&route=B560A87-D&runs=20&seed=3', True),
+    ('/t5/orbit', 'orbit_number=3.5', True),
+    ('/t5/orbit', 'orbit_number=12', True),
+    ('/t5/orbit/batch', 'orbit_number=1&orbit_number=2', True),
+    ('/t5/orbit/inverse', 'au=1.3', True),
+    ('/misc/starcolor', 'code=G2V', True),
+    ('/misc/starcolour', 'code=M5V', True),
+    ('/misc/starcolor/batch', 'code=G2V&code=K0V', True),
+    ('/misc/starcolor/palette', 'format=csv', True),
+    ('/error_handler/foo', '', True),
+    ('/ping', '', True),
+    ('/ct/lbb3/encounter', 'terrain=Clear&uwp=A867949-C', False),
+    ('/ct/lbb3/encounter', 'terrain=Desert&size=1', False),
+    ('/api_version', '', True),
+    ('/ct/lbb6/star', 'doc=true', True),
+    ('/t5/orbit', 'doc=true', True),
+]
+
+
+@pytest.fixture
+def client():
+    '''API test client'''
+    return testing.TestClient(api)
+
+
+def _keys(resp):
+    '''Top-level keys of JSON response (None if not a JSON object)'''
+    try:
+        doc = resp.json
+    except ValueError:
+        return None
+    return sorted(doc) if isinstance(doc, dict) else None
+
+
+def _summary(resp, deterministic):
+    '''Comparable summary of response'''
+    if deterministic:
+        return (resp.status, resp.text)
+    return (resp.status, _keys(resp))
+
+
+def test_concurrent_requests(client):
+    '''
+    Run every endpoint from many threads at once; each response must
+    match the same request made single-threaded
+    '''
+    expected = [
+        _summary(client.simulate_get(path, query_string=query_string),
+                 deterministic)
+        for path, query_string, deterministic in CASES]
+
+    requests = list(range(len(CASES))) * REPEATS
+    random.Random(0).shuffle(requests)
+
+    def run(indx):
+        '''Make request for CASES[indx], return (indx, summary)'''
+        path, query_string, deterministic = CASES[indx]
+        resp = client.simulate_get(path, query_string=query_string)
+        return indx, _summary(resp, deterministic)
+
+    # Switch threads as often as possible to maximise interleaving;
+    # admit every request (load shedding is tested in test_admission.py)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with patch.object(admission_control, 'capacity', 10 ** 6), \
+                ThreadPoolExecutor(max_workers=THREADS) as executor:
+            results = list(executor.map(run, requests))
+    finally:
+        sys.setswitchinterval(interval)
+
+    for indx, summary in results:
+        assert summary == expected[indx], CASES[indx]
@@ -2,6 +2,7 @@
 
 # pylint: disable=E402
 
+import json
 import unittest
 import sys
 import os
@@ -9,6 +10,13 @@ sys.path.insert(
     0,
     os.path.dirname(os.path.abspath(__file__)) + '/../')
 from traveller_api.ct.lbb2.cargogen.cargo import Cargo, CargoSale
+from traveller_api.ct.lbb2.cargogen.cargo import MarketBoard, TRADE_GOODS
+from traveller_api.ct.lbb2.cargogen.cargo import actual_value_distribution
+from traveller_api.ct.lbb2.cargogen.cargo import price_distribution
+from traveller_api.ct.lbb2.cargogen.cargo import expected_unit_price
+from traveller_api.ct.lbb2.cargogen.cargo import ACTUAL_VALUE_TABLE
+from traveller_api.ct.lbb2.cargogen.simulate import TradeRun, build_leg
+from traveller_api.ct.lbb2.cargogen.simulate import CHUNK_SIZE
 
 
 class TestCargoBasic(unittest.TestCase):
@@ -54,3 +62,148 @@ class TestCargoSaleBasic(unittest.TestCase):
             cargo.quantity * cargo.actual_gross_unit_price)
         self.assertTrue(
             cargo.commission == 0.05 * cargo.quantity * cargo.base_price)
+
+
+class TestActualValue(unittest.TestCase):
+    '''Actual value distribution tests'''
+
+    def test_distribution(self):
+        '''Test distribution covers 36 outcomes, clamps at table ends'''
+        for die_mod in range(-10, 14):
+            dist = actual_value_distribution(die_mod)
+            self.assertTrue(sum([ways for _, ways in dist]) == 36)
+        self.assertTrue(actual_value_distribution(-20) == ((0.4, 36),))
+        self.assertTrue(actual_value_distribution(20) == ((4.0, 36),))
+
+    def test_expected_unit_price(self):
+        '''Test expected price against enumerated 2D rolls'''
+        for die_mod in [-3, 0, 2, 5]:
+            total = 0
+            for die1 in range(1, 7):
+                for die2 in range(1, 7):
+                    roll = min(15, max(2, die1 + die2 + die_mod))
+                    total += int(1000 * ACTUAL_VALUE_TABLE[roll])
+            self.assertTrue(
+                abs(expected_unit_price(1000, die_mod) - total / 36.0) <
+                0.0001)
+
+
+class TestMarketBoard(unittest.TestCase):
+    '''MarketBoard unit tests'''
+
+    def test_board(self):
+        '''Test board covers every trade good'''
+        board = MarketBoard(broker=1, trade_codes=['In', 'Ri'])
+        self.assertTrue(len(board.goods) == len(TRADE_GOODS))
+        for good in board.goods:
+            dms = TRADE_GOODS[good['id']]['resale_dms']
+            self.assertTrue(
+                good['resale_dm'] == dms.get('In', 0) + dms.get('Ri', 0))
+            self.assertTrue(
+                good['commission'] == int(good['base_price'] * 0.05))
+            self.assertTrue('actual_gross_unit_price' not in good)
+
+    def test_sample(self):
+        '''Test sampled prices'''
+        board = MarketBoard(trade_codes=['Ag'], sample=True)
+        for good in board.goods:
+            self.assertTrue(
+                good['actual_gross_unit_price'] >= 0.4 * good['base_price'])
+
+    def test_bogus(self):
+        '''Test bogus skills'''
+        for kwargs in [{'admin': -1}, {'broker': 5}, {'bribery': 'Two'}]:
+            with self.assertRaises(ValueError):
+                MarketBoard(**kwargs)
+
+
+class TestPriceDistribution(unittest.TestCase):
+    '''Analytic pricing tests'''
+
+    def test_sale_distribution(self):
+        '''Test net unit price distribution'''
+        cargo = CargoSale('Copper', quantity=10, broker=2)
+        cargo.determine_price_distribution()
+        dist = cargo.price_distribution
+        # Copper: Cr2000, broker 2 => 2D+2 (4-14), commission Cr200/unit
+        self.assertTrue(dist['table'][0][0] == int(2000 * 0.7) - 200)
+        self.assertTrue(dist['table'][-1][0] == int(2000 * 3.0) - 200)
+        self.assertTrue(dist['percentiles']['50'] == int(2000 * 1.2) - 200)
+        self.assertTrue(
+            abs(sum([prob for _, prob in dist['table']]) - 1.0) < 0.0001)
+        self.assertTrue('price_distribution' in json.loads(cargo.json()))
+
+    def test_purchase_distribution(self):
+        '''Test purchase price distribution'''
+        cargo = Cargo(['In'])
+        self.assertTrue('price_distribution' not in json.loads(cargo.json()))
+        cargo.determine_price_distribution()
+        prices = [price for price, _ in cargo.price_distribution['table']]
+        self.assertTrue(cargo.actual_unit_price in prices)
+
+    def test_distribution_copied(self):
+        '''Test cargo's distribution is its own (cached one unchanged)'''
+        cargo = Cargo(['In'])
+        cargo.determine_price_distribution()
+        expected = json.dumps(cargo.price_distribution)
+        cargo.price_distribution['table'][0][0] = -1
+        cargo.price_distribution['percentiles'].clear()
+        self.assertTrue(json.dumps(price_distribution(
+            cargo.base_price, cargo.purchase_die_mod())) == expected)
+
+
+class TestTradeRun(unittest.TestCase):
+    '''Trade run simulator tests'''
+
+    def test_build_leg(self):
+        '''Test leg tables match Cargo/CargoSale DMs'''
+        leg = build_leg((['In'], 9), (['Ri'], 8), broker=2)
+        self.assertTrue(leg['die_mod'] == 1)
+        cargo = CargoSale('Copper', broker=2, trade_codes=['Ri'])
+        # Copper is cargo index 7 ('22'); outcome index 5 is 1 + 6 = 7
+        die_mod = cargo.resale_die_mod()
+        self.assertTrue(
+            leg['sell'][7][5] ==
+            int(2000 * ACTUAL_VALUE_TABLE[7 + die_mod]) - 200)
+        # Radioactives ('16'), purchase DM In +7 => 2 + 7 = 9
+        self.assertTrue(
+            leg['buy'][5][0] == int(1000000 * ACTUAL_VALUE_TABLE[9]))
+        self.assertTrue(
+            leg['expected_sell'][7] ==
+            expected_unit_price(2000, die_mod) - 200)
+
+    def test_simulate(self):
+        '''Test results are repeatable and independent of processes'''
+        route = [(['In'], 9), (['Ni', 'Po'], 5), (['In'], 9)]
+        runs = CHUNK_SIZE + 100
+        inline = TradeRun(route, runs=runs, seed=42)
+        inline.simulate(processes=1)
+        pooled = TradeRun(route, runs=runs, seed=42)
+        pooled.simulate(processes=2)
+        self.assertTrue(inline.dict() == pooled.dict())
+        self.assertTrue(len(inline.profits) == runs)
+        doc = inline.dict()
+        self.assertTrue(len(doc['legs']) == 2)
+        self.assertTrue(
+            doc['profit']['min'] <= doc['profit']['percentiles']['50'] <=
+            doc['profit']['max'])
+
+    def test_never_buys(self):
+        '''Test zero bankroll never buys'''
+        sim = TradeRun(
+            [(['In'], 9), (['Ri'], 8)], bankroll=0, policy='always', runs=50)
+        sim.simulate()
+        self.assertTrue(sim.profits == [0] * 50)
+        self.assertTrue(sim.dict()['legs'][0]['purchase_rate'] == 0)
+
+    def test_bogus(self):
+        '''Test bogus parameters'''
+        route = [(['In'], 9), (['Ri'], 8)]
+        for kwargs in [
+                {'route': route[:1]}, {'broker': 5}, {'policy': 'bogus'},
+                {'runs': 0}, {'runs': 100001}, {'bankroll': -1},
+                {'seed': 'x'}]:
+            params = {'route': route}
+            params.update(kwargs)
+            with self.assertRaises(ValueError):
+                TradeRun(**params)
@@ -0,0 +1,130 @@
+'''test_executor.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import os
+import sys
+import time
+import unittest
+from mock import patch
+from falcon import testing
+import pytest
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api
+from traveller_api.executor import TaskPool, TASK_POOL, task_seed
+from traveller_api.executor import PoolBusy, TaskTimeout, ResultTooLarge
+from traveller_api.util import randint, thread_rng
+
+
+def roll(count):
+    '''Task: count rolls of 1D using thread RNG'''
+    return [randint(1, 6) for _ in range(count)]
+
+
+def pause(seconds):
+    '''Task: sleep for seconds'''
+    time.sleep(seconds)
+    return seconds
+
+
+def pid():
+    '''Task: process ID'''
+    return os.getpid()
+
+
+@pytest.fixture
+def client():
+    '''API test client'''
+    return testing.TestClient(api)
+
+
+class TestTaskPool(unittest.TestCase):
+    '''TaskPool tests'''
+
+    def setUp(self):
+        self.pool = TaskPool(max_workers=2, max_queue=4, timeout=10)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_map(self):
+        '''Test results are in order, run in pool processes'''
+        self.assertTrue(
+            self.pool.map(pause, [(0.1,), (0,), (0.05,)]) == [0.1, 0, 0.05])
+        self.assertFalse(os.getpid() in self.pool.map(pid, [()]))
+        self.assertTrue(
+            self.pool._executor._mp_context.get_start_method() ==  # noqa
+            'forkserver')
+        self.assertTrue(self.pool.map(pid, [()], inline=True) == [os.getpid()])
+        self.assertTrue(self.pool.pending == 0)
+
+    def test_imap(self):
+        '''Test imap submits tasks at once, yields results in order'''
+        results = self.pool.imap(pause, [(0.2,), (0.1,)])
+        self.assertTrue(self.pool.pending == 2)
+        with self.assertRaises(PoolBusy):
+            self.pool.imap(pause, [(0,)] * 3)
+        self.assertTrue(list(results) == [0.2, 0.1])
+        results = self.pool.imap(roll, [(1,), (2,)], seed=1, inline=True)
+        self.assertTrue(self.pool.pending == 0)
+        self.assertTrue(
+            list(results) == self.pool.map(roll, [(1,), (2,)], seed=1))
+
+    def test_seed(self):
+        '''Test seeded results do not depend on process, leave RNG alone'''
+        rng = thread_rng()
+        tasks = [(5,), (5,), (5,)]
+        pooled = self.pool.map(roll, tasks, seed=42)
+        inline = self.pool.map(roll, tasks, seed=42, inline=True)
+        self.assertTrue(pooled == inline)
+        self.assertTrue(pooled[0] != pooled[1])
+        self.assertTrue(thread_rng() is rng)
+        self.assertTrue(task_seed(42, 1) == '42:1')
+
+    def test_busy(self):
+        '''Test jobs that do not fit in the queue are rejected'''
+        with self.assertRaises(PoolBusy):
+            self.pool.map(pause, [(0,)] * 5)
+        self.assertTrue(self.pool.pending == 0)
+
+    def test_timeout(self):
+        '''Test timeout, queue slots released when tasks finish'''
+        with self.assertRaises(TaskTimeout):
+            self.pool.map(pause, [(0.5,)] * 4, timeout=0.1)
+        self.pool.shutdown()
+        self.assertTrue(self.pool.pending == 0)
+
+    def test_result_size(self):
+        '''Test oversize results are rejected'''
+        self.pool.max_result_size = 100
+        with self.assertRaises(ResultTooLarge):
+            self.pool.map(roll, [(1000,)])
+        with self.assertRaises(ResultTooLarge):
+            self.pool.map(roll, [(1000,)], inline=True)
+        self.assertTrue(len(self.pool.map(roll, [(10,)])[0]) == 10)
+
+    def test_reset_all(self):
+        '''Test forked child forgets parent's executor'''
+        self.pool.map(pid, [()])
+        TaskPool.reset_all()
+        self.assertTrue(self.pool._executor is None)    # noqa
+
+
+def test_busy_api(client):
+    '''Test PoolBusy => 503 with Retry-After'''
+    with patch.object(TASK_POOL, 'max_queue', 0):
+        resp = client.simulate_get(
+            '/ct/lbb2/cargogen/simulate',
+            query_string='route=A867949-C&route=B560A87-D&runs=20000')
+    assert resp.status == '503 Service Unavailable'
+    assert resp.headers['Retry-After'] == '5'
+
+
+def test_timeout_api(client):
+    '''Test TaskTimeout => 504'''
+    with patch.object(TASK_POOL, 'timeout', 0):
+        resp = client.simulate_get(
+            '/ct/lbb6/planet/generate', query_string='count=10000&seed=1')
+    assert resp.status == '504 Gateway Timeout'
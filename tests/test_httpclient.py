@@ -0,0 +1,179 @@
+'''test_httpclient.py'''
+
+# pragma pylint: disable=C0413, E0401
+
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.httpclient import HTTPClient, CircuitBreaker, CircuitOpen
+from traveller_api.util import RestQuery
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    '''
+    Stub API server
+    - /ok?<params>: 200, JSON of params
+    - /slow: 200 after 0.5 s
+    - /flaky: 503 for the first server.flaky requests, then 200
+    - /down: 503
+    - /loop: 302 to /loop
+    '''
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):    # pylint: disable=C0103
+        '''GET'''
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+        path, _, query = self.path.partition('?')
+        status = 200
+        if path == '/slow':
+            time.sleep(0.5)
+        elif path == '/flaky':
+            with server.lock:
+                server.flaky -= 1
+                if server.flaky >= 0:
+                    status = 503
+        elif path == '/down':
+            status = 503
+        elif path == '/loop':
+            status = 302
+        body = json.dumps({'query': query}).encode('utf-8')
+        self.send_response(status)
+        if status == 302:
+            self.send_header('Location', '/loop')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):    # pylint: disable=W0221
+        '''Quiet'''
+
+
+class TestHTTPClient(unittest.TestCase):
+    '''HTTPClient tests against a local stub server'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.url = 'http://127.0.0.1:{}'.format(cls.server.server_port)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests = 0
+        self.server.connections = set()
+        self.server.flaky = 0
+        self.client = HTTPClient(
+            read_timeout=0.2, retries=2, backoff=0.01,
+            failure_threshold=3, reset_timeout=0.2)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_keep_alive(self):
+        '''Test requests reuse one connection'''
+        for indx in range(5):
+            resp = self.client.get(self.url + '/ok', params={'n': indx})
+            self.assertTrue(resp.status_code == 200)
+            self.assertTrue(resp.json() == {'query': 'n={}'.format(indx)})
+        self.assertTrue(len(self.server.connections) == 1)
+
+    def test_timeout(self):
+        '''Test read timeout, retried'''
+        start = time.time()
+        with self.assertRaises(requests.Timeout):
+            self.client.get(self.url + '/slow')
+        self.assertTrue(self.server.requests == 3)
+        self.assertTrue(time.time() - start < 1.5)
+
+    def test_retry(self):
+        '''Test 503 retried until success'''
+        self.server.flaky = 2
+        resp = self.client.get(self.url + '/flaky')
+        self.assertTrue(resp.status_code == 200)
+        self.assertTrue(self.server.requests == 3)
+
+    def test_retries_bounded(self):
+        '''Test last response returned when retries run out'''
+        resp = self.client.get(self.url + '/down')
+        self.assertTrue(resp.status_code == 503)
+        self.assertTrue(self.server.requests == 3)
+
+    def test_circuit_breaker(self):
+        '''Test circuit opens, refuses requests, closes after trial'''
+        self.client.get(self.url + '/down')
+        with self.assertRaises(CircuitOpen):
+            self.client.get(self.url + '/ok')
+        self.assertTrue(self.server.requests == 3)
+        time.sleep(0.25)
+        resp = self.client.get(self.url + '/ok')
+        self.assertTrue(resp.status_code == 200)
+        self.assertTrue(self.client.breaker('127.0.0.1:{}'.format(
+            self.server.server_port)).state == 'closed')
+
+    def test_circuit_trial_error(self):
+        '''Test trial request failing with other error reopens circuit'''
+        self.client.get(self.url + '/down')
+        time.sleep(0.25)
+        with self.assertRaises(requests.TooManyRedirects):
+            self.client.get(self.url + '/loop')
+        with self.assertRaises(CircuitOpen):
+            self.client.get(self.url + '/ok')
+        time.sleep(0.25)
+        resp = self.client.get(self.url + '/ok')
+        self.assertTrue(resp.status_code == 200)
+
+    def test_connection_error(self):
+        '''Test connection refused raised as ConnectionError'''
+        client = HTTPClient(retries=1, backoff=0.01)
+        with self.assertRaises(requests.ConnectionError):
+            client.get('http://127.0.0.1:1/ok')
+
+    def test_rest_query(self):
+        '''Test RestQuery.get() uses shared client'''
+        resp = RestQuery.get(self.url + '/ok', {'a': 1})
+        self.assertTrue(resp.json() == {'query': 'a=1'})
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    '''CircuitBreaker tests'''
+
+    def test_states(self):
+        '''Test closed => open => half open => open => closed'''
+        breaker = CircuitBreaker(
+            'host', failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow() and breaker.state == 'closed')
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        self.assertTrue(breaker.state == 'open')
+        time.sleep(0.06)
+        self.assertTrue(breaker.state == 'half_open')
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertTrue(breaker.state == 'open')
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.state == 'closed' and breaker.allow())
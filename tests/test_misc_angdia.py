@@ -1,5 +1,6 @@
 '''test_misc_angdia.py'''
 
+import json
 import falcon
 from falcon import testing
 import pytest
@@ -31,3 +32,39 @@ def test_angdia_valid(client):
 
     assert expected_result == resp.json
     assert resp.status == falcon.HTTP_200
+
+
+def test_angdia_missing_invalid(client):
+    '''Test missing, invalid parameters'''
+    for query_string in ['distance=4', 'diameter=3', '']:
+        resp = client.simulate_get('/misc/angdia', query_string=query_string)
+        assert resp.status == '400 Missing parameter'
+    for query_string in ['distance=foo&diameter=3',
+                         'distance=1&distance=2&diameter=1&diameter=2&' +
+                         'diameter=3']:
+        resp = client.simulate_get('/misc/angdia', query_string=query_string)
+        assert resp.status == '400 Invalid parameter'
+
+
+def test_angdia_array(client):
+    '''Test array mode (repeated parameters, POST)'''
+    expected_result = {
+        'ang_dia_deg': [36.87, 20.556, 36.87],
+        'ang_dia_rad': [0.644, 0.359, 0.644],
+        'diameter': [3.0, 3.0, 3.0],
+        'distance': [4.0, 8.0, 4.0]
+    }
+    resp = client.simulate_get(
+        '/misc/angdia',
+        query_string='distance=4&distance=8&distance=4&diameter=3')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json == expected_result
+
+    resp = client.simulate_post(
+        '/misc/angdia',
+        body=json.dumps({'distance': [4, 8, 4], 'diameter': [3, 3, 3]}))
+    assert resp.status == falcon.HTTP_200
+    assert resp.json == expected_result
+
+    resp = client.simulate_post('/misc/angdia', body='{"distance": 4}')
+    assert resp.status == '400 Invalid parameter'
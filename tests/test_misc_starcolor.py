@@ -0,0 +1,130 @@
+'''test_misc_starcolor.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import json
+import sys
+import os
+import falcon
+from falcon import testing
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api
+from traveller_api.misc import StarColor, StarColorBatch, StarColorPalette
+from traveller_api.misc.db import Base, Schemas
+from traveller_api.misc.palette import Palette
+from traveller_api.starcode import StarCode
+
+ROWS = [
+    ('G2 V', 255, 244, 234),
+    ('M0 V', 255, 204, 111),
+    ('DA', 160, 190, 255),
+    ('MD', 255, 150, 100)
+]
+
+
+@pytest.fixture
+def palette(tmpdir):
+    '''Palette loaded from test starcolor DB'''
+    sqlite_file = str(tmpdir.join('starcolor.sqlite'))
+    engine = create_engine('sqlite:///{}'.format(sqlite_file))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for code, red, green, blue in ROWS:
+        session.add(Schemas.StarColorTable(
+            code=code, red=red, green=green, blue=blue))
+    session.commit()
+    session.close()
+    engine.dispose()
+    return Palette.from_sqlite(sqlite_file)
+
+
+@pytest.fixture
+def client(palette):
+    '''API test client using test palette'''
+    app = falcon.API()
+    app.add_route('/misc/starcolor', StarColor(palette))
+    app.add_route('/misc/starcolor/batch', StarColorBatch(palette))
+    app.add_route('/misc/starcolor/palette', StarColorPalette(palette))
+    return testing.TestClient(app)
+
+
+def test_palette(palette):
+    '''Test palette load and lookup'''
+    assert len(palette) == 4
+    assert palette.codes == ('DA', 'G2 V', 'M0 V', 'MD')
+    assert palette.lookup(StarCode.parse('G2V')) == (255, 244, 234)
+    assert palette.lookup(StarCode.parse('D M')) == (255, 150, 100)
+    assert palette.lookup(StarCode.parse('K0 V')) is None
+    assert palette.packed()[3:6] == bytes([255, 244, 234])
+    assert palette.csv().splitlines()[0] == 'code,red,green,blue'
+    assert len(Palette.from_sqlite('/nonexistent/starcolor.sqlite')) == 0
+
+
+def test_starcolor(client):
+    '''Test single code lookup from palette'''
+    resp = client.simulate_get('/misc/starcolor', query_string='code=M0V')
+    assert resp.status == falcon.HTTP_200
+    assert resp.json == {
+        'code': 'M0 V',
+        'rgb': {'red': 255, 'green': 204, 'blue': 111}
+    }
+    resp = client.simulate_get('/misc/starcolor', query_string='code=X9')
+    assert resp.status == '400 Invalid code'
+
+
+def test_batch(client):
+    '''Test batch lookup'''
+    resp = client.simulate_get(
+        '/misc/starcolor/batch',
+        query_string='code=G2V&code=bogus&code=K0V&code=G2V')
+    assert resp.status == falcon.HTTP_200
+    colors = resp.json['colors']
+    assert [color['code'] for color in colors] == \
+        ['G2 V', None, 'K0 V', 'G2 V']
+    assert colors[0]['rgb'] == {'red': 255, 'green': 244, 'blue': 234}
+    assert colors[1]['rgb'] is None
+    assert colors[2]['rgb'] is None
+
+    resp = client.simulate_post(
+        '/misc/starcolor/batch', body=json.dumps({'codes': ['MD']}))
+    assert resp.json['colors'][0]['rgb']['blue'] == 100
+    resp = client.simulate_post('/misc/starcolor/batch', body='[]')
+    assert resp.status == '400 Invalid parameter'
+
+
+def test_export(client, palette):
+    '''Test palette export formats and conditional GET'''
+    resp = client.simulate_get('/misc/starcolor/palette')
+    assert resp.json['codes'] == list(palette.codes)
+    assert resp.json['rgb'][1] == [255, 244, 234]
+    etag = resp.headers['etag']
+
+    resp = client.simulate_get(
+        '/misc/starcolor/palette', query_string='format=csv')
+    assert resp.headers['content-type'] == 'text/csv'
+    assert len(resp.text.splitlines()) == 5
+
+    resp = client.simulate_get(
+        '/misc/starcolor/palette', query_string='format=rgb')
+    assert resp.headers['content-type'] == 'application/octet-stream'
+    assert resp.content == palette.packed()
+    assert resp.headers['x-palette-count'] == '4'
+
+    resp = client.simulate_get(
+        '/misc/starcolor/palette', headers={'If-None-Match': etag})
+    assert resp.status == falcon.HTTP_304
+    resp = client.simulate_get(
+        '/misc/starcolor/palette', query_string='format=gif')
+    assert resp.status == '400 Invalid parameter'
+
+
+def test_routes():
+    '''Test palette routes are registered'''
+    resp = testing.TestClient(api).simulate_get(
+        '/misc/starcolor/palette', query_string='doc=true')
+    assert resp.status == falcon.HTTP_200
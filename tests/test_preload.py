@@ -0,0 +1,42 @@
+'''test_preload.py'''
+
+# pragma pylint: disable=C0413, E0401
+
+import gc
+import os
+import sys
+import unittest
+from mock import patch
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api import DB
+from traveller_api.preload import preload, post_fork, rss_kb
+from traveller_api.util import thread_rng
+from traveller_api.ct.lbb6.catalogue import SQLITE_FILE
+
+
+class TestPreload(unittest.TestCase):
+    '''Test preload/post-fork hooks'''
+
+    def tearDown(self):
+        gc.unfreeze()
+        gc.enable()
+
+    def test_preload(self):
+        '''preload() builds and freezes static data'''
+        preload()
+        self.assertTrue(gc.get_freeze_count() > 0)
+        self.assertFalse(gc.isenabled())
+        self.assertTrue(rss_kb() is None or rss_kb() > 0)
+
+    def test_post_fork(self):
+        '''post_fork() disposes DB engines, reseeds RNG, enables GC'''
+        database = DB(SQLITE_FILE)
+        rng = thread_rng()
+        gc.disable()
+        with patch.object(database.engine, 'dispose') as dispose:
+            post_fork()
+        dispose.assert_called_once_with()
+        self.assertFalse(thread_rng() is rng)
+        self.assertTrue(gc.isenabled())
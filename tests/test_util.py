@@ -5,6 +5,7 @@
 import logging
 import sys
 import os
+import threading
 import unittest
 import falcon
 from falcon import testing
@@ -15,6 +16,7 @@ sys.path.insert(
 print(sys.path)
 from traveller_api.app import api
 from traveller_api.util import parse_query_string, RequestProcessor
+from traveller_api.util import thread_rng, randint, choice
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -123,6 +125,16 @@ class TestRequestProcessor(unittest.TestCase):
             self.rp.query_parameters['list'] == ['item1']
         )
 
+        # Repeated list, repeats significant
+        self.rp.repeatable_parameters = ('list',)
+        query_string = 'list=item1&list=item2&list=item1'
+        self.rp.query_parameters['list'] = []
+        self.rp.parse_query_string(query_string)
+        self.assertTrue(
+            self.rp.query_parameters['list'] == ['item1', 'item2', 'item1']
+        )
+        del self.rp.repeatable_parameters
+
         # Boolean
         query_string = 'boolean=false'
         self.rp.parse_query_string(query_string)
@@ -142,3 +154,30 @@ class TestRequestProcessor(unittest.TestCase):
         req = DummyRequest()
         LOGGER.debug('rp.get_doc(req) = %s', self.rp.get_doc(req))
         self.assertTrue(self.rp.get_doc(req)['doc'] == 'Request processor')
+
+
+class TestThreadRNG(unittest.TestCase):
+    '''Test per-thread RNG'''
+
+    def test_thread_rng(self):
+        '''Each thread has its own RNG instance'''
+        rngs = []
+        thread = threading.Thread(target=lambda: rngs.append(thread_rng()))
+        thread.start()
+        thread.join()
+        self.assertTrue(thread_rng() is thread_rng())
+        self.assertFalse(rngs[0] is thread_rng())
+        for _ in range(100):
+            self.assertTrue(1 <= randint(1, 6) <= 6)
+            self.assertTrue(choice('ab') in 'ab')
+
+    def test_parse_query(self):
+        '''parse_query() returns new dict, leaves defaults unchanged'''
+        rp = RequestProcessor()
+        defaults = {'list': [], 'flag': False, 'value': None}
+        query_parameters = rp.parse_query(
+            'list=a&list=b&flag=true&value=1', defaults)
+        self.assertEqual(
+            query_parameters, {'list': ['a', 'b'], 'flag': True, 'value': '1'})
+        self.assertEqual(defaults, {'list': [], 'flag': False, 'value': None})
+        self.assertEqual(rp.query_parameters, {})
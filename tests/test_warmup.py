@@ -0,0 +1,99 @@
+'''test_warmup.py'''
+
+# pragma pylint: disable=C0413, E0401, W0621
+
+import os
+import sys
+import time
+import unittest
+from mock import patch
+import falcon
+from falcon import testing
+import pytest
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.abspath(__file__)) + '/../')
+from traveller_api.app import api
+from traveller_api import warmup
+from traveller_api.warmup import WarmupState, Ready, WARMUP_REQUESTS
+from traveller_api.middleware import REQUEST_COUNT
+
+
+@pytest.fixture
+def client():
+    '''API test client'''
+    return testing.TestClient(api)
+
+
+def _ping_count():
+    '''Requests to /ping recorded in metrics'''
+    return REQUEST_COUNT.labels(
+        'egor045_trav_api', 'GET', '/ping', '200')._value.get()    # noqa
+
+
+class TestWarmup(unittest.TestCase):
+    '''Warm-up tests'''
+
+    def test_warm_up(self):
+        '''Test every route warms up, requests not in metrics'''
+        state = WarmupState()
+        count = _ping_count()
+        warmup.warm_up(state)
+        self.assertTrue(state.status == 'ready' and state.ready)
+        self.assertTrue(state.duration > 0)
+        self.assertTrue(len(state.routes) == len(WARMUP_REQUESTS))
+        self.assertTrue(_ping_count() == count)
+        # Already warm
+        self.assertTrue(warmup.warm_up(state).status == 'ready')
+
+    def test_failed(self):
+        '''Test failing route fails warm-up'''
+        state = WarmupState()
+        with patch.object(warmup, 'WARMUP_REQUESTS', [('/bogus', '')]):
+            warmup.warm_up(state)
+        self.assertTrue(state.status == 'failed' and not state.ready)
+        self.assertTrue(state.routes == {'/bogus': falcon.HTTP_404})
+
+    def test_background(self):
+        '''Test /ready starts background warm-up, then reports ready'''
+        ready_api = falcon.API()
+        ready_api.add_route('/ready', Ready(WarmupState(), 'sync'))
+        ready_client = testing.TestClient(ready_api)
+        resp = ready_client.simulate_get('/ready')
+        assert resp.status == falcon.HTTP_503
+        assert resp.headers['Retry-After'] == '1'
+        for _ in range(100):
+            resp = ready_client.simulate_get('/ready')
+            if resp.status == falcon.HTTP_200:
+                break
+            time.sleep(0.05)
+        assert resp.json['ready'] is True
+        assert resp.json['status'] == 'ready'
+
+    def test_off(self):
+        '''Test WARMUP=off is ready without warm-up'''
+        state = WarmupState()
+        ready_api = falcon.API()
+        ready_api.add_route('/ready', Ready(state, 'off'))
+        resp = testing.TestClient(ready_api).simulate_get('/ready')
+        assert resp.status == falcon.HTTP_200
+        assert resp.json['status'] == 'off'
+        assert resp.json['warmup_seconds'] is None
+
+
+def test_ready(client):
+    '''Test /ready reports warm-up, cache states'''
+    warmup.warm_up()
+    resp = client.simulate_get('/ready')
+    assert resp.status == falcon.HTTP_200
+    doc = resp.json
+    assert doc['ready'] is True
+    assert doc['warmup_seconds'] is not None
+    assert doc['routes']['/ct/lbb6/star'] == falcon.HTTP_200
+    assert doc['caches']['ct_lbb6_catalogue']['entries'] == 1
+    assert doc['caches']['responses']['backend'] == 'memory'
+    assert doc['pid'] == os.getpid()
+    with patch.object(warmup.STATE, 'status', 'running'):
+        resp = client.simulate_get('/ready')
+    assert resp.status == falcon.HTTP_503
+    assert resp.json['ready'] is False
@@ -2,6 +2,7 @@
 
 import logging
 import os
+import weakref
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
@@ -20,12 +21,25 @@ BASE = declarative_base()
 class DB(object):
     '''SQLAlchemy SQLite access class'''
 
+    # Live instances (see dispose_all())
+    _instances = weakref.WeakSet()
+
     def __init__(self, sqlite_file):
         LOGGER.debug('sqlite_file = %s', sqlite_file)
         LOGGER.debug('pwd = %s', os.getcwd())
         self.engine = create_engine(
             'sqlite:///{}'.format(sqlite_file))
         self.session = sessionmaker(bind=self.engine)
+        self._instances.add(self)
+
+    @classmethod
+    def dispose_all(cls):
+        '''
+        Dispose of the connection pool of every live DB (e.g. after fork(),
+        so processes never share SQLite connections)
+        '''
+        for database in list(cls._instances):
+            database.engine.dispose()
 
 
 class Config(object):
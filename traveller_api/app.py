@@ -3,17 +3,26 @@
 import falcon
 import traveller_api.ct as ct
 import traveller_api.misc as misc
-# import traveller_api.mt as mt
+import traveller_api.mt as mt
 import traveller_api.t5.cargogen as t5_cargogen
 import traveller_api.t5.orbit as t5_orbit
 import traveller_api.util as util
 import traveller_api.error_handler as error_handler
+import traveller_api.executor as executor
 import traveller_api.middleware as middleware
 import traveller_api.api_version as api_version
+import traveller_api.warmup as warmup
 
+admission_control = middleware.AdmissionControl()
 api = application = falcon.API(
-    middleware=middleware.PrometheusMetrics()
+    middleware=[
+        middleware.PrometheusMetrics(),
+        middleware.ResponseCaching(),
+        middleware.RequestCoalescing(),
+        admission_control
+    ]
 )
+api.add_error_handler(executor.PoolError, executor.handle_pool_error)
 
 # Misc APIs
 # api.add_route('/misc/angdia/{distance}/{diameter}', misc.AngDia())
@@ -21,30 +30,48 @@ api.add_route('/misc/angdia', misc.AngDia())
 
 # Classic Traveller APIs
 api.add_route('/ct/lbb6/star', ct.lbb6.Star())
+api.add_route('/ct/lbb6/star/orbits', ct.lbb6.StarOrbits())
 api.add_route('/ct/lbb6/orbit', ct.lbb6.Orbit())
 api.add_route('/ct/lbb6/planet', ct.lbb6.Planet())
+api.add_route(
+    '/ct/lbb6/planet/temperature', ct.lbb6.PlanetTemperature())
+api.add_route('/ct/lbb6/planet/placement', ct.lbb6.PlanetPlacement())
+api.add_route('/ct/lbb6/planet/generate', ct.lbb6.PlanetGenerate())
+api.add_route('/ct/lbb6/catalogue', ct.lbb6.Catalogue())
+api.add_route('/ct/lbb6/system', ct.lbb6_expanded_sysgen.System())
 
-'''# MegaTraveller World Builder's Handbook APIs
+# MegaTraveller World Builder's Handbook APIs
+api.add_route('/mt/wbh/star', mt.wbh.star.Star())
+api.add_route('/mt/wbh/star/batch', mt.wbh.star.StarBatch())
 api.add_route('/mt/wbh/star/{code}', mt.wbh.star.Star())
 api.add_route(
     '/mt/wbh/star/{code}/orbit/{orbit_no:int}',
-    mt.wbh.orbit.Orbit())'''
+    mt.wbh.orbit.Orbit())
 
 # T5 Cargogen API
 api.add_route('/t5/cargogen', t5_cargogen.CargoGen())
+api.add_route('/t5/cargogen/matrix', t5_cargogen.Matrix())
 
 # CT Cargogen API
 api.add_route('/ct/lbb2/cargogen/purchase', ct.lbb2.cargogen.Purchase())
 api.add_route('/ct/lbb2/cargogen/sale', ct.lbb2.cargogen.Sale())
+api.add_route('/ct/lbb2/cargogen/market', ct.lbb2.cargogen.Market())
+api.add_route('/ct/lbb2/cargogen/simulate', ct.lbb2.cargogen.Simulate())
 
 # T5 orbit API
 api.add_route('/t5/orbit', t5_orbit.Orbit())
+api.add_route('/t5/orbit/batch', t5_orbit.OrbitBatch())
+api.add_route('/t5/orbit/inverse', t5_orbit.OrbitInverse())
 
 # Misc starcolor API
 # api.add_route('/misc/starcolor/{code}', misc.StarColor())
 # api.add_route('/misc/starcolour/{code}', misc.StarColor())
 api.add_route('/misc/starcolor', misc.StarColor())
 api.add_route('/misc/starcolour', misc.StarColor())
+api.add_route('/misc/starcolor/batch', misc.StarColorBatch())
+api.add_route('/misc/starcolour/batch', misc.StarColorBatch())
+api.add_route('/misc/starcolor/palette', misc.StarColorPalette())
+api.add_route('/misc/starcolour/palette', misc.StarColorPalette())
 
 # Metrics
 api.add_route('/metrics', middleware.Metrics())
@@ -55,6 +82,9 @@ api.add_route('/error_handler/{strng}', error_handler.Foo())
 # Ping endpoint
 api.add_route('/ping', util.Ping())
 
+# Readiness (warm-up) endpoint
+api.add_route('/ready', warmup.Ready())
+
 # CT LBB3 encounter table
 api.add_route('/ct/lbb3/encounter', ct.lbb3.encounter.EncounterTable())
 
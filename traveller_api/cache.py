@@ -0,0 +1,376 @@
+'''cache.py'''
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from prometheus_client import Counter, Gauge
+try:
+    import redis
+except ImportError:     # Optional (CACHE_BACKEND=redis only)
+    redis = None
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+# Cache configuration (environment variables)
+# - CACHE_BACKEND: memory (per worker), sqlite (shared by the workers on
+#   a node) or redis
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_PATH = os.environ.get(
+    'CACHE_PATH',
+    os.path.join(tempfile.gettempdir(), 'traveller_api_cache.sqlite'))
+CACHE_URL = os.environ.get('CACHE_URL', 'redis://localhost:6379/0')
+# Seconds before entries expire
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+# Total size (bytes of JSON) of entries (memory, sqlite backends)
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Eviction (sqlite backend) removes entries until the cache is within
+# this fraction of its limits, so most writes do not evict
+CACHE_LOW_WATER = float(os.environ.get('CACHE_LOW_WATER', 0.9))
+
+CACHE_REQUESTS = Counter(
+    'cache_requests',
+    'Cache lookups',
+    ['backend', 'result'])
+CACHE_HIT_RATIO = Gauge(
+    'cache_hit_ratio',
+    'Cache hits / lookups (this process)',
+    ['backend'],
+    multiprocess_mode='liveall')
+CACHE_EVICTIONS = Counter(
+    'cache_evictions',
+    'Cache entries evicted (size limit)',
+    ['backend'])
+
+
+class CacheBackend(object):
+    '''
+    Cache interface: JSON-serialisable values by string key
+
+    Subclasses implement _get(key) (JSON text, None if missing or
+    expired), _set(key, text, ttl), delete(key), clear() and
+    __len__()
+    '''
+
+    name = None
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        '''Return cached value for key (None if missing or expired)'''
+        text = self._get(key)
+        with self._stats_lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            ratio = self.hits / float(self.hits + self.misses)
+        CACHE_REQUESTS.labels(
+            self.name, 'miss' if text is None else 'hit').inc()
+        CACHE_HIT_RATIO.labels(self.name).set(ratio)
+        return None if text is None else json.loads(text)
+
+    def set(self, key, value, ttl=None):
+        '''Cache value for key for ttl seconds (default self.ttl)'''
+        self._set(
+            key, json.dumps(value, sort_keys=True),
+            self.ttl if ttl is None else ttl)
+
+    def get_or_set(self, key, func, ttl=None):
+        '''Return cached value for key, caching func() on a miss'''
+        value = self.get(key)
+        if value is None:
+            value = func()
+            self.set(key, value, ttl)
+        return value
+
+    def stats(self):
+        '''Hit/miss counts for this process'''
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        return {
+            'backend': self.name,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / float(max(1, hits + misses)), 6)
+        }
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, text, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        '''Remove key'''
+        raise NotImplementedError
+
+    def clear(self):
+        '''Remove every entry'''
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    '''Per-process LRU cache'''
+
+    name = 'memory'
+
+    def __init__(
+            self,
+            ttl=CACHE_TTL,
+            max_entries=CACHE_MAX_ENTRIES,
+            max_bytes=CACHE_MAX_BYTES):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, text = entry
+            if expires < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def _remove(self, key):
+        '''Remove key (caller holds lock)'''
+        _, text = self._entries.pop(key)
+        self.size -= len(text)
+
+    def _set(self, key, text, ttl):
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + ttl, text)
+            self.size += len(text)
+            while len(self._entries) > self.max_entries or \
+                    self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            CACHE_EVICTIONS.labels(self.name).inc(evicted)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    '''
+    Node-local cache in an SQLite file (WAL mode), shared by every
+    process that opens the same path
+
+    Each thread of each process has its own connection. When the entry
+    or size limit is exceeded, expired entries then batches of the
+    oldest entries are removed down to CACHE_LOW_WATER of the limits
+    (reads never write, so lookups do not contend)
+    '''
+
+    name = 'sqlite'
+
+    def __init__(
+            self,
+            path=CACHE_PATH,
+            ttl=CACHE_TTL,
+            max_entries=CACHE_MAX_ENTRIES,
+            max_bytes=CACHE_MAX_BYTES):
+        super().__init__(ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'size INTEGER NOT NULL, stored REAL NOT NULL, '
+                'expires REAL NOT NULL)')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS cache_stored ON cache (stored)')
+            # Entry count and total size, kept by triggers (so writes
+            # need not count the table)
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_size ('
+                'id INTEGER PRIMARY KEY CHECK (id = 0), '
+                'entries INTEGER NOT NULL, size INTEGER NOT NULL)')
+            conn.execute(
+                'INSERT OR IGNORE INTO cache_size '
+                'SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache')
+            conn.execute(
+                'CREATE TRIGGER IF NOT EXISTS cache_insert '
+                'AFTER INSERT ON cache BEGIN UPDATE cache_size SET '
+                'entries = entries + 1, size = size + NEW.size; END')
+            conn.execute(
+                'CREATE TRIGGER IF NOT EXISTS cache_delete '
+                'AFTER DELETE ON cache BEGIN UPDATE cache_size SET '
+                'entries = entries - 1, size = size - OLD.size; END')
+
+    def _connection(self):
+        '''This thread's connection (new after fork())'''
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires >= ?',
+            (key, time.time())).fetchone()
+        return None if row is None else row[0]
+
+    def _set(self, key, text, ttl):
+        now = time.time()
+        with self._connection() as conn:
+            # DELETE then INSERT (not INSERT OR REPLACE) so the
+            # cache_size triggers see the replaced entry
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+            conn.execute(
+                'INSERT INTO cache VALUES (?, ?, ?, ?, ?)',
+                (key, text, len(text), now, now + ttl))
+            entries, size = self._size(conn)
+            if entries > self.max_entries or size > self.max_bytes:
+                self._evict(conn, now)
+
+    @staticmethod
+    def _size(conn):
+        '''(entries, total size) of cache'''
+        return conn.execute(
+            'SELECT entries, size FROM cache_size').fetchone()
+
+    def _evict(self, conn, now):
+        '''
+        Remove expired, then oldest, entries in batches until the cache
+        is within CACHE_LOW_WATER of its limits
+        '''
+        max_entries = int(self.max_entries * CACHE_LOW_WATER)
+        max_bytes = int(self.max_bytes * CACHE_LOW_WATER)
+        evicted = conn.execute(
+            'DELETE FROM cache WHERE expires < ?', (now,)).rowcount
+        entries, size = self._size(conn)
+        while entries > max_entries or size > max_bytes:
+            # Enough of the oldest entries to meet both limits, assuming
+            # they are of average size
+            batch = max(
+                entries - max_entries,
+                -(-(size - max_bytes) * entries // size),
+                1)
+            deleted = conn.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY stored LIMIT ?)', (batch,)).rowcount
+            if not deleted:
+                break
+            evicted += deleted
+            entries, size = self._size(conn)
+        CACHE_EVICTIONS.labels(self.name).inc(evicted)
+
+    def delete(self, key):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM cache')
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM cache WHERE expires >= ?',
+            (time.time(),)).fetchone()[0]
+
+
+class RedisCache(CacheBackend):
+    '''
+    Cache in a Redis (or Redis protocol compatible) server
+
+    Keys are prefixed with prefix; size limits are left to the server's
+    maxmemory policy. Needs the redis package
+    '''
+
+    name = 'redis'
+
+    def __init__(
+            self, url=CACHE_URL, ttl=CACHE_TTL, prefix='traveller_api:'):
+        if redis is None:
+            raise ImportError('CACHE_BACKEND=redis needs the redis package')
+        super().__init__(ttl)
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+
+    def _get(self, key):
+        text = self.client.get(self.prefix + key)
+        return None if text is None else text.decode('utf-8')
+
+    def _set(self, key, text, ttl):
+        self.client.set(self.prefix + key, text, px=int(ttl * 1000))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(
+            1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+BACKENDS = {
+    'memory': MemoryCache,
+    'sqlite': SQLiteCache,
+    'redis': RedisCache
+}
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def create_cache(backend=CACHE_BACKEND, **kwargs):
+    '''Return new cache using named backend (ValueError if unknown)'''
+    if backend not in BACKENDS:
+        raise ValueError('Invalid cache backend {}'.format(backend))
+    return BACKENDS[backend](**kwargs)
+
+
+def get_cache():
+    '''Process-wide cache (CACHE_BACKEND), created on first use'''
+    global _CACHE   # pylint: disable=W0603
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = create_cache()
+            LOGGER.debug('Using %s cache', _CACHE.name)
+        return _CACHE
@@ -2,6 +2,7 @@ import configparser
 
 from . import lbb6
 from . import lbb2
+from . import lbb6_expanded_sysgen
 
 config = configparser.ConfigParser()
 config.read('ct.ini')
@@ -1,11 +1,13 @@
 '''ct/lbb2/cargogen/__init__.py'''
 
+import json
 import logging
 import falcon
 from prometheus_client import Histogram
 from traveller_api.util import RequestProcessor
 from ...lbb3.worldgen.planet import System  # noqa
-from .cargo import Cargo, CargoSale
+from .cargo import Cargo, CargoSale, MarketBoard
+from .simulate import TradeRun
 from .... import Config
 from ....util import parse_query_string
 
@@ -20,6 +22,23 @@ REQUEST_TIME = Histogram(
     'ct_lbb2_cargogen latency')
 
 
+def market_trade_codes(query_parameters):
+    '''
+    Determine market trade codes from either market_tc or market_uwp
+    (400 if market_uwp is invalid)
+    '''
+    if query_parameters['market_uwp'] is None:
+        return query_parameters['market_tc']
+    try:
+        planet = System(uwp=query_parameters['market_uwp'])
+    except TypeError as err:
+        raise falcon.HTTPError(
+            title='Invalid UWP',
+            status='400 Invalid UWP',
+            description=str(err))
+    return planet.trade_codes
+
+
 class Purchase(RequestProcessor):
     '''
     Return CT LBB2 cargo object
@@ -29,6 +48,7 @@ class Purchase(RequestProcessor):
     - source_uwp: UWP of source world
     - source_tc: Trade classification of source world (may be repeated)
     - population: Population of source world
+    - analytic: Include exact actual unit price distribution (true/false)
 
     If source_uwp is specified, trade codes and population from that UWP take
     precedence over any source_tc or population specified as options.source_uwp
@@ -68,50 +88,62 @@ class Purchase(RequestProcessor):
     - <purchase DM> is the cargo's purchase DM for the specified trade code
     - <resale DM> is the cargo's resale DM for the specified trade code
     - <units> is the unit for quantity - either tons or blank
+
+    If analytic is true, the response also includes
+        "price_distribution": {
+            "mean": <mean unit price>,
+            "percentiles": {"5": <price>, "25": <price>, "50": <price>,
+                            "75": <price>, "95": <price>},
+            "table": [[<unit price>, <probability>], ...]
+        }
+    giving the exact distribution of <actual unit price> over the actual
+    value table
     '''
 
     @REQUEST_TIME.time()
     def on_get(self, req, resp):
         '''GET <apiserver>/ct/lbb2/cargogen/purchase?<options>'''
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'source_uwp': None,
             'source_tc': [],
             'population': None,
+            'analytic': False,
             'doc': False
-        }
+        })
         LOGGER.debug('query_string = %s', req.query_string)
 
-        self.parse_query_string(req.query_string)
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
         else:
-            for param in self.query_parameters:
+            for param in query_parameters:
                 LOGGER.debug(
                     'param %s = %s',
                     param,
-                    self.query_parameters[param])
-            if self.query_parameters['source_uwp'] is None:
+                    query_parameters[param])
+            if query_parameters['source_uwp'] is None:
                 LOGGER.debug('Using TCs from source_tc')
-                trade_codes = self.query_parameters['source_tc']
+                trade_codes = query_parameters['source_tc']
             else:
                 LOGGER.debug(
                     'Using source_uwp %s',
-                    self.query_parameters['source_uwp'])
+                    query_parameters['source_uwp'])
                 try:
-                    planet = System(uwp=self.query_parameters['source_uwp'])
+                    planet = System(uwp=query_parameters['source_uwp'])
                 except TypeError as err:
                     raise falcon.HTTPError(
                         title='Invalid UWP',
                         status='400 Invalid UWP',
                         description=str(err))
                 trade_codes = planet.trade_codes
-                self.query_parameters['population'] = planet.population
+                query_parameters['population'] = planet.population
             LOGGER.debug('trade codes = %s', trade_codes)
             LOGGER.debug(
                 'population = %s',
-                self.query_parameters['population'])
-            cargo = Cargo(trade_codes, self.query_parameters['population'])
+                query_parameters['population'])
+            cargo = Cargo(trade_codes, query_parameters['population'])
+            if query_parameters['analytic'] is True:
+                cargo.determine_price_distribution()
 
             resp.body = cargo.json()
         resp.status = falcon.HTTP_200
@@ -147,6 +179,7 @@ class Sale(RequestProcessor):
     - bribery: Bribery skill available for sale (optional)
     - broker: Broker skill available for sale (optional)
     - quantity: Lot size
+    - analytic: Include exact net unit price distribution (true/false)
 
     If market_uwp is specified, trade codes from that UWP take
     precedence over any market_tc specified as options.
@@ -193,15 +226,22 @@ class Sale(RequestProcessor):
     - <trade classificattion> is market world trade code, either supplied in
         options or derived from market UWP
     - <units> is the unit for quantity - either tons or blank
-    '''
 
-    def __init__(self):
-        self.query_parameters = {}
+    If analytic is true, the response also includes
+        "price_distribution": {
+            "mean": <mean net unit price>,
+            "percentiles": {"5": <price>, "25": <price>, "50": <price>,
+                            "75": <price>, "95": <price>},
+            "table": [[<net unit price>, <probability>], ...]
+        }
+    giving the exact distribution of <net unit price> over the actual
+    value table
+    '''
 
     @REQUEST_TIME.time()
     def on_get(self, req, resp):
         '''GET <apiserver>/ct/lbb2/cargogen/sale?<options>'''
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'cargo': None,
             'market_uwp': None,
             'market_tc': [],
@@ -209,38 +249,249 @@ class Sale(RequestProcessor):
             'bribery': 0,
             'broker': 0,
             'quantity': 0,
+            'analytic': False,
             'doc': False
-        }
+        })
         LOGGER.debug('query_string = %s', req.query_string)
-        self.parse_query_string(req.query_string)
-        for param in self.query_parameters:
-            LOGGER.debug('param %s = %s', param, self.query_parameters[param])
+        for param in query_parameters:
+            LOGGER.debug('param %s = %s', param, query_parameters[param])
 
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
         else:
             try:
                 cargo = CargoSale(
-                    cargo=self.query_parameters['cargo'],
-                    quantity=self.query_parameters['quantity'],
-                    admin=self.query_parameters['admin'],
-                    bribery=self.query_parameters['bribery'],
-                    broker=self.query_parameters['broker'],
-                    trade_codes=self.determine_trade_codes())
+                    cargo=query_parameters['cargo'],
+                    quantity=query_parameters['quantity'],
+                    admin=query_parameters['admin'],
+                    bribery=query_parameters['bribery'],
+                    broker=query_parameters['broker'],
+                    trade_codes=market_trade_codes(
+                        query_parameters))
             except ValueError as err:
                 raise falcon.HTTPError(
                     title='Invalid parameter',
                     status='400 Bad Request',
                     description=str(err))
+            if query_parameters['analytic'] is True:
+                cargo.determine_price_distribution()
             resp.body = cargo.json()
             resp.status = falcon.HTTP_200
 
-    def determine_trade_codes(self):
-        '''Determine trade codes from either market_tc or market_uwp'''
-        if self.query_parameters['market_uwp'] is None:
-            trade_codes = self.query_parameters['market_tc']
+
+class Market(RequestProcessor):
+    '''
+    Return CT LBB2 sale prices for all trade goods at one market
+    GET <apiserver>/ct/lbb2/cargogen/market?<options>
+
+    Options:
+    - market_uwp: UWP of market world
+    - market_tc: Trade classification of market world (may be repeated)
+    - admin: Admin skill available for sale (optional)
+    - bribery: Bribery skill available for sale (optional)
+    - broker: Broker skill available for sale (optional)
+    - sample: Roll one actual value per trade good (true/false, optional)
+
+    If market_uwp is specified, trade codes from that UWP take
+    precedence over any market_tc specified as options.
+
+    Examples:
+    - GET <apiserver>/ct/lbb2/cargogen/market?market_uwp=C776989-A&broker=2
+    - GET <apiserver>/ct/lbb2/cargogen/market?market_tc=In&market_tc=Ri&sample=true
+
+    Returns
+    {
+        "admin": <admin skill level>,
+        "bribery": <bribery skill level>,
+        "broker": <broker skill level>,
+        "goods": [
+            {
+                "base_price": <base price>,
+                "commission": <unit commission>,
+                "expected_gross_unit_price": <expected gross unit price>,
+                "expected_net_unit_price": <expected net unit price>,
+                "id": <cargo id>,
+                "name": <cargo description>,
+                "resale_dm": <resale DM>
+            },
+            ...
+        ],
+        "trade_codes": [ <trade classification>, ...]
+    }
+
+    where
+    - <expected gross unit price> is the mean unit price over the actual
+        value table, using <resale DM> plus admin, bribery and broker skills
+    - <expected net unit price> is <expected gross unit price> less
+        <unit commission>
+    - <unit commission> is broker's commission per unit, based on <broker
+        skill level>
+    - <resale DM> is the sum of the cargo's resale DMs for the market
+        world's trade classifications
+
+    If sample is true, each good also includes
+    - "actual_gross_unit_price": unit price from one actual value roll
+    - "actual_net_unit_price": as above, less <unit commission>
+
+    GET <apiserver>/ct/lbb2/cargogen/market?doc=true returns this text
+    '''
+
+    @REQUEST_TIME.time()
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb2/cargogen/market?<options>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'market_uwp': None,
+            'market_tc': [],
+            'admin': 0,
+            'bribery': 0,
+            'broker': 0,
+            'sample': False,
+            'doc': False
+        })
+        LOGGER.debug('query_string = %s', req.query_string)
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+        else:
+            try:
+                board = MarketBoard(
+                    admin=query_parameters['admin'],
+                    bribery=query_parameters['bribery'],
+                    broker=query_parameters['broker'],
+                    trade_codes=market_trade_codes(
+                        query_parameters),
+                    sample=query_parameters['sample'])
+            except ValueError as err:
+                raise falcon.HTTPError(
+                    title='Invalid parameter',
+                    status='400 Bad Request',
+                    description=str(err))
+            resp.body = board.json()
+            resp.status = falcon.HTTP_200
+
+
+class Simulate(RequestProcessor):
+    '''
+    Return Monte Carlo simulation of CT LBB2 speculative trade along a route
+    GET <apiserver>/ct/lbb2/cargogen/simulate?<options>
+
+    Options:
+    - route: UWP of world on route (repeat for each world, in order)
+    - bankroll: Starting funds (Cr, default 1000000)
+    - admin: Admin skill available for sale (optional)
+    - bribery: Bribery skill available for sale (optional)
+    - broker: Broker skill available for sale (optional)
+    - policy: Purchasing policy (optional, default expected_profit)
+        - always: buy every lot offered (as far as funds allow)
+        - below_base: buy if actual unit price <= base price
+        - expected_profit: buy if actual unit price < expected net unit
+          price at the next world
+    - runs: Number of independent campaigns (1-100000, default 1000)
+    - seed: Random seed (optional); results for a given seed are
+        repeatable
+
+    At each world on the route a cargo lot is offered (as for
+    /ct/lbb2/cargogen/purchase); if bought, the lot is sold at the next
+    world (as for /ct/lbb2/cargogen/sale).
+
+    Example:
+    - GET <apiserver>/ct/lbb2/cargogen/simulate?route=A777999-C&route=C43059A-8&route=A777999-C&broker=2&runs=10000
+
+    Returns
+    {
+        "admin": <admin skill level>,
+        "bankroll": <bankroll>,
+        "bribery": <bribery skill level>,
+        "broker": <broker skill level>,
+        "legs": [
+            {
+                "leg": <leg>,
+                "loss_rate": <loss rate>,
+                "mean_profit": <mean profit>,
+                "mean_spend": <mean spend>,
+                "mean_units": <mean units>,
+                "purchase_rate": <purchase rate>
+            },
+            ...
+        ],
+        "policy": <policy>,
+        "profit": {
+            "loss_probability": <loss probability>,
+            "max": <max profit>,
+            "mean": <mean profit>,
+            "min": <min profit>,
+            "percentiles": {"5": <profit>, "25": <profit>, "50": <profit>,
+                            "75": <profit>, "95": <profit>},
+            "stdev": <standard deviation>
+        },
+        "runs": <runs>,
+        "seed": <seed>
+    }
+
+    where
+    - "profit" summarises final bankroll less starting bankroll over all
+        campaigns; <loss probability> is the fraction of campaigns ending
+        with a loss
+    - <leg> is the index of the leg (0 => first world to second world)
+    - <purchase rate> is the fraction of campaigns buying cargo on the leg
+    - <mean units>, <mean spend>, <mean profit> are averaged over all
+        campaigns (including those not buying)
+    - <loss rate> is the fraction of purchases on the leg sold at a loss
+
+    Large simulations are split across a process pool.
+
+    GET <apiserver>/ct/lbb2/cargogen/simulate?doc=true returns this text
+    '''
+
+    repeatable_parameters = ('route',)
+
+    @REQUEST_TIME.time()
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb2/cargogen/simulate?<options>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'route': [],
+            'bankroll': 1000000,
+            'admin': 0,
+            'bribery': 0,
+            'broker': 0,
+            'policy': 'expected_profit',
+            'runs': 1000,
+            'seed': None,
+            'doc': False
+        })
+        LOGGER.debug('query_string = %s', req.query_string)
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
         else:
-            planet = System(uwp=self.query_parameters['market_uwp'])
-            trade_codes = planet.trade_codes
-        return trade_codes
+            route = []
+            for uwp in query_parameters['route']:
+                try:
+                    planet = System(uwp=uwp)
+                except TypeError as err:
+                    raise falcon.HTTPError(
+                        title='Invalid UWP',
+                        status='400 Invalid UWP',
+                        description=str(err))
+                route.append((planet.trade_codes, planet.population))
+            try:
+                simulation = TradeRun(
+                    route,
+                    bankroll=query_parameters['bankroll'],
+                    admin=query_parameters['admin'],
+                    bribery=query_parameters['bribery'],
+                    broker=query_parameters['broker'],
+                    policy=query_parameters['policy'],
+                    runs=query_parameters['runs'],
+                    seed=query_parameters['seed'])
+            except ValueError as err:
+                raise falcon.HTTPError(
+                    title='Invalid parameter',
+                    status='400 Bad Request',
+                    description=str(err))
+            simulation.simulate()
+            resp.body = json.dumps(simulation.dict())
+            resp.status = falcon.HTTP_200
@@ -1,9 +1,12 @@
 '''cargo.py'''
 
 import re
+import copy
 import json
 import logging
+from functools import lru_cache
 from ehex import ehex
+from traveller_api.util import distribution_summary
 from ...util import Die
 
 
@@ -16,6 +19,301 @@ RE_ID = re.compile('^[1-6][1-6]$')
 
 D6 = Die(6)
 
+TRADE_GOODS = {
+    '11': {
+        'name': 'Textiles',
+        'base_price': 3000,
+        'purchase_dms': {'Ag': -7, 'Na': -5, 'Ni': -3},
+        'resale_dms': {'Ag': -6, 'Na': +1, 'Ri': +3},
+        'quantity': '3Dx5'},
+    '12': {
+        'name': 'Polymers',
+        'base_price': 7000,
+        'purchase_dms': {'In': -2, 'Ri': -3, 'Po': +2},
+        'resale_dms': {'In': -2, 'Ri': +3},
+        'quantity': '4Dx5'},
+    '13': {
+        'name': 'Liquor',
+        'base_price': 10000,
+        'purchase_dms': {'Ag': -4},
+        'resale_dms': {'Ag': -3, 'In': +1, 'Ri': +2},
+        'quantity': '1Dx5'},
+    '14': {
+        'name': 'Wood',
+        'base_price': 1000,
+        'purchase_dms': {'Ag': -6},
+        'resale_dms': {'Ag': -6, 'In': +1, 'Ri': +2},
+        'quantity': '2Dx10'},
+    '15': {
+        'name': 'Crystals',
+        'base_price': 20000,
+        'purchase_dms': {'Na': -3, 'In': +4},
+        'resale_dms': {'Na': -3, 'In': +3, 'Ri': +3},
+        'quantity': '1D'},
+    '16': {
+        'name': 'Radioactives',
+        'base_price': 1000000,
+        'purchase_dms': {'In': +7, 'Ni': -3, 'Ri': +5},
+        'resale_dms': {'In': +6, 'Ni': -3, 'Ri': -4},
+        'quantity': '1D'},
+    '21': {
+        'name': 'Steel',
+        'base_price': 500,
+        'purchase_dms': {'In': -2, 'Ri': -1, 'Po': +1},
+        'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
+        'quantity': '4Dx10'},
+    '22': {
+        'name': 'Copper',
+        'base_price': 2000,
+        'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +1},
+        'resale_dms': {'In': -3, 'Ri': -1},
+        'quantity': '2Dx10'},
+    '23': {
+        'name': 'Aluminum',
+        'base_price': 1000,
+        'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +1},
+        'resale_dms': {'In': -3, 'Ni': +4, 'Ri': -1},
+        'quantity': '5Dx10'},
+    '24': {
+        'name': 'Tin',
+        'base_price': 9000,
+        'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +1},
+        'resale_dms': {'In': -3, 'Ri': -1},
+        'quantity': '3Dx10'},
+    '25': {
+        'name': 'Silver',
+        'base_price': 70000,
+        'purchase_dms': {'In': +5, 'Ri': -1, 'Po': +2},
+        'resale_dms': {'In': +5, 'Ri': -1},
+        'quantity': '1Dx5'},
+    '26': {
+        'name': 'Special Alloys',
+        'base_price': 200000,
+        'purchase_dms': {'In': -3, 'Ni': +5, 'Ri': -2},
+        'resale_dms': {'In': -3, 'Ni': +4, 'Ri': -1},
+        'quantity': '1D'},
+    '31': {
+        'name': 'Petrochemicals',
+        'base_price': 10000,
+        'purchase_dms': {'Na': -4, 'In': +1, 'Ni': -5},
+        'resale_dms': {'Na': -4, 'In': +3, 'Ni': -5},
+        'quantity': '1D'},
+    '32': {
+        'name': 'Grain',
+        'base_price': 300,
+        'purchase_dms': {'Ag': -2, 'Na': +1, 'In': +2},
+        'resale_dms': {'Ag': -2},
+        'quantity': '8Dx5'},
+    '33': {
+        'name': 'Meat',
+        'base_price': 1500,
+        'purchase_dms': {'Ag': -2, 'Na': +2, 'In': +3},
+        'resale_dms': {'Ag': -2, 'In': +2, 'Po': +1},
+        'quantity': '4Dx5'},
+    '34': {
+        'name': 'Spices',
+        'base_price': 6000,
+        'purchase_dms': {'Ag': -2, 'Na': +3, 'In': +2},
+        'resale_dms': {'Ag': -2, 'Ri': +2, 'Po': +3},
+        'quantity': '1Dx5'},
+    '35': {
+        'name': 'Fruit',
+        'base_price': 1000,
+        'purchase_dms': {'Ag': -3, 'Na': +1, 'In': +2},
+        'resale_dms': {'Ag': -2, 'In': +3, 'Po': +2},
+        'quantity': '2Dx5'},
+    '36': {
+        'name': 'Pharmaceuticals',
+        'base_price': 100000,
+        'purchase_dms': {'Na': -3, 'In': +4, 'Po': +3},
+        'resale_dms': {'Na': -3, 'In': +5, 'Ri': +4},
+        'quantity': '1D'},
+    '41': {
+        'name': 'Gems',
+        'base_price': 1000000,
+        'purchase_dms': {'In': +4, 'Ni': -8, 'Po': -3},
+        'resale_dms': {'In': +4, 'Ni': -2, 'Ri': +8},
+        'quantity': '2D'},
+    '42': {
+        'name': 'Firearms',
+        'base_price': 30000,
+        'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
+        'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
+        'quantity': '2D'},
+    '43': {
+        'name': 'Ammunition',
+        'base_price': 30000,
+        'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
+        'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
+        'quantity': '2D'},
+    '44': {
+        'name': 'Blades',
+        'base_price': 10000,
+        'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
+        'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
+        'quantity': '2D'},
+    '45': {
+        'name': 'Tools',
+        'base_price': 10000,
+        'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
+        'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
+        'quantity': '2D'},
+    '46': {
+        'name': 'Body Armor',
+        'base_price': 50000,
+        'purchase_dms': {'In': -1, 'Ri': -3, 'Po': +3},
+        'resale_dms': {'In': -2, 'Ri': +1, 'Po': +4},
+        'quantity': '2D'},
+    '51': {
+        'name': 'Aircraft',
+        'base_price': 1000000,
+        'purchase_dms': {'In': -4, 'Ri': -3},
+        'resale_dms': {'Ni': +2, 'Po': +1},
+        'quantity': '1D'},
+    '52': {
+        'name': 'Air/raft',
+        'base_price': 6000000,
+        'purchase_dms': {'In': -3, 'Ri': -2},
+        'resale_dms': {'Ni': +2, 'Po': +1},
+        'quantity': '1D'},
+    '53': {
+        'name': 'Computers',
+        'base_price': 10000000,
+        'purchase_dms': {'In': -2, 'Ri': -2},
+        'resale_dms': {'Ni': +2, 'Po': +1, 'Ag': -3},
+        'quantity': '1D'},
+    '54': {
+        'name': 'All Terrain Vehicles',
+        'base_price': 3000000,
+        'purchase_dms': {'In': -2, 'Ri': -2},
+        'resale_dms': {'Ni': +2, 'Po': +1, 'Ag': +1},
+        'quantity': '1D'},
+    '55': {
+        'name': 'Armored Vehicles',
+        'base_price': 7000000,
+        'purchase_dms': {'In': -5, 'Ri': -2, 'Po': +4},
+        'resale_dms': {'Na': -2, 'Ag': +2, 'Ri': +1},
+        'quantity': '1D'},
+    '56': {
+        'name': 'Farm Machinery',
+        'base_price': 150000,
+        'purchase_dms': {'In': -5, 'Ri': -2},
+        'resale_dms': {'Ag': +5, 'Na': -8, 'Po': +1},
+        'quantity': '1D'},
+    '61': {
+        'name': 'Electronics Parts',
+        'base_price': 100000,
+        'purchase_dms': {'In': -4, 'Ri': -3},
+        'resale_dms': {'Ni': +2, 'Po': +1},
+        'quantity': '1Dx5'},
+    '62': {
+        'name': 'Mechanical Parts',
+        'base_price': 70000,
+        'purchase_dms': {'In': -5, 'Ri': -3},
+        'resale_dms': {'Ni': +3, 'Ag': +2},
+        'quantity': '1Dx5'},
+    '63': {
+        'name': 'Cybernetic Parts',
+        'base_price': 250000,
+        'purchase_dms': {'In': -4, 'Ri': -1},
+        'resale_dms': {'Ni': +4, 'Ag': +1, 'Na': +2},
+        'quantity': '1Dx5'},
+    '64': {
+        'name': 'Computer Parts',
+        'base_price': 150000,
+        'purchase_dms': {'In': -5, 'Ri': -3},
+        'resale_dms': {'Ni': +3, 'Ag': +1, 'Na': +2},
+        'quantity': '1Dx5'},
+    '65': {
+        'name': 'Machine Tools',
+        'base_price': 750000,
+        'purchase_dms': {'In': -5, 'Ri': -4},
+        'resale_dms': {'Ni': +3, 'Ag': +1, 'Na': +2},
+        'quantity': '1Dx5'},
+    '66': {
+        'name': 'Vacc Suits',
+        'base_price': 400000,
+        'purchase_dms': {'Na': -5, 'In': -3, 'Ri': +1},
+        'resale_dms': {'Na': -1, 'Ni': +2, 'Po': +1},
+        'quantity': '1Dx5'}
+}
+
+
+def _actual_value(roll):
+    '''Actual value table: multiplier for (modified) 2D roll'''
+    result = 0.0
+    roll = max(2, roll)
+    roll = min(15, roll)
+    if roll <= 3:
+        result = float((roll - 2) / 10) + 0.4
+    elif roll >= 4 and roll <= 10:
+        result = float((roll - 4) / 10) + 0.7
+    elif roll == 11:
+        result = 1.5
+    elif roll == 12:
+        result = 1.7
+    elif roll >= 13:
+        result = float(roll - 11)
+    return result
+
+
+ACTUAL_VALUE_TABLE = {roll: _actual_value(roll) for roll in range(2, 16)}
+
+# 2D6 distribution: (total, ways out of 36)
+TWO_D6 = tuple(
+    (total, 6 - abs(total - 7)) for total in range(2, 13)
+)
+
+
+@lru_cache(maxsize=None)
+def actual_value_distribution(die_mod):
+    '''
+    Exact distribution of actual value multiplier for 2D + die_mod
+
+    Returns tuple of (multiplier, ways) sorted by multiplier, where ways
+    is out of 36
+    '''
+    ways = {}
+    for total, count in TWO_D6:
+        multiplier = ACTUAL_VALUE_TABLE[min(15, max(2, total + die_mod))]
+        ways[multiplier] = ways.get(multiplier, 0) + count
+    return tuple(sorted(ways.items()))
+
+
+@lru_cache(maxsize=None)
+def expected_unit_price(base_price, die_mod):
+    '''Expected int(base_price * actual value) for 2D + die_mod'''
+    return sum(
+        count * int(base_price * multiplier)
+        for multiplier, count in actual_value_distribution(die_mod)
+    ) / 36.0
+
+
+@lru_cache(maxsize=None)
+def price_distribution(base_price, die_mod, unit_commission=0):
+    '''
+    Exact distribution of int(base_price * actual value) - unit_commission
+    for 2D + die_mod (see distribution_summary())
+
+    The result is cached and shared: do not modify it (copy it to keep)
+    '''
+    return distribution_summary(
+        (int(base_price * multiplier) - unit_commission, ways)
+        for multiplier, ways in actual_value_distribution(die_mod)
+    )
+
+
+def population_die_mod(population):
+    '''DM on first cargo selection die for source world population'''
+    die_mod = 0
+    if population is not None:
+        population = ehex(population)
+        if int(population) >= 9:
+            die_mod = 1
+        elif int(population) <= 5:
+            die_mod = -1
+    return die_mod
+
 
 class Cargo(object):
     '''Base cargo object'''
@@ -32,6 +330,7 @@ class Cargo(object):
         self.actual_lot_price = 0
         self.trade_codes = trade_codes
         self.units = ''
+        self.price_distribution = None
 
         self.select_cargo(population)
         self.determine_actual_unit_price()
@@ -40,236 +339,12 @@ class Cargo(object):
 
     def _populate_trade_goods(self):
         '''Populate _trade_goods dict'''
-        self._trade_goods = {
-            '11': {
-                'name': 'Textiles',
-                'base_price': 3000,
-                'purchase_dms': {'Ag': -7, 'Na': -5, 'Ni': -3},
-                'resale_dms': {'Ag': -6, 'Na': +1, 'Ri': +3},
-                'quantity': '3Dx5'},
-            '12': {
-                'name': 'Polymers',
-                'base_price': 7000,
-                'purchase_dms': {'In': -2, 'Ri': -3, 'Po': +2},
-                'resale_dms': {'In': -2, 'Ri': +3},
-                'quantity': '4Dx5'},
-            '13': {
-                'name': 'Liquor',
-                'base_price': 10000,
-                'purchase_dms': {'Ag': -4},
-                'resale_dms': {'Ag': -3, 'In': +1, 'Ri': +2},
-                'quantity': '1Dx5'},
-            '14': {
-                'name': 'Wood',
-                'base_price': 1000,
-                'purchase_dms': {'Ag': -6},
-                'resale_dms': {'Ag': -6, 'In': +1, 'Ri': +2},
-                'quantity': '2Dx10'},
-            '15': {
-                'name': 'Crystals',
-                'base_price': 20000,
-                'purchase_dms': {'Na': -3, 'In': +4},
-                'resale_dms': {'Na': -3, 'In': +3, 'Ri': +3},
-                'quantity': '1D'},
-            '16': {
-                'name': 'Radioactives',
-                'base_price': 1000000,
-                'purchase_dms': {'In': +7, 'Ni': -3, 'Ri': +5},
-                'resale_dms': {'In': +6, 'Ni': -3, 'Ri': -4},
-                'quantity': '1D'},
-            '21': {
-                'name': 'Steel',
-                'base_price': 500,
-                'purchase_dms': {'In': -2, 'Ri': -1, 'Po': +1},
-                'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
-                'quantity': '4Dx10'},
-            '22': {
-                'name': 'Copper',
-                'base_price': 2000,
-                'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +1},
-                'resale_dms': {'In': -3, 'Ri': -1},
-                'quantity': '2Dx10'},
-            '23': {
-                'name': 'Aluminum',
-                'base_price': 1000,
-                'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +1},
-                'resale_dms': {'In': -3, 'Ni': +4, 'Ri': -1},
-                'quantity': '5Dx10'},
-            '24': {
-                'name': 'Tin',
-                'base_price': 9000,
-                'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +1},
-                'resale_dms': {'In': -3, 'Ri': -1},
-                'quantity': '3Dx10'},
-            '25': {
-                'name': 'Silver',
-                'base_price': 70000,
-                'purchase_dms': {'In': +5, 'Ri': -1, 'Po': +2},
-                'resale_dms': {'In': +5, 'Ri': -1},
-                'quantity': '1Dx5'},
-            '26': {
-                'name': 'Special Alloys',
-                'base_price': 200000,
-                'purchase_dms': {'In': -3, 'Ni': +5, 'Ri': -2},
-                'resale_dms': {'In': -3, 'Ni': +4, 'Ri': -1},
-                'quantity': '1D'},
-            '31': {
-                'name': 'Petrochemicals',
-                'base_price': 10000,
-                'purchase_dms': {'Na': -4, 'In': +1, 'Ni': -5},
-                'resale_dms': {'Na': -4, 'In': +3, 'Ni': -5},
-                'quantity': '1D'},
-            '32': {
-                'name': 'Grain',
-                'base_price': 300,
-                'purchase_dms': {'Ag': -2, 'Na': +1, 'In': +2},
-                'resale_dms': {'Ag': -2},
-                'quantity': '8Dx5'},
-            '33': {
-                'name': 'Meat',
-                'base_price': 1500,
-                'purchase_dms': {'Ag': -2, 'Na': +2, 'In': +3},
-                'resale_dms': {'Ag': -2, 'In': +2, 'Po': +1},
-                'quantity': '4Dx5'},
-            '34': {
-                'name': 'Spices',
-                'base_price': 6000,
-                'purchase_dms': {'Ag': -2, 'Na': +3, 'In': +2},
-                'resale_dms': {'Ag': -2, 'Ri': +2, 'Po': +3},
-                'quantity': '1Dx5'},
-            '35': {
-                'name': 'Fruit',
-                'base_price': 1000,
-                'purchase_dms': {'Ag': -3, 'Na': +1, 'In': +2},
-                'resale_dms': {'Ag': -2, 'In': +3, 'Po': +2},
-                'quantity': '2Dx5'},
-            '36': {
-                'name': 'Pharmaceuticals',
-                'base_price': 100000,
-                'purchase_dms': {'Na': -3, 'In': +4, 'Po': +3},
-                'resale_dms': {'Na': -3, 'In': +5, 'Ri': +4},
-                'quantity': '1D'},
-            '41': {
-                'name': 'Gems',
-                'base_price': 1000000,
-                'purchase_dms': {'In': +4, 'Ni': -8, 'Po': -3},
-                'resale_dms': {'In': +4, 'Ni': -2, 'Ri': +8},
-                'quantity': '2D'},
-            '42': {
-                'name': 'Firearms',
-                'base_price': 30000,
-                'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
-                'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
-                'quantity': '2D'},
-            '43': {
-                'name': 'Ammunition',
-                'base_price': 30000,
-                'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
-                'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
-                'quantity': '2D'},
-            '44': {
-                'name': 'Blades',
-                'base_price': 10000,
-                'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
-                'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
-                'quantity': '2D'},
-            '45': {
-                'name': 'Tools',
-                'base_price': 10000,
-                'purchase_dms': {'In': -3, 'Ri': -2, 'Po': +3},
-                'resale_dms': {'In': -2, 'Ri': -1, 'Po': +3},
-                'quantity': '2D'},
-            '46': {
-                'name': 'Body Armor',
-                'base_price': 50000,
-                'purchase_dms': {'In': -1, 'Ri': -3, 'Po': +3},
-                'resale_dms': {'In': -2, 'Ri': +1, 'Po': +4},
-                'quantity': '2D'},
-            '51': {
-                'name': 'Aircraft',
-                'base_price': 1000000,
-                'purchase_dms': {'In': -4, 'Ri': -3},
-                'resale_dms': {'Ni': +2, 'Po': +1},
-                'quantity': '1D'},
-            '52': {
-                'name': 'Air/raft',
-                'base_price': 6000000,
-                'purchase_dms': {'In': -3, 'Ri': -2},
-                'resale_dms': {'Ni': +2, 'Po': +1},
-                'quantity': '1D'},
-            '53': {
-                'name': 'Computers',
-                'base_price': 10000000,
-                'purchase_dms': {'In': -2, 'Ri': -2},
-                'resale_dms': {'Ni': +2, 'Po': +1, 'Ag': -3},
-                'quantity': '1D'},
-            '54': {
-                'name': 'All Terrain Vehicles',
-                'base_price': 3000000,
-                'purchase_dms': {'In': -2, 'Ri': -2},
-                'resale_dms': {'Ni': +2, 'Po': +1, 'Ag': +1},
-                'quantity': '1D'},
-            '55': {
-                'name': 'Armored Vehicles',
-                'base_price': 7000000,
-                'purchase_dms': {'In': -5, 'Ri': -2, 'Po': +4},
-                'resale_dms': {'Na': -2, 'Ag': +2, 'Ri': +1},
-                'quantity': '1D'},
-            '56': {
-                'name': 'Farm Machinery',
-                'base_price': 150000,
-                'purchase_dms': {'In': -5, 'Ri': -2},
-                'resale_dms': {'Ag': +5, 'Na': -8, 'Po': +1},
-                'quantity': '1D'},
-            '61': {
-                'name': 'Electronics Parts',
-                'base_price': 100000,
-                'purchase_dms': {'In': -4, 'Ri': -3},
-                'resale_dms': {'Ni': +2, 'Po': +1},
-                'quantity': '1Dx5'},
-            '62': {
-                'name': 'Mechanical Parts',
-                'base_price': 70000,
-                'purchase_dms': {'In': -5, 'Ri': -3},
-                'resale_dms': {'Ni': +3, 'Ag': +2},
-                'quantity': '1Dx5'},
-            '63': {
-                'name': 'Cybernetic Parts',
-                'base_price': 250000,
-                'purchase_dms': {'In': -4, 'Ri': -1},
-                'resale_dms': {'Ni': +4, 'Ag': +1, 'Na': +2},
-                'quantity': '1Dx5'},
-            '64': {
-                'name': 'Computer Parts',
-                'base_price': 150000,
-                'purchase_dms': {'In': -5, 'Ri': -3},
-                'resale_dms': {'Ni': +3, 'Ag': +1, 'Na': +2},
-                'quantity': '1Dx5'},
-            '65': {
-                'name': 'Machine Tools',
-                'base_price': 750000,
-                'purchase_dms': {'In': -5, 'Ri': -4},
-                'resale_dms': {'Ni': +3, 'Ag': +1, 'Na': +2},
-                'quantity': '1Dx5'},
-            '66': {
-                'name': 'Vacc Suits',
-                'base_price': 400000,
-                'purchase_dms': {'Na': -5, 'In': -3, 'Ri': +1},
-                'resale_dms': {'Na': -1, 'Ni': +2, 'Po': +1},
-                'quantity': '1Dx5'}
-        }
+        self._trade_goods = TRADE_GOODS
 
     def select_cargo(self, population):
         '''Select cargo'''
-        # population DM
         LOGGER.debug('population = %s', population)
-        die_mod = 0
-        if population is not None:
-            population = ehex(population)
-            if int(population) >= 9:
-                die_mod = 1
-            elif int(population) <= 5:
-                die_mod = -1
+        die_mod = population_die_mod(population)
         LOGGER.debug('Die 1 DM = %s', die_mod)
         cargo_id = '{}{}'.format(
             D6.roll(dice=1, modifier=die_mod, floor=1, ceiling=6),
@@ -304,14 +379,22 @@ class Cargo(object):
 
     def determine_actual_unit_price(self):
         '''Determine actual unit price'''
-        # Determine DM
+        self.actual_unit_price = int(
+            self.base_price *
+            self.determine_actual_value(self.purchase_die_mod()))
+
+    def purchase_die_mod(self):
+        '''Actual value DM from purchase DMs'''
         die_mod = 0
         for code in self.trade_codes:
             if code in self.purchase_dms:
                 die_mod += self.purchase_dms[code]
+        return die_mod
 
-        self.actual_unit_price = int(
-            self.base_price * self.determine_actual_value(die_mod))
+    def determine_price_distribution(self):
+        '''Exact distribution of actual unit price'''
+        self.price_distribution = copy.deepcopy(price_distribution(
+            self.base_price, self.purchase_die_mod()))
 
     def json(self):
         '''Return JSON representation'''
@@ -327,26 +410,14 @@ class Cargo(object):
             'trade_codes': self.trade_codes,
             'units': self.units
         }
+        if self.price_distribution is not None:
+            doc['price_distribution'] = self.price_distribution
         return json.dumps(doc)
 
     @staticmethod
     def determine_actual_value(die_mod):
         '''Determine actual value table'''
-        result = 0.0
-        roll = D6.roll(2, die_mod)
-        roll = max(2, roll)
-        roll = min(15, roll)
-        if roll <= 3:
-            result = float((roll - 2) / 10) + 0.4
-        elif roll >= 4 and roll <= 10:
-            result = float((roll - 4) / 10) + 0.7
-        elif roll == 11:
-            result = 1.5
-        elif roll == 12:
-            result = 1.7
-        elif roll >= 13:
-            result = float(roll - 11)
-        return result
+        return ACTUAL_VALUE_TABLE[D6.roll(2, die_mod, floor=2, ceiling=15)]
 
 
 class CargoSale(Cargo):
@@ -366,6 +437,7 @@ class CargoSale(Cargo):
         self.actual_net_lot_price = 0
         self.commission = 0
         self.units = ''
+        self.price_distribution = None
 
         try:
             var = 'admin'
@@ -426,15 +498,26 @@ class CargoSale(Cargo):
 
     def _determine_actual_unit_price(self):
         '''Determine actual sale price'''
+        self.actual_gross_unit_price = int(
+            self.base_price *
+            self.determine_actual_value(self.resale_die_mod()))
+        self.actual_gross_lot_price = \
+            self.actual_gross_unit_price * self.quantity
+
+    def resale_die_mod(self):
+        '''Actual value DM from skills and resale DMs'''
         die_mod = self.broker + self.admin + self.bribery
         for code in self.trade_codes:
             if code in self.resale_dms:
                 die_mod += self.resale_dms[code]
+        return die_mod
 
-        self.actual_gross_unit_price = int(
-            self.base_price * self.determine_actual_value(die_mod))
-        self.actual_gross_lot_price = \
-            self.actual_gross_unit_price * self.quantity
+    def determine_price_distribution(self):
+        '''Exact distribution of actual net unit price'''
+        self.price_distribution = copy.deepcopy(price_distribution(
+            self.base_price,
+            self.resale_die_mod(),
+            int(self.base_price * self.broker * 0.05)))
 
     def _determine_commission(self):
         '''Determine commission, net prices'''
@@ -473,4 +556,108 @@ class CargoSale(Cargo):
             'trade_codes': self.trade_codes,
             'units': self.units
         }
+        if self.price_distribution is not None:
+            doc['price_distribution'] = self.price_distribution
         return json.dumps(doc)
+
+
+TRADE_GOOD_IDS = tuple(sorted(TRADE_GOODS))
+
+
+@lru_cache(maxsize=256)
+def resale_dms(trade_codes):
+    '''
+    Resale DMs for every trade good, in TRADE_GOOD_IDS order
+
+    trade_codes must be hashable (sorted tuple); cached per trade code set
+    '''
+    return tuple(
+        sum(
+            TRADE_GOODS[cargo_id]['resale_dms'].get(code, 0)
+            for code in trade_codes)
+        for cargo_id in TRADE_GOOD_IDS
+    )
+
+
+@lru_cache(maxsize=256)
+def purchase_dms(trade_codes):
+    '''
+    Purchase DMs for every trade good, in TRADE_GOOD_IDS order
+
+    trade_codes must be hashable (sorted tuple); cached per trade code set
+    '''
+    return tuple(
+        sum(
+            TRADE_GOODS[cargo_id]['purchase_dms'].get(code, 0)
+            for code in trade_codes)
+        for cargo_id in TRADE_GOOD_IDS
+    )
+
+
+class MarketBoard(object):
+    '''Sale prices for all trade goods at one market'''
+
+    def __init__(
+            self,
+            admin=0, bribery=0, broker=0,
+            trade_codes=[],
+            sample=False):
+        self.goods = []
+        try:
+            var = 'admin'
+            self.admin = int(admin)
+            assert self.admin >= 0
+            var = 'bribery'
+            self.bribery = int(bribery)
+            assert self.bribery >= 0
+            var = 'broker'
+            self.broker = int(broker)
+            assert self.broker <= 4
+            assert self.broker >= 0
+        except (AssertionError, ValueError):
+            raise ValueError(var)
+        self.trade_codes = trade_codes
+        self.sample = sample
+        self.generate()
+
+    def generate(self):
+        '''Determine resale DM and prices for each trade good'''
+        skill_dm = self.broker + self.admin + self.bribery
+        dms = resale_dms(tuple(sorted(set(self.trade_codes))))
+        self.goods = []
+        for cargo_id, resale_dm in zip(TRADE_GOOD_IDS, dms):
+            base_price = TRADE_GOODS[cargo_id]['base_price']
+            unit_commission = int(base_price * self.broker * 0.05)
+            expected_gross = round(
+                expected_unit_price(base_price, resale_dm + skill_dm), 2)
+            good = {
+                'id': cargo_id,
+                'name': TRADE_GOODS[cargo_id]['name'],
+                'base_price': base_price,
+                'resale_dm': resale_dm,
+                'commission': unit_commission,
+                'expected_gross_unit_price': expected_gross,
+                'expected_net_unit_price': round(
+                    expected_gross - unit_commission, 2)
+            }
+            if self.sample:
+                gross = int(
+                    base_price *
+                    Cargo.determine_actual_value(resale_dm + skill_dm))
+                good['actual_gross_unit_price'] = gross
+                good['actual_net_unit_price'] = gross - unit_commission
+            self.goods.append(good)
+
+    def dict(self):
+        '''dict() representation'''
+        return {
+            'admin': self.admin,
+            'bribery': self.bribery,
+            'broker': self.broker,
+            'trade_codes': self.trade_codes,
+            'goods': self.goods
+        }
+
+    def json(self):
+        '''JSON representation'''
+        return json.dumps(self.dict())
@@ -0,0 +1,236 @@
+'''simulate.py'''
+
+import random
+import logging
+from traveller_api.executor import TASK_POOL, task_seed
+from traveller_api.util import sample_summary
+from .cargo import TRADE_GOODS, TRADE_GOOD_IDS, ACTUAL_VALUE_TABLE
+from .cargo import RE_QUANTITY, RE_QUANTITY_X
+from .cargo import expected_unit_price, population_die_mod
+from .cargo import purchase_dms, resale_dms
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+POLICIES = ('always', 'below_base', 'expected_profit')
+MAX_RUNS = 100000
+# Runs per task pool task (and per task seed)
+CHUNK_SIZE = 5000
+# Use the task pool for at least this many runs
+POOL_THRESHOLD = 20000
+
+# All 36 equally-likely 2D totals
+TWO_D6_FACES = tuple(
+    die1 + die2 for die1 in range(1, 7) for die2 in range(1, 7))
+
+
+def _quantity_dice(quantity_string):
+    '''Parse lot size string (e.g. 3Dx5) to (dice, multiplier)'''
+    match = RE_QUANTITY_X.match(quantity_string)
+    if match:
+        return (int(match.group(1)), int(match.group(2)))
+    match = RE_QUANTITY.match(quantity_string)
+    return (int(match.group(1)), 1)
+
+
+QUANTITY_DICE = tuple(
+    _quantity_dice(TRADE_GOODS[cargo_id]['quantity'])
+    for cargo_id in TRADE_GOOD_IDS)
+BASE_PRICES = tuple(
+    TRADE_GOODS[cargo_id]['base_price'] for cargo_id in TRADE_GOOD_IDS)
+
+
+def _unit_prices(base_price, die_mod, unit_commission=0):
+    '''Unit price less commission for each of the 36 2D outcomes'''
+    return tuple(
+        int(base_price * ACTUAL_VALUE_TABLE[min(15, max(2, total + die_mod))])
+        - unit_commission
+        for total in TWO_D6_FACES)
+
+
+def build_leg(source, market, admin=0, bribery=0, broker=0):
+    '''
+    Precompute price tables for one leg
+
+    source, market are (trade_codes, population) tuples. Cargo selection
+    and prices follow Cargo (purchase at source) and CargoSale (sale at
+    market) exactly; tables are indexed by cargo index (TRADE_GOOD_IDS
+    order) then 2D outcome (TWO_D6_FACES order)
+    '''
+    skill_dm = admin + bribery + broker
+    buy_dms = purchase_dms(tuple(sorted(set(source[0]))))
+    sell_dms = resale_dms(tuple(sorted(set(market[0]))))
+    commissions = [int(price * broker * 0.05) for price in BASE_PRICES]
+    return {
+        'die_mod': population_die_mod(source[1]),
+        'buy': tuple(
+            _unit_prices(price, die_mod)
+            for price, die_mod in zip(BASE_PRICES, buy_dms)),
+        'sell': tuple(
+            _unit_prices(price, die_mod + skill_dm, commission)
+            for price, die_mod, commission
+            in zip(BASE_PRICES, sell_dms, commissions)),
+        'expected_sell': tuple(
+            expected_unit_price(price, die_mod + skill_dm) - commission
+            for price, die_mod, commission
+            in zip(BASE_PRICES, sell_dms, commissions))
+    }
+
+
+def _buys(policy, leg, indx, unit_price):
+    '''Apply purchasing policy to offered lot'''
+    if policy == 'below_base':
+        return unit_price <= BASE_PRICES[indx]
+    elif policy == 'expected_profit':
+        return unit_price < leg['expected_sell'][indx]
+    return True
+
+
+def run_campaigns(legs, bankroll, policy, runs, seed):
+    '''
+    Run independent campaigns using RNG seeded with seed
+
+    Returns (final profits, per-leg totals) where per-leg totals are
+    [purchases, units, spend, profit, losses]
+    '''
+    rng = random.Random(seed)
+    rand = rng.random
+    totals = [[0, 0, 0, 0, 0] for _ in legs]
+    profits = []
+    for _ in range(runs):
+        cash = bankroll
+        for leg, total in zip(legs, totals):
+            # Select cargo: first die modified by population DM
+            die1 = min(6, max(1, int(rand() * 6) + 1 + leg['die_mod']))
+            indx = (die1 - 1) * 6 + int(rand() * 6)
+            unit_price = leg['buy'][indx][int(rand() * 36)]
+            if not _buys(policy, leg, indx, unit_price):
+                continue
+            dice, multiplier = QUANTITY_DICE[indx]
+            quantity = multiplier * sum(
+                int(rand() * 6) + 1 for _ in range(dice))
+            units = min(quantity, cash // unit_price)
+            if units == 0:
+                continue
+            profit = units * (
+                leg['sell'][indx][int(rand() * 36)] - unit_price)
+            cash += profit
+            total[0] += 1
+            total[1] += units
+            total[2] += units * unit_price
+            total[3] += profit
+            total[4] += profit < 0
+        profits.append(cash - bankroll)
+    return profits, totals
+
+
+class TradeRun(object):
+    '''
+    Monte Carlo simulation of LBB2 speculative trade along a route
+
+    route: list of (trade_codes, population) tuples, one per world; cargo
+    is bought at each world and sold at the next
+    '''
+
+    def __init__(
+            self,
+            route,
+            bankroll=1000000,
+            admin=0, bribery=0, broker=0,
+            policy='expected_profit',
+            runs=1000,
+            seed=None):
+        try:
+            var = 'route'
+            self.route = list(route)
+            assert len(self.route) >= 2
+            var = 'bankroll'
+            self.bankroll = int(bankroll)
+            assert self.bankroll >= 0
+            var = 'admin'
+            self.admin = int(admin)
+            assert self.admin >= 0
+            var = 'bribery'
+            self.bribery = int(bribery)
+            assert self.bribery >= 0
+            var = 'broker'
+            self.broker = int(broker)
+            assert self.broker <= 4
+            assert self.broker >= 0
+            var = 'policy'
+            assert policy in POLICIES
+            self.policy = policy
+            var = 'runs'
+            self.runs = int(runs)
+            assert self.runs >= 1 and self.runs <= MAX_RUNS
+            var = 'seed'
+            if seed is None:
+                seed = random.SystemRandom().randint(0, 2 ** 32 - 1)
+            self.seed = int(seed)
+        except (AssertionError, TypeError, ValueError):
+            raise ValueError(var)
+        self.legs = [
+            build_leg(source, market, self.admin, self.bribery, self.broker)
+            for source, market in zip(self.route, self.route[1:])
+        ]
+        self.profits = []
+        self.totals = []
+
+    def simulate(self, processes=None):
+        '''
+        Run campaigns in chunks of CHUNK_SIZE, each with its own seed
+
+        processes: None => shared task pool (TASK_POOL) for
+        POOL_THRESHOLD or more runs; 0 or 1 => run inline; more => task
+        pool. Results for a given seed do not depend on processes
+        '''
+        tasks = []
+        for task, start in enumerate(range(0, self.runs, CHUNK_SIZE)):
+            tasks.append((
+                self.legs, self.bankroll, self.policy,
+                min(CHUNK_SIZE, self.runs - start),
+                task_seed(self.seed, task)))
+        if processes is None:
+            inline = self.runs < POOL_THRESHOLD
+        else:
+            inline = processes <= 1
+        LOGGER.debug('%s tasks, inline = %s', len(tasks), inline)
+
+        results = TASK_POOL.map(run_campaigns, tasks, inline=inline)
+
+        self.profits = []
+        self.totals = [[0, 0, 0, 0, 0] for _ in self.legs]
+        for profits, totals in results:
+            self.profits.extend(profits)
+            for leg_total, task_total in zip(self.totals, totals):
+                for indx, value in enumerate(task_total):
+                    leg_total[indx] += value
+
+    def dict(self):
+        '''dict() representation'''
+        legs = []
+        for indx, total in enumerate(self.totals):
+            purchases, units, spend, profit, losses = total
+            legs.append({
+                'leg': indx,
+                'purchase_rate': round(purchases / float(self.runs), 6),
+                'mean_units': round(units / float(self.runs), 3),
+                'mean_spend': round(spend / float(self.runs), 3),
+                'mean_profit': round(profit / float(self.runs), 3),
+                'loss_rate': round(losses / float(max(1, purchases)), 6)
+            })
+        summary = sample_summary(self.profits)
+        summary['loss_probability'] = round(
+            sum(1 for profit in self.profits if profit < 0) /
+            float(self.runs), 6)
+        return {
+            'runs': self.runs,
+            'seed': self.seed,
+            'bankroll': self.bankroll,
+            'admin': self.admin,
+            'bribery': self.bribery,
+            'broker': self.broker,
+            'policy': self.policy,
+            'profit': summary,
+            'legs': legs
+        }
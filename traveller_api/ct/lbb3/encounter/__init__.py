@@ -94,37 +94,36 @@ class EncounterTable(RequestProcessor):
     def on_get(self, req, resp):
         '''GET <apiserver>/ct/lbb3/encounter_table'''
 
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'doc': False,
             'list_terrains': False,
             'terrain': None,
             'uwp': None,
             'size': 2
-        }
-        self.parse_query_string(req.query_string)
-        LOGGER.debug('size = %s', self.query_parameters['size'])
+        })
+        LOGGER.debug('size = %s', query_parameters['size'])
 
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
-        elif self.query_parameters['list_terrains'] is True:
+        elif query_parameters['list_terrains'] is True:
             lst = []
             lst.extend(sorted(TERRAIN_TYPES_DM.keys()))
             resp.body = json.dumps(lst)
             resp.status = falcon.HTTP_200
         else:
             try:
-                if int(self.query_parameters['size']) == 1:
+                if int(query_parameters['size']) == 1:
                     table = EncounterTable1D(
                         terrain=catch_html_space(
-                            self.query_parameters['terrain']),
-                        uwp=self.query_parameters['uwp']
+                            query_parameters['terrain']),
+                        uwp=query_parameters['uwp']
                     )
                 else:
                     table = EncounterTable2D(
                         terrain=catch_html_space(
-                            self.query_parameters['terrain']),
-                        uwp=self.query_parameters['uwp']
+                            query_parameters['terrain']),
+                        uwp=query_parameters['uwp']
                     )
             except ValueError as err:
                 raise falcon.HTTPError(
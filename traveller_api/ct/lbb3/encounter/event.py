@@ -2,9 +2,9 @@
 
 import json
 import logging
-from random import randint, seed
 from traveller_api.ct.lbb3.worldgen.planet import System
 from traveller_api.ct.lbb3.encounter.tables import TERRAIN_TYPES_DM
+from traveller_api.util import randint
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -274,7 +274,6 @@ class Event(object):
             except TypeError:
                 raise ValueError('Invalid UWP {}'.format(uwp))
 
-        seed()
         self.generate()
 
     def generate(self):
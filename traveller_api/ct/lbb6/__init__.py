@@ -1,15 +1,21 @@
 '''__init__.py'''
 
+import json
 import logging
 import requests
 import falcon
-from traveller_api.util import RequestProcessor
-from traveller_api.ct.lbb6.planet import LBB6Planet
+from traveller_api.util import RequestProcessor, not_modified
+from traveller_api.ct.lbb6.planet import LBB6Planet, PROFILE_COLUMNS
 from traveller_api.ct.lbb6.star import Star as StarData
 from traveller_api.ct.lbb6.orbit import Orbit as OrbitData
+from traveller_api.ct.lbb6.catalogue import load_catalogue
+from traveller_api.ct.lbb6.worldgen import WorldBatch, MAX_COUNT
+from traveller_api.starcode import StarCode
 
 API_ENDPOINT = 'http://localhost:8000'
 
+MAX_PLACEMENTS = 1000
+
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
 
@@ -75,20 +81,19 @@ class Star(RequestProcessor):
 
     def on_get(self, req, resp):
         '''GET <apiserver>/ct/lbb6/star?code=<star>'''
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'doc': False,
             'code': None
-        }
-        self.parse_query_string(req.query_string)
+        })
 
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
         else:
             try:
-                self.query_parameters['code'] = \
-                    catch_html_space(self.query_parameters['code'])
-                star = StarData(self.query_parameters['code'])
+                query_parameters['code'] = \
+                    catch_html_space(query_parameters['code'])
+                star = StarData(query_parameters['code'])
             except ValueError as err:
                 raise falcon.HTTPError(
                     title='Invalid star',
@@ -118,41 +123,40 @@ class Orbit(RequestProcessor):
 
     def on_get(self, req, resp):
         '''GET <apiserver>/ct/lbb6/orbit?orbit_no=<orbit>&star=<code>'''
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'doc': False,
             'orbit_no': None,
             'star': None
-        }
-        self.parse_query_string(req.query_string)
+        })
 
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
         else:
             # Anything to do?
-            if self.query_parameters['orbit_no'] is None:
+            if query_parameters['orbit_no'] is None:
                 raise falcon.HTTPError(
                     title='Invalid orbit',
                     status='400 Invalid parameter',
                     description='No orbit specified')
 
             # Star? If yes, retrieve star data into Star object
-            if self.query_parameters['star'] is not None:
+            if query_parameters['star'] is not None:
                 try:
-                    self.query_parameters['star'] = \
-                        catch_html_space(self.query_parameters['star'])
-                    star = StarData(self.query_parameters['star'])
+                    query_parameters['star'] = \
+                        catch_html_space(query_parameters['star'])
+                    star = StarData(query_parameters['star'])
                 except ValueError as err:
                     raise falcon.HTTPError(
                         title='Invalid star',
                         status='400 Invalid parameter',
                         description='Invalid star {}'.format(
-                            self.query_parameters['star']))
+                            query_parameters['star']))
             else:
                 star = None
             try:
                 orbit = OrbitData(
-                    self.query_parameters['orbit_no'],
+                    query_parameters['orbit_no'],
                     star
                 )
             except ValueError as err:
@@ -165,6 +169,163 @@ class Orbit(RequestProcessor):
             resp.status = falcon.HTTP_200
 
 
+class StarOrbits(RequestProcessor):
+    '''
+    Return details of all orbits (0-19) for star
+    GET <apiserver>/ct/lbb6/star/orbits?code=<star>
+
+    Returns
+    {
+        "hz_orbit": <habitable zone orbit>,
+        "int_orbit": <interior orbit>,
+        "min_orbit": <minimum orbit>,
+        "orbits": [
+            {
+                "angular_diameter": <angular diameter of star (degrees)>,
+                "au": <orbital radius (AU)>,
+                "habitable": <true/false>,
+                "interior": <true/false>,
+                "mkm": <orbital radius (Mkm)>,
+                "orbit_no": <orbit number>,
+                "period": <orbital period (years)>,
+                "unavailable": <true/false>
+            },
+            ...
+        ],
+        "star": <classification>
+    }
+
+    where
+    - <habitable zone orbit>, <interior orbit>, <minimum orbit> are as
+      returned by <apiserver>/ct/lbb6/star
+    - "orbits" lists orbits 0-19 in order, with the values returned by
+      <apiserver>/ct/lbb6/orbit for each orbit
+    - "habitable" is true for the habitable zone orbit
+    - "interior" is true for orbits within the star
+    - "unavailable" is true for orbits closer than the minimum orbit
+
+    Profiles for every star are computed at startup.
+
+    GET <apiserver>/ct/lbb6/star/orbits?doc=true returns this text
+    '''
+
+    def __init__(self):
+        super(StarOrbits, self).__init__()
+        catalogue = load_catalogue()
+        self.profiles = {}
+        for star in catalogue.stars:
+            star_code = catalogue.star_code(star)
+            self.profiles.setdefault(star_code, json.dumps({
+                'star': str(star_code),
+                'hz_orbit': star.hz_orbit,
+                'int_orbit': star.int_orbit,
+                'min_orbit': star.min_orbit,
+                'orbits': catalogue.orbit_profile(star)
+            }, sort_keys=True))
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb6/star/orbits?code=<star>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'doc': False,
+            'code': None
+        })
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+        else:
+            code = query_parameters['code']
+            try:
+                star_code = StarCode.parse(catch_html_space(code or ''))
+                resp.body = self.profiles[star_code]
+            except (ValueError, KeyError):
+                raise falcon.HTTPError(
+                    title='Invalid star',
+                    status='400 Invalid parameter',
+                    description='Invalid star {}'.format(code))
+        resp.status = falcon.HTTP_200
+
+
+class Catalogue(RequestProcessor):
+    '''
+    Return complete star and orbit tables
+    GET <apiserver>/ct/lbb6/catalogue?format=<format>
+
+    <format> is one of
+    - json (default): one object per row
+        {
+            "orbit": [{"au": <au>, "indx": <orbit>, "mkm": <mkm>}, ...],
+            "star": [
+                {
+                    "decimal": <decimal>,
+                    "hz_orbit": <habitable zone orbit>,
+                    "indx": <row number>,
+                    "int_orbit": <interior orbit>,
+                    "luminosity": <luminosity>,
+                    "magnitude": <magnitude>,
+                    "mass": <mass>,
+                    "min_orbit": <minimum orbit>,
+                    "radius": <radius>,
+                    "size": <size>,
+                    "temperature": <temperature>,
+                    "typ": <type>
+                },
+                ...
+            ],
+            "version": <version>
+        }
+    - columnar: one list of values per column, rows in the same order
+        {
+            "orbit": {"au": [<au>, ...], "indx": [...], "mkm": [...]},
+            "star": {"decimal": [<decimal>, ...], ...},
+            "version": <version>
+        }
+
+    where
+    - <version> is a hash of the table contents; it changes whenever the
+      tables change
+    - star fields are as returned by <apiserver>/ct/lbb6/star (<decimal>
+      is null for dwarf stars)
+
+    Responses carry an ETag (derived from <version> and <format>) and may
+    be cached; If-None-Match returns 304 Not Modified if the catalogue is
+    unchanged.
+
+    GET <apiserver>/ct/lbb6/catalogue?doc=true returns this text
+    '''
+
+    def __init__(self):
+        super(Catalogue, self).__init__()
+        catalogue = load_catalogue()
+        self.version = catalogue.version
+        self.bodies = {
+            'json': json.dumps(catalogue.dict(), sort_keys=True),
+            'columnar': json.dumps(catalogue.columnar(), sort_keys=True)
+        }
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb6/catalogue?format=<format>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'doc': False,
+            'format': 'json'
+        })
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+            return
+        fmt = query_parameters['format']
+        if fmt not in self.bodies:
+            raise falcon.HTTPError(
+                title='Invalid format',
+                status='400 Invalid parameter',
+                description='format must be one of {}'.format(
+                    ', '.join(sorted(self.bodies))))
+        if not_modified(req, resp, '"{}-{}"'.format(self.version, fmt)):
+            return
+        resp.body = self.bodies[fmt]
+        resp.status = falcon.HTTP_200
+
+
 class Planet(RequestProcessor):
     '''
     GET <apiserver>/ct/lbb6/planet?uwp=<uwp>&<options>
@@ -210,54 +371,53 @@ class Planet(RequestProcessor):
     '''
     def on_get(self, req, resp):
         '''GET <apiserver>/ct/lbb6/planet?uwp=<uwp>&<<options>>'''
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'doc': False,
             'uwp': None,
             'orbit_no': None,
             'star': None,
             'name': None,
             'is_mainworld': True
-        }
-        self.parse_query_string(req.query_string)
+        })
         LOGGER.debug('querystring = %s', req.query_string)
-        LOGGER.debug('is_mainworld = %s', self.query_parameters['is_mainworld'])
+        LOGGER.debug('is_mainworld = %s', query_parameters['is_mainworld'])
 
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
         else:
             # Anything to do?
-            if self.query_parameters['uwp'] is None:
+            if query_parameters['uwp'] is None:
                 raise falcon.HTTPError(
                     title='Invalid UWP',
                     status='400 Invalid parameter',
                     description='No UWP specified')
             # Star?
-            if self.query_parameters['star'] is not None:
-                self.query_parameters['star'] = \
-                    catch_html_space(self.query_parameters['star'])
-                star = self.get_star_details()
+            if query_parameters['star'] is not None:
+                star = self.get_star_details(
+                    catch_html_space(query_parameters['star']))
             else:
                 star = None
             # Orbit?
-            if self.query_parameters['orbit_no'] is not None:
-                orbit = self.get_orbit_details(star)
+            if query_parameters['orbit_no'] is not None:
+                orbit = self.get_orbit_details(
+                    query_parameters['orbit_no'], star)
             else:
                 orbit = None
 
             try:
                 planet = LBB6Planet(
-                    uwp=self.query_parameters['uwp'],
-                    name=self.query_parameters['name']
+                    uwp=query_parameters['uwp'],
+                    name=query_parameters['name']
                 )
                 LOGGER.debug(
                     'query_param is_mainworld = %s',
-                    self.query_parameters['is_mainworld']
+                    query_parameters['is_mainworld']
                 )
                 planet.generate(
                     star=star,
                     orbit=orbit,
-                    is_mainworld=self.query_parameters['is_mainworld']
+                    is_mainworld=query_parameters['is_mainworld']
                 )
             except ValueError as err:
                 raise falcon.HTTPError(
@@ -268,25 +428,307 @@ class Planet(RequestProcessor):
             resp.body = planet.json()
             resp.status = falcon.HTTP_200
 
-    def get_star_details(self):
+    @staticmethod
+    def get_star_details(code):
         '''Get star details'''
         try:
-            return StarData(self.query_parameters['star'])
+            return StarData(code)
         except ValueError:
             raise falcon.HTTPError(
                 title='Invalid star',
                 status='400 Invalid parameter',
-                description='Invalid star {}'.format(
-                    self.query_parameters['star']))
+                description='Invalid star {}'.format(code))
 
-    def get_orbit_details(self, star):
+    @staticmethod
+    def get_orbit_details(orbit_no, star):
         '''Get orbit details'''
         try:
-            orbit = OrbitData(self.query_parameters['orbit_no'], star)
+            orbit = OrbitData(orbit_no, star)
             return orbit
         except ValueError:
             raise falcon.HTTPError(
                 title='Invalid orbit',
                 status='400 Invalid parameter',
-                description='Invalid orbit {}'.format(
-                    self.query_parameters['orbit_no']))
+                description='Invalid orbit {}'.format(orbit_no))
+
+
+class PlanetGenerate(RequestProcessor):
+    '''
+    Generate random LBB6 worlds
+    GET <apiserver>/ct/lbb6/planet/generate?<options>
+
+    Options:
+    - count=<count>: number of worlds to generate (1-10000, default 1)
+    - is_mainworld=<true|false>: generate mainworlds (default) or
+      satellites/secondary worlds (size S, starport Y, H, G or F)
+    - orbit_no=<orbit no>: worlds orbit in orbit <orbit no>
+    - star=<code>: worlds orbit a star of type <code>
+    - seed=<seed>: random seed (same seed and options => same worlds)
+
+    Returns
+    {
+        "count": <count>,
+        "is_mainworld": <true|false>,
+        "orbit_no": <orbit no>,
+        "seed": <seed>,
+        "star": <star classification>,
+        "worlds": [
+            {
+                "temperature": {"max": <max temp>, "min": <min temp>},
+                "trade_codes": [<tc>, <tc>],
+                "uwp": <uwp>
+            },
+            ...
+        ]
+    }
+
+    where
+    - worlds are generated using the same rules as
+      <apiserver>/ct/lbb6/planet; size, atmosphere and hydrographics
+      depend on <star> and <orbit no>
+    - <temp> is measured in degrees Kelvin
+      This will be null unless both <star> and <orbit no> are specified
+      in the request.
+    - <tc> is a standard Traveller trade classification (including
+      environmental trade codes)
+
+    GET <apiserver>/ct/lbb6/planet/generate?doc=true returns this text
+    '''
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb6/planet/generate?<options>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'doc': False,
+            'count': 1,
+            'star': None,
+            'orbit_no': None,
+            'is_mainworld': None,
+            'seed': None
+        })
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+            return
+        catalogue = load_catalogue()
+        star = None
+        orbit = None
+        try:
+            var = 'star'
+            if query_parameters['star'] is not None:
+                star = catalogue.star(StarCode.parse(
+                    catch_html_space(query_parameters['star'])))
+                assert star is not None
+            var = 'orbit_no'
+            if query_parameters['orbit_no'] is not None:
+                orbit_no = int(query_parameters['orbit_no'])
+                assert orbit_no in range(0, len(catalogue.orbits))
+                orbit = catalogue.orbits[orbit_no]
+            var = 'count'
+            count = int(query_parameters['count'])
+            assert count >= 1 and count <= MAX_COUNT
+            var = 'seed'
+            seed = query_parameters['seed']
+            if seed is not None:
+                seed = int(seed)
+            var = 'is_mainworld'
+            is_mainworld = True
+            if query_parameters['is_mainworld'] is not None:
+                is_mainworld = {'true': True, 'false': False}.get(
+                    query_parameters['is_mainworld'].lower())
+                assert is_mainworld is not None
+        except (AssertionError, ValueError):
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description='Invalid {} {}'.format(
+                    var, query_parameters[var]))
+        batch = WorldBatch(
+            count=count,
+            star=star,
+            orbit=orbit,
+            is_mainworld=is_mainworld,
+            seed=seed)
+        batch.generate()
+        doc = batch.dict()
+        doc['star'] = None if star is None else str(catalogue.star_code(star))
+        doc['orbit_no'] = None if orbit is None else orbit.indx
+        resp.body = json.dumps(doc, sort_keys=True)
+        resp.status = falcon.HTTP_200
+
+
+class PlanetTemperature(RequestProcessor):
+    '''
+    Return temperature profile of planet at every orbit around star
+    GET <apiserver>/ct/lbb6/planet/temperature?uwp=<uwp>&star=<code>
+
+    Returns
+    {
+        "cloudiness": <cloudiness>,
+        "columns": ["orbit_no", "au", "zone", "albedo_min", "albedo_max",
+                    "temperature_min", "temperature_max"],
+        "greenhouse": {"max": <max greenhouse effect>,
+                       "min": <min greenhouse effect>},
+        "orbits": [
+            [<orbit no>, <au>, <zone>, <min albedo>, <max albedo>,
+             <min temp>, <max temp>],
+            ...
+        ],
+        "star": <star classification>,
+        "uwp": <uwp>
+    }
+
+    where
+    - "orbits" has one row per orbit (0-19), with values in "columns" order
+    - <zone> is Inner, HZ (habitable zone) or Outer
+    - <cloudiness>, <albedo>, <greenhouse effect> and <temp> are as
+      returned by <apiserver>/ct/lbb6/planet for the same UWP, star and
+      orbit
+
+    GET <apiserver>/ct/lbb6/planet/temperature?doc=true returns this text
+    '''
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb6/planet/temperature?uwp=<uwp>&star=<code>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'doc': False,
+            'uwp': None,
+            'star': None
+        })
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+            return
+        catalogue = load_catalogue()
+        code = query_parameters['star']
+        try:
+            star_code = StarCode.parse(catch_html_space(code or ''))
+            star = catalogue.star(star_code)
+            assert star is not None
+        except (ValueError, AssertionError):
+            raise falcon.HTTPError(
+                title='Invalid star',
+                status='400 Invalid parameter',
+                description='Invalid star {}'.format(code))
+        try:
+            assert query_parameters['uwp'] is not None
+            planet = LBB6Planet(uwp=query_parameters['uwp'])
+        except (AssertionError, TypeError, ValueError):
+            raise falcon.HTTPError(
+                title='Invalid UWP',
+                status='400 Invalid parameter',
+                description='Invalid UWP {}'.format(
+                    query_parameters['uwp']))
+        profile = planet.temperature_profile(star, catalogue.orbits)
+        resp.body = json.dumps({
+            'uwp': str(planet),
+            'star': str(star_code),
+            'cloudiness': planet.cloudiness,
+            'greenhouse': planet.greenhouse.dict(),
+            'columns': PROFILE_COLUMNS,
+            'orbits': profile
+        }, sort_keys=True)
+        resp.status = falcon.HTTP_200
+
+
+class PlanetPlacement(RequestProcessor):
+    '''
+    Return stars and orbits where planet temperature is in target range
+    GET <apiserver>/ct/lbb6/planet/placement?uwp=<uwp>&min_temp=<min>&max_temp=<max>&<options>
+
+    Options:
+    - overlap=<true|false>: match if planet temperature range overlaps
+      target range (default false: planet temperature range must lie
+      within target range)
+    - limit=<limit>: return at most <limit> placements (1-1000, default
+      100)
+
+    Returns
+    {
+        "count": <number of matching placements>,
+        "max_temp": <max>,
+        "min_temp": <min>,
+        "placements": [
+            {
+                "distance": <distance from target>,
+                "orbit_no": <orbit number>,
+                "star": <star classification>,
+                "temperature": {"max": <max temp>, "min": <min temp>},
+                "zone": <zone>
+            },
+            ...
+        ],
+        "uwp": <uwp>
+    }
+
+    where
+    - every star in <apiserver>/ct/lbb6/catalogue and every orbit
+      available to planets (outside the star and at or beyond the minimum
+      orbit) is considered
+    - <temp> is the planet's temperature range (K) at that star and orbit,
+      as returned by <apiserver>/ct/lbb6/planet
+    - <distance> is the difference between the midpoints of the planet's
+      temperature range and the target range; placements are sorted by
+      <distance> (closest first)
+    - <zone> is Inner, HZ (habitable zone) or Outer
+    - <count> is the number of placements found (before <limit> applies)
+
+    GET <apiserver>/ct/lbb6/planet/placement?doc=true returns this text
+    '''
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb6/planet/placement?uwp=<uwp>&<options>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'doc': False,
+            'uwp': None,
+            'min_temp': None,
+            'max_temp': None,
+            'overlap': False,
+            'limit': 100
+        })
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+            return
+        try:
+            var = 'min_temp'
+            temp_min = float(query_parameters['min_temp'])
+            var = 'max_temp'
+            temp_max = float(query_parameters['max_temp'])
+            assert temp_min <= temp_max
+            var = 'limit'
+            limit = int(query_parameters['limit'])
+            assert limit >= 1 and limit <= MAX_PLACEMENTS
+            var = 'uwp'
+            assert query_parameters['uwp'] is not None
+            planet = LBB6Planet(uwp=query_parameters['uwp'])
+        except (AssertionError, TypeError, ValueError):
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description='Invalid {} {}'.format(
+                    var, query_parameters[var]))
+
+        catalogue = load_catalogue()
+        matches = planet.find_placements(
+            catalogue, temp_min, temp_max, query_parameters['overlap'])
+        resp.body = json.dumps({
+            'uwp': str(planet),
+            'min_temp': temp_min,
+            'max_temp': temp_max,
+            'count': len(matches),
+            'placements': [
+                {
+                    'distance': distance,
+                    'star': str(catalogue.star_code(star)),
+                    'orbit_no': orbit.indx,
+                    'zone': zone,
+                    'temperature': {'min': low, 'max': high}
+                }
+                for distance, star, orbit, zone, low, high
+                in matches[:limit]
+            ]
+        }, sort_keys=True)
+        resp.status = falcon.HTTP_200
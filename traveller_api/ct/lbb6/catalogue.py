@@ -0,0 +1,151 @@
+'''catalogue.py'''
+
+import os
+import json
+import hashlib
+import logging
+from collections import namedtuple
+from functools import lru_cache
+from traveller_api import DB
+from traveller_api.physics import angular_diameter, period
+from traveller_api.starcode import StarCode
+from traveller_api.ct.lbb6.db import Schemas
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+SQLITE_FILE = '{}/{}'.format(
+    os.path.dirname(os.path.realpath(__file__)),
+    'star.sqlite'
+)
+
+STAR_COLUMNS = (
+    'indx', 'typ', 'decimal', 'size', 'min_orbit', 'hz_orbit', 'int_orbit',
+    'magnitude', 'luminosity', 'temperature', 'radius', 'mass')
+ORBIT_COLUMNS = ('indx', 'au', 'mkm')
+
+StarRow = namedtuple('StarRow', STAR_COLUMNS)
+OrbitRow = namedtuple('OrbitRow', ORBIT_COLUMNS)
+
+# Solar diameter (Mkm)
+SOLAR_DIAMETER = 1.3914
+
+
+class Catalogue(object):
+    '''
+    In-memory copy of the LBB6 star and orbit tables
+
+    stars, orbits are sequences of StarRow, OrbitRow (or equivalent
+    tuples); stars are indexed by StarCode. version is a hash of the
+    table contents
+    '''
+
+    def __init__(self, stars, orbits):
+        self.stars = tuple(StarRow(*row) for row in stars)
+        self.orbits = tuple(
+            OrbitRow(*row) for row in sorted(orbits, key=lambda r: r[0]))
+        self._by_star_code = {}
+        for star in self.stars:
+            self._by_star_code.setdefault(self.star_code(star), star)
+        # Temperature formula factors: luminosity ** 0.25, au ** 0.5
+        self.luminosity_factors = tuple(
+            star.luminosity ** 0.25 for star in self.stars)
+        self.distance_factors = tuple(
+            orbit.au ** 0.5 for orbit in self.orbits)
+        self.version = hashlib.sha256(json.dumps(
+            [self.stars, self.orbits]).encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def from_sqlite(cls, sqlite_file):
+        '''Load star, orbit tables'''
+        database = DB(sqlite_file)
+        session = database.session()
+        try:
+            stars = [
+                tuple(getattr(row, column) for column in STAR_COLUMNS)
+                for row in session.query(Schemas.StarTable).order_by(
+                    Schemas.StarTable.indx)
+            ]
+            orbits = [
+                tuple(getattr(row, column) for column in ORBIT_COLUMNS)
+                for row in session.query(Schemas.OrbitTable)
+            ]
+        finally:
+            session.close()
+            database.engine.dispose()
+        LOGGER.debug('Loaded %s stars, %s orbits', len(stars), len(orbits))
+        return cls(stars, orbits)
+
+    @staticmethod
+    def star_code(star):
+        '''StarCode for star row (dwarfs have no decimal)'''
+        if star.size == 'D':
+            return StarCode(star.typ, '', 'D')
+        return StarCode(star.typ, star.decimal, star.size)
+
+    def star(self, star_code):
+        '''Return StarRow for StarCode, None if not in catalogue'''
+        return self._by_star_code.get(star_code)
+
+    def star_codes(self):
+        '''StarCodes for all stars, in table order'''
+        return [self.star_code(star) for star in self.stars]
+
+    @staticmethod
+    def first_orbit(star):
+        '''First orbit available to planets (outside star, >= minimum)'''
+        first = star.min_orbit or 0
+        if star.int_orbit is not None:
+            first = max(first, star.int_orbit + 1)
+        return first
+
+    def dict(self):
+        '''dict() representation: one {column: value} dict per row'''
+        return {
+            'version': self.version,
+            'star': [star._asdict() for star in self.stars],
+            'orbit': [orbit._asdict() for orbit in self.orbits]
+        }
+
+    def columnar(self):
+        '''Columnar representation: one list of values per column'''
+        return {
+            'version': self.version,
+            'star': {
+                column: [star[indx] for star in self.stars]
+                for indx, column in enumerate(STAR_COLUMNS)
+            },
+            'orbit': {
+                column: [orbit[indx] for orbit in self.orbits]
+                for indx, column in enumerate(ORBIT_COLUMNS)
+            }
+        }
+
+    def orbit_profile(self, star):
+        '''
+        Return list of orbit details (one per orbit) for StarRow, as
+        returned by /ct/lbb6/orbit for each orbit in turn
+        '''
+        profile = []
+        stellar_diameter = star.radius * SOLAR_DIAMETER
+        for orbit in self.orbits:
+            profile.append({
+                'orbit_no': orbit.indx,
+                'au': orbit.au,
+                'mkm': orbit.mkm,
+                'period': period(orbit.au, star.mass),
+                'angular_diameter': angular_diameter(
+                    orbit.mkm, stellar_diameter),
+                'interior': (
+                    star.int_orbit is not None and
+                    orbit.indx <= star.int_orbit),
+                'unavailable': orbit.indx < (star.min_orbit or 0),
+                'habitable': orbit.indx == star.hz_orbit
+            })
+        return profile
+
+
+@lru_cache(maxsize=4)
+def load_catalogue(sqlite_file=SQLITE_FILE):
+    '''Load catalogue once per file'''
+    return Catalogue.from_sqlite(sqlite_file)
@@ -5,8 +5,9 @@
 import json
 import logging
 import os
-import requests
 from traveller_api import DB
+from traveller_api.physics import angular_diameter, period
+from traveller_api.ct.lbb6.catalogue import SOLAR_DIAMETER
 from traveller_api.ct.lbb6.db import Schemas
 # from ... import Config
 
@@ -26,20 +27,24 @@ class Orbit(object):
         self.star = star
         self.notes = []
 
+        try:
+            orbit_no = int(orbit_no)
+            assert orbit_no in range(0, 20)
+        except:
+            raise ValueError('Invalid orbit_no {}'.format(orbit_no))
+
         sqlite_file = '{}/{}'.format(
             os.path.dirname(os.path.realpath(__file__)),
             'star.sqlite'
         )
         self.database = DB(sqlite_file)
         self.session = self.database.session()
-
         try:
-            orbit_no = int(orbit_no)
-            assert orbit_no in range(0, 20)
-        except:
-            raise ValueError('Invalid orbit_no {}'.format(orbit_no))
-
-        self.get_details(orbit_no)
+            self.get_details(orbit_no)
+        finally:
+            # Connections must be closed by the thread that opened them
+            self.session.close()
+            self.database.engine.dispose()
         if self.star is not None:
             self.determine_period()
             self.determine_angular_diameter()
@@ -60,32 +65,15 @@ class Orbit(object):
     def determine_period(self):
         '''Determine orbital period'''
         if self.star is not None:
-            self.period = round((self.au ** 3 / self.star.mass) ** 0.5, 3)
+            self.period = period(self.au, self.star.mass)
             LOGGER.debug('period = %s', self.period)
 
     def determine_angular_diameter(self):
-        '''Determine angular diameter'''
+        '''Determine angular diameter (degrees) of star from orbit'''
         if self.star is not None:
-            stellar_diameter = self.star.radius * 1.3914
-            req_string = 'http://api.trav.phraction.org/misc/angdia'
-            req_string += '?distance={}&diameter={}'.format(
-                self.mkm,
-                stellar_diameter
-            )
-            try:
-                resp = requests.get(req_string)
-                if resp.status_code == 200:
-                    self.angular_diameter = resp.json()['ang_dia_deg']
-                else:
-                    self.notes.append(
-                        'Call to http://api.trav.phraction.org/misc/angdia' +\
-                        ' returned {}'.format(resp.status_code))
-                    LOGGER.error(
-                        'Call to API endpoint returned %s', resp.status_code)
-            except requests.ConnectionError:
-                LOGGER.debug('Unable to connect to API server')
-                self.notes.append(
-                    'Unable to connect to API endpoint http://api.trav.phraction.org')
+            self.angular_diameter = angular_diameter(
+                self.mkm, self.star.radius * SOLAR_DIAMETER)
+            LOGGER.debug('angular_diameter = %s', self.angular_diameter)
 
     def json(self):
         '''JSON representation'''
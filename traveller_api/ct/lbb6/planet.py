@@ -5,9 +5,11 @@
 import json
 import logging
 import re
+from collections import namedtuple
 from ehex import ehex
-from traveller_api.ct.planet import Planet
+from traveller_api.ct.planet import Planet, starport_from_roll
 from traveller_api.ct.util import Die
+from traveller_api.physics import scaled_temperature, temperature
 from traveller_api.util import MinMax
 
 D6 = Die(6)
@@ -111,6 +113,82 @@ class EhexSize(ehex):
                 '%s %s should be ehex, int or str' % (type(other), other))
 
 
+# Atmosphere, hydrographics codes covered by FACTOR_TABLE
+ATMOSPHERE_CODES = '0123456789ABCDEF'
+HYDROGRAPHICS_CODES = '0123456789A'
+# (zone, hydro_lost) cases: zone None => no star/orbit
+ZONE_CASES = (
+    (None, False), ('Inner', False), ('HZ', False),
+    ('Outer', False), ('Outer', True))
+
+PlanetFactors = namedtuple(
+    'PlanetFactors',
+    ['cloudiness', 'greenhouse_min', 'greenhouse_max',
+     'albedo_min', 'albedo_max'])
+
+PROFILE_COLUMNS = (
+    'orbit_no', 'au', 'zone', 'albedo_min', 'albedo_max',
+    'temperature_min', 'temperature_max')
+
+
+def secondary_starport_die_mod(population):
+    '''Secondary world (not mainworld) starport DM'''
+    die_mod = 0
+    if population >= 6:
+        die_mod += 2
+    if population == 1:
+        die_mod -= 2
+    if population == 0:
+        die_mod -= 3
+    return die_mod
+
+
+def secondary_starport_from_roll(roll):
+    '''Secondary world (not mainworld) spaceport for 1D+DM roll'''
+    if roll <= 2:
+        return 'Y'
+    elif roll == 3:
+        return 'H'
+    elif roll >= 4 and roll <= 5:
+        return 'G'
+    return 'F'
+
+
+def env_trade_codes(size, atmosphere, hydrographics, is_mainworld):
+    '''Environmental trade codes Wa, De, Va, As, Ic for UWP values (ints)'''
+    codes = []
+    # Wa
+    if hydrographics == 10:
+        codes.append('Wa')
+    # De
+    if hydrographics == 0 and atmosphere <= 2:
+        codes.append('De')
+    # Va
+    if atmosphere == 0:
+        codes.append('Va')
+    # As
+    if size == 0 and is_mainworld:
+        codes.append('As')
+    # Ic
+    if atmosphere <= 1 and hydrographics >= 1:
+        codes.append('Ic')
+    return codes
+
+
+def orbit_zone(hz_orbit, orbit_no):
+    '''
+    Zone of orbit_no for star with habitable zone orbit hz_orbit
+    Outer zone: hz_orbit is None or orbit_no > hz_orbit
+    Inner zone: orbit_no < hz_orbit
+    HZ: orbit_no == hz_orbit
+    '''
+    if hz_orbit is None or hz_orbit < orbit_no:
+        return 'Outer'
+    elif hz_orbit == orbit_no:
+        return 'HZ'
+    return 'Inner'
+
+
 class LBB6Planet(Planet):
     '''LBB6 planet - extends basic CT planet'''
 
@@ -152,46 +230,18 @@ class LBB6Planet(Planet):
             self._generate_techlevel()
             self._determine_trade_codes()
         self._determine_env_trade_codes()
-        self.determine_greenhouse()
-        self.determine_cloudiness()
-        self.determine_albedo()
+        self.determine_factors()
         self.determine_temperature_range()
 
     def _generate_starport(self):
         '''Generate starport'''
         if self.is_mainworld is True:
-            starport = 'X'
             roll = D6.roll(2)
             LOGGER.debug('roll = %s', roll)
-
-            if roll <= 4:
-                starport = 'A'
-            elif roll >= 5 and roll <= 6:
-                starport = 'B'
-            elif roll >= 7 and roll <= 8:
-                starport = 'C'
-            elif roll == 9:
-                starport = 'D'
-            elif roll >= 10 and roll <= 11:
-                starport = 'E'
-        else:
-            die_mod = 0
-            if int(self.population) >= 6:
-                die_mod += 2
-            if int(self.population) == 1:
-                die_mod -= 2
-            if int(self.population) == 0:
-                die_mod -= 3
-            roll = D6.roll(1, die_mod)
-            if roll <= 2:
-                starport = 'Y'
-            elif roll == 3:
-                starport = 'H'
-            elif roll >= 4 and roll <= 5:
-                starport = 'G'
-            else:
-                starport = 'F'
-        return starport
+            return starport_from_roll(roll)
+        roll = D6.roll(
+            1, secondary_starport_die_mod(int(self.population)))
+        return secondary_starport_from_roll(roll)
 
     def _generate_size(self):
         '''LBB6 size'''
@@ -216,23 +266,25 @@ class LBB6Planet(Planet):
         Outer zone: DM -2
         Size 0 or S: atm = 0
         Outer zone +2: roll 12 for A (0 otherwise)
+        Star without habitable zone: all orbits are outer zone
         '''
         if int(self.size) == 0:     # 0 or S
             self.atmosphere = ehex(0)
             return
         die_mod = 0
-        if self.star is not None and self.orbit is not None:
-            if self.orbit.orbit_no < self.star.hz_orbit:
-                die_mod -= 2
-            if self.orbit.orbit_no > self.star.hz_orbit:
+        zone = self._zone()[0]
+        if zone is not None:
+            if zone in ('Inner', 'Outer'):
                 die_mod -= 2
-            if self.orbit.orbit_no - self.star.hz_orbit >= 2:
+            if (
+                    self.star.hz_orbit is not None and
+                    self.orbit.orbit_no - self.star.hz_orbit >= 2):
                 if D6.roll(2) == 12:
                     self.atmosphere = ehex('A')
                 else:
                     self.atmosphere = ehex(0)
                 return
-        self.atmosphere = D6.roll(2, die_mod, ceiling=12)
+        self.atmosphere = ehex(D6.roll(2, die_mod, ceiling=12))
 
     def _generate_hydrographics(self):
         '''
@@ -242,15 +294,16 @@ class LBB6Planet(Planet):
         * Outer zone: DM -4
         * Size 1- or S: hyd = 0
         * Atmosphere 1- or A+: DM -4
+        * Star without habitable zone: all orbits are outer zone
         '''
         # Orbit-related
         die_mod = 0
-        if self.star is not None and self.orbit is not None:
-            if self.orbit.orbit_no < self.star.hz_orbit:
-                self.hydrographics = ehex(0)
-                return
-            if self.orbit.orbit_no > self.star.hz_orbit:
-                die_mod -= 4
+        zone = self._zone()[0]
+        if zone == 'Inner':
+            self.hydrographics = ehex(0)
+            return
+        if zone == 'Outer':
+            die_mod -= 4
 
         # Size-related
         if int(self.size) <= 1:
@@ -291,22 +344,9 @@ class LBB6Planet(Planet):
 
     def _determine_env_trade_codes(self):
         '''Generate environmental trade codes Wa, De, Va, As, Ic'''
-        # Wa
-        if str(self.hydrographics) == 'A':
-            self.trade_codes.append('Wa')
-        # De
-        if str(self.hydrographics) == '0' and \
-                int(self.atmosphere) <= 2:
-            self.trade_codes.append('De')
-        # Va
-        if int(self.atmosphere) == 0:
-            self.trade_codes.append('Va')
-        # As
-        if int(self.size) == 0 and self.is_mainworld:
-            self.trade_codes.append('As')
-        # Ic
-        if int(self.atmosphere) <= 1 and int(self.hydrographics) >= 1:
-            self.trade_codes.append('Ic')
+        self.trade_codes.extend(env_trade_codes(
+            int(self.size), int(self.atmosphere), int(self.hydrographics),
+            self.is_mainworld))
 
     def determine_cloudiness(self):
         '''Determine cloudiness (dep hydrographics, atmosphere)'''
@@ -329,11 +369,53 @@ class LBB6Planet(Planet):
             self.cloudiness = self.cloudiness / 2
         self.cloudiness = round(self.cloudiness, 1)
 
+    def determine_factors(self):
+        '''
+        Determine greenhouse, cloudiness and albedo from FACTOR_TABLE
+
+        Falls back to determine_greenhouse(), determine_cloudiness() and
+        determine_albedo() (the reference implementation) for atmosphere,
+        hydrographics values not in the table
+        '''
+        zone, hydro_lost = self._zone()
+        factors = FACTOR_TABLE.get(
+            (str(self.atmosphere), str(self.hydrographics), zone, hydro_lost))
+        if factors is None:
+            self.determine_greenhouse()
+            self.determine_cloudiness()
+            self.determine_albedo()
+            return
+        self.cloudiness = factors.cloudiness
+        self.greenhouse = MinMax(factors.greenhouse_min, factors.greenhouse_max)
+        self.albedo = MinMax(factors.albedo_min, factors.albedo_max)
+
+    def _zone(self):
+        '''(zone, hydro_lost) for planet's star/orbit (zone None if unset)'''
+        if self.star is None or self.orbit is None:
+            return (None, False)
+        zone = orbit_zone(self.star.hz_orbit, self.orbit.orbit_no)
+        return (zone, zone == 'Outer' and self.star.hz_orbit is not None)
+
+    def _zone_albedo(self, zone, hydro_lost):
+        '''Albedo range for zone from FACTOR_TABLE, or _albedo()'''
+        factors = FACTOR_TABLE.get(
+            (str(self.atmosphere), str(self.hydrographics), zone, hydro_lost))
+        if factors is None:
+            return self._albedo(zone, hydro_lost)
+        return MinMax(factors.albedo_min, factors.albedo_max)
+
     def determine_albedo(self):
         '''Determine albedo range'''
+        self.albedo = self._albedo(*self._zone())
+
+    def _albedo(self, zone, hydro_lost):
+        '''
+        Albedo range for zone (see orbit_zone(), None if no star/orbit);
+        hydro_lost => no liquid water (beyond habitable zone)
+        '''
         desert_coverage = self._albedo_determine_desert_coverage()
         veg_coverage = 1.0 - desert_coverage
-        ice_coverage = self._determine_albedo_ice_coverage()
+        ice_coverage = self._ice_coverage(zone)
         LOGGER.debug(
             'desert_coverage = %s veg_coverage = %s ice_coverage = %s',
             desert_coverage, veg_coverage, ice_coverage
@@ -348,10 +430,8 @@ class LBB6Planet(Planet):
             net_land_coverage, net_hydro_coverage
         )
 
-        if self.star is not None and self.orbit is not None:
-            if self.star.hz_orbit is not None:
-                if self.orbit.orbit_no > self.star.hz_orbit:
-                    net_hydro_coverage = 0.0
+        if hydro_lost:
+            net_hydro_coverage = 0.0
         non_cloud_albedo = (
             (
                 desert_coverage * 0.2 +
@@ -362,7 +442,7 @@ class LBB6Planet(Planet):
 
         LOGGER.debug('non_cloud_albedo = %s', non_cloud_albedo)
 
-        self.albedo = MinMax(
+        return MinMax(
             round(self.cloudiness * 0.4 + non_cloud_albedo, 3),
             round(self.cloudiness * 0.8 + non_cloud_albedo, 3)
         )
@@ -377,6 +457,10 @@ class LBB6Planet(Planet):
         return (net_land_coverage, net_hydro_coverage)
 
     def _determine_albedo_ice_coverage(self):
+        '''Determine ice cap coverage for planet's star/orbit'''
+        return self._ice_coverage(self._zone()[0])
+
+    def _ice_coverage(self, zone):
         '''
         Determine ice cap coverage
         Hyd == 0: no ice cap
@@ -384,39 +468,13 @@ class LBB6Planet(Planet):
         Habitable zone: ice cap = 10%
         Outer zone: ice cap = hydrographics
 
-        Default (no orbit/star): ice cap = 10%
+        Default (no orbit/star, zone None): ice cap = 10%
         '''
-
-        # Determine zone
-        # Outer zone:
-        #   star.hz_orbit == None or orbit.orbit_no > star.hz_orbit
-        # Inner zone:
-        #   orbit.hz_orbit < star.hz_orbit
-        # HZ
-        #   orbit.hz_orbit == star.hz_orbit
-        if self.star is not None and self.orbit is not None:
-            LOGGER.debug(
-                'hz_orbit = %s orbit = %s',
-                self.star.hz_orbit, self.orbit.orbit_no
-            )
-            if (
-                    self.star.hz_orbit is None or
-                    self.star.hz_orbit < self.orbit.orbit_no
-                ):
-                zone = 'Outer'
-            else:
-                if self.star.hz_orbit == self.orbit.orbit_no:
-                    zone = 'HZ'
-                elif self.star.hz_orbit > self.orbit.orbit_no:
-                    zone = 'Inner'
-            LOGGER.debug('zone = %s', zone)
-
-            if zone == 'Inner':
-                ice_coverage = 0.0
-            elif zone == 'HZ':
-                ice_coverage = 0.1
-            else:
-                ice_coverage = float(int(self.hydrographics) / 10.0)
+        LOGGER.debug('zone = %s', zone)
+        if zone == 'Inner':
+            ice_coverage = 0.0
+        elif zone == 'Outer':
+            ice_coverage = float(int(self.hydrographics) / 10.0)
         else:
             ice_coverage = 0.1
         # Desert
@@ -492,6 +550,94 @@ class LBB6Planet(Planet):
                 )
             )
 
+    def temperature_profile(self, star, orbits):
+        '''
+        Determine temperature factors, range for every orbit around star
+
+        star has luminosity, hz_orbit (Star or catalogue StarRow); orbits
+        is a sequence of (orbit_no, au, ...) tuples (catalogue OrbitRows).
+        Cloudiness and greenhouse don't depend on orbit and albedo depends
+        only on zone, so each is determined once; temperatures for all
+        orbits are then calculated in a single pass. Returns list of
+        PROFILE_COLUMNS tuples, one per orbit
+        '''
+        self.determine_greenhouse()
+        self.determine_cloudiness()
+        albedos = {
+            zone: self._zone_albedo(
+                zone, zone == 'Outer' and star.hz_orbit is not None)
+            for zone in ('Inner', 'HZ', 'Outer')
+        }
+        luminosity = star.luminosity ** 0.25
+        profile = []
+        for orbit in orbits:
+            orbit_no, au_dist = orbit[0], orbit[1]
+            zone = orbit_zone(star.hz_orbit, orbit_no)
+            albedo = albedos[zone]
+            profile.append(
+                (orbit_no, au_dist, zone, albedo.min(), albedo.max()) +
+                self._temperature_range(albedo, luminosity, au_dist ** 0.5))
+        return profile
+
+    def find_placements(self, catalogue, temp_min, temp_max, overlap=False):
+        '''
+        Search every star and available orbit in catalogue for positions
+        where the planet's temperature range lies within (overlap=True:
+        overlaps) temp_min-temp_max
+
+        Albedo depends only on zone (and whether the star has a habitable
+        zone), so is determined once for each case; the temperature
+        formula is then evaluated over the catalogue's precomputed
+        luminosity and distance factors. Returns list of
+        (distance, star, orbit, zone, temp_min, temp_max) tuples sorted by
+        distance between the midpoints of the planet's temperature range
+        and the target range
+        '''
+        self.determine_greenhouse()
+        self.determine_cloudiness()
+        albedos = {
+            (zone, hydro_lost): self._zone_albedo(zone, hydro_lost)
+            for zone in ('Inner', 'HZ', 'Outer')
+            for hydro_lost in (False, True)
+        }
+        target = (temp_min + temp_max) / 2.0
+        matches = []
+        for star, luminosity in zip(
+                catalogue.stars, catalogue.luminosity_factors):
+            first = catalogue.first_orbit(star)
+            for orbit, distance in zip(
+                    catalogue.orbits[first:],
+                    catalogue.distance_factors[first:]):
+                zone = orbit_zone(star.hz_orbit, orbit.indx)
+                albedo = albedos[
+                    (zone, zone == 'Outer' and star.hz_orbit is not None)]
+                low, high = self._temperature_range(
+                    albedo, luminosity, distance)
+                if overlap:
+                    match = low <= temp_max and high >= temp_min
+                else:
+                    match = low >= temp_min and high <= temp_max
+                if match:
+                    matches.append((
+                        abs((low + high) / 2.0 - target),
+                        star, orbit, zone, low, high))
+        matches.sort(
+            key=lambda match: (match[0], match[1].indx, match[2].indx))
+        return matches
+
+    def _temperature_range(self, albedo, luminosity, distance):
+        '''
+        (min, max) temperature for albedo range, luminosity ** 0.25 and
+        distance ** 0.5, using the current greenhouse range
+        '''
+        temps = (
+            scaled_temperature(
+                luminosity, albedo.min(), distance, self.greenhouse.max()),
+            scaled_temperature(
+                luminosity, albedo.max(), distance, self.greenhouse.min())
+        )
+        return (min(temps), max(temps))
+
     @staticmethod
     def _temperature_formula(
             luminosity,
@@ -504,12 +650,39 @@ class LBB6Planet(Planet):
             'lum %s albedo %s dist %s greenhouse %s',
             luminosity, albedo, distance, greenhouse
         )
-        temp = round(
-            374.025 * greenhouse *
-            (1.0 - albedo) *
-            (luminosity ** 0.25) /
-            (distance ** 0.5),
-            0
-        )
+        temp = temperature(luminosity, albedo, distance, greenhouse)
         LOGGER.debug('temp = %d', temp)
         return temp
+
+
+def _build_factor_table():
+    '''
+    Precompute PlanetFactors for every (atmosphere, hydrographics, zone,
+    hydro_lost) combination using the reference determine_*() methods.
+    Keys are (atmosphere code, hydrographics code, zone, hydro_lost);
+    is_mainworld and size have no effect on these factors
+    '''
+    level = LOGGER.level
+    LOGGER.setLevel(logging.ERROR)
+    table = {}
+    try:
+        for atmosphere in ATMOSPHERE_CODES:
+            for hydrographics in HYDROGRAPHICS_CODES:
+                planet = LBB6Planet()
+                planet.atmosphere = ehex(atmosphere)
+                planet.hydrographics = ehex(hydrographics)
+                planet.determine_greenhouse()
+                planet.determine_cloudiness()
+                for zone, hydro_lost in ZONE_CASES:
+                    albedo = planet._albedo(zone, hydro_lost)   # noqa
+                    table[(atmosphere, hydrographics, zone, hydro_lost)] = \
+                        PlanetFactors(
+                            planet.cloudiness,
+                            planet.greenhouse.min(), planet.greenhouse.max(),
+                            albedo.min(), albedo.max())
+    finally:
+        LOGGER.setLevel(level)
+    return table
+
+
+FACTOR_TABLE = _build_factor_table()
@@ -2,9 +2,10 @@
 
 import json
 import os
-import re
 import logging
 from traveller_api import DB
+from traveller_api.physics import period
+from traveller_api.starcode import StarCode
 from traveller_api.ct.lbb6.db import Schemas
 # from ... import Config
 
@@ -13,8 +14,13 @@ LOGGER.setLevel(logging.ERROR)
 
 
 class Star(object):
-    '''Star class'''
-    def __init__(self, code):
+    '''
+    Star class
+
+    catalogue: take star details from in-memory Catalogue (see
+    catalogue.load_catalogue()) instead of querying the DB
+    '''
+    def __init__(self, code, catalogue=None):
         self.type = None
         self.decimal = None
         self.size = None
@@ -29,84 +35,44 @@ class Star(object):
         self.hz_period = None
         self.classification = None
         self.notes = []
+        self.catalogue = catalogue
 
-        # Leave this as is until config gets sorted out
-        '''sqlite_file = '{}/{}'.format(
-            os.path.dirname(os.path.realpath(__file__)),
-            config.get('dbfile'))'''
-        sqlite_file = '{}/{}'.format(
-            os.path.dirname(os.path.realpath(__file__)),
-            'star.sqlite'
-        )
-        LOGGER.debug('sqlite_file = %s', sqlite_file)
-        self.database = DB(sqlite_file)
-        self.session = self.database.session()
+        if self.catalogue is None:
+            # Leave this as is until config gets sorted out
+            '''sqlite_file = '{}/{}'.format(
+                os.path.dirname(os.path.realpath(__file__)),
+                config.get('dbfile'))'''
+            sqlite_file = '{}/{}'.format(
+                os.path.dirname(os.path.realpath(__file__)),
+                'star.sqlite'
+            )
+            LOGGER.debug('sqlite_file = %s', sqlite_file)
+            self.database = DB(sqlite_file)
+            self.session = self.database.session()
 
         # Do stuff
-        self._validate_code(code)
-        self.get_classification()
-        self.get_details()
-        self.calculate_hz_period()
+        try:
+            self._validate_code(code)
+            self.get_classification()
+            self.get_details()
+            self.calculate_hz_period()
+        finally:
+            self.close_db()
+
+    def close_db(self):
+        '''
+        Close DB session, engine once details are loaded (connections
+        must be closed by the thread that opened them)
+        '''
+        if self.catalogue is None:
+            self.session.close()
+            self.database.engine.dispose()
 
     def _validate_code(self, code):
         '''Validate code -> type, decimal, size'''
         LOGGER.debug('code = %s', code)
         if code:
-            # Convert HTML %20 (space) to ' '
-            # code = code.replace('%20', ' ')
-            if code.endswith('D'):
-                self._validate_code_dwarf(code)
-            else:
-                self._validate_code_star(code)
-
-    def _validate_code_star(self, code):
-        '''Validate code for non-dwarf'''
-        mtch = re.match(
-            r'([OBAFGKM])([0-9])\s*([IVDab]{1,3}$)',
-            code)
-        if mtch:
-            LOGGER.debug('Code matches RE')
-            self.type = mtch.group(1)
-            self.decimal = int(mtch.group(2))
-            if mtch.group(3) in ['Ia', 'Ib', 'II', 'III', 'IV', 'V', 'VI']:
-                self.size = mtch.group(3)
-            else:
-                raise ValueError('Invalid size {}'.format(mtch.group(3)))
-            LOGGER.debug(
-                'type = %s decimal = %s size = %s',
-                self.type, self.decimal, self.size)
-
-            # Check for invalid types
-            if self.size == 'IV':
-                LOGGER.debug('size = IV')
-                # M[0-9] IV not possible, use V instead
-                if self.type == 'M':
-                    LOGGER.debug('type = M, setting size=V')
-                    self.size = 'V'
-                # K[5-9] IV not possible, use V instead
-                if self.type == 'K' and self.decimal >= 5:
-                    LOGGER.debug('type = K, size = 5-9, setting size=V')
-                    self.size = 'V'
-            if self.size == 'VI':
-                # B[0-9] VI not possible, use V instead
-                if self.type == 'B':
-                    self.size = 'V'
-                # F[0-4] VI not possible, use V instead
-                if self.type == 'F' and self.decimal <= 4:
-                    self.size = 'V'
-        else:
-            raise ValueError('Unknown code/type {}'.format(code))
-
-    def _validate_code_dwarf(self, code):
-        '''Validate code for dwarf'''
-        mtch = re.match(r'([OBAFGKM])\s*D', code)
-        if mtch:
-            LOGGER.debug('code matches RE')
-            self.type = mtch.group(1)
-            self.decimal = ''
-            self.size = 'D'
-        else:
-            raise ValueError('Unknown code/type {}'.format(code))
+            self.type, self.decimal, self.size = StarCode.parse(code)
 
     def get_details(self):
         '''Get details from DB'''
@@ -115,7 +81,10 @@ class Star(object):
             self.type,
             self.size,
             self.decimal)
-        if self.size == 'D':
+        if self.catalogue is not None:
+            details = self.catalogue.star(
+                StarCode(self.type, self.decimal, self.size))
+        elif self.size == 'D':
             details = self.session.query(Schemas.StarTable).\
                 filter_by(typ=self.type).\
                 filter_by(size=self.size).\
@@ -147,10 +116,13 @@ class Star(object):
     def calculate_hz_period(self):
         '''Calculate period of planet in HZ orbit'''
         if self.hz_orbit:
-            orbit = self.session.query(Schemas.OrbitTable).\
-                filter_by(indx=self.hz_orbit).first()
+            if self.catalogue is not None:
+                orbit = self.catalogue.orbits[self.hz_orbit]
+            else:
+                orbit = self.session.query(Schemas.OrbitTable).\
+                    filter_by(indx=self.hz_orbit).first()
             LOGGER.debug('orbit = %s', orbit)
-            self.hz_period = round((orbit.au ** 3 / self.mass) ** 0.5, 3)
+            self.hz_period = period(orbit.au, self.mass)
             LOGGER.debug('hz_period = %s', self.hz_period)
 
     def get_classification(self):
@@ -159,9 +131,9 @@ class Star(object):
             self.classification = '{0}{1} {2}'.format(
                 self.type, self.decimal, self.size)
 
-    def json(self):
-        '''JSON representation'''
-        doc = {
+    def dict(self):
+        '''dict() representation'''
+        return {
             'type': self.type,
             'decimal': self.decimal,
             'size': self.size,
@@ -176,7 +148,10 @@ class Star(object):
             'int_orbit': self.int_orbit,
             'classification': self.classification
         }
-        return json.dumps(doc, sort_keys=True)
+
+    def json(self):
+        '''JSON representation'''
+        return json.dumps(self.dict(), sort_keys=True)
 
     def __str__(self):
         if self.size == 'D':
@@ -0,0 +1,232 @@
+'''worldgen.py'''
+
+import random
+import logging
+from functools import lru_cache
+from ehex import ehex
+from traveller_api.executor import TASK_POOL, task_seed
+from traveller_api.ct.util import batch_roll
+from traveller_api.ct.planet import starport_from_roll, techlevel_die_mod
+from traveller_api.ct.planet import trade_codes
+from .planet import LBB6Planet, env_trade_codes, orbit_zone
+from .planet import secondary_starport_die_mod, secondary_starport_from_roll
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+MAX_COUNT = 10000
+# Worlds per task pool task (and per task seed)
+CHUNK_SIZE = 2500
+# Use the task pool for at least this many worlds
+POOL_THRESHOLD = 5000
+
+# UWP digits 0-33
+EHEX_CODES = tuple(str(ehex(value)) for value in range(34))
+
+
+@lru_cache(maxsize=4096)
+def _trade_codes(size, atmosphere, hydrographics, population, government,
+                 is_mainworld):
+    '''Trade codes (incl environmental codes) for UWP values (ints)'''
+    return tuple(
+        trade_codes(
+            ehex(atmosphere), ehex(hydrographics),
+            ehex(population), ehex(government)) +
+        env_trade_codes(size, atmosphere, hydrographics, is_mainworld))
+
+
+def _temperatures(star, orbit):
+    '''Return function (atmosphere, hydrographics) -> (min, max) temp'''
+    @lru_cache(maxsize=None)
+    def temperature(atmosphere, hydrographics):
+        planet = LBB6Planet()
+        planet.atmosphere = ehex(atmosphere)
+        planet.hydrographics = ehex(hydrographics)
+        return planet.temperature_profile(star, [orbit])[0][5:]
+    return temperature
+
+
+def _generate_chunk(batch, count, seed):
+    '''Task pool task: worlds for a chunk of batch'''
+    return batch.generate_chunk(count, seed)
+
+
+class WorldBatch(object):
+    '''
+    Batch of LBB6 worlds generated using the LBB6Planet.generate() rules
+
+    star, orbit are catalogue StarRow, OrbitRow (or None). Each die roll
+    is made for the whole batch at once (one list of rolls per UWP
+    element) using an RNG seeded with seed; batches of more than
+    CHUNK_SIZE worlds are generated in chunks, each with its own seed.
+    Stars with no habitable zone are treated as having every orbit in
+    the outer zone
+    '''
+
+    def __init__(
+            self, count=1, star=None, orbit=None, is_mainworld=True,
+            seed=None):
+        try:
+            var = 'count'
+            self.count = int(count)
+            assert self.count >= 1 and self.count <= MAX_COUNT
+            var = 'seed'
+            if seed is None:
+                seed = random.SystemRandom().randint(0, 2 ** 32 - 1)
+            self.seed = int(seed)
+        except (AssertionError, TypeError, ValueError):
+            raise ValueError(var)
+        self.star = star
+        self.orbit = orbit
+        self.is_mainworld = is_mainworld
+        self.worlds = []
+
+    def _size_die_mod(self):
+        '''Size DM for orbit, star type'''
+        die_mod = -2
+        if self.orbit is not None:
+            if self.orbit.indx == 0:
+                die_mod -= 5
+            if self.orbit.indx == 1:
+                die_mod -= 4
+        if self.star is not None and self.star.typ == 'M':
+            die_mod -= 2
+        return die_mod
+
+    def generate(self, processes=None):
+        '''
+        Generate worlds
+
+        processes: None => shared task pool (TASK_POOL) for
+        POOL_THRESHOLD or more worlds; 0 or 1 => generate inline; more
+        => task pool. Worlds for a given seed do not depend on processes
+        '''
+        self.worlds = []
+        if self.count <= CHUNK_SIZE:
+            self.worlds = self.generate_chunk(self.count, self.seed)
+            return
+        tasks = [
+            (self, min(CHUNK_SIZE, self.count - start), task_seed(
+                self.seed, task))
+            for task, start in enumerate(range(0, self.count, CHUNK_SIZE))
+        ]
+        if processes is None:
+            inline = self.count < POOL_THRESHOLD
+        else:
+            inline = processes <= 1
+        for worlds in TASK_POOL.map(_generate_chunk, tasks, inline=inline):
+            self.worlds.extend(worlds)
+
+    def generate_chunk(self, count, seed):
+        '''Return list of count worlds generated with RNG seeded with seed'''
+        rng = random.Random(seed)
+        zone = None
+        beyond_hz = False
+        if self.star is not None and self.orbit is not None:
+            zone = orbit_zone(self.star.hz_orbit, self.orbit.indx)
+            beyond_hz = (
+                self.star.hz_orbit is not None and
+                self.orbit.indx - self.star.hz_orbit >= 2)
+
+        # Size
+        die_mod = self._size_die_mod()
+        sizes = [
+            min(12, max(0, roll + die_mod))
+            for roll in batch_roll(rng, 2, count)]
+
+        # Atmosphere
+        if beyond_hz:
+            atmospheres = [
+                10 if roll == 12 else 0 for roll in batch_roll(rng, 2, count)]
+        else:
+            die_mod = -2 if zone in ('Inner', 'Outer') else 0
+            atmospheres = [
+                min(12, max(0, roll + die_mod))
+                for roll in batch_roll(rng, 2, count)]
+        atmospheres = [
+            0 if size == 0 else atmosphere
+            for size, atmosphere in zip(sizes, atmospheres)]
+
+        # Hydrographics
+        die_mod = -4 if zone == 'Outer' else 0
+        hydrographics = [
+            0 if zone == 'Inner' or size <= 1 else min(10, max(
+                0,
+                roll + size - 7 + die_mod -
+                (4 if atmosphere <= 1 or atmosphere >= 10 else 0)))
+            for roll, size, atmosphere
+            in zip(batch_roll(rng, 2, count), sizes, atmospheres)]
+
+        # Population, government, law level
+        populations = [max(0, roll - 2) for roll in batch_roll(rng, 2, count)]
+        governments = [
+            min(13, max(0, roll + population - 7))
+            for roll, population
+            in zip(batch_roll(rng, 2, count), populations)]
+        lawlevels = [
+            min(9, max(0, roll + government - 7))
+            for roll, government
+            in zip(batch_roll(rng, 2, count), governments)]
+
+        # Starport
+        if self.is_mainworld:
+            starports = [
+                starport_from_roll(roll)
+                for roll in batch_roll(rng, 2, count)]
+        else:
+            starports = [
+                secondary_starport_from_roll(max(
+                    0, roll + secondary_starport_die_mod(population)))
+                for roll, population
+                in zip(batch_roll(rng, 1, count), populations)]
+
+        # Tech level
+        techlevels = [
+            max(0, roll + techlevel_die_mod(*uwp))
+            for roll, uwp in zip(
+                batch_roll(rng, 1, count),
+                zip(starports, sizes, atmospheres, hydrographics,
+                    populations, governments))]
+
+        temperature = None
+        if zone is not None:
+            temperature = _temperatures(self.star, self.orbit)
+
+        return [
+            self._world(uwp, temperature)
+            for uwp in zip(
+                starports, sizes, atmospheres, hydrographics, populations,
+                governments, lawlevels, techlevels)
+        ]
+
+    def _world(self, uwp, temperature):
+        '''World dict for UWP values'''
+        starport, size, atmosphere, hydrographics, population, \
+            government, lawlevel, techlevel = uwp
+        size_code = EHEX_CODES[size]
+        if size == 0 and not self.is_mainworld:
+            size_code = 'S'
+        world = {
+            'uwp': '{}{}{}{}{}{}{}-{}'.format(
+                starport, size_code,
+                EHEX_CODES[atmosphere], EHEX_CODES[hydrographics],
+                EHEX_CODES[population], EHEX_CODES[government],
+                EHEX_CODES[lawlevel], EHEX_CODES[techlevel]),
+            'trade_codes': list(_trade_codes(
+                size, atmosphere, hydrographics, population, government,
+                self.is_mainworld)),
+            'temperature': {'min': None, 'max': None}
+        }
+        if temperature is not None:
+            low, high = temperature(atmosphere, hydrographics)
+            world['temperature'] = {'min': low, 'max': high}
+        return world
+
+    def dict(self):
+        '''dict() representation'''
+        return {
+            'count': self.count,
+            'seed': self.seed,
+            'is_mainworld': self.is_mainworld,
+            'worlds': self.worlds
+        }
@@ -0,0 +1,94 @@
+'''LBB6 expanded system generation API'''
+
+import json
+import logging
+import falcon
+from traveller_api.util import RequestProcessor
+from traveller_api.ct.lbb6.planet import LBB6Planet
+from .system import LBB6ExpandedSystem
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+
+class System(RequestProcessor):
+    '''
+    Generate LBB6 expanded star system
+    GET <apiserver>/ct/lbb6/system?<options>
+
+    Options:
+    - uwp=<uwp>: mainworld UWP (default: generate random mainworld)
+    - name=<name>: system name
+
+    Returns stream of JSON documents (application/x-ndjson), one per line,
+    each sent as soon as it is generated:
+    - primary star
+        {"body": "star", "role": "primary", "classification": <code>, ...}
+    - companion stars (0-2)
+        {"body": "star", "role": "companion", "classification": <code>,
+         "orbit": <orbit no>|"Close"|"Far", ...}
+    - one document per orbit of the primary, in orbit order
+        {
+            "body": "orbit",
+            "orbit_no": <orbit no>,
+            "au": <au>,
+            "mkm": <mkm>,
+            "period": <period>,
+            "zone": <zone>,
+            "contents": <contents>,
+            "size": <gas giant size>,
+            "uwp": <uwp>,
+            "trade_codes": [<tc>, <tc>],
+            "temperature": {"max": <max temp>, "min": <min temp>}
+        }
+
+    where
+    - star documents contain the same details as <apiserver>/ct/lbb6/star
+    - <zone> is Inner, HZ (habitable zone) or Outer
+    - <contents> is one of unavailable, companion, empty, gas giant,
+      planetoid belt, mainworld or world
+    - <gas giant size> (Small or Large) is included for gas giants only
+    - <uwp>, <tc> and <temp> are included for worlds and the mainworld
+      only, as returned by <apiserver>/ct/lbb6/planet
+
+    GET <apiserver>/ct/lbb6/system?doc=true returns this text
+    '''
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/ct/lbb6/system?<options>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'doc': False,
+            'uwp': None,
+            'name': ''
+        })
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+            return
+        mainworld = None
+        if query_parameters['uwp'] is not None:
+            try:
+                mainworld = LBB6Planet(uwp=query_parameters['uwp'])
+            except (TypeError, ValueError):
+                raise falcon.HTTPError(
+                    title='Invalid UWP',
+                    status='400 Invalid parameter',
+                    description='Invalid UWP {}'.format(
+                        query_parameters['uwp']))
+        system = LBB6ExpandedSystem(
+            name=query_parameters['name'], mainworld=mainworld)
+        # Stars first, so an invalid star is an error response rather
+        # than a truncated stream
+        try:
+            system.generate_stars()
+        except ValueError as err:
+            LOGGER.error('Unable to generate stars: %s', err)
+            raise falcon.HTTPInternalServerError(
+                title='Unable to generate system', description=str(err))
+        resp.content_type = 'application/x-ndjson'
+        resp.stream = (
+            (json.dumps(body, sort_keys=True) + '\n').encode('utf-8')
+            for body in system.bodies()
+        )
+        resp.status = falcon.HTTP_200
@@ -1,11 +1,13 @@
 '''system.py'''
 
 import logging
-from random import randint
+from collections import namedtuple
+from traveller_api.physics import period
+from traveller_api.util import choice, randint
 from traveller_api.ct.util import Die
-from traveller_api.ct.lbb6.planet import LBB6Planet
-from traveller_api.ct.lbb6.orbit import Orbit
+from traveller_api.ct.lbb6.planet import LBB6Planet, orbit_zone
 from traveller_api.ct.lbb6.star import Star
+from traveller_api.ct.lbb6.catalogue import load_catalogue
 
 D6 = Die(6)
 
@@ -14,7 +16,7 @@ LOGGER.setLevel(logging.DEBUG)
 
 STAR_TYPES = [
     'B', 'B', 'A', 'M', 'M', 'M', 'M',
-    'M', 'K', 'G', 'F', 'F', 'D'
+    'M', 'K', 'G', 'F', 'F', 'F'
 ]
 STAR_SIZES = [
     'Ia', 'Ib', 'II', 'III', 'IV', 'V', 'V',
@@ -34,27 +36,264 @@ COMPANION_STAR_ORBITS = [
 ]
 GAS_GIANT_QTY = [0, 1, 1, 1, 2, 2, 3, 3, 4, 4, 4, 5, 5]
 PLANETOID_QTY = [3, 2, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1]
+# Empty orbits (1D, DM +1 for B, A stars)
+EMPTY_ORBIT_QTY = [0, 1, 1, 2, 3, 3, 3, 3]
+
+# Orbit as used by LBB6Planet.generate() (no DB or network lookups)
+SystemOrbit = namedtuple('SystemOrbit', ['orbit_no', 'au', 'mkm', 'period'])
+
+
+def _star_code(star_type, star_size):
+    '''Star code for type, size (random decimal)'''
+    star_decimal = randint(0, 9)
+    if star_size == 'D':
+        return '{}D'.format(star_type)
+    return '{}{} {}'.format(star_type, star_decimal, star_size)
+
 
 class LBB6ExpandedSystem(object):
-    '''LBB6 expanded system'''
+    '''
+    LBB6 expanded system
+
+    mainworld: LBB6Planet (UWP) for system mainworld; a random mainworld
+    is generated if None. Star details come from catalogue (default:
+    load_catalogue()), so generating a system makes no DB queries
+    '''
 
-    def __init__(self, name=''):
+    def __init__(self, name='', mainworld=None, catalogue=None):
         self.name = name
+        self.catalogue = catalogue
+        if self.catalogue is None:
+            self.catalogue = load_catalogue()
+        self.mainworld = mainworld
         self.star = None
         self.companions = []
         self.worlds = []
 
+    def generate(self):
+        '''Generate complete system'''
+        for _ in self.bodies():
+            pass
+
+    def generate_stars(self):
+        '''
+        Generate mainworld (if None), primary and companion stars
+        (ValueError if a star is invalid)
+        '''
+        if self.mainworld is None:
+            self.mainworld = LBB6Planet()
+            self.mainworld.generate()
+        self.star = LBB6ExpandedStar(
+            self.mainworld, catalogue=self.catalogue)
+        self.companions = []
+        for indx in range(self._companion_qty()):
+            companion = LBB6CompanionStar(
+                self.star, catalogue=self.catalogue)
+            companion.orbit = self._companion_orbit(indx)
+            self.companions.append(companion)
+
+    def bodies(self):
+        '''
+        Generate system, yielding each body as a dict as soon as it is
+        generated: primary star, companion stars, then one entry per
+        orbit of the primary (in orbit order)
+
+        Stars are generated first unless generate_stars() has been
+        called
+        '''
+        if self.star is None:
+            self.generate_stars()
+        yield self._star_body(self.star, 'primary')
+        for companion in self.companions:
+            body = self._star_body(companion, 'companion')
+            body['orbit'] = companion.orbit
+            yield body
+
+        self.worlds = []
+        for orbit_no, contents in enumerate(self.layout()):
+            body = self._orbit_body(orbit_no, contents)
+            if contents in ('world', 'mainworld'):
+                self.worlds.append(body['uwp'])
+            yield body
+
+    @staticmethod
+    def _star_body(star, role):
+        '''Body dict for star'''
+        body = star.dict()
+        body['body'] = 'star'
+        body['role'] = role
+        body['classification'] = str(star)
+        return body
+
+    @staticmethod
+    def _companion_qty():
+        '''Number of companion stars: 2D 8-11 => 1, 12 => 2'''
+        roll = D6.roll(2)
+        if roll == 12:
+            return 2
+        elif roll >= 8:
+            return 1
+        return 0
+
+    @staticmethod
+    def _companion_orbit(indx):
+        '''Companion orbit: Close, Far or orbit number (DM +4 for 3rd star)'''
+        orbit = COMPANION_STAR_ORBITS[D6.roll(2, 4 * indx, ceiling=12)]
+        if orbit in ('Close', 'Far'):
+            return orbit
+        if '+' in orbit:
+            return int(orbit.split('+')[0]) + D6.roll(1)
+        return int(orbit)
+
+    def max_orbits(self):
+        '''
+        Number of orbits around primary: 2D
+        DM +4 for size III, +8 for size Ia, Ib, II
+        DM -4 for type M, -2 for type K
+        '''
+        die_mod = 0
+        if self.star.size == 'III':
+            die_mod += 4
+        elif self.star.size in ('Ia', 'Ib', 'II'):
+            die_mod += 8
+        if self.star.type == 'M':
+            die_mod -= 4
+        elif self.star.type == 'K':
+            die_mod -= 2
+        return min(len(self.catalogue.orbits), D6.roll(2, die_mod))
+
+    def layout(self):
+        '''
+        Determine contents of each orbit around primary: unavailable,
+        companion, mainworld, empty, gas giant, planetoid belt or world
+
+        - orbits inside the star or the minimum orbit are unavailable
+        - a companion in orbit n makes orbits n/2 + 1 to n - 1
+          unavailable
+        - the mainworld is placed in the habitable zone orbit (or the
+          nearest free orbit; an extra orbit is added if none are free)
+        - empty orbits: 1D 5+ (DM +1 for B, A stars)
+        - gas giants: 2D 9- (outer or habitable zone)
+        - planetoid belts: 2D - gas giants 6- (inside gas giants first)
+        - all remaining orbits contain worlds
+        '''
+        layout = [None] * self.max_orbits()
+        first = self.catalogue.first_orbit(self.star)
+        for orbit_no in range(min(first, len(layout))):
+            layout[orbit_no] = 'unavailable'
+        for companion in self.companions:
+            if isinstance(companion.orbit, int):
+                for orbit_no in range(
+                        companion.orbit // 2 + 1,
+                        min(companion.orbit, len(layout))):
+                    layout[orbit_no] = 'unavailable'
+                if companion.orbit < len(layout):
+                    layout[companion.orbit] = 'companion'
+
+        # Mainworld (add an orbit beyond the last if none are free)
+        free = self._free_orbits(layout)
+        if not free:
+            orbit_no = min(
+                max(first, len(layout)), len(self.catalogue.orbits) - 1)
+            layout.extend(['unavailable'] * (orbit_no + 1 - len(layout)))
+            free = [orbit_no]
+        target = self.star.hz_orbit
+        if target is None:
+            target = free[0]
+        layout[min(free, key=lambda no: (abs(no - target), no))] = \
+            'mainworld'
+
+        # Empty orbits
+        die_mod = 1 if self.star.type in 'BA' else 0
+        if D6.roll(1, die_mod) >= 5:
+            qty = EMPTY_ORBIT_QTY[D6.roll(1, die_mod)]
+            self._place(layout, 'empty', qty, self._free_orbits(layout))
+
+        # Gas giants
+        gas_giant_qty = 0
+        if D6.roll(2) <= 9:
+            gas_giant_qty = GAS_GIANT_QTY[D6.roll(2)]
+        gas_giant_qty = self._place(
+            layout, 'gas giant', gas_giant_qty, [
+                orbit_no for orbit_no in self._free_orbits(layout)
+                if orbit_zone(self.star.hz_orbit, orbit_no) != 'Inner'])
+
+        # Planetoid belts
+        if D6.roll(2, -gas_giant_qty) <= 6:
+            qty = PLANETOID_QTY[D6.roll(2, -gas_giant_qty, 0, 12)]
+            inside = [
+                orbit_no - 1 for orbit_no, contents in enumerate(layout)
+                if contents == 'gas giant' and orbit_no > 0 and
+                layout[orbit_no - 1] is None]
+            qty -= self._place(layout, 'planetoid belt', qty, inside)
+            self._place(
+                layout, 'planetoid belt', qty, self._free_orbits(layout))
+
+        return [contents or 'world' for contents in layout]
+
+    @staticmethod
+    def _free_orbits(layout):
+        '''Orbit numbers with nothing placed yet'''
+        return [
+            orbit_no for orbit_no, contents in enumerate(layout)
+            if contents is None]
+
+    @staticmethod
+    def _place(layout, contents, qty, candidates):
+        '''Place up to qty of contents in random candidate orbits'''
+        candidates = list(candidates)
+        placed = 0
+        while placed < qty and candidates:
+            orbit_no = choice(candidates)
+            candidates.remove(orbit_no)
+            layout[orbit_no] = contents
+            placed += 1
+        return placed
+
+    def _orbit(self, orbit_no):
+        '''SystemOrbit for orbit_no around primary'''
+        row = self.catalogue.orbits[orbit_no]
+        return SystemOrbit(
+            orbit_no, row.au, row.mkm, period(row.au, self.star.mass))
+
+    def _orbit_body(self, orbit_no, contents):
+        '''Body dict for orbit, generating world if required'''
+        orbit = self._orbit(orbit_no)
+        body = {
+            'body': 'orbit',
+            'orbit_no': orbit_no,
+            'au': orbit.au,
+            'mkm': orbit.mkm,
+            'period': orbit.period,
+            'zone': orbit_zone(self.star.hz_orbit, orbit_no),
+            'contents': contents
+        }
+        if contents == 'gas giant':
+            body['size'] = 'Small' if D6.roll(1) <= 3 else 'Large'
+        elif contents in ('world', 'mainworld'):
+            if contents == 'mainworld':
+                planet = LBB6Planet(uwp=str(self.mainworld))
+                planet.generate(star=self.star, orbit=orbit)
+            else:
+                planet = LBB6Planet()
+                planet.generate(
+                    is_mainworld=False, star=self.star, orbit=orbit)
+            body['uwp'] = str(planet)
+            body['trade_codes'] = planet.trade_codes
+            body['temperature'] = planet.temperature.dict()
+        return body
+
 
 class LBB6ExpandedStar(Star):
     '''Extend Star to include orbits etc'''
 
-    def __init__(self, mainworld, code=None):
+    def __init__(self, mainworld, code=None, catalogue=None):
         self.orbits = []
         self.size_roll = None
         self.type_roll = None
         if code is None:
             code = self.generate(mainworld)
-        super().__init__(code)
+        super().__init__(code, catalogue)
 
     def generate(self, mainworld):
         '''Generate code'''
@@ -73,22 +312,16 @@ class LBB6ExpandedStar(Star):
 
         star_size = STAR_SIZES[self.size_roll]
         star_type = STAR_TYPES[self.type_roll]
-        star_decimal = randint(0, 9)
-
-        if star_size == 'D':
-            code = '{}D'.format(star_size)
-        else:
-            code = '{}{} {}'.format(star_type, star_decimal, star_size)
-        return code
+        return _star_code(star_type, star_size)
 
 
 class LBB6CompanionStar(Star):
     '''Extend Star to cover companion stars'''
 
-    def __init__(self, parent):
+    def __init__(self, parent, catalogue=None):
         self.orbit = []
         code = self.generate(parent)
-        super().__init__(code)
+        super().__init__(code, catalogue)
 
     @staticmethod
     def generate(parent):
@@ -102,11 +335,4 @@ class LBB6CompanionStar(Star):
             star_size = COMPANION_STAR_SIZES[size_roll]
         except AttributeError:
             raise ValueError('parent must have type_roll and size_roll attributes')
-
-        star_decimal = randint(0, 9)
-
-        if star_size == 'D':
-            code = '{}D'.format(star_size)
-        else:
-            code = '{}{} {}'.format(star_type, star_decimal, star_size)
-        return code
+        return _star_code(star_type, star_size)
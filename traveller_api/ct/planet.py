@@ -12,6 +12,99 @@ LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
 
 
+def starport_from_roll(roll):
+    '''Starport for 2D roll'''
+    if roll <= 4:
+        return 'A'
+    elif roll >= 5 and roll <= 6:
+        return 'B'
+    elif roll >= 7 and roll <= 8:
+        return 'C'
+    elif roll == 9:
+        return 'D'
+    elif roll >= 10 and roll <= 11:
+        return 'E'
+    return 'X'
+
+
+def techlevel_die_mod(
+        starport, size, atmosphere, hydrographics, population, government):
+    '''Tech level DM (UWP values other than starport are ints)'''
+    die_mod = 0
+    # Starport
+    if starport == 'A':
+        die_mod += 6
+    elif starport == 'B':
+        die_mod += 4
+    elif starport == 'C':
+        die_mod += 2
+    elif starport == 'X':
+        die_mod -= 4
+    # Size
+    if size <= 1:
+        die_mod += 2
+    elif size <= 4 and size >= 2:
+        die_mod += 1
+    # Atmosphere
+    if atmosphere <= 3 or atmosphere >= 10:
+        die_mod += 1
+    # Hydrographics
+    if hydrographics == 9:
+        die_mod += 1
+    elif hydrographics == 10:
+        die_mod += 2
+    # Population
+    if population >= 1 and government <= 5:
+        die_mod += 1
+    elif population == 9:
+        die_mod += 2
+    elif population == 10:
+        die_mod += 4
+    # Government
+    if government in (0, 5):
+        die_mod += 1
+    elif government == 13:
+        die_mod -= 2
+    return die_mod
+
+
+def trade_codes(atmosphere, hydrographics, population, government):
+    '''Trade codes for UWP values (ehex)'''
+    codes = []
+    # Agricultural
+    if (
+            str(atmosphere) in '456789' and
+            str(hydrographics) in '45678' and
+            str(population) in '567'):
+        codes.append('Ag')
+    # Non-agricultural
+    if (
+            int(atmosphere) <= 3 and
+            int(hydrographics) <= 3 and
+            int(population) >= 6):
+        codes.append('Na')
+    # Industrial
+    if (
+            str(atmosphere) in '0123479' and
+            int(population) >= 9):
+        codes.append('In')
+    # Non-industrial
+    if int(population) <= 6:
+        codes.append('Ni')
+    # Rich
+    if (
+            str(government) in '456789' and
+            str(atmosphere) in '68' and
+            str(population) in '678'):
+        codes.append('Ri')
+    # Poor
+    if (
+            str(atmosphere) in '2345' and
+            int(hydrographics) <= 3):
+        codes.append('Po')
+    return codes
+
+
 class Planet(object):
     '''
     Planet class
@@ -94,21 +187,9 @@ class Planet(object):
     @staticmethod
     def _generate_starport():
         '''Generate starport'''
-        starport = 'X'
         roll = D6.roll(2)
         LOGGER.debug('roll = %s', roll)
-
-        if roll <= 4:
-            starport = 'A'
-        elif roll >= 5 and roll <= 6:
-            starport = 'B'
-        elif roll >= 7 and roll <= 8:
-            starport = 'C'
-        elif roll == 9:
-            starport = 'D'
-        elif roll >= 10 and roll <= 11:
-            starport = 'E'
-        return starport
+        return starport_from_roll(roll)
 
     def _generate_atmosphere(self):
         '''Generate atmosphere'''
@@ -135,75 +216,18 @@ class Planet(object):
 
     def _generate_techlevel(self):
         '''Generate tech level'''
-        die_mod = 0
-        # Starport
-        if self.starport == 'A':
-            die_mod += 6
-        elif self.starport == 'B':
-            die_mod += 4
-        elif self.starport == 'C':
-            die_mod += 2
-        elif self.starport == 'X':
-            die_mod -= 4
-        # Size
-        if int(self.size) <= 1:
-            die_mod += 2
-        elif int(self.size) <= 4 and int(self.size) >= 2:
-            die_mod += 1
-        # Atmosphere
-        if int(self.atmosphere) <= 3 or int(self.atmosphere) >= 10:
-            die_mod += 1
-        # Hydrographics
-        if int(self.hydrographics) == 9:
-            die_mod += 1
-        elif int(self.hydrographics) == 10:
-            die_mod += 2
-        # Population
-        if int(self.population) >= 1 and int(self.government) <= 5:
-            die_mod += 1
-        elif int(self.population) == 9:
-            die_mod += 2
-        elif int(self.population) == 10:
-            die_mod += 4
-        # Government
-        if str(self.government) in '05':
-            die_mod += 1
-        elif str(self.government) == 'D':
-            die_mod -= 2
+        die_mod = techlevel_die_mod(
+            self.starport,
+            int(self.size),
+            int(self.atmosphere),
+            int(self.hydrographics),
+            int(self.population),
+            int(self.government))
         self.techlevel = ehex(D6.roll(1, die_mod, 0))
 
     def _determine_trade_codes(self):
         '''Determine trade codes'''
-        self.trade_codes = []
-        # Agricultural
-        if (
-                str(self.atmosphere) in '456789' and
-                str(self.hydrographics) in '45678' and
-                str(self.population) in '567'):
-            self.trade_codes.append('Ag')
-        # Non-agricultural
-        if (
-                int(self.atmosphere) <= 3 and
-                int(self.hydrographics) <= 3 and
-                int(self.population) >= 6):
-            self.trade_codes.append('Na')
-        # Industrial
-        if (
-                str(self.atmosphere) in '0123479' and
-                int(self.population) >= 9):
-            self.trade_codes.append('In')
-        # Non-industrial
-        if int(self.population) <= 6:
-            self.trade_codes.append('Ni')
-        # Rich
-        if (
-                str(self.government) in '456789' and
-                str(self.atmosphere) in '68' and
-                str(self.population) in '678'):
-            self.trade_codes.append('Ri')
-        # Poor
-        if (
-                str(self.atmosphere) in '2345' and
-                int(self.hydrographics) <= 3):
-            self.trade_codes.append('Po')
+        self.trade_codes = trade_codes(
+            self.atmosphere, self.hydrographics,
+            self.population, self.government)
         LOGGER.debug('trade codes = %s', self.trade_codes)
@@ -3,11 +3,16 @@ Utility classes
 - Die
 - Table
 - Writer
+
+Utility functions
+- batch_roll
 '''
 from __future__ import print_function
 
+from functools import lru_cache
 from inspect import ismethod
-from random import seed, randint
+from itertools import product
+from traveller_api.util import randint
 
 
 class Die(object):
@@ -18,7 +23,6 @@ class Die(object):
 
     def __init__(self, sides=6):
         self.__sides = sides
-        seed()
 
     def roll(self, dice=1, modifier=0, floor=0, ceiling=9999):
         '''
@@ -36,6 +40,18 @@ class Die(object):
         return roll
 
 
+@lru_cache(maxsize=16)
+def dice_totals(dice, sides=6):
+    '''All equally-likely totals for dice x sides-sided dice'''
+    return tuple(
+        sum(faces) for faces in product(range(1, sides + 1), repeat=dice))
+
+
+def batch_roll(rng, dice, count, sides=6):
+    '''Roll dice count times using random.Random rng, return list of totals'''
+    return rng.choices(dice_totals(dice, sides), k=count)
+
+
 class Table(object):
     '''
     Lookup table
@@ -0,0 +1,290 @@
+'''executor.py'''
+
+import os
+import time
+import pickle
+import logging
+import multiprocessing
+import threading
+import weakref
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import falcon
+from prometheus_client import Counter, Gauge, Histogram
+from traveller_api.util import reseed_thread_rng
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+# Pool limits (override with environment variables)
+MAX_WORKERS = int(os.environ.get('TASK_POOL_WORKERS', 0)) or os.cpu_count()
+# Tasks submitted and not yet finished (per API worker process)
+MAX_QUEUE = int(os.environ.get('TASK_POOL_MAX_QUEUE', 64))
+# Seconds allowed for all of a job's tasks to finish
+TASK_TIMEOUT = float(os.environ.get('TASK_POOL_TIMEOUT', 30))
+# Pickled size (bytes) allowed for one task's result
+MAX_RESULT_SIZE = int(
+    os.environ.get('TASK_POOL_MAX_RESULT_SIZE', 16 * 1024 * 1024))
+# Retry-After (seconds) sent when the queue is full
+RETRY_AFTER = 5
+# Pool processes are started by a fork server rather than forked from
+# the (multi-threaded) API worker, so they never inherit locks held by
+# other threads
+START_METHOD = os.environ.get('TASK_POOL_START_METHOD', 'forkserver')
+
+QUEUE_DEPTH = Gauge(
+    'task_pool_queue_depth',
+    'Task pool tasks submitted and not yet finished',
+    multiprocess_mode='livesum')
+TASK_LATENCY = Histogram(
+    'task_pool_task_latency_seconds',
+    'Task pool task latency (submission to result)',
+    ['task'])
+TASK_REJECTED = Counter(
+    'task_pool_rejected',
+    'Task pool jobs rejected or failed',
+    ['task', 'reason'])
+
+
+class PoolError(Exception):
+    '''Task pool error'''
+
+
+class PoolBusy(PoolError):
+    '''Task queue full'''
+
+
+class TaskTimeout(PoolError):
+    '''Tasks not finished within timeout'''
+
+
+class ResultTooLarge(PoolError):
+    '''Task result exceeds size limit'''
+
+
+def task_seed(seed, task):
+    '''Seed for task number task of a job (independent of process count)'''
+    return '{}:{}'.format(seed, task)
+
+
+def _run_task(func, args, seed, max_result_size):
+    '''
+    Run func(*args) with the thread RNG seeded with seed (None => leave
+    the RNG alone); return pickled result, ResultTooLarge if it exceeds
+    max_result_size bytes
+    '''
+    if seed is not None:
+        previous = reseed_thread_rng(seed)
+    try:
+        result = func(*args)
+    finally:
+        if seed is not None:
+            reseed_thread_rng(rng=previous)
+    result = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    if len(result) > max_result_size:
+        raise ResultTooLarge(
+            'Result of {} bytes exceeds limit of {} bytes'.format(
+                len(result), max_result_size))
+    return result
+
+
+class TaskPool(object):
+    '''
+    Bounded process pool for CPU-heavy tasks
+
+    The process pool is created on first use in each process, so pools
+    are never shared across fork() (e.g. between gunicorn workers).
+    At most max_queue tasks may be submitted and unfinished at once;
+    jobs that do not fit are rejected (PoolBusy) rather than queued
+    '''
+
+    _instances = weakref.WeakSet()
+
+    def __init__(
+            self,
+            max_workers=MAX_WORKERS,
+            max_queue=MAX_QUEUE,
+            timeout=TASK_TIMEOUT,
+            max_result_size=MAX_RESULT_SIZE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_result_size = max_result_size
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        TaskPool._instances.add(self)
+
+    @classmethod
+    def reset_all(cls):
+        '''
+        Forget every pool's executor and pending tasks (in a forked child;
+        the parent's pool processes and lock belong to the parent)
+        '''
+        for pool in list(cls._instances):
+            pool._lock = threading.Lock()
+            pool._executor = None
+            pool.pending = 0
+
+    def shutdown(self):
+        '''Shut down pool processes (cancelling queued tasks)'''
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _task_done(self, name, submitted, future):
+        '''Future callback: release queue slot, record latency'''
+        with self._lock:
+            self.pending -= 1
+        QUEUE_DEPTH.dec()
+        if not future.cancelled():
+            TASK_LATENCY.labels(name).observe(time.time() - submitted)
+
+    def _reserve(self, name, count):
+        '''Reserve count queue slots, return executor (PoolBusy if full)'''
+        with self._lock:
+            if self.pending + count > self.max_queue:
+                TASK_REJECTED.labels(name, 'busy').inc()
+                raise PoolBusy(
+                    'Task queue full ({} of {} tasks pending)'.format(
+                        self.pending, self.max_queue))
+            if self._executor is None:
+                LOGGER.debug('Starting %s pool processes', self.max_workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(START_METHOD))
+            self.pending += count
+            QUEUE_DEPTH.inc(count)
+            return self._executor
+
+    def _release(self, count):
+        '''Release count reserved (unsubmitted) queue slots'''
+        with self._lock:
+            self.pending -= count
+        QUEUE_DEPTH.dec(count)
+
+    def map(self, func, tasks, seed=None, inline=False, timeout=None):
+        '''
+        Return [func(*args) for args in tasks], computed in the pool
+
+        func must be a module-level function. seed: task n runs with its
+        thread RNG (util.randint(), util.choice()) seeded with
+        task_seed(seed, n), so results do not depend on which process
+        runs the task. inline: run tasks in the calling thread (for
+        small jobs; no timeout or queue limit applies). timeout: seconds
+        for all tasks to finish (default self.timeout)
+
+        PoolBusy if the queue cannot take every task, TaskTimeout if the
+        tasks are not finished in time (unstarted tasks are cancelled),
+        ResultTooLarge if a result exceeds self.max_result_size bytes
+        '''
+        return list(self.imap(func, tasks, seed, inline, timeout))
+
+    def imap(self, func, tasks, seed=None, inline=False, timeout=None):
+        '''
+        As map(), but return an iterator of results in task order
+
+        Tasks are submitted before imap() returns (so PoolBusy is raised
+        by imap()); TaskTimeout and ResultTooLarge are raised as results
+        are consumed. Closing the iterator cancels unstarted tasks.
+        Inline tasks run as their results are consumed
+        '''
+        tasks = [tuple(args) for args in tasks]
+        name = getattr(func, '__name__', repr(func))
+        seeds = [
+            None if seed is None else task_seed(seed, indx)
+            for indx in range(len(tasks))]
+        timeout = self.timeout if timeout is None else timeout
+        if inline:
+            results = self._run_inline(func, name, tasks, seeds)
+        else:
+            executor, futures = self._submit(func, name, tasks, seeds)
+            results = self._collect(
+                name, executor, futures, time.time() + timeout, timeout)
+        return self._unpickle(name, results)
+
+    @staticmethod
+    def _unpickle(name, results):
+        '''Yield unpickled results'''
+        try:
+            for result in results:
+                yield pickle.loads(result)
+        except ResultTooLarge:
+            TASK_REJECTED.labels(name, 'result_size').inc()
+            raise
+
+    def _run_inline(self, func, name, tasks, seeds):
+        '''Run tasks in the calling thread, yield pickled results'''
+        for args, args_seed in zip(tasks, seeds):
+            start = time.time()
+            result = _run_task(func, args, args_seed, self.max_result_size)
+            TASK_LATENCY.labels(name).observe(time.time() - start)
+            yield result
+
+    def _submit(self, func, name, tasks, seeds):
+        '''Submit tasks to the pool, return (executor, futures)'''
+        executor = self._reserve(name, len(tasks))
+        futures = []
+        try:
+            for args, args_seed in zip(tasks, seeds):
+                future = executor.submit(
+                    _run_task, func, args, args_seed, self.max_result_size)
+                futures.append(future)
+                future.add_done_callback(
+                    partial(self._task_done, name, time.time()))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            self._release(len(tasks) - len(futures))
+        return executor, futures
+
+    def _collect(self, name, executor, futures, deadline, timeout):
+        '''Yield pickled results of futures in order'''
+        try:
+            for future in futures:
+                yield future.result(timeout=max(0, deadline - time.time()))
+        except FutureTimeout:
+            TASK_REJECTED.labels(name, 'timeout').inc()
+            raise TaskTimeout(
+                '{} tasks not finished within {} s'.format(name, timeout))
+        except BrokenProcessPool:
+            # A pool process died; start a new pool for the next job
+            TASK_REJECTED.labels(name, 'broken_pool').inc()
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def handle_pool_error(req, resp, ex, params):
+    '''falcon error handler: PoolError => HTTP error'''
+    if isinstance(ex, PoolBusy):
+        raise falcon.HTTPServiceUnavailable(
+            title='Server busy',
+            description=str(ex),
+            retry_after=RETRY_AFTER)
+    if isinstance(ex, TaskTimeout):
+        raise falcon.HTTPGatewayTimeout(
+            title='Request timed out',
+            description=str(ex))
+    if isinstance(ex, ResultTooLarge):
+        raise falcon.HTTPError(
+            title='Result too large',
+            status='400 Result too large',
+            description=str(ex))
+    raise falcon.HTTPInternalServerError(
+        title='Task pool error', description=str(ex))
+
+
+os.register_at_fork(after_in_child=TaskPool.reset_all)
+
+# Shared pool for CPU-heavy endpoints
+TASK_POOL = TaskPool()
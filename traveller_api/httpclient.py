@@ -0,0 +1,243 @@
+'''httpclient.py'''
+
+import os
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from prometheus_client import Counter, Gauge, Histogram
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+# Client configuration (environment variables)
+# Seconds to connect, and to wait for each read, per attempt
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+# Retries after a connection error, timeout or RETRY_STATUSES response
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+# Retry n waits a random time up to min(backoff * 2 ** n, max backoff)
+HTTP_BACKOFF = float(os.environ.get('HTTP_BACKOFF', 0.1))
+HTTP_MAX_BACKOFF = float(os.environ.get('HTTP_MAX_BACKOFF', 2))
+# Kept-alive connections per host
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+# Consecutive failures that open a host's circuit, and seconds it stays
+# open before a trial request is allowed
+HTTP_FAILURE_THRESHOLD = int(os.environ.get('HTTP_FAILURE_THRESHOLD', 5))
+HTTP_RESET_TIMEOUT = float(os.environ.get('HTTP_RESET_TIMEOUT', 30))
+
+RETRY_STATUSES = (502, 503, 504)
+
+HTTP_CLIENT_LATENCY = Histogram(
+    'http_client_latency_seconds',
+    'Outbound HTTP request latency (per attempt)',
+    ['host'])
+HTTP_CLIENT_REQUESTS = Counter(
+    'http_client_requests',
+    'Outbound HTTP request attempts',
+    ['host', 'outcome'])
+HTTP_CLIENT_CIRCUIT_OPEN = Gauge(
+    'http_client_circuit_open',
+    'Outbound HTTP circuit open (1) or closed (0)',
+    ['host'],
+    multiprocess_mode='max')
+
+
+class CircuitOpen(requests.ConnectionError):
+    '''Request not made: circuit for host is open'''
+
+
+class CircuitBreaker(object):
+    '''
+    Circuit breaker for one host
+
+    failure_threshold consecutive failures open the circuit; requests
+    are refused until reset_timeout seconds have passed, then one trial
+    request is allowed (half open): success closes the circuit, failure
+    opens it again
+    '''
+
+    def __init__(
+            self,
+            host,
+            failure_threshold=HTTP_FAILURE_THRESHOLD,
+            reset_timeout=HTTP_RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        '''closed, open or half_open'''
+        with self._lock:
+            if self.opened is None:
+                return 'closed'
+            if time.time() - self.opened < self.reset_timeout:
+                return 'open'
+            return 'half_open'
+
+    def allow(self):
+        '''True if a request may be made now'''
+        with self._lock:
+            if self.opened is None:
+                return True
+            if time.time() - self.opened < self.reset_timeout:
+                return False
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        '''Request succeeded: close circuit'''
+        with self._lock:
+            was_open = self.opened is not None
+            self.failures = 0
+            self.opened = None
+            self._trial = False
+        if was_open:
+            LOGGER.info('Circuit for %s closed', self.host)
+            HTTP_CLIENT_CIRCUIT_OPEN.labels(self.host).set(0)
+
+    def record_failure(self):
+        '''Request failed: open circuit at threshold (or after a trial)'''
+        with self._lock:
+            self.failures += 1
+            opened = self._trial or (
+                self.opened is None and
+                self.failures >= self.failure_threshold)
+            if opened:
+                self.opened = time.time()
+                self._trial = False
+        if opened:
+            LOGGER.warning('Circuit for %s open', self.host)
+            HTTP_CLIENT_CIRCUIT_OPEN.labels(self.host).set(1)
+
+
+class HTTPClient(object):
+    '''
+    Pooled HTTP client: one keep-alive session per process (created on
+    first use, and again after fork()), connect/read timeouts, bounded
+    retries with jittered exponential backoff and a circuit breaker per
+    host
+    '''
+
+    def __init__(
+            self,
+            connect_timeout=HTTP_CONNECT_TIMEOUT,
+            read_timeout=HTTP_READ_TIMEOUT,
+            retries=HTTP_RETRIES,
+            backoff=HTTP_BACKOFF,
+            max_backoff=HTTP_MAX_BACKOFF,
+            pool_size=HTTP_POOL_SIZE,
+            failure_threshold=HTTP_FAILURE_THRESHOLD,
+            reset_timeout=HTTP_RESET_TIMEOUT):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._session = None
+        self._pid = None
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        '''This process's session'''
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+                self._pid = os.getpid()
+            return self._session
+
+    def breaker(self, host):
+        '''Circuit breaker for host'''
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    host, self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def delay(self, attempt):
+        '''Seconds to wait before retry attempt (full jitter)'''
+        return random.uniform(
+            0, min(self.backoff * 2 ** attempt, self.max_backoff))
+
+    def close(self):
+        '''Close pooled connections'''
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def get(self, url, params=None, timeout=None):
+        '''
+        GET url, return requests.Response
+
+        Connection errors, timeouts and RETRY_STATUSES responses are
+        retried up to self.retries times; the last error is raised (or
+        the last response returned); other requests errors are raised at
+        once. CircuitOpen (a requests.ConnectionError) if the host's
+        circuit is open
+        '''
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        timeout = self.timeout if timeout is None else timeout
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                HTTP_CLIENT_REQUESTS.labels(host, 'circuit_open').inc()
+                raise CircuitOpen('Circuit for {} is open'.format(host))
+            start = time.time()
+            try:
+                resp = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                HTTP_CLIENT_LATENCY.labels(host).observe(time.time() - start)
+                HTTP_CLIENT_REQUESTS.labels(host, type(err).__name__).inc()
+                breaker.record_failure()
+                if attempt >= self.retries:
+                    raise
+                LOGGER.debug('GET %s failed (%s), retrying', url, err)
+            except requests.RequestException as err:
+                # Not retried (e.g. TooManyRedirects, InvalidURL), but a
+                # failure: a half-open circuit's trial must not be left
+                # outstanding
+                HTTP_CLIENT_LATENCY.labels(host).observe(time.time() - start)
+                HTTP_CLIENT_REQUESTS.labels(host, type(err).__name__).inc()
+                breaker.record_failure()
+                raise
+            else:
+                HTTP_CLIENT_LATENCY.labels(host).observe(time.time() - start)
+                HTTP_CLIENT_REQUESTS.labels(
+                    host, '{}xx'.format(resp.status_code // 100)).inc()
+                if resp.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return resp
+                breaker.record_failure()
+                if attempt >= self.retries:
+                    return resp
+                LOGGER.debug(
+                    'GET %s returned %s, retrying', url, resp.status_code)
+                resp.close()
+            time.sleep(self.delay(attempt))
+            attempt += 1
+
+
+# Shared client (see util.RestQuery)
+HTTP_CLIENT = HTTPClient()
@@ -1,10 +1,18 @@
 '''middleware.py'''
 
+import os
+import json
 import time
+import base64
+import threading
+from urllib.parse import parse_qsl
 import falcon
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 from prometheus_client import multiprocess, CollectorRegistry
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from traveller_api.singleflight import SingleFlight, NodeFlight
+from traveller_api.cache import get_cache
+from traveller_api.warmup import WARMUP_HEADER
 
 REQUEST_COUNT = Counter(
     'request_count',
@@ -18,17 +26,122 @@ REQUEST_LATENCY = Histogram(
 )
 API_PATHS = [
     '/misc/angdia',
+    '/ct/lbb6/star/orbits',
     '/ct/lbb6/star',
+    '/ct/lbb6/catalogue',
+    '/ct/lbb6/system',
+    '/ct/lbb6/planet/temperature',
+    '/ct/lbb6/planet/placement',
+    '/ct/lbb6/planet/generate',
+    '/mt/wbh/star/batch',
     '/mt/wbh/star',
+    '/t5/cargogen/matrix',
     '/t5/cargogen',
     '/ct/lbb2/cargogen/purchase',
     '/ct/lbb2/cargogen/sale',
+    '/ct/lbb2/cargogen/market',
+    '/ct/lbb2/cargogen/simulate',
+    '/t5/orbit/batch',
+    '/t5/orbit/inverse',
     '/t5/orbit',
+    '/misc/starcolor/batch',
+    '/misc/starcolor/palette',
     '/misc/starcolor',
     '/metrics',
-    '/ping'
+    '/ping',
+    '/ready'
 ]
 
+# Admission control (per worker process): requests hold capacity units
+# (their cost class's cost) while they run; the last ADMISSION_RESERVED
+# units are reserved for cheap requests
+COST_CLASSES = {
+    'cheap': 1,
+    'standard': 2,
+    'expensive': 4
+}
+# Cost class by path prefix (first match, so longer paths come first);
+# other paths are 'standard'
+ROUTE_COSTS = [
+    ('/ct/lbb6/star', 'cheap'),
+    ('/ct/lbb6/orbit', 'cheap'),
+    ('/ct/lbb6/catalogue', 'cheap'),
+    ('/ct/lbb6/system', 'expensive'),
+    ('/ct/lbb6/planet/placement', 'expensive'),
+    ('/ct/lbb6/planet/generate', 'expensive'),
+    ('/ct/lbb3/encounter', 'expensive'),
+    ('/ct/lbb2/cargogen', 'expensive'),
+    ('/t5/cargogen', 'expensive'),
+    ('/t5/orbit', 'cheap'),
+    ('/mt/wbh/star', 'cheap'),
+    ('/misc', 'cheap'),
+    ('/api_version', 'cheap'),
+    ('/metrics', 'cheap'),
+    ('/ping', 'cheap'),
+    ('/ready', 'cheap')
+]
+ADMISSION_CAPACITY = int(os.environ.get('ADMISSION_CAPACITY', 16))
+ADMISSION_RESERVED = int(os.environ.get('ADMISSION_RESERVED', 4))
+# Seconds a request may wait for capacity before it is rejected
+ADMISSION_MAX_WAIT = float(os.environ.get('ADMISSION_MAX_WAIT', 0.05))
+# Retry-After (seconds) sent with rejections
+ADMISSION_RETRY_AFTER = 1
+
+# Request coalescing: GET requests for these (deterministic) path
+# prefixes that match a request in flight wait for its response
+COALESCE_PATHS = [
+    '/ct/lbb6/star',
+    '/ct/lbb6/orbit',
+    '/ct/lbb6/catalogue',
+    '/mt/wbh/star',
+    '/t5/orbit',
+    '/misc/angdia',
+    '/misc/starcolor',
+    '/misc/starcolour'
+]
+# Seconds a coalesced request waits for the leader's response
+COALESCE_TIMEOUT = float(os.environ.get('COALESCE_TIMEOUT', 10))
+# Directory for node-wide (cross-worker) coalescing (unset => per worker)
+COALESCE_DIR = os.environ.get('COALESCE_DIR')
+
+# Response caching: 200 responses to GET requests for these path
+# prefixes are cached (star lookups, orbit profiles) ...
+CACHE_PATHS = [
+    '/ct/lbb6/star',
+    '/ct/lbb6/orbit',
+    '/mt/wbh/star',
+    '/t5/orbit'
+]
+# ... as are those for these prefixes with a seed parameter
+SEEDED_PATHS = [
+    '/ct/lbb6/planet/generate',
+    '/ct/lbb2/cargogen/simulate'
+]
+# Largest response body (bytes) cached
+CACHE_MAX_RESPONSE = int(os.environ.get('CACHE_MAX_RESPONSE', 1024 * 1024))
+
+ADMISSION_QUEUE_TIME = Histogram(
+    'admission_queue_seconds',
+    'Time waiting for admission',
+    ['app_name', 'cost_class'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+ADMISSION_REJECTED = Counter(
+    'admission_rejected',
+    'Requests rejected by admission control',
+    ['app_name', 'endpoint', 'cost_class']
+)
+ADMISSION_IN_USE = Gauge(
+    'admission_capacity_in_use',
+    'Admission capacity units held by running requests',
+    multiprocess_mode='livesum'
+)
+COALESCED_REQUESTS = Counter(
+    'coalesced_requests',
+    'Requests answered with the response to an identical request',
+    ['app_name', 'endpoint', 'scope']
+)
+
 class PrometheusMetrics(object):
     '''Prometheus metrics middleware'''
 
@@ -68,7 +181,9 @@ class PrometheusMetrics(object):
         pass
 
     def process_response(self, req, resp, resource, req_succeeded):
-        '''Post-routing response processing'''
+        '''Post-routing response processing (warm-up requests ignored)'''
+        if req.get_header(WARMUP_HEADER):
+            return
         self.record_request_data(req, resp)
         self.stop_timer(req, resp)
 
@@ -79,6 +194,329 @@ class PrometheusMetrics(object):
             if path.startswith(api_path):
                 return api_path
 
+class AdmissionControl(object):
+    '''
+    Admission control middleware
+
+    Each request's cost class (ROUTE_COSTS) sets the capacity units it
+    holds while it runs. Requests wait up to max_wait seconds for
+    capacity, then get 503 with Retry-After; only cheap requests may
+    use the last reserved units, so cheap routes keep working while
+    expensive ones are shed
+    '''
+
+    def __init__(
+            self,
+            capacity=ADMISSION_CAPACITY,
+            reserved=ADMISSION_RESERVED,
+            max_wait=ADMISSION_MAX_WAIT,
+            route_costs=ROUTE_COSTS):
+        if not 0 <= reserved <= capacity - max(COST_CLASSES.values()):
+            raise ValueError(
+                'Invalid reserved capacity {} (capacity {})'.format(
+                    reserved, capacity))
+        self.capacity = capacity
+        self.reserved = reserved
+        self.max_wait = max_wait
+        self.route_costs = list(route_costs)
+        self.in_use = 0
+        self._condition = threading.Condition()
+
+    def cost_class(self, path):
+        '''Cost class for request path'''
+        for prefix, cost_class in self.route_costs:
+            if path.startswith(prefix):
+                return cost_class
+        return 'standard'
+
+    def acquire(self, cost_class):
+        '''Wait (up to max_wait) for capacity; return True if admitted'''
+        cost = COST_CLASSES[cost_class]
+        limit = self.capacity
+        if cost_class != 'cheap':
+            limit -= self.reserved
+        deadline = time.time() + self.max_wait
+        with self._condition:
+            while self.in_use + cost > limit:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.in_use += cost
+        ADMISSION_IN_USE.inc(cost)
+        return True
+
+    def release(self, cost_class):
+        '''Release capacity held by request'''
+        cost = COST_CLASSES[cost_class]
+        with self._condition:
+            self.in_use -= cost
+            self._condition.notify_all()
+        ADMISSION_IN_USE.dec(cost)
+
+    def process_request(self, req, resp):
+        '''Admit request or reject with 503'''
+        cost_class = self.cost_class(req.path)
+        start = time.time()
+        admitted = self.acquire(cost_class)
+        ADMISSION_QUEUE_TIME.labels(
+            'egor045_trav_api', cost_class).observe(time.time() - start)
+        if not admitted:
+            ADMISSION_REJECTED.labels(
+                'egor045_trav_api',
+                PrometheusMetrics.trim_path(req.path) or 'other',
+                cost_class).inc()
+            raise falcon.HTTPServiceUnavailable(
+                title='Server busy',
+                description='Too many {} requests in progress'.format(
+                    cost_class),
+                retry_after=ADMISSION_RETRY_AFTER)
+        req.context.admission_cost_class = cost_class
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        '''
+        Release capacity held by admitted request, or (streamed
+        responses) once the stream is exhausted or closed
+        '''
+        cost_class = getattr(req.context, 'admission_cost_class', None)
+        if cost_class is None:
+            return
+        req.context.admission_cost_class = None
+        # Falcon drops (without closing) the stream of bodiless responses
+        bodiless = req.method == 'HEAD' or \
+            resp.status[:3] in ('204', '304') or resp.status[0] == '1'
+        if resp.stream is None or bodiless:
+            self.release(cost_class)
+        else:
+            resp.stream = ReleasingStream(
+                resp.stream, lambda: self.release(cost_class))
+
+
+class ReleasingStream(object):
+    '''
+    Response stream wrapper: calls release() (once) when the stream is
+    exhausted, raises or is closed by the WSGI server
+    '''
+
+    # Bytes per read() of file-like streams
+    block_size = 64 * 1024
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        if hasattr(stream, 'read'):
+            self._iterator = iter(
+                lambda: stream.read(self.block_size), b'')
+        else:
+            self._iterator = iter(stream)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        '''Release capacity, close wrapped stream'''
+        release, self._release = self._release, None
+        try:
+            if hasattr(self._stream, 'close'):
+                self._stream.close()
+        finally:
+            if release is not None:
+                release()
+
+
+def request_key(req):
+    '''Normalized request: path, parameters sorted by name'''
+    parameters = sorted(
+        parse_qsl(req.query_string, keep_blank_values=True),
+        key=lambda parameter: parameter[0])
+    return '{} {} {}'.format(
+        req.path,
+        '&'.join('{}={}'.format(*parameter) for parameter in parameters),
+        req.get_header('If-None-Match') or '')
+
+
+def response_result(resp):
+    '''Shareable copy of response (None if not shareable)'''
+    if resp.stream is not None or int(resp.status[:3]) >= 500:
+        return None
+    result = {
+        'status': resp.status,
+        'content_type': resp.content_type,
+        'headers': resp.headers
+    }
+    data = resp.data
+    if isinstance(resp.body, bytes):
+        data = resp.body
+    if data is not None:
+        result['data'] = base64.b64encode(data).decode('ascii')
+    else:
+        result['body'] = resp.body
+    return result
+
+
+def apply_result(resp, result):
+    '''Set response from shared result'''
+    resp.status = result['status']
+    resp.set_headers(result['headers'])
+    resp.content_type = result['content_type']
+    if 'data' in result:
+        resp.data = base64.b64decode(result['data'])
+    else:
+        resp.body = result['body']
+    resp.complete = True
+
+
+class ResponseCaching(object):
+    '''
+    Response cache middleware (CACHE_BACKEND, see cache.py)
+
+    Answers GET requests for deterministic routes (paths) and seeded
+    requests (seeded_paths with a seed parameter) from cache; other
+    middleware and the responder are skipped on a hit. 200 responses
+    up to max_size bytes are cached, unless they carry notes
+    '''
+
+    def __init__(
+            self,
+            cache=None,
+            paths=CACHE_PATHS,
+            seeded_paths=SEEDED_PATHS,
+            max_size=CACHE_MAX_RESPONSE):
+        self._cache = cache
+        self.paths = tuple(paths)
+        self.seeded_paths = tuple(seeded_paths)
+        self.max_size = max_size
+
+    @property
+    def cache(self):
+        '''Cache backend (process-wide cache unless one was given)'''
+        if self._cache is None:
+            self._cache = get_cache()
+        return self._cache
+
+    def cacheable(self, req):
+        '''True if response to request may be cached'''
+        if req.method != 'GET':
+            return False
+        if req.path.startswith(self.paths):
+            return True
+        return (
+            req.path.startswith(self.seeded_paths) and
+            'seed' in dict(parse_qsl(req.query_string)))
+
+    def process_request(self, req, resp):
+        '''Answer request from cache'''
+        if not self.cacheable(req):
+            return
+        key = 'response:' + request_key(req)
+        result = self.cache.get(key)
+        if result is not None:
+            apply_result(resp, result)
+            return
+        req.context.cache_key = key
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        '''Cache response'''
+        key = getattr(req.context, 'cache_key', None)
+        if key is None or not req_succeeded or resp.status != falcon.HTTP_200:
+            return
+        req.context.cache_key = None
+        result = response_result(resp)
+        if result is None:
+            return
+        size = len(result.get('body') or result.get('data') or '')
+        if size <= self.max_size and not has_notes(result):
+            self.cache.set(key, result)
+
+
+def has_notes(result):
+    '''
+    True if result's body is a JSON object with notes (warnings, e.g.
+    an outbound call that failed), which may not hold for later requests
+    '''
+    try:
+        doc = json.loads(result.get('body') or '')
+    except (TypeError, ValueError):
+        return False
+    return isinstance(doc, dict) and bool(doc.get('notes'))
+
+
+class RequestCoalescing(object):
+    '''
+    Single-flight middleware for deterministic routes
+
+    Identical GET requests (same path, query parameters and
+    If-None-Match) arriving while one is in flight wait for its
+    response instead of recomputing it: within a worker through a
+    SingleFlight, and across workers through a NodeFlight when
+    directory is set. Streamed and 5xx responses are not shared
+    (waiters compute their own)
+    '''
+
+    def __init__(
+            self,
+            paths=COALESCE_PATHS,
+            timeout=COALESCE_TIMEOUT,
+            directory=COALESCE_DIR):
+        self.paths = tuple(paths)
+        self.timeout = timeout
+        self.flights = SingleFlight()
+        self.node = NodeFlight(directory) if directory else None
+
+    def _coalesced(self, req, resp, result, scope):
+        '''Answer request with shared result'''
+        apply_result(resp, result)
+        COALESCED_REQUESTS.labels(
+            'egor045_trav_api',
+            PrometheusMetrics.trim_path(req.path) or 'other',
+            scope).inc()
+
+    def process_request(self, req, resp):
+        '''Join or lead flight for request'''
+        if req.method != 'GET' or not req.path.startswith(self.paths):
+            return
+        key = request_key(req)
+        flight, leader = self.flights.join(key)
+        if not leader:
+            result = self.flights.wait(flight, self.timeout)
+            if result is not None:
+                self._coalesced(req, resp, result, 'worker')
+            return
+        req.context.coalesce = (key, flight, None)
+        if self.node is not None:
+            lock_file, result = self.node.acquire(key, self.timeout)
+            if result is not None:
+                self.node.release(key, lock_file)
+                self.flights.finish(key, flight, result)
+                req.context.coalesce = None
+                self._coalesced(req, resp, result, 'node')
+                return
+            req.context.coalesce = (key, flight, lock_file)
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        '''Publish leader's response to waiters'''
+        coalesce = getattr(req.context, 'coalesce', None)
+        if coalesce is None:
+            return
+        req.context.coalesce = None
+        key, flight, lock_file = coalesce
+        result = None
+        try:
+            if req_succeeded or resp.body is not None:
+                result = response_result(resp)
+        finally:
+            if lock_file is not None:
+                self.node.release(key, lock_file, result)
+            self.flights.finish(key, flight, result)
+
+
 class Metrics(object):
     '''Report Prometheus metrics'''
 
@@ -1,16 +1,16 @@
 '''angdia.py'''
 
-from math import atan2, pi
 import json
 import logging
 import os
-import re
 import falcon
 from prometheus_client import Histogram
-from traveller_api.util import RequestProcessor
+from traveller_api.util import RequestProcessor, not_modified
+from traveller_api.physics import angular_diameter, angular_diameters
+from traveller_api.physics import broadcast
 from .. import Config
-from .. import DB
-from .db import Schemas
+from ..starcode import StarCode
+from .palette import load_palette
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.ERROR)
@@ -19,6 +19,8 @@ KONFIG = Config()
 config = KONFIG.config['traveller_api.misc']
 
 
+MAX_BATCH = 10000
+
 REQUEST_TIME = Histogram(
     'misc_request_latency_seconds',
     'misc latency')
@@ -37,53 +39,125 @@ class AngDia(RequestProcessor):
         "diameter": <diameter>,
         "distance": <distance>
     }
+
+    Array mode: repeat distance and/or diameter
+    GET <apiserver>/misc/angdia?distance=<distance>&distance=<distance>...&diameter=<diameter>...
+    POST <apiserver>/misc/angdia
+        {"distance": [<distance>, ...], "diameter": [<diameter>, ...]}
+
+    Returns the same keys, each with a list of values (one per
+    distance/diameter pair). A single distance or diameter is used for
+    every value of the other; otherwise both lists must be the same
+    length. Up to 10000 values may be supplied.
+
     GET <apiserver>/misc/angdia?doc=true returns this text
     '''
 
+    repeatable_parameters = ('distance', 'diameter')
+
     @REQUEST_TIME.time()
     def on_get(self, req, resp):
         '''GET /misc/angdia?distance=<distance>&diameter=<diameter>'''
-        self.query_parameters = {
-            'distance': None,
-            'diameter': None,
-            'doc': False
-        }
+        query_parameters = self.parse_query(
+            req.query_string, {'distance': [], 'diameter': [], 'doc': False})
         LOGGER.debug('query_string = %s', req.query_string)
         LOGGER.debug('scheme = %s host = %s', req.scheme, req.host)
         LOGGER.debug('prefix = %s', req.prefix)
-        self.parse_query_string(req.query_string)
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             doc = self.get_doc(req)
         else:
-            if self.query_parameters['distance'] is None \
-                    or self.query_parameters['diameter'] is None:
-                raise falcon.HTTPError(
-                    title='Missing parameter',
-                    status='400 Missing parameter',
-                    description='Missing parameter(s) - ' +
-                    'specify distance and diameter')
-            try:
-                distance = float(self.query_parameters['distance'])
-                diameter = float(self.query_parameters['diameter'])
-            except ValueError as err:
-                raise falcon.HTTPError(
-                    title='Invalid parameter',
-                    status='400 Invalid parameter',
-                    description=str(err))
-
-            angdia_deg = round(
-                atan2(diameter, distance) * 180 / pi, 3)
-            angdia_rad = round(
-                atan2(diameter, distance), 3)
-            doc = {
-                'ang_dia_deg': angdia_deg,
-                'ang_dia_rad': angdia_rad,
-                'diameter': diameter,
-                'distance': distance
-            }
+            distances = query_parameters['distance']
+            diameters = query_parameters['diameter']
+            if len(distances) == 1 and len(diameters) == 1:
+                doc = self.angdia(distances[0], diameters[0])
+            else:
+                doc = self.angdias(distances, diameters)
         resp.body = json.dumps(doc)
         resp.status = falcon.HTTP_200
 
+    @REQUEST_TIME.time()
+    def on_post(self, req, resp):
+        '''POST /misc/angdia (array mode)'''
+        try:
+            doc = json.loads(req.bounded_stream.read().decode('utf-8'))
+            distances = doc.get('distance', [])
+            diameters = doc.get('diameter', [])
+            assert isinstance(distances, list)
+            assert isinstance(diameters, list)
+        except (AssertionError, AttributeError, ValueError):
+            raise falcon.HTTPError(
+                title='Invalid request body',
+                status='400 Invalid parameter',
+                description='Body must be ' +
+                '{"distance": [<distance>, ...], ' +
+                '"diameter": [<diameter>, ...]}')
+        resp.body = json.dumps(self.angdias(distances, diameters))
+        resp.status = falcon.HTTP_200
+
+    @staticmethod
+    def _floats(values):
+        '''Convert values to floats (HTTP 400 if invalid)'''
+        try:
+            return [float(value) for value in values]
+        except (TypeError, ValueError) as err:
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description=str(err))
+
+    def angdia(self, distance, diameter):
+        '''Angular diameter for single distance, diameter'''
+        distance, diameter = self._floats([distance, diameter])
+        return {
+            'ang_dia_deg': angular_diameter(distance, diameter),
+            'ang_dia_rad': angular_diameter(distance, diameter, False),
+            'diameter': diameter,
+            'distance': distance
+        }
+
+    def angdias(self, distances, diameters):
+        '''Angular diameters for lists of distances, diameters'''
+        if not distances or not diameters:
+            raise falcon.HTTPError(
+                title='Missing parameter',
+                status='400 Missing parameter',
+                description='Missing parameter(s) - ' +
+                'specify distance and diameter')
+        if max(len(distances), len(diameters)) > MAX_BATCH:
+            raise falcon.HTTPError(
+                title='Too many values',
+                status='400 Invalid parameter',
+                description='Specify at most {} values'.format(MAX_BATCH))
+        distances = self._floats(distances)
+        diameters = self._floats(diameters)
+        if len(distances) == 1:
+            distances = distances[0]
+        if len(diameters) == 1:
+            diameters = diameters[0]
+        try:
+            distances, diameters = broadcast(distances, diameters)
+        except ValueError as err:
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description=str(err))
+        return {
+            'ang_dia_deg': angular_diameters(distances, diameters),
+            'ang_dia_rad': angular_diameters(distances, diameters, False),
+            'diameter': diameters,
+            'distance': distances
+        }
+
+
+SQLITE_FILE = '{}/{}'.format(
+    os.path.dirname(os.path.realpath(__file__)),
+    config.get('dbfile'))
+PALETTE_FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'rgb': 'application/octet-stream'
+}
+
 
 class StarColor(RequestProcessor):
     '''
@@ -100,125 +174,186 @@ class StarColor(RequestProcessor):
     '''
     # See star_color.sqlite for RGB
 
-    def __init__(self):
+    def __init__(self, palette=None):
         super(StarColor, self).__init__()
-        self.code = None
-        self.rgb = {
-            'red': None,
-            'blue': None,
-            'green': None
-        }
-        # Path
-        sqlite_file = '{}/{}'.format(
-            os.path.dirname(os.path.realpath(__file__)),
-            config.get('dbfile'))
-        self.db = DB(sqlite_file)
-        self.session = self.db.session()
+        # Palette is loaded once, at startup
+        self.palette = palette if palette is not None else \
+            load_palette(SQLITE_FILE)
 
     @REQUEST_TIME.time()
     def on_get(self, req, resp):
         ''' GET /misc/starcolor?code=<code>'''
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'code': None,
             'doc': False
-        }
+        })
         LOGGER.debug('query_string = %s', req.query_string)
-        self.parse_query_string(req.query_string)
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             doc = self.get_doc(req)
         else:
-            self.clear_data()
-            code = self.query_parameters['code']
-            self._validate_code(code)
-            try:
-                assert self.code is not None
-                assert self.code != ''
-            except AssertionError:
+            code = query_parameters['code']
+            star_code = self._validate_code(code)
+            if star_code is None:
                 raise falcon.HTTPError(
                     title='Bad paramter value {}'.format(code),
                     description='Invalid code {}'.format(code),
                     status='400 Invalid code')
-            self.get_details()
             doc = {
-                'code': self.code,
-                'rgb': self.rgb
+                'code': str(star_code),
+                'rgb': self.palette.rgb(star_code)
             }
         resp.body = json.dumps(doc)
         resp.status = falcon.HTTP_200
 
-    def clear_data(self):
-        '''Clear data on new request'''
-        self.code = ''
-        self.rgb = {'red': None, 'green': None, 'blue': None}
-
-    def get_details(self):
-        '''Get RGB details for code from DB'''
-        LOGGER.debug('code = %s', self.code)
-        details = self.session.query(Schemas.StarColorTable).\
-            filter_by(code=self.code).first()
-        LOGGER.debug('starcolor = %s', details)
-        if details:
-            self.rgb['red'] = details.red
-            self.rgb['green'] = details.green
-            self.rgb['blue'] = details.blue
-
-    def _validate_code(self, code):
-        '''Validate code -> type, decimal, size'''
+    @staticmethod
+    def _validate_code(code):
+        '''Validate code -> StarCode (None if invalid)'''
         LOGGER.debug('code = %s', code)
         if code:
-            if code.endswith('D') or code.startswith('D'):
-                self._validate_code_dwarf(code)
-            else:
-                self._validate_code_star(code)
-
-    def _validate_code_star(self, code):
-        '''Validate code for non-dwarf'''
-        mtch = re.match(
-            r'([OBAFGKM])([0-9])\s*([IVDab]{1,3}$)',
-            code)
-        if mtch:
-            LOGGER.debug('Code matches RE')
-            typ = mtch.group(1)
-            decimal = int(mtch.group(2))
-            if mtch.group(3) in ['Ia', 'Ib', 'II', 'III', 'IV', 'V', 'VI']:
-                size = mtch.group(3)
-            else:
-                raise TypeError
-            LOGGER.debug(
-                'type = %s decimal = %s size = %s',
-                typ, decimal, size)
-
-            # Check for invalid types
-            if size == 'IV':
-                LOGGER.debug('size = IV')
-                # M[0-9] IV not possible, use V instead
-                if typ == 'M':
-                    LOGGER.debug('type = M, setting size=V')
-                    size = 'V'
-                # K[5-9] IV not possible, use V instead
-                if typ == 'K' and decimal >= 5:
-                    LOGGER.debug('type = K, size = 5-9, setting size=V')
-                    size = 'V'
-            if size == 'VI':
-                # B[0-9] VI not possible, use V instead
-                if typ == 'B':
-                    size = 'V'
-                # F[0-4] VI not possible, use V instead
-                if typ == 'F' and decimal <= 4:
-                    size = 'V'
-            self.code = '{}{} {}'.format(typ, decimal, size)
-
-    def _validate_code_dwarf(self, code):
-        '''Validate code for dwarf'''
-        if code.startswith('D'):
-            mtch = re.match(r'D\s*([OBAFGKM])', code)
-            if mtch:
-                LOGGER.debug('code matches RE')
-                typ = mtch.group(1)
-                self.code = 'D{}'.format(typ)
+            try:
+                return StarCode.parse(code)
+            except ValueError:
+                LOGGER.debug('Invalid code %s', code)
+        return None
+
+
+class StarColorBatch(RequestProcessor):
+    '''
+    Return (R, G, B) colours for many star codes
+    GET <apiserver>/misc/starcolor/batch?code=<code>&code=<code>...
+    POST <apiserver>/misc/starcolor/batch
+        {"codes": [<code>, <code>, ...]}
+
+    Returns
+    {
+        "colors": [
+            {
+                "query": <code as supplied>,
+                "code": <code>,
+                "rgb": {"red": <red>, "blue": <blue>, "green": <green>}
+            },
+            ...
+        ]
+    }
+
+    in the order supplied (repeated codes are repeated). <code> is the
+    canonical code, or null if the supplied code is invalid; colours for
+    invalid or unknown codes are null. Up to 10000 codes may be supplied.
+
+    GET <apiserver>/misc/starcolor/batch?doc=true returns this text
+    '''
+
+    repeatable_parameters = ('code',)
+
+    def __init__(self, palette=None):
+        super(StarColorBatch, self).__init__()
+        self.palette = palette if palette is not None else \
+            load_palette(SQLITE_FILE)
+
+    @REQUEST_TIME.time()
+    def on_get(self, req, resp):
+        '''GET /misc/starcolor/batch?code=<code>&code=<code>...'''
+        query_parameters = self.parse_query(req.query_string, {
+            'code': [],
+            'doc': False
+        })
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+        else:
+            resp.body = json.dumps(
+                self.colors(query_parameters['code']))
+        resp.status = falcon.HTTP_200
+
+    @REQUEST_TIME.time()
+    def on_post(self, req, resp):
+        '''POST /misc/starcolor/batch'''
+        try:
+            codes = json.loads(req.bounded_stream.read().decode('utf-8'))
+            codes = codes['codes']
+        except (ValueError, KeyError, TypeError):
+            codes = None
+        if not isinstance(codes, list):
+            raise falcon.HTTPError(
+                title='Invalid request body',
+                status='400 Invalid parameter',
+                description='Body must be {"codes": [<code>, ...]}')
+        resp.body = json.dumps(self.colors(codes))
+        resp.status = falcon.HTTP_200
+
+    def colors(self, codes):
+        '''Look up colours for list of codes'''
+        if len(codes) > MAX_BATCH:
+            raise falcon.HTTPError(
+                title='Too many codes',
+                status='400 Invalid parameter',
+                description='Specify at most {} codes'.format(MAX_BATCH))
+        colors = []
+        for code in codes:
+            try:
+                star_code = StarCode.parse(code)
+            except ValueError:
+                colors.append({'query': code, 'code': None, 'rgb': None})
+                continue
+            rgb = self.palette.lookup(star_code)
+            colors.append({
+                'query': code,
+                'code': str(star_code),
+                'rgb': self.palette.rgb(star_code) if rgb else None
+            })
+        return {'colors': colors}
+
+
+class StarColorPalette(RequestProcessor):
+    '''
+    Return full star colour palette
+    GET <apiserver>/misc/starcolor/palette?format=<format>
+
+    <format> is one of
+    - json (default):
+        {"codes": [<code>, ...], "rgb": [[<red>, <green>, <blue>], ...]}
+    - csv: header row code,red,green,blue then one row per code
+    - rgb: packed binary array, 3 bytes (red, green, blue) per code
+
+    Codes are sorted, and every format uses the same order, so the
+    binary array can be indexed using the codes from the JSON or CSV
+    export. Responses carry ETag and X-Palette-Count (number of codes)
+    headers and may be cached; If-None-Match returns 304 Not Modified if
+    the palette is unchanged.
+
+    GET <apiserver>/misc/starcolor/palette?doc=true returns this text
+    '''
+
+    def __init__(self, palette=None):
+        super(StarColorPalette, self).__init__()
+        self.palette = palette if palette is not None else \
+            load_palette(SQLITE_FILE)
+
+    @REQUEST_TIME.time()
+    def on_get(self, req, resp):
+        '''GET /misc/starcolor/palette?format=<format>'''
+        query_parameters = self.parse_query(req.query_string, {
+            'format': 'json',
+            'doc': False
+        })
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+            return
+        fmt = query_parameters['format']
+        if fmt not in PALETTE_FORMATS:
+            raise falcon.HTTPError(
+                title='Invalid format',
+                status='400 Invalid parameter',
+                description='format must be one of {}'.format(
+                    ', '.join(sorted(PALETTE_FORMATS))))
+        resp.set_header('X-Palette-Count', str(len(self.palette)))
+        if not_modified(req, resp, '"{}-{}"'.format(self.palette.etag, fmt)):
+            return
+        resp.content_type = PALETTE_FORMATS[fmt]
+        if fmt == 'rgb':
+            resp.data = self.palette.packed()
+        elif fmt == 'csv':
+            resp.body = self.palette.csv()
         else:
-            mtch = re.match(r'([OBAFGKM])\s*D', code)
-            if mtch:
-                LOGGER.debug('code matches RE')
-                typ = mtch.group(1)
-                self.code = '{}D'.format(typ)
+            resp.body = self.palette.json()
+        resp.status = falcon.HTTP_200
@@ -0,0 +1,98 @@
+'''palette.py'''
+
+import csv
+import io
+import json
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from traveller_api import DB
+from traveller_api.starcode import StarCode
+from .db import Schemas
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+
+class Palette(object):
+    '''
+    In-memory star colour palette (code -> (red, green, blue))
+
+    rows is a sequence of (code, red, green, blue); codes are kept in
+    sorted order, which is also the order used by every export format
+    '''
+
+    def __init__(self, rows=()):
+        self.colors = OrderedDict(
+            (code, (red, green, blue))
+            for code, red, green, blue in sorted(rows))
+        self.codes = tuple(self.colors)
+        # Index by parsed classification so any spelling of a code matches
+        self._by_star_code = {}
+        for code, rgb in self.colors.items():
+            try:
+                self._by_star_code.setdefault(StarCode.parse(code), rgb)
+            except ValueError:
+                LOGGER.debug('Unparseable palette code %s', code)
+        self.etag = hashlib.sha1(self.csv().encode('utf-8')).hexdigest()
+
+    @classmethod
+    def from_sqlite(cls, sqlite_file):
+        '''Load palette from starcolor table (empty if file is missing)'''
+        if not os.path.isfile(sqlite_file):
+            LOGGER.error('Star colour DB %s not found', sqlite_file)
+            return cls()
+        database = DB(sqlite_file)
+        session = database.session()
+        try:
+            rows = [
+                (row.code, row.red, row.green, row.blue)
+                for row in session.query(Schemas.StarColorTable)
+            ]
+        finally:
+            session.close()
+            database.engine.dispose()
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def lookup(self, star_code):
+        '''Return (red, green, blue) for StarCode, None if not in palette'''
+        return self._by_star_code.get(star_code)
+
+    def rgb(self, star_code):
+        '''Return {'red', 'green', 'blue'} dict for StarCode'''
+        rgb = self.lookup(star_code) or (None, None, None)
+        return dict(zip(('red', 'green', 'blue'), rgb))
+
+    def json(self):
+        '''JSON export: {"codes": [<code>, ...], "rgb": [[r, g, b], ...]}'''
+        return json.dumps({
+            'codes': list(self.codes),
+            'rgb': [list(rgb) for rgb in self.colors.values()]
+        })
+
+    def csv(self):
+        '''CSV export: code,red,green,blue'''
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(['code', 'red', 'green', 'blue'])
+        for code, rgb in self.colors.items():
+            writer.writerow([code] + list(rgb))
+        return out.getvalue()
+
+    def packed(self):
+        '''Binary export: 3 bytes (R, G, B) per code, in code order'''
+        return bytes(
+            max(0, min(255, int(value or 0)))
+            for rgb in self.colors.values()
+            for value in rgb)
+
+
+@lru_cache(maxsize=8)
+def load_palette(sqlite_file):
+    '''Load palette once per file'''
+    return Palette.from_sqlite(sqlite_file)
@@ -0,0 +1,165 @@
+'''catalogue.py'''
+
+import csv
+import os
+import logging
+from collections import namedtuple
+from functools import lru_cache
+from traveller_api import DB
+from traveller_api.physics import period
+from traveller_api.starcode import StarCode
+from traveller_api.ct.lbb6.catalogue import SOLAR_DIAMETER, angular_diameter
+from traveller_api.ct.lbb6.catalogue import load_catalogue as load_lbb6
+from .db import Schemas
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+STAR_CSV = '{}/{}'.format(
+    os.path.dirname(os.path.realpath(__file__)),
+    'star.csv'
+)
+SQLITE_FILE = '{}/{}'.format(
+    os.path.dirname(os.path.realpath(__file__)),
+    'star.sqlite'
+)
+
+STAR_COLUMNS = (
+    'indx', 'typ', 'decimal', 'size', 'min_orbit', 'hz_orbit', 'int_orbit',
+    'luminosity', 'mass')
+ORBIT_COLUMNS = ('indx', 'au', 'mkm')
+
+StarRow = namedtuple('StarRow', STAR_COLUMNS)
+OrbitRow = namedtuple('OrbitRow', ORBIT_COLUMNS)
+
+# Sun's angular diameter from earth orbit (degrees)
+SOLAR_ANGULAR_DIAMETER = 0.522
+
+
+def _int_or_none(value):
+    '''CSV value -> int (None if blank)'''
+    return int(value) if value != '' else None
+
+
+def read_star_csv(csv_file):
+    '''Read star table from CSV, return list of StarRows'''
+    with open(csv_file, newline='') as infile:
+        return [
+            StarRow(
+                int(row['indx']), row['typ'], _int_or_none(row['decimal']),
+                row['size'], _int_or_none(row['min_orbit']),
+                _int_or_none(row['hz_orbit']), _int_or_none(row['int_orbit']),
+                float(row['luminosity']), float(row['mass']))
+            for row in csv.DictReader(infile)
+        ]
+
+
+def read_orbit_table(sqlite_file):
+    '''Read orbit table from SQLite, return list of OrbitRows'''
+    database = DB(sqlite_file)
+    session = database.session()
+    try:
+        return [
+            OrbitRow(row.indx, float(row.au), float(row.mkm))
+            for row in session.query(Schemas.OrbitTable).order_by(
+                Schemas.OrbitTable.indx)
+        ]
+    finally:
+        session.close()
+        database.engine.dispose()
+
+
+class WBHCatalogue(object):
+    '''
+    In-memory copy of the WBH star and orbit tables
+
+    stars, orbits are sequences of StarRow, OrbitRow; radii maps StarCode
+    to stellar radius (solar radii) for angular diameters (the WBH table
+    has no radius column)
+    '''
+
+    def __init__(self, stars, orbits, radii=None):
+        self.stars = tuple(StarRow(*row) for row in stars)
+        self.orbits = tuple(
+            OrbitRow(*row) for row in sorted(orbits, key=lambda r: r[0]))
+        self.radii = dict(radii or {})
+        self._by_star_code = {}
+        for star in self.stars:
+            self._by_star_code.setdefault(self.star_code(star), star)
+
+    @classmethod
+    def from_files(cls, csv_file=STAR_CSV, sqlite_file=SQLITE_FILE):
+        '''Load stars from CSV, orbits from SQLite, radii from LBB6 tables'''
+        lbb6 = load_lbb6()
+        radii = {
+            lbb6.star_code(star): star.radius for star in lbb6.stars
+        }
+        return cls(
+            read_star_csv(csv_file), read_orbit_table(sqlite_file), radii)
+
+    @staticmethod
+    def star_code(star):
+        '''StarCode for star row (dwarfs have no decimal)'''
+        if star.size == 'D':
+            return StarCode(star.typ, '', 'D')
+        return StarCode(star.typ, star.decimal, star.size)
+
+    def star(self, star_code):
+        '''Return StarRow for StarCode, None if not in catalogue'''
+        return self._by_star_code.get(star_code)
+
+    @staticmethod
+    def period(star, orbit):
+        '''Orbital period (years) of orbit around star'''
+        return period(orbit.au, star.mass)
+
+    def star_details(self, star):
+        '''Star details (as returned by /mt/wbh/star)'''
+        hz_period = None
+        if star.hz_orbit is not None:
+            hz_period = self.period(star, self.orbits[star.hz_orbit])
+        return {
+            'type': star.typ,
+            'decimal': star.decimal if star.size != 'D' else '',
+            'size': star.size,
+            'min_orbit': star.min_orbit,
+            'hz_orbit': star.hz_orbit,
+            'luminosity': star.luminosity,
+            'mass': star.mass,
+            'hz_period': hz_period,
+            'int_orbit': star.int_orbit
+        }
+
+    def orbit_details(self, star, orbit_no):
+        '''
+        Orbit details (as returned by /mt/wbh/star/{code}/orbit/{orbit_no}),
+        ValueError for unknown orbit_no
+        '''
+        if orbit_no not in range(len(self.orbits)):
+            raise ValueError('Invalid orbit number {}'.format(orbit_no))
+        orbit = self.orbits[orbit_no]
+        angular_dia_deg = None
+        angular_dia_sun = None
+        radius = self.radii.get(self.star_code(star))
+        if radius is not None:
+            angular_dia_deg = angular_diameter(
+                orbit.mkm, radius * SOLAR_DIAMETER)
+            angular_dia_sun = round(
+                angular_dia_deg / SOLAR_ANGULAR_DIAMETER, 3)
+        return {
+            'orbit_no': orbit_no,
+            'au': orbit.au,
+            'mkm': orbit.mkm,
+            'period': self.period(star, orbit),
+            'angular_dia_deg': angular_dia_deg,
+            'angular_dia_sun': angular_dia_sun,
+            'interior': (
+                star.int_orbit is not None and orbit_no <= star.int_orbit),
+            'unavailable': orbit_no < (star.min_orbit or 0)
+        }
+
+
+@lru_cache(maxsize=4)
+def load_catalogue(csv_file=STAR_CSV, sqlite_file=SQLITE_FILE):
+    '''Load catalogue once per file'''
+    return WBHCatalogue.from_files(csv_file, sqlite_file)
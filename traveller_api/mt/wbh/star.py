@@ -1,165 +1,180 @@
 '''star.py'''
 
-import re
-import os
 import json
 import logging
 import falcon
-from .db import Schemas
-from ... import DB
-from ... import Config
+from traveller_api.util import RequestProcessor
+from traveller_api.starcode import StarCode
+from .catalogue import load_catalogue
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
 
-KONFIG = Config()
-config = KONFIG.config['traveller_api.mt.wbh']
-
-
-class Star(object):
-    '''Star class'''
-
-    def __init__(self):
-        self.clear_data()
-        # Path
-        sqlite_file = '{}/{}'.format(
-            os.path.dirname(os.path.realpath(__file__)),
-            config.get('dbfile'))
-        self.db = DB(sqlite_file)
-        self.session = self.db.session()
-
-    def on_get(self, req, resp, code):
-        '''GET /ct/lbb6/star/<code>'''
-        self.clear_data()
-        self._validate_code(code)
-        self.get_classification()
-        self.get_details()
-        self.calculate_hz_period()
-
-        if self.type is None:
-            resp.body = json.dumps({
-                'message': 'Invalid star classification'
-            })
-            resp.status = falcon.HTTP_400
-        else:
-            doc = {
-                'type': self.type,
-                'decimal': self.decimal,
-                'size': self.size,
-                'min_orbit': self.min_orbit,
-                'hz_orbit': self.hz_orbit,
-                'luminosity': self.luminosity,
-                'mass': self.mass,
-                'hz_period': self.hz_period,
-                'int_orbit': self.int_orbit
-            }
-            resp.body = json.dumps(doc)
+MAX_BATCH = 10000
+
+
+def lookup_star(catalogue, code):
+    '''Return (StarCode, StarRow) for code, HTTP 400 if invalid/unknown'''
+    LOGGER.debug('code = %s', code)
+    try:
+        star_code = StarCode.parse(code)
+        star = catalogue.star(star_code)
+        assert star is not None
+    except (AssertionError, ValueError):
+        raise falcon.HTTPError(
+            title='Invalid star',
+            status='400 Invalid parameter',
+            description='Invalid star classification {}'.format(code))
+    return star_code, star
+
+
+class Star(RequestProcessor):
+    '''
+    Return WBH star details
+    GET <apiserver>/mt/wbh/star/<code>
+    GET <apiserver>/mt/wbh/star?code=<code>
+
+    Returns
+    {
+        "decimal": <decimal>,
+        "hz_orbit": <HZ orbit>,
+        "hz_period": <HZ period>,
+        "int_orbit": <internal orbit>,
+        "luminosity": <luminosity>,
+        "mass": <mass>,
+        "min_orbit": <min orbit>,
+        "size": <size>,
+        "type": <type>
+    }
+
+    where
+    - <code> is <type><decimal> <size> (e.g. G2 V) or <type> D for dwarfs
+    - <HZ orbit> is the habitable zone orbit
+    - <HZ period> is the orbital period (years) of the habitable zone
+      orbit
+    - <internal orbit> is the last orbit within the star (null if none)
+
+    GET <apiserver>/mt/wbh/star?doc=true returns this text
+    '''
+
+    def __init__(self, catalogue=None):
+        super(Star, self).__init__()
+        self.catalogue = catalogue if catalogue is not None else \
+            load_catalogue()
+
+    def on_get(self, req, resp, code=None):
+        '''GET <apiserver>/mt/wbh/star/<code>'''
+        query_parameters = self.parse_query(
+            req.query_string, {'doc': False, 'code': code})
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
-
-    def clear_data(self):
-        '''Clear data on new request'''
-        self.type = None
-        self.decimal = None
-        self.size = None
-        self.min_orbit = 0
-        self.hz_orbit = None
-        self.int_orbit = None
-        self.luminosity = 0
-        self.mass = 0
-        self.hz_period = None
-        self.classification = None
-
-    def _validate_code(self, code):
-        '''Validate code -> type, decimal, size'''
-        LOGGER.debug('code = %s', code)
-        if code:
-            if code.endswith('D'):
-                self._validate_code_dwarf(code)
-            else:
-                self._validate_code_star(code)
-
-    def _validate_code_star(self, code):
-        '''Validate code for non-dwarf'''
-        mtch = re.match(
-            r'([OBAFGKM])([0-9])\s*([IVDab]{1,3}$)',
-            code)
-        if mtch:
-            LOGGER.debug('Code matches RE')
-            self.type = mtch.group(1)
-            self.decimal = int(mtch.group(2))
-            if mtch.group(3) in ['Ia', 'Ib', 'II', 'III', 'IV', 'V', 'VI']:
-                self.size = mtch.group(3)
-            else:
-                raise TypeError
-            LOGGER.debug(
-                'type = %s decimal = %s size = %s',
-                self.type, self.decimal, self.size)
-
-            # Check for invalid types
-            if self.size == 'IV':
-                LOGGER.debug('size = IV')
-                # M[0-9] IV not possible, use V instead
-                if self.type == 'M':
-                    LOGGER.debug('type = M, setting size=V')
-                    self.size = 'V'
-                # K[5-9] IV not possible, use V instead
-                if self.type == 'K' and self.decimal >= 5:
-                    LOGGER.debug('type = K, size = 5-9, setting size=V')
-                    self.size = 'V'
-            if self.size == 'VI':
-                # B[0-9] VI not possible, use V instead
-                if self.type == 'B':
-                    self.size = 'V'
-                # F[0-4] VI not possible, use V instead
-                if self.type == 'F' and self.decimal <= 4:
-                    self.size = 'V'
-
-    def _validate_code_dwarf(self, code):
-        '''Validate code for dwarf'''
-        mtch = re.match(r'([BAFGKM])\s*D', code)
-        if mtch:
-            LOGGER.debug('code matches RE')
-            self.type = mtch.group(1)
-            self.decimal = ''
-            self.size = 'D'
-
-    def get_details(self):
-        '''Get details from DB'''
-        LOGGER.debug(
-            'typ = %s size = %s decimal = %s',
-            self.type,
-            self.size,
-            self.decimal)
-        if self.size == 'D':
-            details = self.session.query(Schemas.StarTable).\
-                filter_by(typ=self.type).\
-                filter_by(size=self.size).\
-                first()
+            return
+        code = (query_parameters['code'] or '').replace('%20', ' ')
+        _, star = lookup_star(self.catalogue, code)
+        resp.body = json.dumps(
+            self.catalogue.star_details(star), sort_keys=True)
+        resp.status = falcon.HTTP_200
+
+
+class StarBatch(RequestProcessor):
+    '''
+    Return WBH star details for many star codes
+    GET <apiserver>/mt/wbh/star/batch?code=<code>&code=<code>...&orbits=<true|false>
+    POST <apiserver>/mt/wbh/star/batch
+        {"codes": [<code>, <code>, ...], "orbits": <true|false>}
+
+    Returns
+    {
+        "stars": [
+            {
+                "query": <code as supplied>,
+                "code": <code>,
+                "star": <star details>,
+                "orbits": [<orbit details>, ...]
+            },
+            ...
+        ]
+    }
+
+    in the order supplied (repeated codes are repeated), where
+    - <code> is the canonical code, or null if the supplied code is
+      invalid; <star details> are null for invalid or unknown codes
+    - <star details> are as returned by <apiserver>/mt/wbh/star/<code>
+    - "orbits" (orbits=true only) lists every orbit (0-19), with
+      <orbit details> as returned by
+      <apiserver>/mt/wbh/star/<code>/orbit/<orbit_no>
+    Up to 10000 codes may be supplied.
+
+    GET <apiserver>/mt/wbh/star/batch?doc=true returns this text
+    '''
+
+    repeatable_parameters = ('code',)
+
+    def __init__(self, catalogue=None):
+        super(StarBatch, self).__init__()
+        self.catalogue = catalogue if catalogue is not None else \
+            load_catalogue()
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/mt/wbh/star/batch?code=<code>&code=<code>...'''
+        query_parameters = self.parse_query(
+            req.query_string, {'doc': False, 'code': [], 'orbits': False})
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
         else:
-            details = self.session.query(Schemas.StarTable).\
-                filter_by(typ=self.type).\
-                filter_by(size=self.size).\
-                filter_by(decimal=self.decimal).\
-                first()
-        LOGGER.debug('star = %s', details)
-        if details:
-            self.min_orbit = details.min_orbit
-            self.hz_orbit = details.hz_orbit
-            self.luminosity = details.luminosity
-            self.mass = details.mass
-            self.int_orbit = details.int_orbit
-
-    def calculate_hz_period(self):
-        '''Calculate period of planet in HZ orbit'''
-        if self.hz_orbit:
-            orbit = self.session.query(Schemas.OrbitTable).\
-                filter_by(indx=self.hz_orbit).first()
-            LOGGER.debug('orbit = %s', orbit)
-            self.hz_period = round((orbit.au ** 3 / self.mass) ** 0.5, 3)
-            LOGGER.debug('hz_period = %s', self.hz_period)
-
-    def get_classification(self):
-        '''Write canonical classification'''
-        if self.type:
-            self.classification = '{0}{1} {2}'.format(
-                self.type, self.decimal, self.size)
+            codes = [
+                code.replace('%20', ' ') for code in query_parameters['code']]
+            resp.body = json.dumps(
+                self.stars(codes, query_parameters['orbits']))
+        resp.status = falcon.HTTP_200
+
+    def on_post(self, req, resp):
+        '''POST <apiserver>/mt/wbh/star/batch'''
+        try:
+            doc = json.loads(req.bounded_stream.read().decode('utf-8'))
+            codes = doc['codes']
+            orbits = doc.get('orbits', False)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            codes = None
+        if not isinstance(codes, list):
+            raise falcon.HTTPError(
+                title='Invalid request body',
+                status='400 Invalid parameter',
+                description='Body must be {"codes": [<code>, ...]}')
+        if not isinstance(orbits, bool):
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description='orbits must be true or false')
+        resp.body = json.dumps(self.stars(codes, orbits))
+        resp.status = falcon.HTTP_200
+
+    def stars(self, codes, orbits=False):
+        '''Look up star (and optionally orbit) details for list of codes'''
+        if len(codes) > MAX_BATCH:
+            raise falcon.HTTPError(
+                title='Too many codes',
+                status='400 Invalid parameter',
+                description='Specify at most {} codes'.format(MAX_BATCH))
+        stars = []
+        for code in codes:
+            entry = {'query': code, 'code': None, 'star': None}
+            if orbits:
+                entry['orbits'] = None
+            try:
+                star_code = StarCode.parse(code)
+            except ValueError:
+                stars.append(entry)
+                continue
+            entry['code'] = str(star_code)
+            star = self.catalogue.star(star_code)
+            if star is not None:
+                entry['star'] = self.catalogue.star_details(star)
+                if orbits:
+                    entry['orbits'] = [
+                        self.catalogue.orbit_details(star, orbit_no)
+                        for orbit_no in range(len(self.catalogue.orbits))
+                    ]
+            stars.append(entry)
+        return {'stars': stars}
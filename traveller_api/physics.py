@@ -0,0 +1,76 @@
+'''physics.py'''
+
+from math import atan2, pi
+
+# Temperature formula constant (LBB6)
+TEMPERATURE_CONSTANT = 374.025
+
+
+def broadcast(*args):
+    '''
+    Return args as equal-length lists; scalars are repeated to match the
+    sequences (ValueError if sequences differ in length)
+    '''
+    lengths = set(
+        len(arg) for arg in args if isinstance(arg, (list, tuple)))
+    if len(lengths) > 1:
+        raise ValueError(
+            'Sequences must be the same length (got {})'.format(
+                ', '.join(str(length) for length in sorted(lengths))))
+    length = lengths.pop() if lengths else 1
+    return [
+        list(arg) if isinstance(arg, (list, tuple)) else [arg] * length
+        for arg in args]
+
+
+def angular_diameter(distance, diameter, degrees=True):
+    '''Angular diameter (degrees, or radians) of diameter at distance'''
+    angle = atan2(diameter, distance)
+    if degrees:
+        angle = angle * 180 / pi
+    return round(angle, 3)
+
+
+def angular_diameters(distances, diameters, degrees=True):
+    '''angular_diameter() for sequences (or scalars) of distances, diameters'''
+    distances, diameters = broadcast(distances, diameters)
+    return [
+        angular_diameter(distance, diameter, degrees)
+        for distance, diameter in zip(distances, diameters)]
+
+
+def period(au, mass):
+    '''Orbital period (years) of orbit radius au (AU) around mass (solar)'''
+    return round((au ** 3 / mass) ** 0.5, 3)
+
+
+def periods(aus, masses):
+    '''period() for sequences (or scalars) of orbit radii, masses'''
+    aus, masses = broadcast(aus, masses)
+    return [period(au, mass) for au, mass in zip(aus, masses)]
+
+
+def scaled_temperature(luminosity_factor, albedo, distance_factor, greenhouse):
+    '''
+    Temperature (K) from precomputed luminosity ** 0.25 and distance ** 0.5
+    factors
+    '''
+    return round(
+        TEMPERATURE_CONSTANT * greenhouse * (1.0 - albedo) *
+        luminosity_factor / distance_factor, 0)
+
+
+def temperature(luminosity, albedo, distance, greenhouse):
+    '''Temperature (K) of planet at distance (AU) from star (LBB6 formula)'''
+    return scaled_temperature(
+        luminosity ** 0.25, albedo, distance ** 0.5, greenhouse)
+
+
+def temperatures(luminosities, albedos, distances, greenhouses):
+    '''temperature() for sequences (or scalars) of each argument'''
+    luminosities, albedos, distances, greenhouses = broadcast(
+        luminosities, albedos, distances, greenhouses)
+    return [
+        temperature(luminosity, albedo, distance, greenhouse)
+        for luminosity, albedo, distance, greenhouse
+        in zip(luminosities, albedos, distances, greenhouses)]
@@ -0,0 +1,84 @@
+'''preload.py'''
+
+import gc
+import logging
+import random
+import resource
+from traveller_api import DB
+from traveller_api.util import reseed_thread_rng
+from traveller_api.warmup import WARMUP, warm_up
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.INFO)
+
+# Die modifiers to precompute actual value distributions for (covers every
+# clamped table row)
+LBB2_DIE_MODS = range(-13, 14)
+T5_MODIFIERS = range(-13, 14)
+
+
+def build_static_data():
+    '''
+    Build every static table the API uses (importing the app builds the
+    resources, which load the star/orbit catalogues and palette; the
+    encounter, trade goods and T5 description tables are built on
+    import). Lazily-cached derived tables are filled in here so that
+    workers never build their own copies
+    '''
+    # pragma pylint: disable=W0611
+    import traveller_api.app
+    from traveller_api.ct.lbb6.catalogue import load_catalogue
+    from traveller_api.ct.lbb2.cargogen import cargo
+    from traveller_api.t5.cargogen import trade_cargo
+    from traveller_api.starcode import StarCode
+
+    catalogue = load_catalogue()
+    for star_code in catalogue.star_codes():
+        StarCode.parse(str(star_code))
+    for die_mod in LBB2_DIE_MODS:
+        cargo.actual_value_distribution(die_mod)
+    for modifier in T5_MODIFIERS:
+        trade_cargo.actual_value_distribution(modifier)
+
+
+def rss_kb():
+    '''Resident set size of this process (kB), None if unavailable'''
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * resource.getpagesize() // 1024
+
+
+def preload():
+    '''
+    Build static data (and warm up, unless WARMUP=off) in the master
+    process, then freeze it: the collector is disabled while the data is
+    built and every object is moved to the permanent generation
+    (gc.freeze()), so workers never write to the shared pages and they
+    stay shared copy-on-write after fork(). Workers inherit the warm-up
+    state
+    '''
+    gc.disable()
+    if WARMUP == 'off':
+        build_static_data()
+    else:
+        warm_up()
+    DB.dispose_all()
+    gc.freeze()
+    LOGGER.info(
+        'Preloaded static data: %s objects frozen, RSS %s kB',
+        gc.get_freeze_count(), rss_kb())
+
+
+def post_fork():
+    '''
+    Per-worker setup after fork(): drop DB connections inherited from
+    the master, give the worker its own RNG state and re-enable the
+    collector (frozen objects stay out of collections)
+    '''
+    DB.dispose_all()
+    random.seed()
+    reseed_thread_rng()
+    gc.enable()
@@ -0,0 +1,142 @@
+'''singleflight.py'''
+
+import os
+import json
+import time
+import fcntl
+import hashlib
+import threading
+
+# Lock stripes for node-wide (cross-process) single flight; keys share a
+# stripe's lock and result file, so the directory never holds more than
+# 2 * NODE_STRIPES files
+NODE_STRIPES = 256
+# Seconds between attempts to take a node lock
+NODE_POLL_INTERVAL = 0.002
+
+
+class Flight(object):
+    '''In-flight call: waiters block on done until the leader publishes'''
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    '''
+    Per-process single flight
+
+    The first caller to join() a key is its leader and must call
+    finish() with the result (None => not shareable); callers joining
+    while the leader is in flight wait() for that result
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key):
+        '''Return (flight, True if caller is leader)'''
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight()
+                return flight, True
+            flight.waiters += 1
+            return flight, False
+
+    def finish(self, key, flight, result):
+        '''Publish leader's result to waiters, end flight'''
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.done.set()
+
+    @staticmethod
+    def wait(flight, timeout):
+        '''Wait for leader's result (None if not shareable or timed out)'''
+        if flight.done.wait(timeout):
+            return flight.result
+        return None
+
+    def in_flight(self):
+        '''Number of keys in flight'''
+        with self._lock:
+            return len(self._flights)
+
+
+class NodeFlight(object):
+    '''
+    Node-wide single flight using flock()ed files in directory
+
+    A process holding a key's stripe lock is computing that key (or
+    another key in the same stripe); others block in acquire() and,
+    once they have the lock, use the result the holder wrote if it was
+    written for the same key after they started waiting
+    '''
+
+    def __init__(self, directory, stripes=NODE_STRIPES):
+        self.directory = directory
+        self.stripes = stripes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix):
+        '''Lock or result file path for key's stripe'''
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(
+            self.directory,
+            '{:03d}{}'.format(int(digest, 16) % self.stripes, suffix))
+
+    def acquire(self, key, timeout):
+        '''
+        Take key's stripe lock, waiting up to timeout seconds
+
+        Returns (lock file or None if timed out, result written for key
+        by another process while this one waited, or None)
+        '''
+        start = time.time()
+        lock_file = open(self._path(key, '.lock'), 'a+')
+        waited = False
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                waited = True
+                if time.time() - start >= timeout:
+                    lock_file.close()
+                    return None, None
+                time.sleep(NODE_POLL_INTERVAL)
+        result = None
+        if waited:
+            result = self._read(key, start)
+        return lock_file, result
+
+    def _read(self, key, since):
+        '''Result for key written after since (None if none)'''
+        try:
+            with open(self._path(key, '.result')) as result_file:
+                doc = json.load(result_file)
+        except (OSError, ValueError):
+            return None
+        if doc.get('key') != key or doc.get('time', 0) < since:
+            return None
+        return doc.get('result')
+
+    def release(self, key, lock_file, result=None):
+        '''Write result (if JSON-serialisable, not None), drop lock'''
+        try:
+            if result is not None:
+                path = self._path(key, '.result')
+                tmp_path = '{}.{}'.format(path, os.getpid())
+                with open(tmp_path, 'w') as result_file:
+                    json.dump(
+                        {'key': key, 'time': time.time(), 'result': result},
+                        result_file)
+                os.replace(tmp_path, path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
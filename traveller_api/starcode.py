@@ -0,0 +1,102 @@
+'''starcode.py'''
+
+import re
+import logging
+from collections import namedtuple
+from functools import lru_cache
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+RE_STAR = re.compile(r'([OBAFGKM])([0-9])\s*([IVDab]{1,3})$')
+RE_DWARF_SUFFIX = re.compile(r'([OBAFGKM])\s*D$')
+RE_DWARF_PREFIX = re.compile(r'D\s*([OBAFGKM])$')
+SIZES = ('Ia', 'Ib', 'II', 'III', 'IV', 'V', 'VI', 'D')
+
+# Canonical StarCode instances, one per (type, decimal, size)
+_INTERNED = {}
+
+
+class StarCode(namedtuple('StarCode', ['type', 'decimal', 'size'])):
+    '''
+    Parsed stellar classification (type, decimal, size)
+
+    decimal is an int (0-9), or '' for dwarfs (size 'D'). Use
+    StarCode.parse() to create instances from classification strings
+    '''
+    __slots__ = ()
+
+    @staticmethod
+    def parse(code):
+        '''Parse code, return interned StarCode (ValueError if invalid)'''
+        return parse_star_code(code)
+
+    @property
+    def is_dwarf(self):
+        '''True for dwarf stars'''
+        return self.size == 'D'
+
+    def keys(self):
+        '''
+        Lookup keys for tables keyed on classification string, canonical
+        form first (dwarfs may be stored as e.g. GD or DG)
+        '''
+        if self.is_dwarf:
+            return (
+                '{}D'.format(self.type),
+                'D{}'.format(self.type),
+                str(self))
+        return (str(self),)
+
+    def __str__(self):
+        if self.is_dwarf:
+            return '{} D'.format(self.type)
+        return '{}{} {}'.format(self.type, self.decimal, self.size)
+
+
+def _normalize(typ, decimal, size):
+    '''Apply size corrections for stars that can't exist'''
+    if size == 'IV':
+        # M[0-9] IV, K[5-9] IV not possible, use V instead
+        if typ == 'M' or (typ == 'K' and decimal >= 5):
+            LOGGER.debug('%s%s IV not possible, setting size=V', typ, decimal)
+            size = 'V'
+    elif size == 'VI':
+        # B[0-9] VI, A[0-9] VI, F[0-4] VI not possible, use V instead
+        if typ in ('B', 'A') or (typ == 'F' and decimal <= 4):
+            LOGGER.debug('%s%s VI not possible, setting size=V', typ, decimal)
+            size = 'V'
+    return size
+
+
+@lru_cache(maxsize=512)
+def parse_star_code(code):
+    '''
+    Parse classification string, return interned StarCode
+
+    Accepts <type><decimal> <size> (e.g. G2 V, K5VI) and dwarfs as
+    <type> D, <type>D or D<type> (e.g. G D, GD, DG). Sizes that can't
+    exist (K5-M9 IV, B0-F4 VI) are rewritten as V. Raises ValueError for
+    unknown codes
+    '''
+    LOGGER.debug('code = %s', code)
+    if not isinstance(code, str):
+        raise ValueError('Unknown code/type {}'.format(code))
+    code = code.strip()
+    mtch = RE_STAR.match(code)
+    if mtch:
+        typ = mtch.group(1)
+        decimal = int(mtch.group(2))
+        size = mtch.group(3)
+        if size not in SIZES or size == 'D':
+            raise ValueError('Invalid size {}'.format(size))
+        size = _normalize(typ, decimal, size)
+    else:
+        mtch = RE_DWARF_SUFFIX.match(code) or RE_DWARF_PREFIX.match(code)
+        if mtch is None:
+            raise ValueError('Unknown code/type {}'.format(code))
+        typ = mtch.group(1)
+        decimal = ''
+        size = 'D'
+    star_code = StarCode(typ, decimal, size)
+    return _INTERNED.setdefault(star_code, star_code)
@@ -4,9 +4,12 @@ import json
 import re
 import logging
 import configparser
+from concurrent.futures.process import BrokenProcessPool
 import falcon
 from traveller_api.util import RequestProcessor
+from traveller_api.executor import PoolError
 from .trade_cargo import TradeCargo
+from .matrix import trade_matrix
 
 config = configparser.ConfigParser()    # noqa
 config.read('t5.ini')
@@ -14,6 +17,9 @@ uwp_validator = re.compile(r'[A-HX][0-9A-Z]{6}\-([0-9A-Z])')    # noqa
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
 
+MAX_COUNT = 1000
+MAX_WORLDS = 500
+
 
 def validate_uwps(source_uwp, market_uwp):
     '''Validate UWPs'''
@@ -79,6 +85,28 @@ class CargoGen(RequestProcessor):
     - <price>, <actual value> and <net actual value> will be 0
     - <market UWP>, <av roll1>, <av roll2> will be null
 
+    GET <apiserver>/t5/cargogen?source_uwp=<source_uwp>&market_uwp=<dest_uwp>&analytic=true
+
+    As above, with market including
+        "price_distribution": {
+            "mean": <mean net actual value>,
+            "percentiles": {"5": <value>, "25": <value>, "50": <value>,
+                            "75": <value>, "95": <value>},
+            "table": [[<net actual value>, <probability>], ...]
+        }
+    giving the exact distribution of <net actual value> over all flux
+    rolls. Requires market_uwp.
+
+    GET <apiserver>/t5/cargogen?source_uwp=<source_uwp>&market_uwp=<dest_uwp>&count=<n>
+
+    Returns
+    [
+        <cargo>, <cargo>, ...
+    ]
+
+    where <cargo> is a cargo object as above; <n> lots (1-1000) are generated
+    for the same source/market pair
+
 
     GET <apiserver>/t5/cargogen?doc=true
 
@@ -90,31 +118,173 @@ class CargoGen(RequestProcessor):
         GET <apiserver>/t5/cargogen?source_uwp=<source_uwp>&market_uwp=<dest_uwp>
         GET <apiserver>/t5/cargogen?source_uwp=<source_uwp>'''
 
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'doc': False,
             'source_uwp': None,
             'market_uwp': None,
-            'broker': 0
-        }
-        self.parse_query_string(req.query_string)
+            'broker': 0,
+            'count': None,
+            'analytic': False
+        })
 
-        if self.query_parameters['doc'] is True:
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
+        elif query_parameters['count'] is not None:
+            count = self.validate_count(query_parameters['count'])
+            cargo = TradeCargo()
+            try:
+                lots = cargo.generate_cargoes(
+                    query_parameters['source_uwp'],
+                    query_parameters['market_uwp'],
+                    query_parameters['broker'],
+                    count,
+                    query_parameters['analytic']
+                )
+            except ValueError as err:
+                raise falcon.HTTPError(
+                    title='Invalid UWP',
+                    status='400 Invalid parameter',
+                    description=str(err))
+
+            resp.body = json.dumps(lots)
+            resp.status = falcon.HTTP_200
         else:
             cargo = TradeCargo()
-            LOGGER.debug('broker = %s', self.query_parameters['broker'])
+            LOGGER.debug('broker = %s', query_parameters['broker'])
             try:
                 cargo.generate_cargo(
-                    self.query_parameters['source_uwp'],
-                    self.query_parameters['market_uwp'],
-                    self.query_parameters['broker']
+                    query_parameters['source_uwp'],
+                    query_parameters['market_uwp'],
+                    query_parameters['broker']
                 )
             except ValueError as err:
                 raise falcon.HTTPError(
                     title='Invalid UWP',
                     status='400 Invalid parameter',
                     description=str(err))
+            if query_parameters['analytic'] is True:
+                cargo.determine_price_distribution()
 
             resp.body = cargo.json()
             resp.status = falcon.HTTP_200
+
+    @staticmethod
+    def validate_count(count):
+        '''Validate count parameter (1 - MAX_COUNT)'''
+        try:
+            count = int(count)
+            assert count >= 1
+            assert count <= MAX_COUNT
+        except (ValueError, AssertionError):
+            raise falcon.HTTPError(
+                title='Invalid count',
+                status='400 Invalid parameter',
+                description='count must be in range 1-{}'.format(MAX_COUNT))
+        return count
+
+
+class Matrix(RequestProcessor):
+    '''
+    Return T5 trade matrix for a list of worlds
+    GET <apiserver>/t5/cargogen/matrix?uwp=<uwp>&uwp=<uwp>...&broker=<broker_skill>
+    POST <apiserver>/t5/cargogen/matrix
+        {"uwps": [<uwp>, <uwp>, ...], "broker": <broker_skill>}
+
+    Returns newline-delimited JSON, one line per source world:
+    {
+        "cost": <cost>,
+        "expected_actual_value": [<expected actual value>, ...],
+        "expected_net_actual_value": [<expected net actual value>, ...],
+        "price": [<price>, ...],
+        "row": <row>,
+        "source": <source UWP>
+    }
+
+    where
+    - <row> is the index of the source world in the list of UWPs
+    - <cost> is the purchase cost of cargo from the source world
+    - <price>, <expected actual value> and <expected net actual value>
+      have one entry per market world, in the order supplied
+    - <expected actual value> is the mean of the actual value over all
+      flux rolls; <expected net actual value> is the same less broker
+      commission
+    - <broker skill> is the broker skill used when selling (default 0)
+
+    Up to 500 worlds may be supplied. Rows are streamed as they are
+    computed; large matrices are split across a process pool. If the
+    pool cannot finish the matrix once streaming has started (e.g. it
+    times out), the rows sent so far are followed by a final line
+    {"error": <description>}
+
+    GET <apiserver>/t5/cargogen/matrix?doc=true
+
+    Returns this text
+    '''
+
+    repeatable_parameters = ('uwp',)
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/t5/cargogen/matrix?uwp=<uwp>&uwp=<uwp>...'''
+        query_parameters = self.parse_query(req.query_string, {
+            'doc': False,
+            'uwp': [],
+            'broker': 0
+        })
+
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+        else:
+            self.stream_matrix(
+                resp,
+                query_parameters['uwp'],
+                query_parameters['broker'])
+
+    def on_post(self, req, resp):
+        '''POST <apiserver>/t5/cargogen/matrix'''
+        try:
+            doc = json.loads(req.bounded_stream.read().decode('utf-8'))
+            uwps = doc['uwps']
+        except (ValueError, KeyError, TypeError):
+            uwps = None
+        if not isinstance(uwps, list):
+            raise falcon.HTTPError(
+                title='Invalid request body',
+                status='400 Invalid parameter',
+                description='Body must be {"uwps": [<uwp>, ...]}')
+        self.stream_matrix(resp, uwps, doc.get('broker', 0))
+
+    @staticmethod
+    def stream_matrix(resp, uwps, broker):
+        '''Validate worlds, stream matrix rows as NDJSON'''
+        if not uwps or len(uwps) > MAX_WORLDS:
+            raise falcon.HTTPError(
+                title='Invalid world list',
+                status='400 Invalid parameter',
+                description='Specify 1-{} UWPs'.format(MAX_WORLDS))
+        try:
+            rows = trade_matrix(uwps, broker)
+        except ValueError as err:
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description=str(err))
+        resp.content_type = 'application/x-ndjson'
+        resp.stream = Matrix.ndjson(rows)
+        resp.status = falcon.HTTP_200
+
+    @staticmethod
+    def ndjson(rows):
+        '''
+        Yield rows as NDJSON lines; a task pool error (raised after the
+        response status has been sent) ends the stream with an error line
+        '''
+        try:
+            for row in rows:
+                yield (json.dumps(row, sort_keys=True) + '\n').encode('utf-8')
+        except (PoolError, BrokenProcessPool) as err:
+            LOGGER.error('Trade matrix incomplete: %s', err)
+            yield (json.dumps({
+                'error': str(err) or 'Task pool error'
+            }) + '\n').encode('utf-8')
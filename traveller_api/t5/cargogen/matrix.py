@@ -0,0 +1,119 @@
+'''matrix.py'''
+
+import logging
+from T5_worldgen.planet import Planet
+from traveller_api.executor import TASK_POOL
+from .trade_cargo import TradeCargo, broker_dm, cargo_cost, cargo_price
+from .trade_cargo import price_distribution
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.ERROR)
+
+# Use the task pool for matrices with at least this many worlds
+POOL_THRESHOLD = 100
+# Rows per pool task
+CHUNK_SIZE = 10
+
+
+def classify_world(uwp):
+    '''Parse UWP, return (uwp, tech level, trade codes)'''
+    planet = Planet()
+    try:
+        planet._load_uwp(uwp)     # noqa
+    except (ValueError, TypeError):
+        raise ValueError('Invalid UWP {}'.format(uwp))
+    planet.mainworld_type = None
+    planet.determine_trade_codes()
+    trade_codes = TradeCargo.purge_ce_trade_codes(planet.trade_codes)
+    return (planet.uwp(), int(planet.tech_level), tuple(trade_codes))
+
+
+def matrix_row(source, markets, broker):
+    '''
+    Matrix row for source world across markets
+
+    source, markets are classify_world() tuples; broker is broker DM
+    '''
+    _, source_tl, source_tcs = source
+    cost, _ = cargo_cost(source_tl, list(source_tcs))
+    prices = [
+        cargo_price(source_tcs, source_tl, market_tcs, market_tl)
+        for _, market_tl, market_tcs in markets
+    ]
+    commissions = [int(0.05 * broker * price) for price in prices]
+    return {
+        'source': source[0],
+        'cost': cost,
+        'price': prices,
+        'expected_actual_value': [
+            price_distribution(price, broker)['mean'] for price in prices],
+        'expected_net_actual_value': [
+            price_distribution(price, broker, commission)['mean']
+            for price, commission in zip(prices, commissions)]
+    }
+
+
+def _matrix_rows(sources, markets, broker):
+    '''Task pool task: rows for a chunk of sources'''
+    return [matrix_row(source, markets, broker) for source in sources]
+
+
+def trade_matrix(uwps, broker_skill=0, processes=None):
+    '''
+    Return T5 trade matrix generator for list of UWPs, one row per source
+    world
+
+    Each world is parsed and classified once (ValueError on an invalid
+    UWP or broker skill, raised before the generator is returned). Rows
+    are yielded in order as
+    {
+        'row': <index>,
+        'source': <source UWP>,
+        'cost': <cost>,
+        'price': [<price at market>, ...],
+        'expected_actual_value': [<mean actual value at market>, ...],
+        'expected_net_actual_value': [<mean net actual value>, ...]
+    }
+    with one column per world in uwps.
+
+    processes: None => shared task pool (TASK_POOL) for POOL_THRESHOLD
+    or more worlds; 0 or 1 => compute inline; more => task pool. Pooled
+    chunks of rows are submitted before the generator is returned (so
+    PoolBusy is raised by trade_matrix()) and yielded as the generator
+    reaches them
+    '''
+    try:
+        assert int(broker_skill) >= 0
+        broker = broker_dm(int(broker_skill))
+    except (TypeError, ValueError, AssertionError):
+        raise ValueError('Invalid broker_skill {}'.format(broker_skill))
+    worlds = [classify_world(uwp) for uwp in uwps]
+    return _generate_rows(worlds, broker, processes)
+
+
+def _generate_rows(worlds, broker, processes):
+    '''Return generator of matrix rows, inline or from the task pool'''
+    if processes is None:
+        inline = len(worlds) < POOL_THRESHOLD
+    else:
+        inline = processes <= 1
+    LOGGER.debug('%s worlds, inline = %s', len(worlds), inline)
+
+    if inline:
+        rows = (matrix_row(world, worlds, broker) for world in worlds)
+    else:
+        chunks = TASK_POOL.imap(
+            _matrix_rows,
+            [
+                (worlds[indx:indx + CHUNK_SIZE], worlds, broker)
+                for indx in range(0, len(worlds), CHUNK_SIZE)
+            ])
+        rows = (row for chunk in chunks for row in chunk)
+    return _number_rows(rows)
+
+
+def _number_rows(rows):
+    '''Yield rows with row index added'''
+    for indx, row in enumerate(rows):
+        row['row'] = indx
+        yield row
@@ -1,9 +1,11 @@
 '''cargogen.py'''
 
-from random import seed, randint
+from functools import lru_cache
+import copy
 import json
 import logging
 from T5_worldgen.planet import Planet
+from traveller_api.util import distribution_summary, randint
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.ERROR)
@@ -25,7 +27,315 @@ class FluxRoll(object):
             self.die1, self.die2)
 
 
-FLUX = FluxRoll()
+# Raw T5 cargo description tables (6 x 6 per trade code); _Xx => imbalance
+_CODES = {
+    'Ga': [
+        ['Bulk Protein', 'Bulk Carbs', 'Bulk Fats',
+         'Bulk Pharma', 'Livestock', 'Seedstock'],
+        ['Flavored Waters', 'Wines', 'Juices',
+         'Nectars', 'Decoctions', 'Drinkable Lymphs'],
+        ['Health Foods', 'Nutraceuticals', 'Fast Drug',
+         'Painkillers', 'Antiseptic', 'Antibiotics'],
+        ['Incenses', 'Iridescents', 'Photonics',
+         'Pigments', 'Noisemakers', 'Soundmakers'],
+        ['Fine Furs', 'Meat Delicacies', 'Fruit Delicacies',
+         'Candies', 'Textiles', 'Exotic Sauces'],
+        ['_As', '_De', '_Fl', '_Ic', '_Na', '_In']],
+    'Fa': [
+        ['Bulk Woods', 'Bulk Pets', 'Bulk Herbs',
+         'Bulk Spices', 'Bulk Nitrates', 'Foodstuffs'],
+        ['Flowers', 'Aromatics', 'Pheromones',
+         'Secretions', 'Adhesives', 'Novel Flavorings'],
+        ['Antifungals', 'Antivirals', 'Panacea',
+         'Pseudomones', 'Anagathics', 'Slow Drug'],
+        ['Strange Seeds', 'Motile Plants', 'Reactive Plants',
+         'IR Emitters', 'Lek Emitters'],
+        ['Spices', 'Organic Gems', 'Flavorings',
+         'Aged Meats', 'Fermented Fluids', 'Fine Aromatics'],
+        ['_Po', '_Ri', '_Va', '_Ic', '_Na', '_In']],
+    'As': [
+        ['Bulk Nitrates', 'Bulk Carbon', 'Bulk Iron',
+         'Bulk Copper', 'Radioactive Ores', 'Bulk Ices'],
+        ['Ores', 'Ices', 'Carbons',
+         'Metals', 'Uranium', 'Chelates'],
+        ['Platinum', 'Gold', 'Gallium',
+         'Silver', 'Thorium', 'Radium'],
+        ['Unusual Rocks', 'Fused Metals', 'Strange Crystals',
+         'Fine Dusts', 'Magnetics', 'Light-Sensitives'],
+        ['Gemstones', 'Alloys', 'Iridium Sponge',
+         'Lanthanum', 'Isotopes', 'Anti-Matter'],
+        ['_Ag', '_De', '_Na', '_Po', '_Ri', '_Ic']],
+    'De': [
+        ['Bulk Nitrates', 'Bulk Minerals', 'Bulk Abrasives',
+         'Bulk Particulates', 'Exotic Fauna', 'Exotic Flora'],
+        ['Archeologicals', 'Fauna', 'Flora',
+         'Minerals', 'Ephemerals', 'Polymers'],
+        ['Stimulants', 'Bulk Herbs', 'Palliatives',
+         'Pheromones', 'Antibiotics', 'Combat Drug'],
+        ['Envirosuits', 'Reclamation Suits', 'Navigators',
+         'Dupe Masterpieces', 'ShimmerCloth', 'ANIFX Blocker'],
+        ['Excretions', 'Flavorings', 'Nectars',
+         'Pelts', 'ANIFX Dyes', 'Seedstock'],
+        ['Pheromones', 'Artifacts', 'Sparx',
+         'Repulsant', 'Dominants', 'Fossils']],
+    'Fl': [
+        ['Bulk Carbon', 'Bulk Petros', 'Bulk Precipitates',
+         'Exotic Fluids', 'Organic Polymers', 'Bulk Synthetics'],
+        ['Archeologicals', 'Fauna', 'Flora',
+         'Germanes', 'Flill', 'Chelates'],
+        ['Antifungals', 'Antivirals', 'Palliatives',
+         'Counter-prions', 'Antibiotics', 'Cold Sleep Pills'],
+        ['Silanes', 'Lek Emitters', 'Aware Blockers',
+         'Soothants', 'Self-Solving Puzzlies', 'Fluidic Timepieces'],
+        ['Flavorings', 'Unusual Fluids', 'Encapsulants',
+         'Insidiants', 'Corrosives', 'Exotic Aromatics'],
+        ['_In', '_Ri', '_Ic', '_Na', '_Ag', '_Po']],
+    'Ic': [
+        ['Bulk Ices', 'Bulk Precipitates', 'Bulk Ephemerals',
+         'Exotic Flora', 'Bulk Gases', 'Bulk Oxygen'],
+        ['Archeologicals', 'Fauna', 'Flora',
+         'Minerals', 'Luminescents', 'Polymers'],
+        ['Antifungals', 'Antivirals', 'Palliatives',
+         'Counter-prions', 'Antibiotics', 'Cold Sleep Pills'],
+        ['Silanes', 'Lek Emitters', 'Aware Blockers',
+         'Soothants', 'Self-Solving Puzzlies', 'Fluidic Timepieces'],
+        ['Unusual Ices', 'Cryo Alloys', 'Rare Minerals',
+         'Unusual Fluids', 'Cryogems', 'VHDUS Dyes'],
+        ['Fossils', 'Cryogems', 'Vision Suppressant',
+         'Fission Suppressant', 'Wafers', 'Cold Sleep Pills']],
+    'In': [
+        ['Electronics', 'Photonics', 'Magnetics',
+         'Fluidics', 'Polymers', 'Gravitics'],
+        ['Obsoletes', 'Used Goods', 'Reparables',
+         'Radioactives', 'Metals', 'Sludges'],
+        ['Biologics', 'Mechanicals', 'Textiles',
+         'Weapons', 'Armor', 'Robots'],
+        ['Nostrums', 'Restoratives', 'Palliatives',
+         'Chelates', 'Antidotes', 'Antitoxins'],
+        ['Software', 'Databases', 'Expert Systems',
+         'Upgrades', 'Backups', 'Raw Sensings'],
+        ['Disposables', 'Respirators', 'Filter Masks',
+         'Combination', 'Parts', 'Improvements']],
+    'Na': [
+        ['Bulk Abrasives', 'Bulk Gases', 'Bulk Minerals',
+         'Bulk Precipitates', 'Exotic Fauna', 'Exotic Flora'],
+        ['Archeologicals', 'Fauna', 'Flora',
+         'Minerals', 'Ephemerals', 'Polymers'],
+        ['Branded Tools', 'Drinkable Lymphs', 'Strange Seeds',
+         'Pattern Creators', 'Pigments', 'Warm Leather'],
+        ['Hummingsand', 'Masterpieces', 'Fine Carpets',
+         'Isotopes', 'Pelts', 'Seedstock'],
+        ['Masterpieces', 'Unusual Rocks', 'Artifacts',
+         'Non-fossil Carcasses', 'Replicating Clays', 'ANIFX EMitter'],
+        ['_Ag', '_Ri', '_In', '_Ic', '_De', '_Fl']],
+    'Po': [
+        ['Bulk Nutrients', 'Bulk Fibers', 'Bulk Organics',
+         'Bulk Minerals', 'Bulk Textiles', 'Exotic Flora'],
+        ['Art', 'Recordings', 'Writings',
+         'Tactiles', 'Osmancies', 'Wafers'],
+        ['Strange Crystals', 'Strange Seeds', 'Pigments',
+         'Emotion Lighting', 'Silanes', 'Flora'],
+        ['Gemstones', 'Antiques', 'Collectibles',
+         'Allotropes', 'Spices', 'Seedstock'],
+        ['Masterpieces', 'Exotic Flora', 'Antiques',
+         'Incomprehensibles', 'Fossils', 'VHDUS Emitter'],
+        ['_In', '_Ri', '_Fl', '_Ic', '_Ag', '_Va']],
+    'Ri': [
+        ['Bulk Foodstuffs', 'Bulk Protein', 'Bulk Carbs',
+         'Bulk Fats', 'Exotic Flora', 'Exotic Fauna'],
+        ['Echostones', 'Self-Defenders', 'Attractants',
+         'Sophont Cuisine', 'Sophone Hats', 'Variable Tattoos'],
+        ['Branded Foods', 'Branded Drinks', 'Branded Clothes',
+         'Flavored Drinks', 'Flowers', 'Music'],
+        ['Delicacies', 'Spices', 'Tisanes',
+         'Nectars', 'Pelts', 'Variable Tattoos'],
+        ['Antique Art', 'Masterpieces', 'Artifacts',
+         'Fine Art', 'Meson Barriers', 'Famous Wafers'],
+        ['Edutainments', 'Recordings', 'Writings',
+         'Tactiles', 'Osmancies', 'Wafers']],
+    'Va': [
+        ['Bulk Dusts', 'Bulk Minerals', 'Bulk Metals',
+         'Radioactive Ores', 'Bulk Particulates', 'Ephererals'],
+        ['Branded Vacc Suits', 'Awareness Pinger', 'Strange Seeds',
+         'Pigments', 'Unusual Minerals', 'Exotic Crystals'],
+        ['Branded Oxygen', 'Vacc Suit Scents', 'Vacc Suit Patches',
+         'Branded Tools', 'Holo-Companions', 'Flavored Air'],
+        ['Vacc Gems', 'Unusual Dusts', 'Insulants',
+         'Crafted Devices', 'Rare Minerals', 'Catalysts'],
+        ['Archeologicals', 'Fauna', 'Flora',
+         'Minerals', 'Ephemerals', 'Polymers'],
+        ['Obsoletes', 'Used Goods', 'Reparables',
+         'Plutonium', 'Metals', 'Sludges']],
+    'Cp': [
+        ['Software', 'Expert Systems', 'Databases',
+         'Upgrades', 'Backups', 'Raw Sensings'],
+        ['Incenses', 'Contemplatives', 'Cold Welders',
+         'Polymer Sheets', 'Hats', 'Skin Tones'],
+        ['Branded Clothes', 'Branded Devices', 'Flavored Drinks',
+         'Flavorings', 'Decorations', 'Group Symbols'],
+        ['Monumental Art', 'Holo Sculpture', 'Collectible Books',
+         'Jewelry', 'Museum Items', 'Monumental Art'],
+        ['Coinage', 'Currency', 'Money Cards',
+         'Gold', 'Silver', 'Platinum'],
+        ['Regulations', 'Synchronzations', 'Expert Systems',
+         'Educationals', 'Mandates', 'Accountings']]
+}
+
+
+def actual_value_multiplier(flux):
+    '''Actual value multiplier for (modified) flux result'''
+    flux = max(-5, flux)
+    flux = min(8, flux)
+
+    if flux <= -4:
+        multiplier = float(9 + flux) / 10.0
+    elif flux <= 3 and flux > -4:
+        multiplier = float(10 + flux) / 10.0
+    elif flux <= 5 and flux > 3:
+        multiplier = float(7 + 2 * flux) / 10.0
+    else:
+        multiplier = float(flux - 4)
+    return multiplier
+
+
+ACTUAL_VALUE_MULTIPLIERS = {
+    flux: actual_value_multiplier(flux) for flux in range(-5, 9)
+}
+
+# Flux (D6 - D6) distribution: (result, ways out of 36)
+FLUX_OUTCOMES = tuple((flux, 6 - abs(flux)) for flux in range(-5, 6))
+
+
+@lru_cache(maxsize=None)
+def actual_value_distribution(modifier):
+    '''
+    Exact distribution of actual value multiplier for flux + modifier
+
+    Returns tuple of (multiplier, ways) sorted by multiplier, where ways
+    is out of 36
+    '''
+    ways = {}
+    for flux, count in FLUX_OUTCOMES:
+        multiplier = ACTUAL_VALUE_MULTIPLIERS[min(8, max(-5, flux + modifier))]
+        ways[multiplier] = ways.get(multiplier, 0) + count
+    return tuple(sorted(ways.items()))
+
+
+@lru_cache(maxsize=None)
+def price_distribution(price, modifier, commission=0):
+    '''
+    Exact distribution of int(price * actual value) - commission
+    for flux + modifier (see distribution_summary())
+
+    The result is cached and shared: do not modify it (copy it to keep)
+    '''
+    return distribution_summary(
+        (int(price * multiplier) - commission, ways)
+        for multiplier, ways in actual_value_distribution(modifier)
+    )
+
+
+COST_MODS = {
+    'Ag': -1000, 'As': -1000, 'Ba': +1000, 'De': +1000,
+    'Fl': +1000, 'Hi': -1000, 'Ic': 0, 'In': -1000,
+    'Lo': +1000, 'Na': 0, 'Ni': +1000, 'Po': -1000,
+    'Ri': +1000, 'Va': +1000
+}
+
+# Source trade code: ([market trade codes], price modifier)
+MARKET_MODS = {
+    'Ag': (['Ag', 'As', 'De', 'Hi', 'In', 'Ri', 'Va'], 1000),
+    'As': (['As', 'In', 'Ri', 'Va'], 1000),
+    'Ba': (['In'], 1000),
+    'De': (['De'], 1000),
+    'Fl': (['Fl', 'In'], 1000),
+    'Hi': (['Hi'], 1000),
+    'In': (['Ag', 'As', 'De', 'Fl', 'Hi', 'In', 'Ri', 'Va'], 1000),
+    'Na': (['As', 'De', 'Va'], 1000),
+    'Po': (['Ag', 'Hi', 'In', 'Ri'], -1000),
+    'Ri': (['Ag', 'De', 'Hi', 'In', 'Ri'], 1000),
+    'Va': (['As', 'In', 'Va'], 1000)
+}
+
+
+def cargo_cost(tech_level, trade_codes):
+    '''Return (cost, interesting trade codes) for source TL, trade codes'''
+    cost = 3000 + 100 * int(tech_level)
+    if trade_codes == []:
+        trade_codes = ['Na']
+    interesting_trade_codes = sorted(
+        set([code for code in trade_codes if code in COST_MODS]))
+    for trade_code in interesting_trade_codes:
+        cost += COST_MODS[trade_code]
+    return cost, interesting_trade_codes
+
+
+@lru_cache(maxsize=4096)
+def market_adjustment(source_trade_codes, market_trade_codes):
+    '''
+    Price modifier (Cr) for source trade codes at market
+
+    Arguments must be hashable (tuples); cached per trade code pair
+    '''
+    adjustment = 0
+    for trade_code in source_trade_codes:
+        if trade_code in MARKET_MODS:
+            for code in MARKET_MODS[trade_code][0]:
+                if code in market_trade_codes:
+                    adjustment += MARKET_MODS[trade_code][1]
+    return adjustment
+
+
+def broker_dm(broker_skill):
+    '''Broker DM = (skill + 0.5) / 2, max 4'''
+    return min(4, int((broker_skill + 0.5) / 2))
+
+
+def cargo_price(
+        source_trade_codes, source_tech_level,
+        market_trade_codes, market_tech_level):
+    '''Price (before actual value) of source cargo at market'''
+    price = 5000 + market_adjustment(
+        tuple(source_trade_codes), tuple(market_trade_codes))
+    # TL effect
+    tl_mod = 0.1 * (int(source_tech_level) - int(market_tech_level))
+    price = int(price * (1 + tl_mod))
+    return max(0, price)
+
+
+def resolve_table_codes(trade_code):
+    '''Map trade code to the description table(s) it rolls on'''
+    # Ag => either Ga or Fa; anything without a table uses Na
+    if trade_code == 'Ag':
+        return ('Ga', 'Fa')
+    if trade_code in _CODES:
+        return (trade_code,)
+    return ('Na',)
+
+
+def _build_descriptions(codes):
+    '''
+    Flatten description tables to 36-entry tuples (index 6 * row + column)
+
+    Imbalance entries (_Xx) are replaced by the tuple of table codes they
+    redirect to, so selection never needs to parse or recurse
+    '''
+    tables = {}
+    for trade_code, rows in codes.items():
+        flat = []
+        for row in rows:
+            for column in range(6):
+                # Short rows (Fa row 4) wrap rather than raise IndexError
+                cargo = row[column % len(row)]
+                if cargo.startswith('_'):
+                    flat.append(resolve_table_codes(cargo[1:]))
+                else:
+                    flat.append(cargo)
+        tables[trade_code] = tuple(flat)
+    return tables
+
+
+DESCRIPTIONS = _build_descriptions(_CODES)
 
 
 class TradeCargo(object):
@@ -37,158 +347,6 @@ class TradeCargo(object):
         self.interesting_trade_codes = []
         self.actual_value = 0
         self.price = 0
-        self._codes = {
-            'Ga': [
-                ['Bulk Protein', 'Bulk Carbs', 'Bulk Fats',
-                 'Bulk Pharma', 'Livestock', 'Seedstock'],
-                ['Flavored Waters', 'Wines', 'Juices',
-                 'Nectars', 'Decoctions', 'Drinkable Lymphs'],
-                ['Health Foods', 'Nutraceuticals', 'Fast Drug',
-                 'Painkillers', 'Antiseptic', 'Antibiotics'],
-                ['Incenses', 'Iridescents', 'Photonics',
-                 'Pigments', 'Noisemakers', 'Soundmakers'],
-                ['Fine Furs', 'Meat Delicacies', 'Fruit Delicacies',
-                 'Candies', 'Textiles', 'Exotic Sauces'],
-                ['_As', '_De', '_Fl', '_Ic', '_Na', '_In']],
-            'Fa': [
-                ['Bulk Woods', 'Bulk Pets', 'Bulk Herbs',
-                 'Bulk Spices', 'Bulk Nitrates', 'Foodstuffs'],
-                ['Flowers', 'Aromatics', 'Pheromones',
-                 'Secretions', 'Adhesives', 'Novel Flavorings'],
-                ['Antifungals', 'Antivirals', 'Panacea',
-                 'Pseudomones', 'Anagathics', 'Slow Drug'],
-                ['Strange Seeds', 'Motile Plants', 'Reactive Plants',
-                 'IR Emitters', 'Lek Emitters'],
-                ['Spices', 'Organic Gems', 'Flavorings',
-                 'Aged Meats', 'Fermented Fluids', 'Fine Aromatics'],
-                ['_Po', '_Ri', '_Va', '_Ic', '_Na', '_In']],
-            'As': [
-                ['Bulk Nitrates', 'Bulk Carbon', 'Bulk Iron',
-                 'Bulk Copper', 'Radioactive Ores', 'Bulk Ices'],
-                ['Ores', 'Ices', 'Carbons',
-                 'Metals', 'Uranium', 'Chelates'],
-                ['Platinum', 'Gold', 'Gallium',
-                 'Silver', 'Thorium', 'Radium'],
-                ['Unusual Rocks', 'Fused Metals', 'Strange Crystals',
-                 'Fine Dusts', 'Magnetics', 'Light-Sensitives'],
-                ['Gemstones', 'Alloys', 'Iridium Sponge',
-                 'Lanthanum', 'Isotopes', 'Anti-Matter'],
-                ['_Ag', '_De', '_Na', '_Po', '_Ri', '_Ic']],
-            'De': [
-                ['Bulk Nitrates', 'Bulk Minerals', 'Bulk Abrasives',
-                 'Bulk Particulates', 'Exotic Fauna', 'Exotic Flora'],
-                ['Archeologicals', 'Fauna', 'Flora',
-                 'Minerals', 'Ephemerals', 'Polymers'],
-                ['Stimulants', 'Bulk Herbs', 'Palliatives',
-                 'Pheromones', 'Antibiotics', 'Combat Drug'],
-                ['Envirosuits', 'Reclamation Suits', 'Navigators',
-                 'Dupe Masterpieces', 'ShimmerCloth', 'ANIFX Blocker'],
-                ['Excretions', 'Flavorings', 'Nectars',
-                 'Pelts', 'ANIFX Dyes', 'Seedstock'],
-                ['Pheromones', 'Artifacts', 'Sparx',
-                 'Repulsant', 'Dominants', 'Fossils']],
-            'Fl': [
-                ['Bulk Carbon', 'Bulk Petros', 'Bulk Precipitates',
-                 'Exotic Fluids', 'Organic Polymers', 'Bulk Synthetics'],
-                ['Archeologicals', 'Fauna', 'Flora',
-                 'Germanes', 'Flill', 'Chelates'],
-                ['Antifungals', 'Antivirals', 'Palliatives',
-                 'Counter-prions', 'Antibiotics', 'Cold Sleep Pills'],
-                ['Silanes', 'Lek Emitters', 'Aware Blockers',
-                 'Soothants', 'Self-Solving Puzzlies', 'Fluidic Timepieces'],
-                ['Flavorings', 'Unusual Fluids', 'Encapsulants',
-                 'Insidiants', 'Corrosives', 'Exotic Aromatics'],
-                ['_In', '_Ri', '_Ic', '_Na', '_Ag', '_Po']],
-            'Ic': [
-                ['Bulk Ices', 'Bulk Precipitates', 'Bulk Ephemerals',
-                 'Exotic Flora', 'Bulk Gases', 'Bulk Oxygen'],
-                ['Archeologicals', 'Fauna', 'Flora',
-                 'Minerals', 'Luminescents', 'Polymers'],
-                ['Antifungals', 'Antivirals', 'Palliatives',
-                 'Counter-prions', 'Antibiotics', 'Cold Sleep Pills'],
-                ['Silanes', 'Lek Emitters', 'Aware Blockers',
-                 'Soothants', 'Self-Solving Puzzlies', 'Fluidic Timepieces'],
-                ['Unusual Ices', 'Cryo Alloys', 'Rare Minerals',
-                 'Unusual Fluids', 'Cryogems', 'VHDUS Dyes'],
-                ['Fossils', 'Cryogems', 'Vision Suppressant',
-                 'Fission Suppressant', 'Wafers', 'Cold Sleep Pills']],
-            'In': [
-                ['Electronics', 'Photonics', 'Magnetics',
-                 'Fluidics', 'Polymers', 'Gravitics'],
-                ['Obsoletes', 'Used Goods', 'Reparables',
-                 'Radioactives', 'Metals', 'Sludges'],
-                ['Biologics', 'Mechanicals', 'Textiles',
-                 'Weapons', 'Armor', 'Robots'],
-                ['Nostrums', 'Restoratives', 'Palliatives',
-                 'Chelates', 'Antidotes', 'Antitoxins'],
-                ['Software', 'Databases', 'Expert Systems',
-                 'Upgrades', 'Backups', 'Raw Sensings'],
-                ['Disposables', 'Respirators', 'Filter Masks',
-                 'Combination', 'Parts', 'Improvements']],
-            'Na': [
-                ['Bulk Abrasives', 'Bulk Gases', 'Bulk Minerals',
-                 'Bulk Precipitates', 'Exotic Fauna', 'Exotic Flora'],
-                ['Archeologicals', 'Fauna', 'Flora',
-                 'Minerals', 'Ephemerals', 'Polymers'],
-                ['Branded Tools', 'Drinkable Lymphs', 'Strange Seeds',
-                 'Pattern Creators', 'Pigments', 'Warm Leather'],
-                ['Hummingsand', 'Masterpieces', 'Fine Carpets',
-                 'Isotopes', 'Pelts', 'Seedstock'],
-                ['Masterpieces', 'Unusual Rocks', 'Artifacts',
-                 'Non-fossil Carcasses', 'Replicating Clays', 'ANIFX EMitter'],
-                ['_Ag', '_Ri', '_In', '_Ic', '_De', '_Fl']],
-            'Po': [
-                ['Bulk Nutrients', 'Bulk Fibers', 'Bulk Organics',
-                 'Bulk Minerals', 'Bulk Textiles', 'Exotic Flora'],
-                ['Art', 'Recordings', 'Writings',
-                 'Tactiles', 'Osmancies', 'Wafers'],
-                ['Strange Crystals', 'Strange Seeds', 'Pigments',
-                 'Emotion Lighting', 'Silanes', 'Flora'],
-                ['Gemstones', 'Antiques', 'Collectibles',
-                 'Allotropes', 'Spices', 'Seedstock'],
-                ['Masterpieces', 'Exotic Flora', 'Antiques',
-                 'Incomprehensibles', 'Fossils', 'VHDUS Emitter'],
-                ['_In', '_Ri', '_Fl', '_Ic', '_Ag', '_Va']],
-            'Ri': [
-                ['Bulk Foodstuffs', 'Bulk Protein', 'Bulk Carbs',
-                 'Bulk Fats', 'Exotic Flora', 'Exotic Fauna'],
-                ['Echostones', 'Self-Defenders', 'Attractants',
-                 'Sophont Cuisine', 'Sophone Hats', 'Variable Tattoos'],
-                ['Branded Foods', 'Branded Drinks', 'Branded Clothes',
-                 'Flavored Drinks', 'Flowers', 'Music'],
-                ['Delicacies', 'Spices', 'Tisanes',
-                 'Nectars', 'Pelts', 'Variable Tattoos'],
-                ['Antique Art', 'Masterpieces', 'Artifacts',
-                 'Fine Art', 'Meson Barriers', 'Famous Wafers'],
-                ['Edutainments', 'Recordings', 'Writings',
-                 'Tactiles', 'Osmancies', 'Wafers']],
-            'Va': [
-                ['Bulk Dusts', 'Bulk Minerals', 'Bulk Metals',
-                 'Radioactive Ores', 'Bulk Particulates', 'Ephererals'],
-                ['Branded Vacc Suits', 'Awareness Pinger', 'Strange Seeds',
-                 'Pigments', 'Unusual Minerals', 'Exotic Crystals'],
-                ['Branded Oxygen', 'Vacc Suit Scents', 'Vacc Suit Patches',
-                 'Branded Tools', 'Holo-Companions', 'Flavored Air'],
-                ['Vacc Gems', 'Unusual Dusts', 'Insulants',
-                 'Crafted Devices', 'Rare Minerals', 'Catalysts'],
-                ['Archeologicals', 'Fauna', 'Flora',
-                 'Minerals', 'Ephemerals', 'Polymers'],
-                ['Obsoletes', 'Used Goods', 'Reparables',
-                 'Plutonium', 'Metals', 'Sludges']],
-            'Cp': [
-                ['Software', 'Expert Systems', 'Databases',
-                 'Upgrades', 'Backups', 'Raw Sensings'],
-                ['Incenses', 'Contemplatives', 'Cold Welders',
-                 'Polymer Sheets', 'Hats', 'Skin Tones'],
-                ['Branded Clothes', 'Branded Devices', 'Flavored Drinks',
-                 'Flavorings', 'Decorations', 'Group Symbols'],
-                ['Monumental Art', 'Holo Sculpture', 'Collectible Books',
-                 'Jewelry', 'Museum Items', 'Monumental Art'],
-                ['Coinage', 'Currency', 'Money Cards',
-                 'Gold', 'Silver', 'Platinum'],
-                ['Regulations', 'Synchronzations', 'Expert Systems',
-                 'Educationals', 'Mandates', 'Accountings']]
-        }
         self.source_world = Planet()
         self.market_world = None
         self.actual_value_rolls = (None, None)
@@ -196,10 +354,34 @@ class TradeCargo(object):
         self.broker_dm = None
         self.commission = 0
         self.net_actual_value = 0
-        seed()
+        self.price_distribution = None
 
     def generate_cargo(self, source_uwp, market_uwp=None, broker_skill=0):
         '''Generate cargo'''
+        self.load_worlds(source_uwp, market_uwp, broker_skill)
+        self.generate_lot()
+
+    def generate_cargoes(
+            self, source_uwp, market_uwp=None, broker_skill=0, count=1,
+            analytic=False):
+        '''
+        Generate <count> cargo lots for the same source/market pair
+
+        Worlds are parsed and classified once; returns list of dict()
+        representations, one per lot. If analytic is True, each lot
+        includes the (shared) price distribution
+        '''
+        self.load_worlds(source_uwp, market_uwp, broker_skill)
+        lots = []
+        for _ in range(count):
+            self.generate_lot()
+            if analytic and self.price_distribution is None:
+                self.determine_price_distribution()
+            lots.append(self.dict())
+        return lots
+
+    def load_worlds(self, source_uwp, market_uwp=None, broker_skill=0):
+        '''Load source/market worlds, determine trade codes and cost'''
         try:
             self.source_world._load_uwp(source_uwp)     # noqa
         except (ValueError, TypeError):
@@ -207,15 +389,13 @@ class TradeCargo(object):
         try:
             assert int(broker_skill) >= 0
             self.broker_skill = int(broker_skill)
-        except TypeError:
+        except (TypeError, AssertionError):
             raise ValueError('Invalid broker_skill {}'.format(broker_skill))
         self.source_world.mainworld_type = None
         self.source_world.determine_trade_codes()
         self.source_world.trade_codes = self.purge_ce_trade_codes(
             self.source_world.trade_codes)
-        self.description = self.select_cargo_name()
         self.determine_cost(self.source_world.trade_codes)
-        self.add_detail(self.source_world.trade_codes)
 
         if market_uwp is not None:
             self.market_world = Planet()
@@ -228,6 +408,11 @@ class TradeCargo(object):
             self.market_world.trade_codes = self.purge_ce_trade_codes(
                 self.market_world.trade_codes
             )
+
+    def generate_lot(self):
+        '''Select description, roll price for loaded worlds'''
+        self.description = self.select_cargo_name()
+        if self.market_world is not None:
             self.determine_price()
 
     def select_cargo_name(self, add_detail_flag=True):
@@ -239,38 +424,21 @@ class TradeCargo(object):
             LOGGER.debug('No trade codes supplied, using Na')
             trade_code = 'Na'
         else:
-            LOGGER.debug(
-                'randint = %s',
-                randint(0, len(self.source_world.trade_codes) - 1))
             trade_code = self.source_world.trade_codes[randint(
                 0, len(self.source_world.trade_codes) - 1)]
         LOGGER.debug('Selected trade code %s', trade_code)
+        trade_code = self._pick_table_code(resolve_table_codes(trade_code))
 
-        # Ag => pick either Ga or Fa at random
-        if trade_code == 'Ag':
-            LOGGER.debug('Trade code is Ag, select either Ga or Fa')
-            trade_code = ('Fa' if randint(0, 1) else 'Ga')
-            LOGGER.debug('Trade code is %s', trade_code)
-
-        # Validate trade code -- use Na if it's not in the list
-        if trade_code not in self._codes:
-            LOGGER.debug(
-                '%s not in supported trade codes, using Na instead',
-                trade_code)
-            trade_code = 'Na'
-
-        # Pick cargo at random
+        # Pick cargo at random, following imbalance results (_Xx)
         LOGGER.debug('Picking cargo description for %s', trade_code)
-        cargo = self._codes[trade_code][randint(0, 5)][randint(0, 5)]
-        LOGGER.debug('Selected %s', cargo)
-
-        # Deal with imbalance results (_Xx)
-        if cargo.startswith('_'):
+        table_code = trade_code
+        cargo = DESCRIPTIONS[table_code][randint(0, 35)]
+        while not isinstance(cargo, str):
             LOGGER.debug('Imbalance cargo %s', cargo)
             add_detail_flag = False
-            code = cargo.replace('_', '')
-            LOGGER.debug('Rerunning with imbalance')
-            cargo = self.select_cargo_name([code])
+            table_code = self._pick_table_code(cargo)
+            cargo = DESCRIPTIONS[table_code][randint(0, 35)]
+        LOGGER.debug('Selected %s', cargo)
 
         # Classification-specific prefix
         prefix = None
@@ -280,6 +448,13 @@ class TradeCargo(object):
             cargo = '{} {}'.format(prefix, cargo)
         return cargo
 
+    @staticmethod
+    def _pick_table_code(table_codes):
+        '''Pick one of the tables from resolve_table_codes()'''
+        if len(table_codes) == 1:
+            return table_codes[0]
+        return table_codes[randint(0, len(table_codes) - 1)]
+
     @staticmethod
     def add_detail(trade_codes):
         '''Add detail prefix based on trade code'''
@@ -316,74 +491,17 @@ class TradeCargo(object):
 
     def determine_cost(self, trade_codes):
         ''' Process trade codes - add valid TCs to self.trade_codes'''
-        cost_mods = {
-            'Ag': -1000, 'As': -1000, 'Ba': +1000, 'De': +1000,
-            'Fl': +1000, 'Hi': -1000, 'Ic': 0, 'In': -1000,
-            'Lo': +1000, 'Na': 0, 'Ni': +1000, 'Po': -1000,
-            'Ri': +1000, 'Va': +1000
-        }
-        self.cost = 3000
-        self.cost += 100 * int(self.source_world.tech_level)
+        self.cost, self.interesting_trade_codes = cargo_cost(
+            self.source_world.tech_level, trade_codes)
         LOGGER.debug('Cost = %s', self.cost)
-        if trade_codes == []:
-            trade_codes = ['Na']
-        valid_trade_codes = []
-        for trade_code in trade_codes:
-            if trade_code in cost_mods.keys():
-                LOGGER.debug('Adding trade code %s', trade_code)
-                valid_trade_codes.append(trade_code)
-            else:
-                LOGGER.debug('Ignoring trade code %s', trade_code)
-        self.interesting_trade_codes = sorted(list(set(valid_trade_codes)))
-
-        # Add cost modifiers
-        for trade_code in self.interesting_trade_codes:
-            LOGGER.debug(
-                'Processing trade code %s (cost mod = Cr %s)',
-                trade_code,
-                cost_mods[trade_code])
-            self.cost += cost_mods[trade_code]
 
     def determine_price(self):
         '''Determine price based on source TCs, market TCs'''
-        market_mods = {
-            'Ag': (['Ag', 'As', 'De', 'Hi', 'In', 'Ri', 'Va'], 1000),
-            'As': (['As', 'In', 'Ri', 'Va'], 1000),
-            'Ba': (['In'], 1000),
-            'De': (['De'], 1000),
-            'Fl': (['Fl' 'In'], 1000),
-            'Hi': (['Hi'], 1000),
-            'In': (['Ag', 'As', 'De', 'Fl', 'Hi', 'In', 'Ri', 'Va'], 1000),
-            'Na': (['As', 'De', 'Va'], 1000),
-            'Po': (['Ag', 'Hi', 'In', 'Ri'], -1000),
-            'Ri': (['Ag', 'De', 'Hi', 'In', 'Ri'], 1000),
-            'Va': (['As', 'In', 'Va'], 1000)
-        }
-        self.price = 5000
-        # Market trade codes
-        for trade_code in self.source_world.trade_codes:
-            if trade_code in market_mods.keys():
-                for code in market_mods[trade_code][0]:
-                    LOGGER.debug(
-                        'Checking source TC %s market TC %s',
-                        trade_code,
-                        code)
-                    if code in self.market_world.trade_codes:
-                        LOGGER.debug(
-                            'Found match: adjustment = %s',
-                            market_mods[trade_code][1])
-                        self.price += market_mods[trade_code][1]
-                    LOGGER.debug('Price = Cr%s', self.price)
-        # TL effect
-        tl_mod = 0.1 * (
-            int(self.source_world.tech_level) -
-            int(self.market_world.tech_level))
-        LOGGER.debug('Price TL modifier = %s%%', int(100 * tl_mod))
-        LOGGER.debug('Price TL change = %s', int(-self.price * tl_mod))
-        self.price = int(self.price * (1 + tl_mod))
-        if self.price < 0:
-            LOGGER.debug('Price (Cr%s) < Cr0, resetting to Cr0', self.price)
-            self.price = 0
+        self.price = cargo_price(
+            self.source_world.trade_codes,
+            self.source_world.tech_level,
+            self.market_world.trade_codes,
+            self.market_world.tech_level)
         LOGGER.debug('Price = %s', self.price)
         self.actual_value = int(self.price * self.determine_actual_value())
         LOGGER.debug('actual value = %s', self.actual_value)
@@ -393,23 +511,12 @@ class TradeCargo(object):
 
     def determine_actual_value(self, modifier=0):
         '''Determine actual value using flux roll'''
-        broker_dm = int((self.broker_skill + 0.5) / 2)
-        broker_dm = min(4, broker_dm)
-        self.broker_dm = broker_dm
-        flux = FLUX.roll() + modifier + self.broker_dm
-        self.actual_value_rolls = (FLUX.die1, FLUX.die2)
-
-        flux = max(-5, flux)
-        flux = min(8, flux)
-
-        if flux <= -4:
-            actual_value_multiplier = float(9 + flux) / 10.0
-        elif flux <= 3 and flux > -4:
-            actual_value_multiplier = float(10 + flux) / 10.0
-        elif flux <= 5 and flux > 3:
-            actual_value_multiplier = float(7 + 2 * flux) / 10.0
-        elif flux > 5:
-            actual_value_multiplier = float(flux - 4) / 10.0
+        self.determine_broker_dm()
+        flux_roll = FluxRoll()
+        flux = flux_roll.roll() + modifier + self.broker_dm
+        self.actual_value_rolls = (flux_roll.die1, flux_roll.die2)
+        actual_value_multiplier = ACTUAL_VALUE_MULTIPLIERS[
+            min(8, max(-5, flux))]
         LOGGER.debug(
             'flux result = %s flux rolls = +%s -%s ',
             flux,
@@ -421,6 +528,19 @@ class TradeCargo(object):
 
         return actual_value_multiplier
 
+    def determine_broker_dm(self):
+        '''Determine broker DM from broker skill'''
+        self.broker_dm = broker_dm(self.broker_skill)
+
+    def determine_price_distribution(self):
+        '''Exact distribution of net actual value (requires market)'''
+        if self.market_world is not None:
+            self.determine_broker_dm()
+            self.price_distribution = copy.deepcopy(price_distribution(
+                self.price,
+                self.broker_dm,
+                int(0.05 * self.broker_dm * self.price)))
+
     def __str__(self):
         source = '{}-{} Cr{:,} {}'.format(
             self.source_world.tech_level,
@@ -429,8 +549,8 @@ class TradeCargo(object):
             self.description)
         return source
 
-    def json(self):
-        '''JSON representation'''
+    def dict(self):
+        '''dict() representation'''
         if self.market_world is not None:
             market_world_trade_codes = self.market_world.trade_codes
             market_world_uwp = self.market_world.uwp()
@@ -460,7 +580,13 @@ class TradeCargo(object):
                 "broker_skill": self.broker_skill
             }
         }
-        return json.dumps(doc)
+        if self.price_distribution is not None:
+            doc['market']['price_distribution'] = self.price_distribution
+        return doc
+
+    def json(self):
+        '''JSON representation'''
+        return json.dumps(self.dict())
 
     @staticmethod
     def purge_ce_trade_codes(trade_codes):
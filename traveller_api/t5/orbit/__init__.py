@@ -1,12 +1,16 @@
 '''__init__.py'''
 
+import json
 import logging
 import falcon
 from traveller_api.util import RequestProcessor
 from .orbit import Orbit as CalcOrbit
+from .orbit import orbit_radii, orbit_numbers
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.ERROR)
 
+MAX_BATCH = 10000
+
 
 class Orbit(RequestProcessor):
     '''
@@ -27,17 +31,16 @@ class Orbit(RequestProcessor):
     def on_get(self, req, resp):
         '''GET /t5/orbit?orbit_number=<orbit_number>'''
 
-        self.query_parameters = {
+        query_parameters = self.parse_query(req.query_string, {
             'doc': False,
             'orbit_number': None
-        }
-        self.parse_query_string(req.query_string)
-        if self.query_parameters['doc'] is True:
+        })
+        if query_parameters['doc'] is True:
             resp.body = self.get_doc_json(req)
             resp.status = falcon.HTTP_200
         else:
             try:
-                orbit = CalcOrbit(self.query_parameters['orbit_number'])
+                orbit = CalcOrbit(query_parameters['orbit_number'])
             except TypeError as err:
                 raise falcon.HTTPError(
                     title='Invalid type',
@@ -50,3 +53,165 @@ class Orbit(RequestProcessor):
                     description=str(err))
             resp.body = orbit.json()
             resp.status = falcon.HTTP_200
+
+
+def _bad_value(err):
+    '''HTTP 400 for TypeError/ValueError from orbit functions'''
+    title = 'Invalid type' if isinstance(err, TypeError) else \
+        'Value out of range'
+    return falcon.HTTPError(
+        title=title,
+        status='400 Invalid parameter',
+        description=str(err))
+
+
+def _read_body(req, keys):
+    '''Return (key, values) for first of keys in POSTed JSON body'''
+    try:
+        doc = json.loads(req.bounded_stream.read().decode('utf-8'))
+        for key in keys:
+            if key in doc and isinstance(doc[key], list):
+                return key, doc[key]
+    except (ValueError, TypeError, AttributeError):
+        pass
+    raise falcon.HTTPError(
+        title='Invalid request body',
+        status='400 Invalid parameter',
+        description='Body must be {{"{}": [<value>, ...]}}'.format(
+            '" | "'.join(keys)))
+
+
+def _check_size(values):
+    '''HTTP 400 if too many values'''
+    if len(values) > MAX_BATCH:
+        raise falcon.HTTPError(
+            title='Too many values',
+            status='400 Invalid parameter',
+            description='Specify at most {} values'.format(MAX_BATCH))
+
+
+class OrbitBatch(RequestProcessor):
+    '''
+    Return orbit details for many orbit numbers
+    GET <apiserver>/t5/orbit/batch?orbit_number=<orbit_number>&orbit_number=<orbit_number>...
+    POST <apiserver>/t5/orbit/batch
+        {"orbit_numbers": [<orbit_number>, <orbit_number>, ...]}
+
+    Returns
+    {
+        "orbits": [
+            {
+                "orbit_number": <orbit_number>,
+                "au": <orbit_radius (AU)>,
+                "mkm": <orbit_radius (Mkm)>
+            },
+            ...
+        ]
+    }
+
+    in the order supplied, as returned by <apiserver>/t5/orbit for each
+    orbit number. Each <orbit_number> must be in range 0-19; up to 10000
+    orbit numbers may be supplied.
+
+    GET <apiserver>/t5/orbit/batch?doc=true returns this text
+    '''
+
+    repeatable_parameters = ('orbit_number',)
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/t5/orbit/batch?orbit_number=<orbit_number>...'''
+        query_parameters = self.parse_query(
+            req.query_string, {'doc': False, 'orbit_number': []})
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+        else:
+            resp.body = json.dumps(
+                self.orbits(query_parameters['orbit_number']))
+        resp.status = falcon.HTTP_200
+
+    def on_post(self, req, resp):
+        '''POST <apiserver>/t5/orbit/batch'''
+        _, values = _read_body(req, ('orbit_numbers',))
+        resp.body = json.dumps(self.orbits(values))
+        resp.status = falcon.HTTP_200
+
+    @staticmethod
+    def orbits(values):
+        '''Return {"orbits": [...]} for list of orbit numbers'''
+        _check_size(values)
+        try:
+            radii = orbit_radii(values)
+        except (TypeError, ValueError) as err:
+            raise _bad_value(err)
+        return {
+            'orbits': [
+                {'orbit_number': number, 'au': au, 'mkm': mkm}
+                for number, au, mkm in radii]
+        }
+
+
+class OrbitInverse(RequestProcessor):
+    '''
+    Return (fractional) orbit numbers for orbit radii
+    GET <apiserver>/t5/orbit/inverse?au=<distance>&au=<distance>...
+    GET <apiserver>/t5/orbit/inverse?mkm=<distance>&mkm=<distance>...
+    POST <apiserver>/t5/orbit/inverse
+        {"au": [<distance>, ...]} or {"mkm": [<distance>, ...]}
+
+    Returns
+    {
+        "orbits": [
+            {
+                "au": <distance> (or "mkm": <distance>),
+                "orbit_number": <orbit_number>
+            },
+            ...
+        ]
+    }
+
+    in the order supplied, where <orbit_number> is interpolated between
+    the orbit radii used by <apiserver>/t5/orbit (3 decimal places).
+    Distances must be in range 0.2-39500 AU (30-5925000 Mkm); supply
+    either au or mkm, not both. Up to 10000 distances may be supplied.
+
+    GET <apiserver>/t5/orbit/inverse?doc=true returns this text
+    '''
+
+    repeatable_parameters = ('au', 'mkm')
+
+    def on_get(self, req, resp):
+        '''GET <apiserver>/t5/orbit/inverse?au=<distance>...'''
+        query_parameters = self.parse_query(
+            req.query_string, {'doc': False, 'au': [], 'mkm': []})
+        if query_parameters['doc'] is True:
+            resp.body = self.get_doc_json(req)
+            resp.status = falcon.HTTP_200
+            return
+        if query_parameters['au'] and query_parameters['mkm']:
+            raise falcon.HTTPError(
+                title='Invalid parameter',
+                status='400 Invalid parameter',
+                description='Specify au or mkm, not both')
+        unit = 'mkm' if query_parameters['mkm'] else 'au'
+        resp.body = json.dumps(self.orbits(query_parameters[unit], unit))
+        resp.status = falcon.HTTP_200
+
+    def on_post(self, req, resp):
+        '''POST <apiserver>/t5/orbit/inverse'''
+        unit, values = _read_body(req, ('au', 'mkm'))
+        resp.body = json.dumps(self.orbits(values, unit))
+        resp.status = falcon.HTTP_200
+
+    @staticmethod
+    def orbits(values, unit):
+        '''Return {"orbits": [...]} for list of distances'''
+        _check_size(values)
+        try:
+            numbers = orbit_numbers(values, unit)
+        except (TypeError, ValueError) as err:
+            raise _bad_value(err)
+        return {
+            'orbits': [
+                {unit: distance, 'orbit_number': number}
+                for distance, number in numbers]
+        }
@@ -1,45 +1,100 @@
 '''orbit.py'''
 
 import json
+from bisect import bisect_right
 
+# Orbit radius (AU) for each flat orbit number
+ORBIT_AU = (
+    0.2, 0.4, 0.7, 1.0, 1.6, 2.8, 5.2,
+    10.0, 20.0, 40.0, 77.0,
+    154.0, 308.0, 615.0,
+    1230.0, 2458.0, 4916.0, 9830.0,
+    19500.0, 39500.0, 78700.0     # Fits table on T5.09 Core p.684
+)
+# AU change per orbit number between ORBIT_AU[n] and ORBIT_AU[n + 1]
+ORBIT_AU_STEP = tuple(
+    outer - inner for inner, outer in zip(ORBIT_AU, ORBIT_AU[1:]))
+MAX_ORBIT_NUMBER = 19.0
+MKM_PER_AU = 150
 
-class Orbit(object):
-    '''Given flat orbit number, return orbital radius (Mkm and AU)'''
 
-    def __init__(self, orbit_number=None):
-        self._orbit_au = [
-            0.2, 0.4, 0.7, 1.0, 1.6, 2.8, 5.2,
-            10.0, 20.0, 40.0, 77.0,
-            154.0, 308.0, 615.0,
-            1230.0, 2458.0, 4916.0, 9830.0,
-            19500.0, 39500.0, 78700.0     # Fits table on T5.09 Core p.684
-        ]
+def check_orbit_number(orbit_number):
+    '''Return orbit_number as float, TypeError/ValueError if invalid'''
+    try:
+        orbit_number = float(orbit_number)
+    except (TypeError, ValueError):
+        raise TypeError(
+            'Invalid type for orbit_number {}'.format(str(orbit_number)))
+    if not 0 <= orbit_number <= MAX_ORBIT_NUMBER:
+        raise ValueError(
+            'Orbit number {} out of range'.format(orbit_number))
+    return orbit_number
+
+
+def orbit_radii(orbit_numbers):
+    '''
+    Return list of (orbit_number, au, mkm) for sequence of orbit numbers,
+    interpolating linearly between ORBIT_AU entries (as Orbit())
+    '''
+    orbit_numbers = [check_orbit_number(number) for number in orbit_numbers]
+    radii = [
+        round(
+            ORBIT_AU[int(number)] +
+            ORBIT_AU_STEP[int(number)] * (number - int(number)),
+            1)
+        for number in orbit_numbers]
+    return [
+        (number, au, int(au * MKM_PER_AU))
+        for number, au in zip(orbit_numbers, radii)]
+
+
+def orbit_numbers(distances, unit='au'):
+    '''
+    Return list of (distance, orbit_number) for sequence of distances (AU
+    or Mkm), using binary search on ORBIT_AU; orbit_number is fractional
+    (3 decimal places)
+    '''
+    if unit not in ('au', 'mkm'):
+        raise ValueError('Invalid unit {}'.format(unit))
+    min_distance = ORBIT_AU[0]
+    max_distance = ORBIT_AU[int(MAX_ORBIT_NUMBER)]
+    if unit == 'mkm':
+        min_distance *= MKM_PER_AU
+        max_distance *= MKM_PER_AU
+    numbers = []
+    for distance in distances:
         try:
-            self.orbit_number = float(orbit_number)
+            distance = float(distance)
         except (TypeError, ValueError):
             raise TypeError(
-                'Invalid type for orbit_number {}'.format(str(orbit_number)))
-        try:
-            assert self.orbit_number >= 0
-            assert self.orbit_number <= 19.0
-        except AssertionError:
+                'Invalid type for {} {}'.format(unit, str(distance)))
+        if not min_distance <= distance <= max_distance:
             raise ValueError(
-                'Orbit number {} out of range'.format(
-                    self.orbit_number))
+                'Distance {} {} out of range ({}-{})'.format(
+                    distance, unit, min_distance, max_distance))
+        au = distance / MKM_PER_AU if unit == 'mkm' else distance
+        indx = min(
+            bisect_right(ORBIT_AU, au) - 1, int(MAX_ORBIT_NUMBER) - 1)
+        numbers.append((
+            distance,
+            round(indx + (au - ORBIT_AU[indx]) / ORBIT_AU_STEP[indx], 3)))
+    return numbers
+
+
+class Orbit(object):
+    '''Given flat orbit number, return orbital radius (Mkm and AU)'''
+
+    def __init__(self, orbit_number=None):
+        self._orbit_au = ORBIT_AU
+        self.orbit_number = check_orbit_number(orbit_number)
         self.orbit_radius_mkm = None
         self.orbit_radius_au = None
         self.determine_orbit_radius()
-        self.orbit_radius_mkm = int(self.orbit_radius_au * 150)
+        self.orbit_radius_mkm = int(self.orbit_radius_au * MKM_PER_AU)
 
     def determine_orbit_radius(self):
         '''Determine orbit_radius (AU)'''
-        orbit_int = int(self.orbit_number)
-        orbit_dec = self.orbit_number - int(self.orbit_number)
-        self.orbit_radius_au = round(
-            self._orbit_au[orbit_int] +
-            (self._orbit_au[orbit_int + 1] - self._orbit_au[orbit_int]) *
-            orbit_dec,
-            1)
+        _, self.orbit_radius_au, _ = orbit_radii([self.orbit_number])[0]
 
     def json(self):
         '''Return JSON representation'''
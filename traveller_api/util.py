@@ -3,27 +3,152 @@
 # pragma pylint: disable=W0102, W0613
 
 import json
-import requests
+import random
+import threading
+from collections import OrderedDict
 import falcon
+from traveller_api.httpclient import HTTP_CLIENT
 
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Per-thread RNG state (see thread_rng())
+_LOCAL = threading.local()
+
+
+def thread_rng():
+    '''
+    Return the calling thread's random.Random instance (seeded from OS
+    entropy on first use), so concurrent requests never share RNG state
+    '''
+    rng = getattr(_LOCAL, 'rng', None)
+    if rng is None:
+        rng = _LOCAL.rng = random.Random()
+    return rng
+
+
+def reseed_thread_rng(seed=None, rng=None):
+    '''
+    Replace the calling thread's RNG (e.g. in a newly-forked worker) with
+    rng, or a new RNG seeded with seed (None => OS entropy); return the
+    RNG replaced (None if the thread had none)
+    '''
+    previous = getattr(_LOCAL, 'rng', None)
+    _LOCAL.rng = rng if rng is not None else random.Random(seed)
+    return previous
+
+
+def randint(low, high):
+    '''random.randint() using the calling thread's RNG'''
+    return thread_rng().randint(low, high)
+
+
+def choice(seq):
+    '''random.choice() using the calling thread's RNG'''
+    return thread_rng().choice(seq)
+
+
+def distribution_summary(outcomes):
+    '''
+    Summarise discrete distribution
+
+    outcomes is a sequence of (value, weight) tuples; weights need not be
+    normalised. Returns
+    {
+        "mean": <mean value>,
+        "percentiles": {<p>: <value>, ...},
+        "table": [[<value>, <probability>], ...]
+    }
+    where <value> for percentile <p> is the smallest value whose
+    cumulative probability is at least <p>%
+    '''
+    merged = {}
+    for value, weight in outcomes:
+        merged[value] = merged.get(value, 0) + weight
+    table = sorted(merged.items())
+    total = float(sum(merged.values()))
+
+    mean = sum(value * weight for value, weight in table) / total
+    percentiles = {}
+    cumulative = 0
+    indx = 0
+    for percentile in PERCENTILES:
+        while (cumulative + table[indx][1]) * 100 < percentile * total:
+            cumulative += table[indx][1]
+            indx += 1
+        percentiles[str(percentile)] = table[indx][0]
+    return {
+        'mean': round(mean, 3),
+        'percentiles': percentiles,
+        'table': [
+            [value, round(weight / total, 6)] for value, weight in table]
+    }
+
+
+def sample_summary(values):
+    '''
+    Summarise list of sampled values
+
+    Returns
+    {
+        "mean": <mean value>,
+        "stdev": <population standard deviation>,
+        "min": <minimum value>,
+        "max": <maximum value>,
+        "percentiles": {<p>: <value>, ...}
+    }
+    using the same percentile definition as distribution_summary()
+    '''
+    values = sorted(values)
+    count = len(values)
+    mean = sum(values) / float(count)
+    variance = sum((value - mean) ** 2 for value in values) / count
+    return {
+        'mean': round(mean, 3),
+        'stdev': round(variance ** 0.5, 3),
+        'min': values[0],
+        'max': values[-1],
+        'percentiles': {
+            str(percentile): values[
+                max(0, -(-percentile * count // 100) - 1)]
+            for percentile in PERCENTILES
+        }
+    }
+
+
+def not_modified(req, resp, etag, max_age=86400):
+    '''
+    Set ETag, Cache-Control headers for cacheable response; return True
+    (with status 304 Not Modified set) if request If-None-Match matches
+    '''
+    resp.set_header('ETag', etag)
+    resp.set_header('Cache-Control', 'public, max-age={}'.format(max_age))
+    if_none_match = req.get_header('If-None-Match') or ''
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or \
+            if_none_match.strip() == '*':
+        resp.status = falcon.HTTP_304
+        return True
+    return False
 
 
 class RestQuery(object):
-    '''REST queries'''
+    '''REST queries (pooled, with timeouts, retries, circuit breaker)'''
     @staticmethod
     def get(url, params=None):
         '''GET'''
         if isinstance(params, dict):
-            resp = requests.get(url, params=params)
+            resp = HTTP_CLIENT.get(url, params=params)
         else:
-            resp = requests.get(url)
+            resp = HTTP_CLIENT.get(url)
         return resp
 
 
 # @staticmethod
 def parse_query_string(query_string='', valid_query_parameters={}):
-    '''Parse query string, return query_parameters dict'''
-    query_parameters = valid_query_parameters
+    '''Parse query string, return new query_parameters dict'''
+    query_parameters = {
+        param: list(value) if isinstance(value, list) else value
+        for param, value in valid_query_parameters.items()
+    }
     if query_string != '':
         options_list = query_string.split('&')
         for option in options_list:
@@ -44,41 +169,63 @@ def parse_query_string(query_string='', valid_query_parameters={}):
 class RequestProcessor(object):
     '''Request processor'''
 
+    # List parameters where repeated values are significant (not deduped)
+    repeatable_parameters = ()
+
     def __init__(self):
         self.query_parameters = {}
 
     def parse_query_string(self, query_string=''):
-        '''Process query string (from req)'''
-        # self.query_parameters = valid_query_parameters
+        '''
+        Process query string (from req), storing the result in
+        self.query_parameters. Resources are shared between concurrent
+        requests, so they use parse_query() instead
+        '''
+        self.query_parameters = self.parse_query(
+            query_string, self.query_parameters)
+
+    def parse_query(self, query_string, valid_query_parameters):
+        '''
+        Parse query string, return new query_parameters dict
+
+        valid_query_parameters maps each parameter to its default value
+        (list => parameter may be repeated, bool => true/false). Neither
+        valid_query_parameters nor self is modified
+        '''
+        query_parameters = {
+            param: list(value) if isinstance(value, list) else value
+            for param, value in valid_query_parameters.items()
+        }
         if query_string != '':
             options_list = query_string.split('&')
             for option in options_list:
                 param, value = option.split('=')
-                if param in self.query_parameters:
-                    if isinstance(self.query_parameters[param], list):
-                        self.query_parameters[param].append(value)
-                    elif isinstance(self.query_parameters[param], bool):
+                if param in query_parameters:
+                    if isinstance(query_parameters[param], list):
+                        query_parameters[param].append(value)
+                    elif isinstance(query_parameters[param], bool):
                         if str(value).lower() == 'true':
-                            self.query_parameters[param] = True
+                            query_parameters[param] = True
                         else:
-                            self.query_parameters[param] = False
+                            query_parameters[param] = False
                     else:
-                        self.query_parameters[param] = value
+                        query_parameters[param] = value
                 else:
                     raise falcon.HTTPError(
                         title='Invalid parameter',
                         status='400 Invalid parameter',
                         description='Invalid parameter "{}"'.format(param))
-            self._dedupe_list()
-
-
-    def _dedupe_list(self):
-        '''Dedupe list parameter'''
-        for param in self.query_parameters:
-            if isinstance(self.query_parameters[param], list):
-                t_set = set(self.query_parameters[param])
-                self.query_parameters[param] = list(t_set)
+            self._dedupe_list(query_parameters)
+        return query_parameters
 
+    def _dedupe_list(self, query_parameters):
+        '''Dedupe list parameter (preserving order)'''
+        for param in query_parameters:
+            if param in self.repeatable_parameters:
+                continue
+            if isinstance(query_parameters[param], list):
+                query_parameters[param] = list(
+                    OrderedDict.fromkeys(query_parameters[param]))
 
     def get_doc(self, req):
         '''Return class doc, replace <apiserver> with server prefix'''
@@ -0,0 +1,230 @@
+'''warmup.py'''
+
+import os
+import json
+import time
+import logging
+import threading
+import falcon
+from falcon import testing
+from traveller_api.util import RequestProcessor
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.INFO)
+
+# sync => warm up before serving (gunicorn hooks), background => warm up
+# in a thread (/ready reports 503 until done), off => no warm-up
+WARMUP = os.environ.get('WARMUP', 'sync')
+# Header marking warm-up requests (not counted in request metrics)
+WARMUP_HEADER = 'X-Warm-Up'
+
+# One request per route (path, query string)
+WARMUP_REQUESTS = [
+    ('/ping', ''),
+    ('/api_version', ''),
+    ('/misc/angdia', 'distance=4&diameter=3'),
+    ('/misc/starcolor', 'code=G2V'),
+    ('/misc/starcolor/batch', 'code=G2V&code=M0V'),
+    ('/misc/starcolor/palette', ''),
+    ('/ct/lbb6/star', 'code=G2%20V'),
+    ('/ct/lbb6/star/orbits', 'code=G2%20V'),
+    ('/ct/lbb6/orbit', 'orbit_no=3'),
+    ('/ct/lbb6/planet', 'uwp=A867949-C'),
+    ('/ct/lbb6/planet/temperature', 'uwp=A867949-C&star=G2%20V'),
+    ('/ct/lbb6/planet/placement',
+     'uwp=A867949-C&min_temp=270&max_temp=300&limit=1'),
+    ('/ct/lbb6/planet/generate', 'count=1&seed=1'),
+    ('/ct/lbb6/catalogue', ''),
+    ('/ct/lbb6/system', 'uwp=A867949-C'),
+    ('/mt/wbh/star', 'code=G2%20V'),
+    ('/mt/wbh/star/batch', 'code=G2V'),
+    ('/mt/wbh/star/G2 V/orbit/3', ''),
+    ('/t5/cargogen', 'source_uwp=A867949-C&market_uwp=B560A87-D'),
+    ('/t5/cargogen/matrix', 'uwp=A867949-C&uwp=B560A87-D'),
+    ('/ct/lbb2/cargogen/purchase', 'source_uwp=A867949-C'),
+    ('/ct/lbb2/cargogen/sale', 'cargo=11&quantity=10&market_uwp=B560A87-D'),
+    ('/ct/lbb2/cargogen/market', 'market_uwp=B560A87-D'),
+    ('/ct/lbb2/cargogen/simulate',
+     'route=A867949-C&route=B560A87-D&runs=10&seed=1'),
+    ('/t5/orbit', 'orbit_number=3'),
+    ('/t5/orbit/batch', 'orbit_number=1&orbit_number=2'),
+    ('/t5/orbit/inverse', 'au=1'),
+    ('/ct/lbb3/encounter', 'terrain=Clear&uwp=A867949-C')
+]
+
+
+class WarmupState(object):
+    '''Warm-up progress (one per process; inherited across fork())'''
+
+    def __init__(self):
+        self.status = 'pending'
+        self.started = None
+        self.duration = None
+        self.routes = {}
+        self.error = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        '''Mark warm-up started; False if already started'''
+        with self._lock:
+            if self.status not in ('pending', 'failed'):
+                return False
+            self.status = 'running'
+            self.started = time.time()
+            self.duration = None
+            self.routes = {}
+            self.error = None
+            return True
+
+    def finish(self, routes, error=None):
+        '''Record warm-up result'''
+        with self._lock:
+            self.routes = dict(routes)
+            self.error = error
+            self.duration = round(time.time() - self.started, 3)
+            failed = error is not None or any(
+                not status.startswith(('2', '3'))
+                for status in routes.values())
+            self.status = 'failed' if failed else 'ready'
+
+    @property
+    def ready(self):
+        '''True if warm-up finished (or is disabled)'''
+        return self.status in ('ready', 'off')
+
+    def dict(self):
+        '''dict() representation'''
+        with self._lock:
+            return {
+                'status': self.status,
+                'warmup_seconds': self.duration,
+                'routes': dict(self.routes),
+                'error': self.error
+            }
+
+
+STATE = WarmupState()
+
+
+def cache_states():
+    '''Entries, hits and misses of the static data and response caches'''
+    # pragma pylint: disable=C0415
+    from traveller_api.cache import get_cache
+    from traveller_api.ct.lbb6.catalogue import load_catalogue
+    from traveller_api.mt.wbh.catalogue import load_catalogue as load_wbh
+    from traveller_api.misc.palette import load_palette
+    from traveller_api.starcode import parse_star_code
+    from traveller_api.ct.lbb2.cargogen import cargo
+    from traveller_api.t5.cargogen import trade_cargo
+
+    states = {}
+    for name, func in (
+            ('ct_lbb6_catalogue', load_catalogue),
+            ('mt_wbh_catalogue', load_wbh),
+            ('star_colour_palette', load_palette),
+            ('star_codes', parse_star_code),
+            ('ct_lbb2_actual_value', cargo.actual_value_distribution),
+            ('t5_actual_value', trade_cargo.actual_value_distribution)):
+        info = func.cache_info()
+        states[name] = {
+            'entries': info.currsize,
+            'hits': info.hits,
+            'misses': info.misses
+        }
+    response_cache = get_cache()
+    states['responses'] = response_cache.stats()
+    states['responses']['entries'] = len(response_cache)
+    return states
+
+
+def warm_up(state=STATE):
+    '''
+    Build static data (see preload.build_static_data()), then make one
+    request to each route (WARMUP_REQUESTS); returns state
+    '''
+    # pragma pylint: disable=C0415
+    if not state.start():
+        return state
+    routes = {}
+    try:
+        from traveller_api.preload import build_static_data
+        from traveller_api.app import api
+        build_static_data()
+        for path, query_string in WARMUP_REQUESTS:
+            resp = testing.simulate_get(
+                api, path, query_string=query_string,
+                headers={WARMUP_HEADER: 'true'})
+            routes[path] = resp.status
+            if not resp.status.startswith(('2', '3')):
+                LOGGER.warning(
+                    'Warm-up request %s?%s returned %s',
+                    path, query_string, resp.status)
+    except Exception as err:    # pylint: disable=W0703
+        LOGGER.exception('Warm-up failed')
+        state.finish(routes, repr(err))
+        return state
+    state.finish(routes)
+    LOGGER.info(
+        'Warm-up %s in %ss (%s routes)',
+        state.status, state.duration, len(routes))
+    return state
+
+
+def start(mode=WARMUP, state=STATE):
+    '''Warm up per mode (sync, background or off)'''
+    if mode == 'off':
+        state.status = 'off'
+    elif mode == 'background':
+        thread = threading.Thread(target=warm_up, args=(state,))
+        thread.daemon = True
+        thread.start()
+    else:
+        warm_up(state)
+
+
+class Ready(RequestProcessor):
+    '''
+    GET /ready
+
+    Returns 200 once this worker has warmed up (503 before then, or if
+    warm-up failed):
+    {
+        "ready": <true|false>,
+        "status": <pending|running|ready|failed|off>,
+        "warmup_seconds": <warm-up duration>,
+        "routes": {<path>: <warm-up response status>, ...},
+        "error": <warm-up error>,
+        "caches": {
+            <cache>: {"entries": <n>, "hits": <n>, "misses": <n>},
+            ...
+            "responses": {"backend": <backend>, "entries": <n>,
+                          "hits": <n>, "misses": <n>,
+                          "hit_ratio": <ratio>}
+        },
+        "pid": <worker process ID>
+    }
+
+    If no warm-up has started (e.g. the app is not run with the
+    gunicorn hooks) or warm-up failed, a request to /ready starts one in
+    the background
+    '''
+
+    def __init__(self, state=STATE, mode=WARMUP):
+        super().__init__()
+        self.state = state
+        self.mode = mode
+
+    def on_get(self, req, resp):
+        '''GET /ready'''
+        if self.state.status in ('pending', 'failed'):
+            start('background' if self.mode != 'off' else 'off', self.state)
+        doc = self.state.dict()
+        doc['ready'] = self.state.ready
+        doc['caches'] = cache_states()
+        doc['pid'] = os.getpid()
+        resp.body = json.dumps(doc, sort_keys=True)
+        if self.state.ready:
+            resp.status = falcon.HTTP_200
+        else:
+            resp.status = falcon.HTTP_503
+            resp.set_header('Retry-After', '1')